@@ -104,91 +104,148 @@ src_path = os.path.join(base_path, 'src')
 if src_path not in sys.path:
     sys.path.insert(0, src_path)
 
+# --profile-startup: misura import e inizializzazione fino alla prima
+# iterazione del ciclo eventi, stampa il report ed esce.
+PROFILE_STARTUP = "--profile-startup" in sys.argv
+if PROFILE_STARTUP:
+    sys.argv.remove("--profile-startup")
+    from src.utils import startup_profiler
+    startup_profiler.start()
+
+
+def _finish_startup_profile(app):
+    """Chiude il profilo di avvio: report su console e nel log, poi esce."""
+    from src.utils import startup_profiler
+
+    profiler = startup_profiler.stop()
+    report = profiler.report()
+    logging.getLogger("StartupProfiler").info("\n" + report)
+    # stdout è rediretto sul logger: il report va anche sulla console reale
+    if sys.__stdout__ is not None:
+        sys.__stdout__.write(report + "\n")
+        sys.__stdout__.flush()
+    app.quit()
+
+
 def main():
     """Main entry point."""
+    from src.utils.startup_profiler import phase
+
     # Import PyQt6 components
-    from PyQt6.QtWidgets import QApplication, QMessageBox
-    from PyQt6.QtCore import Qt
-    from PyQt6.QtGui import QFont, QIcon
-    from src.gui.styles import apply_theme
+    with phase("import PyQt6"):
+        from PyQt6.QtWidgets import QApplication, QMessageBox
+        from PyQt6.QtCore import Qt, QTimer
+        from PyQt6.QtGui import QFont, QIcon
+        from src.gui.styles import apply_theme
     
     # Create application first to allow message boxes
-    app = QApplication(sys.argv)
-    app.setStyle('Fusion')
-    apply_theme(app, "light") # Default to light theme for now
-    
-    # Set default font
-    font = QFont("Segoe UI", 10)
-    app.setFont(font)
-    
+    with phase("QApplication + tema"):
+        app = QApplication(sys.argv)
+        app.setStyle('Fusion')
+        apply_theme(app, "light") # Default to light theme for now
+
+        # Set default font
+        font = QFont("Segoe UI", 10)
+        app.setFont(font)
+
     # Set application metadata
     app.setApplicationName("Bot TS")
     app.setOrganizationName("Giancarlo Allegretti")
     app.setApplicationVersion("1.0.0")
 
     # === LICENSE CHECK FLOW ===
-    try:
-        from src.core.license_validator import get_detailed_license_status, LicenseStatus, get_hardware_id
-        from src.core.license_updater import run_update, check_emergency_grace_period
-
-        status, msg = get_detailed_license_status()
-
-        # Se la licenza non è valida, proviamo a scaricarla di nuovo
-        if status != LicenseStatus.VALID:
-            print(f"[LICENZA] Stato: {status.name} ({msg}). Tentativo aggiornamento...")
-            run_update() # Forza il download
-            status, msg = get_detailed_license_status() # Ricontrolla
-
-        # Se ancora non valida, gestiamo i casi
-        if status != LicenseStatus.VALID:
-
-            # Verifichiamo il periodo di grazia (3 giorni)
-            grace_allowed, grace_msg, days_left = check_emergency_grace_period()
-
-            hw_id = get_hardware_id()
-
-            if grace_allowed:
-                # Avviso grazia attiva
-                QMessageBox.warning(
-                    None,
-                    "Licenza non trovata - Modalità Provvisoria",
-                    f"Licenza non rilevata o non valida.\n\n"
-                    f"{grace_msg}\n\n"
-                    f"ID Hardware: {hw_id}\n\n"
-                    "Contatta l'amministratore per ottenere una licenza valida.\n"
-                    "L'applicazione continuerà a funzionare per il periodo rimanente."
-                )
-            else:
-                # Blocco totale
-                QMessageBox.critical(
-                    None,
-                    "Errore Licenza",
-                    f"Licenza non valida e periodo di prova scaduto.\n\n"
-                    f"Errore: {msg}\n"
-                    f"ID Hardware: {hw_id}\n\n"
-                    "L'applicazione verrà chiusa. Contatta l'amministratore."
-                )
-                sys.exit(1)
-
-    except Exception as e:
-        # Fallback di sicurezza in caso di crash del controllo licenza
-        # Nota: questo viene catturato qui, ma se crasha prima (es. import) interviene l'excepthook
-        QMessageBox.critical(
-            None,
-            "Errore Critico",
-            f"Impossibile verificare la licenza.\n{e}"
-        )
-        sys.exit(1)
+    # ⚡ BOLT: se l'ultimo verdetto VALID in cache è ancora utilizzabile la
+    # finestra parte subito e la validazione completa (Hardware ID, orario
+    # di rete, download licenza) gira in background.
+    with phase("controllo licenza"):
+        try:
+            from src.core import license_verdict
+
+            cached = license_verdict.load_cached_verdict()
+            if cached is None:
+                status, msg = license_verdict.revalidate()
+                if not _license_allows_start(status, msg):
+                    sys.exit(1)
+
+        except Exception as e:
+            # Fallback di sicurezza in caso di crash del controllo licenza
+            # Nota: questo viene catturato qui, ma se crasha prima (es. import) interviene l'excepthook
+            QMessageBox.critical(
+                None,
+                "Errore Critico",
+                f"Impossibile verificare la licenza.\n{e}"
+            )
+            sys.exit(1)
 
     # === START APP ===
-    from src.gui.main_window import MainWindow
-    
-    window = MainWindow()
-    window.showMaximized()
-    
+    with phase("import MainWindow"):
+        from src.gui.main_window import MainWindow
+
+    with phase("MainWindow()"):
+        window = MainWindow()
+    with phase("showMaximized"):
+        window.showMaximized()
+
+    if cached is not None:
+        revalidator = license_verdict.LicenseRevalidator()
+
+        def _on_revalidated(status, msg):
+            # Il verdetto in cache era VALID: si interrompe l'utente solo se cambia
+            if not _license_allows_start(status, msg, window):
+                app.exit(1)
+
+        revalidator.finished_signal.connect(_on_revalidated)
+        revalidator.start()
+
+    if PROFILE_STARTUP:
+        # Primo giro del ciclo eventi = finestra dipinta e reattiva
+        QTimer.singleShot(0, lambda: _finish_startup_profile(app))
+
     # Run event loop
     sys.exit(app.exec())
 
 
+def _license_allows_start(status, msg, parent=None) -> bool:
+    """
+    Gestisce una licenza non valida: periodo di grazia (avviso) oppure
+    blocco. Ritorna False se l'applicazione deve chiudersi.
+    """
+    from PyQt6.QtWidgets import QMessageBox
+    from src.core.license_validator import LicenseStatus, get_hardware_id
+    from src.core.license_updater import check_emergency_grace_period
+
+    if status == LicenseStatus.VALID:
+        return True
+
+    # Verifichiamo il periodo di grazia (3 giorni)
+    grace_allowed, grace_msg, days_left = check_emergency_grace_period()
+
+    hw_id = get_hardware_id()
+
+    if grace_allowed:
+        # Avviso grazia attiva
+        QMessageBox.warning(
+            parent,
+            "Licenza non trovata - Modalità Provvisoria",
+            f"Licenza non rilevata o non valida.\n\n"
+            f"{grace_msg}\n\n"
+            f"ID Hardware: {hw_id}\n\n"
+            "Contatta l'amministratore per ottenere una licenza valida.\n"
+            "L'applicazione continuerà a funzionare per il periodo rimanente."
+        )
+        return True
+
+    # Blocco totale
+    QMessageBox.critical(
+        parent,
+        "Errore Licenza",
+        f"Licenza non valida e periodo di prova scaduto.\n\n"
+        f"Errore: {msg}\n"
+        f"ID Hardware: {hw_id}\n\n"
+        "L'applicazione verrà chiusa. Contatta l'amministratore."
+    )
+    return False
+
+
 if __name__ == "__main__":
     main()
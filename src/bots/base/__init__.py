@@ -2,5 +2,6 @@
 Bot TS - Base Bot Module
 """
 from src.bots.base.base_bot import BaseBot, BotStatus
+from src.bots.base.session_pool import SessionPool, session_pool
 
-__all__ = ['BaseBot', 'BotStatus']
+__all__ = ['BaseBot', 'BotStatus', 'SessionPool', 'session_pool']
@@ -4,7 +4,7 @@ Classe base astratta per tutti i bot di automazione.
 """
 import os
 import time
-import shutil
+from contextlib import contextmanager
 from abc import ABC, abstractmethod
 from typing import Optional, Callable, List, Dict, Any
 from pathlib import Path
@@ -21,13 +21,20 @@ from selenium.common.exceptions import (
     TimeoutException, 
     NoSuchElementException,
     ElementClickInterceptedException,
-    StaleElementReferenceException
+    StaleElementReferenceException,
+    SessionNotCreatedException
 )
-from webdriver_manager.chrome import ChromeDriverManager
 
 from src.core.constants import URLs, Timeouts, BotStatus, BrowserConfig
 from src.core import config_manager
 from src.bots.common.locators import LoginLocators, CommonLocators
+from src.bots.common.downloads import download_root
+from src.bots.common import resource_blocking, tracing, waits
+from src.bots.common.tracing import traced
+from src.bots.common.waits import TimedWait
+from src.core.stats_manager import StatsManager
+from src.bots.base.session_pool import session_pool
+from src.bots.base.driver_resolver import resolve_chromedriver, invalidate_cache
 
 class BaseBot(ABC):
     """
@@ -43,6 +50,22 @@ class BaseBot(ABC):
     """
     
     ISAB_URL = URLs.ISAB_PORTAL
+
+    # True quando il browser è autenticato e può tornare al pool a fine run
+    _session_reusable = False
+
+    # Esecuzione parallela (ParallelRunner): ogni worker ha profilo Chrome e
+    # cartella download propri, così i browser non si contendono i file
+    worker_id: Optional[str] = None
+    browser_download_dir: Optional[Path] = None
+    # Eventi Network.* nel log "performance" (cattura richieste, es. export HTTP)
+    log_network_events = False
+    # Bilancio attesa/azione e trace dei passi dell'ultima run
+    # (src.bots.common.waits.WaitStats, src.bots.common.tracing.Tracer)
+    last_wait_stats = None
+    last_trace = None
+    # Notifica di ogni esito di riga appena registrato (checkpoint della coda lavori)
+    _row_callback: Optional[Callable[[Dict[str, Any]], None]] = None
     
     def __init__(
         self,
@@ -76,6 +99,8 @@ class BaseBot(ABC):
         self._stop_requested = False
         self._log_callback: Optional[Callable[[str], None]] = None
         self._input_callback: Optional[Callable[[str], str]] = None
+        # Esito per riga dell'ultima run() (vedi _record_row)
+        self.row_results: List[Dict[str, Any]] = []
     
     @property
     @abstractmethod
@@ -96,6 +121,10 @@ class BaseBot(ABC):
     def set_input_callback(self, callback: Callable[[str], str]):
         """Set the input callback for user interaction."""
         self._input_callback = callback
+
+    def set_row_callback(self, callback: Callable[[Dict[str, Any]], None]):
+        """Callback chiamata con l'esito di ogni riga appena completata (vedi _record_row)."""
+        self._row_callback = callback
     
     def log(self, message: str):
         """Log a message."""
@@ -120,6 +149,7 @@ class BaseBot(ABC):
         if self._stop_requested:
             raise InterruptedError("Bot interrotto dall'utente")
     
+    @traced("avvio browser")
     def _init_driver(self):
         """Initialize Chrome driver with optimized configuration."""
         self.log("Inizializzazione browser...")
@@ -170,6 +200,12 @@ class BaseBot(ABC):
         # --- 4. CACHING & PERSISTENT PROFILE ---
         # Use user config directory to ensure write permissions (fixes Program Files issue)
         profile_dir = config_manager.CONFIG_DIR / "data" / BrowserConfig.CACHE_DIR_NAME
+        if session_pool.enabled() or self.worker_id:
+            # Un profilo per account (e per worker): Chrome non condivide
+            # user-data-dir tra istanze aperte contemporaneamente
+            account = "".join(c if c.isalnum() else "_" for c in self.username) or "default"
+            suffix = f"{account}_{self.worker_id}" if self.worker_id else account
+            profile_dir = profile_dir.with_name(f"{BrowserConfig.CACHE_DIR_NAME}_{suffix}")
         options.add_argument(f"user-data-dir={profile_dir}")
         self.log(f"Cache profilo attiva: {profile_dir}")
 
@@ -190,91 +226,133 @@ class BaseBot(ABC):
             "browser.download.manager.showWhenStarting": False,
             "download.manager.showWhenStarting": False,
         }
+        prefs["download.default_directory"] = str(self._downloads_dir())
+        if resource_blocking.blocks_images(resource_blocking.profile_from_config()):
+            prefs["profile.managed_default_content_settings.images"] = 2
 
         options.add_argument("--safebrowsing-disable-download-protection")
         options.add_argument("--safebrowsing-disable-extension-blacklist")
         options.add_experimental_option("prefs", prefs)
+
+        # Eventi CDP di download (Page.download*) leggibili da DownloadManager;
+        # gli eventi di rete solo se il bot li usa (il buffer di chromedriver resta piccolo)
+        options.set_capability("goog:loggingPrefs", {"performance": "ALL"})
+        options.add_experimental_option(
+            "perfLoggingPrefs", {"enableNetwork": bool(self.log_network_events), "enablePage": True}
+        )
         
-        # --- 6. DRIVER INSTALLATION (Robust handling for WinError 193) ---
-        driver_path = None
+        # --- 6. DRIVER RESOLUTION ---
+        # ⚡ BOLT: driver in cache locale, rete solo al cambio di major di Chrome
+        driver_path = resolve_chromedriver(self.log)
         try:
-            driver_path = ChromeDriverManager().install()
-
-            # --- FIX FOR BAD WEBDRIVER PATH (THIRD_PARTY_NOTICES) ---
-            path_obj = Path(driver_path)
-            if not driver_path.lower().endswith(".exe"):
-                # Silent fix attempt first
-                potential_exe = list(path_obj.parent.rglob("chromedriver.exe"))
-                if potential_exe:
-                    driver_path = str(potential_exe[0])
-                else:
-                    self.log(f"⚠️ Path driver anomalo: {driver_path} (Eseguibile non trovato)")
-
-            # Silent success unless debug needed
-            # self.log(f"Driver installato in: {driver_path}")
-
-        except Exception as e:
-            # WinError 193 means corrupted binary or arch mismatch
-            if "WinError 193" in str(e) or "valid Win32" in str(e):
-                self.log("⚠️ Rilevato driver corrotto (WinError 193). Tento pulizia forzata...")
-
-                try:
-                    wdm_root = Path.home() / ".wdm"
-                    if wdm_root.exists():
-                        self.log(f"Eliminazione cache driver: {wdm_root}")
-                        shutil.rmtree(wdm_root, ignore_errors=True)
-                        self.log("Cache eliminata. Riprovo download...")
-
-                        time.sleep(2)
-                        driver_path = ChromeDriverManager().install()
-
-                        path_obj = Path(driver_path)
-                        if not driver_path.lower().endswith(".exe"):
-                            potential_exe = list(path_obj.parent.rglob("chromedriver.exe"))
-                            if potential_exe:
-                                driver_path = str(potential_exe[0])
-
-                        self.log(f"Driver reinstallato con successo: {driver_path}")
-                except Exception as cleanup_error:
-                    self.log(f"❌ Impossibile pulire/reinstallare driver: {cleanup_error}")
-                    raise e
-            else:
-                self.log(f"❌ Errore installazione driver: {e}")
-                raise e
-
-        # Initialize Service
-        service = Service(driver_path)
-        self.driver = webdriver.Chrome(service=service, options=options)
+            self.driver = webdriver.Chrome(service=Service(driver_path), options=options)
+        except SessionNotCreatedException:
+            # Il driver in cache non corrisponde più a Chrome: nuova risoluzione
+            self.log("⚠️ Driver non compatibile con Chrome installato. Aggiorno il driver...")
+            invalidate_cache()
+            driver_path = resolve_chromedriver(self.log, force=True)
+            self.driver = webdriver.Chrome(service=Service(driver_path), options=options)
         
         # Remove webdriver flag (JS side)
         self.driver.execute_cdp_cmd(
             "Page.addScriptToEvaluateOnNewDocument",
             {"source": "Object.defineProperty(navigator, 'webdriver', {get: () => undefined})"}
         )
+
+        self._apply_download_dir()
+        self._apply_resource_blocking()
         
-        # Setup waits
-        self.wait = WebDriverWait(self.driver, self.timeout)
-        self.popup_wait = WebDriverWait(self.driver, Timeouts.SHORT)
-        self.long_wait = WebDriverWait(self.driver, Timeouts.PAGE_LOAD)
+        self._setup_waits()
         
         self.log("✓ Browser inizializzato (Modalità Silenziosa)")
+
+    def _setup_waits(self):
+        """Crea le attese esplicite per il driver corrente."""
+        self.wait = TimedWait(self.driver, self.timeout)
+        self.popup_wait = TimedWait(self.driver, Timeouts.SHORT)
+        self.long_wait = TimedWait(self.driver, Timeouts.PAGE_LOAD)
+
+    def _apply_download_dir(self):
+        """Cartella download del bot sul browser (anche su una sessione ripresa dal pool)."""
+        # In headless la preferenza non basta: la cartella va impostata via CDP
+        try:
+            self._downloads_dir().mkdir(parents=True, exist_ok=True)
+            self.driver.execute_cdp_cmd(
+                "Browser.setDownloadBehavior",
+                {"behavior": "allow", "downloadPath": str(self._downloads_dir())}
+            )
+        except Exception:
+            pass
+
+    def _apply_resource_blocking(self):
+        """
+        ⚡ BOLT: blocca tracker (e, secondo il profilo in configurazione,
+        immagini, media e font); i pattern che toccherebbero script ExtJS,
+        chiamate dati o export vengono scartati da blocked_patterns.
+        """
+        profile = resource_blocking.profile_from_config()
+        patterns = resource_blocking.blocked_patterns(
+            profile,
+            config_manager.get_config_value("resource_blocking_extra", []),
+            config_manager.get_config_value("resource_blocking_allow", []),
+        )
+        with self.span("blocco risorse", profilo=profile, pattern=len(patterns)) as span:
+            if not resource_blocking.apply(self.driver, patterns):
+                span.fail("non supportato")
+                self.log("⚠️ Blocco risorse non disponibile su questo browser.")
+
+    def _resume_session(self) -> bool:
+        """
+        Riporta una sessione del pool sulla home del portale e verifica che
+        sia ancora autenticata (health check prima del riuso).
+        """
+        try:
+            if not self.headless:
+                self.driver.maximize_window()
+            # Profilo di blocco e cartella download possono essere cambiati da
+            # quando il browser è nel pool (es. sessione ripresa da un worker parallelo)
+            self._apply_download_dir()
+            self._apply_resource_blocking()
+            self.driver.get(self.ISAB_URL)
+            self._attendi_scomparsa_overlay(timeout_secondi=10)
+            if not self._verify_logged_in_via_ui():
+                return False
+            self.status = BotStatus.LOGGING_IN
+            self.log("✓ Sessione attiva riutilizzata (skip avvio browser e login).")
+            return True
+        except Exception:
+            return False
     
+    def _downloads_dir(self) -> Path:
+        """Cartella base dei download del browser (i job usano sottocartelle dedicate)."""
+        return Path(self.browser_download_dir) if self.browser_download_dir else download_root(self.worker_id)
+
+    def _record_row(self, index: int, ok: bool, message: str = "", output: Optional[str] = None,
+                    retry: bool = True):
+        """
+        Registra l'esito di una riga (1-based) dell'ultima run(), con l'eventuale
+        file prodotto. `retry=False` per errori che un nuovo tentativo non risolve
+        (es. dati della riga mancanti).
+        """
+        result = {"index": index, "ok": ok, "message": message, "output": output, "retry": retry}
+        self.row_results.append(result)
+        if self._row_callback:
+            try:
+                self._row_callback(result)
+            except Exception as e:
+                self.log(f"⚠️ Checkpoint riga {index} non salvato: {e}")
+
     def _attendi_scomparsa_overlay(self, timeout_secondi: int = Timeouts.OVERLAY) -> bool:
         """
         Waits for Ext JS loading overlays to disappear.
         """
-        try:
-            overlay_wait = WebDriverWait(self.driver, timeout_secondi)
-            # Combine selectors for efficiency
-            xpath_combined = f"{CommonLocators.LOADING_MASK[1]} | {CommonLocators.LOADING_TEXT[1]}"
-            
-            overlay_wait.until(EC.invisibility_of_element_located((By.XPATH, xpath_combined)))
+        # ⚡ BOLT: niente pausa fissa dopo l'overlay: si attende che ExtJS sia
+        # davvero inattivo (maschere, richieste Ajax, animazioni)
+        if waits.wait_idle(self.driver, timeout_secondi, label="overlay"):
             self.log(" -> Overlay di caricamento scomparso.")
-            time.sleep(0.3)
             return True
-        except TimeoutException:
-            self.log(f"⚠ Timeout ({timeout_secondi}s) attesa overlay. Proseguo con cautela.")
-            return False
+        self.log(f"⚠ Timeout ({timeout_secondi}s) attesa overlay. Proseguo con cautela.")
+        return False
     
     def _perform_login_form_action(self):
         """Fills login form and clicks Enter."""
@@ -305,6 +383,7 @@ class BaseBot(ABC):
         self.log("Login effettuato. Attendo scomparsa overlay...")
         self._attendi_scomparsa_overlay(Timeouts.LONG)
 
+    @traced("login")
     def _login(self) -> bool:
         """
         Performs login to ISAB portal.
@@ -327,7 +406,7 @@ class BaseBot(ABC):
 
             # Check for existing session
             try:
-                WebDriverWait(self.driver, 5).until(
+                TimedWait(self.driver, 5).until(
                     EC.presence_of_element_located(LoginLocators.USERNAME_FIELD)
                 )
                 self._perform_login_form_action()
@@ -351,7 +430,8 @@ class BaseBot(ABC):
                         return False
             
             self._check_stop()
-            self._handle_session_popup()
+            if not self._handle_session_popup():
+                return False
             self._handle_ok_popup()
             
             self.log("✓ Login completato con successo")
@@ -364,15 +444,23 @@ class BaseBot(ABC):
             self.log(f"✗ Errore login: {e}")
             return False
     
-    def _handle_session_popup(self):
-        """Handles 'Active Session' popup."""
+    def _handle_session_popup(self) -> bool:
+        """
+        Handles 'Active Session' popup.
+        Un worker parallelo non subentra alla sessione: confermare chiuderebbe
+        quella di un altro browser con lo stesso account. Ritorna False in quel caso.
+        """
         try:
             si_button = self.popup_wait.until(EC.element_to_be_clickable(CommonLocators.POPUP_SESSION_YES))
-            self.log("Pop-up 'Sessione attiva' trovato. Click su 'Si'...")
-            si_button.click()
-            self._attendi_scomparsa_overlay(10)
         except TimeoutException:
-            pass
+            return True
+        if self.worker_id:
+            self.log("✗ Pop-up 'Sessione attiva': account già in uso da un'altra sessione, login annullato.")
+            return False
+        self.log("Pop-up 'Sessione attiva' trovato. Click su 'Si'...")
+        si_button.click()
+        self._attendi_scomparsa_overlay(10)
+        return True
     
     def _handle_ok_popup(self):
         """Handles generic OK popup."""
@@ -382,7 +470,7 @@ class BaseBot(ABC):
             )
             self.log("Pop-up 'OK' trovato. Click...")
             ok_button.click()
-            WebDriverWait(self.driver, 5).until(
+            TimedWait(self.driver, 5).until(
                 EC.invisibility_of_element_located(CommonLocators.POPUP_OK)
             )
             self.log("Popup gestito.")
@@ -397,13 +485,13 @@ class BaseBot(ABC):
     def _handle_unsaved_changes_popup(self):
         """Handles 'Unsaved Changes' popup."""
         try:
-            WebDriverWait(self.driver, 3).until(
+            TimedWait(self.driver, 3).until(
                 EC.presence_of_element_located(CommonLocators.POPUP_ATTENTION_HEADER)
             )
             
             self.log("Pop-up 'Attenzione - modifiche non salvate' trovato. Click su 'Si'...")
             
-            si_button = WebDriverWait(self.driver, 5).until(
+            si_button = TimedWait(self.driver, 5).until(
                 EC.element_to_be_clickable(CommonLocators.POPUP_YES_BUTTON)
             )
             
@@ -413,7 +501,7 @@ class BaseBot(ABC):
                 self.driver.execute_script("arguments[0].click();", si_button)
             
             self.log("Popup 'Attenzione' gestito - cliccato 'Si'.")
-            time.sleep(0.5)
+            waits.wait_idle(self.driver, Timeouts.SHORT, label="chiusura popup")
             return True
             
         except TimeoutException:
@@ -433,13 +521,22 @@ class BaseBot(ABC):
     def _verify_logged_in_via_ui(self) -> bool:
         """Checks for post-login UI elements."""
         try:
-            WebDriverWait(self.driver, 5).until(EC.presence_of_element_located(CommonLocators.SETTINGS_BUTTON))
+            TimedWait(self.driver, 5).until(EC.presence_of_element_located(CommonLocators.SETTINGS_BUTTON))
             return True
         except Exception:
             return False
     
+    def _keeps_session(self) -> bool:
+        """True se a fine run il browser resterà autenticato nel pool."""
+        return self._session_reusable and session_pool.enabled()
+
+    @traced("logout")
     def _logout(self) -> bool:
         """Performs logout."""
+        if self._keeps_session():
+            self.log("Logout saltato: sessione mantenuta per il prossimo bot.")
+            return True
+
         self.log("Tentativo di Logout...")
         try:
             settings_button = self.wait.until(
@@ -454,24 +551,26 @@ class BaseBot(ABC):
             logout_option.click()
             self.log("Opzione 'Esci' cliccata.")
             
-            time.sleep(1)
+            waits.wait_idle(self.driver, Timeouts.SHORT, label="logout")
             self._handle_unsaved_changes_popup()
-            time.sleep(1)
             
             # Confirm Logout (Standard 'Si' button)
             try:
-                yes_button = WebDriverWait(self.driver, 10).until(
+                yes_button = TimedWait(self.driver, 10).until(
                     EC.presence_of_element_located(CommonLocators.POPUP_SESSION_YES)
                 )
                 self.log("Pulsante 'Si' per conferma logout trovato.")
                 self.driver.execute_script("arguments[0].scrollIntoView({block: 'center'}); arguments[0].click();", yes_button)
                 self.log("Logout confermato.")
-                time.sleep(3)
+                waits.wait_optional(
+                    self.driver, EC.presence_of_element_located(LoginLocators.USERNAME_FIELD),
+                    10, label="logout"
+                )
                 
             except TimeoutException:
                 self.log("Nessun ulteriore popup di conferma logout.")
             
-            WebDriverWait(self.driver, 10).until(
+            TimedWait(self.driver, 10).until(
                 EC.url_contains(self.ISAB_URL.split("://")[1].split("/")[0])
             )
             self.log(f"✓ Logout completato. URL: {self.driver.current_url}")
@@ -481,7 +580,7 @@ class BaseBot(ABC):
             current_url = self.driver.current_url if self.driver else "N/A"
             self.log(f"⚠ Timeout durante il logout. URL attuale: {current_url}")
             try:
-                WebDriverWait(self.driver, 5).until(
+                TimedWait(self.driver, 5).until(
                     EC.presence_of_element_located(LoginLocators.USERNAME_FIELD)
                 )
                 self.log("Campo Username trovato. Logout probabilmente riuscito.")
@@ -534,8 +633,20 @@ class BaseBot(ABC):
             self.log(f"✗ Errore navigazione: {e}")
             return False
     
+    @traced("chiusura")
     def cleanup(self):
-        """Closes browser and releases resources."""
+        """Closes browser (or returns it to the session pool) and releases resources."""
+        if self.driver:
+            if self._session_reusable and session_pool.release(self):
+                self.log("Browser mantenuto aperto per il prossimo bot")
+            else:
+                self._quit_driver()
+            self.driver = None
+            self.wait = None
+        self._session_reusable = False
+
+    def _quit_driver(self):
+        """Chiude definitivamente il browser corrente."""
         if self.driver:
             try:
                 self.driver.quit()
@@ -552,11 +663,21 @@ class BaseBot(ABC):
     
     def _safe_login_with_retry(self, max_retries: int = 3) -> bool:
         """Initializes driver and login with retry mechanism."""
+        # ⚡ BOLT: prima si prova una sessione già autenticata dal pool
+        self._check_stop()
+        with self.span("sessione dal pool") as span:
+            leased = session_pool.lease(self)
+            span.set(riuso=leased)
+        if leased:
+            self._session_reusable = True
+            return True
+
         for attempt in range(1, max_retries + 1):
             self._check_stop()
             try:
                 self._init_driver()
                 if self._login():
+                    self._session_reusable = True
                     return True
 
                 self.log(f"Tentativo {attempt}/{max_retries} fallito. Riprovo tra 5 secondi...")
@@ -583,35 +704,71 @@ class BaseBot(ABC):
         except Exception:
             return ""
 
+    def span(self, name: str, **args):
+        """Span di tracing di un passo della run (vedi src.bots.common.tracing)."""
+        return tracing.span(name, **args)
+
+    @contextmanager
+    def _measured_run(self):
+        """
+        Bilancio attesa/azione (waits.WaitStats) e trace dei passi della run,
+        registrati a fine esecuzione.
+        """
+        trace_name = f"{self.name}_{self.worker_id}" if self.worker_id else self.name
+        with waits.recording() as stats, tracing.recording(trace_name) as tracer:
+            try:
+                # Profilo di blocco risorse sullo span radice: trace confrontabili
+                with tracer.span("run", blocco_risorse=resource_blocking.profile_from_config()):
+                    yield stats
+            finally:
+                self.last_wait_stats = stats
+                self.last_trace = tracer
+                self.log(stats.report())
+                self._save_trace(tracer)
+
+    def _save_trace(self, tracer: "tracing.Tracer"):
+        """Trace JSON (Chrome trace event), tabella p50/p95 nel log e durate in StatsManager."""
+        table = tracer.summary_table()
+        if table:
+            self.log(table)
+        path = tracer.write()
+        if path:
+            self.log(f"🧭 Trace della run: {path}")
+        try:
+            StatsManager().record_step_durations(self.name, tracer.summary())
+        except Exception:
+            pass
+
     def execute(self, data: List[Dict[str, Any]]) -> bool:
         """Executes full bot workflow."""
         self._stop_requested = False
         
-        try:
-            if not self._safe_login_with_retry():
-                self.status = BotStatus.ERROR
-                return False
+        with self._measured_run():
+            try:
+                if not self._safe_login_with_retry():
+                    self.status = BotStatus.ERROR
+                    return False
             
-            self.status = BotStatus.RUNNING
-            result = self.run(data)
+                self.status = BotStatus.RUNNING
+                result = self.run(data)
             
-            self.status = BotStatus.COMPLETED if result else BotStatus.ERROR
-            return result
+                self.status = BotStatus.COMPLETED if result else BotStatus.ERROR
+                return result
             
-        except InterruptedError:
-            self.log("Bot interrotto")
-            self.status = BotStatus.STOPPED
-            return False
-        except Exception as e:
-            snapshot = self._capture_error_snapshot()
-            msg = f"✗ Errore esecuzione: {e}"
-            if snapshot:
-                msg += f" [IMG:{snapshot}]"
-            self.log(msg)
-            self.status = BotStatus.ERROR
-            return False
-        finally:
-            self.cleanup()
+            except InterruptedError:
+                self.log("Bot interrotto")
+                self.status = BotStatus.STOPPED
+                return False
+            except Exception as e:
+                snapshot = self._capture_error_snapshot()
+                msg = f"✗ Errore esecuzione: {e}"
+                if snapshot:
+                    msg += f" [IMG:{snapshot}]"
+                self.log(msg)
+                self.status = BotStatus.ERROR
+                return False
+            finally:
+                self.cleanup()
     
     def execute_login_only(self) -> bool:
         """Executes only login."""
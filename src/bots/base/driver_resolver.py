@@ -0,0 +1,182 @@
+"""
+Bot TS - ChromeDriver Resolver
+Risoluzione di chromedriver con cache locale, senza rete a ogni avvio.
+
+`ChromeDriverManager().install()` interroga ogni volta il registro dei driver
+via rete. Qui si salva in CONFIG_DIR il percorso del driver risolto e la
+versione di Chrome a cui corrisponde: agli avvii successivi basta leggere la
+versione locale di Chrome (registro di Windows o `--version`) e, se la major
+non è cambiata, riusare il driver in cache. Il download avviene solo al
+cambio di major (o se il driver in cache non esiste più).
+"""
+import json
+import os
+import shutil
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Optional
+
+from src.core import config_manager
+
+CACHE_FILE = "chromedriver.json"
+
+_lock = threading.Lock()
+
+# Chiavi di registro aggiornate da Chrome a ogni update (lettura istantanea,
+# nessun processo PowerShell come in webdriver_manager)
+_CHROME_REGISTRY_KEYS = (
+    ("HKEY_CURRENT_USER", r"Software\Google\Chrome\BLBeacon", "version"),
+    ("HKEY_LOCAL_MACHINE", r"Software\Google\Chrome\BLBeacon", "version"),
+    ("HKEY_LOCAL_MACHINE",
+     r"Software\WOW6432Node\Microsoft\Windows\CurrentVersion\Uninstall\Google Chrome", "version"),
+)
+
+
+def _get_cache_path() -> Path:
+    return config_manager.CONFIG_DIR / CACHE_FILE
+
+
+def _major(version: Optional[str]) -> Optional[str]:
+    if not version:
+        return None
+    return version.split(".")[0] or None
+
+
+def get_local_chrome_version() -> Optional[str]:
+    """Versione di Chrome installata (es. '131.0.6778.86'), senza rete; None se ignota."""
+    if sys.platform == "win32":
+        try:
+            import winreg
+            for hive, path, name in _CHROME_REGISTRY_KEYS:
+                try:
+                    with winreg.OpenKey(getattr(winreg, hive), path) as key:
+                        value, _ = winreg.QueryValueEx(key, name)
+                        if value:
+                            return str(value).strip()
+                except OSError:
+                    continue
+        except ImportError:
+            pass
+
+    # Fallback: comando locale di webdriver_manager (`chrome --version` / PowerShell)
+    try:
+        from webdriver_manager.core.os_manager import OperationSystemManager, ChromeType
+        return OperationSystemManager().get_browser_version_from_os(ChromeType.GOOGLE)
+    except Exception:
+        return None
+
+
+def load_cache() -> Optional[dict]:
+    try:
+        with open(_get_cache_path(), "r", encoding="utf-8") as f:
+            data = json.load(f)
+        return data if isinstance(data, dict) else None
+    except (OSError, ValueError):
+        return None
+
+
+def save_cache(driver_path: str, browser_version: Optional[str]):
+    data = {
+        "driver_path": driver_path,
+        "browser_version": browser_version or "",
+        "browser_major": _major(browser_version) or "",
+        "resolved_at": time.strftime("%Y-%m-%d %H:%M:%S"),
+    }
+    path = _get_cache_path()
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix(".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=2)
+        os.replace(tmp_path, path)
+    except (OSError, TypeError):
+        pass
+
+
+def invalidate_cache():
+    """Dimentica il driver risolto (es. Chrome rifiuta la sessione)."""
+    try:
+        os.remove(_get_cache_path())
+    except OSError:
+        pass
+
+
+def _cached_driver(browser_version: Optional[str]) -> Optional[str]:
+    cache = load_cache()
+    if not cache:
+        return None
+    driver_path = cache.get("driver_path")
+    if not driver_path or not os.path.isfile(driver_path):
+        return None
+    # Versione locale non rilevabile: il driver in cache è la scelta migliore
+    if browser_version is None or _major(browser_version) == cache.get("browser_major"):
+        return driver_path
+    return None
+
+
+def _fix_driver_path(driver_path: str) -> str:
+    """Alcune release di webdriver_manager puntano a THIRD_PARTY_NOTICES invece dell'eseguibile."""
+    if sys.platform == "win32" and not driver_path.lower().endswith(".exe"):
+        potential_exe = list(Path(driver_path).parent.rglob("chromedriver.exe"))
+        if potential_exe:
+            return str(potential_exe[0])
+    return driver_path
+
+
+def _install(log: Callable[[str], None]) -> str:
+    """Download dal registro dei driver (robusto a WinError 193)."""
+    from webdriver_manager.chrome import ChromeDriverManager
+
+    try:
+        driver_path = _fix_driver_path(ChromeDriverManager().install())
+        if sys.platform == "win32" and not driver_path.lower().endswith(".exe"):
+            log(f"⚠️ Path driver anomalo: {driver_path} (Eseguibile non trovato)")
+        return driver_path
+    except Exception as e:
+        # WinError 193 means corrupted binary or arch mismatch
+        if "WinError 193" not in str(e) and "valid Win32" not in str(e):
+            log(f"❌ Errore installazione driver: {e}")
+            raise
+
+        log("⚠️ Rilevato driver corrotto (WinError 193). Tento pulizia forzata...")
+        try:
+            wdm_root = Path.home() / ".wdm"
+            if wdm_root.exists():
+                log(f"Eliminazione cache driver: {wdm_root}")
+                shutil.rmtree(wdm_root, ignore_errors=True)
+                log("Cache eliminata. Riprovo download...")
+            time.sleep(2)
+            driver_path = _fix_driver_path(ChromeDriverManager().install())
+            log(f"Driver reinstallato con successo: {driver_path}")
+            return driver_path
+        except Exception as cleanup_error:
+            log(f"❌ Impossibile pulire/reinstallare driver: {cleanup_error}")
+            raise e
+
+
+def resolve_chromedriver(log: Callable[[str], None] = print, force: bool = False) -> str:
+    """
+    Ritorna il percorso di chromedriver per il Chrome installato.
+
+    Usa la cache in CONFIG_DIR se la major di Chrome coincide con quella
+    registrata; altrimenti (o con force=True) scarica il driver e aggiorna
+    la cache.
+    """
+    with _lock:
+        browser_version = get_local_chrome_version()
+
+        if not force:
+            driver_path = _cached_driver(browser_version)
+            if driver_path:
+                return driver_path
+
+        cache = load_cache() or {}
+        if cache.get("browser_major") and _major(browser_version) != cache.get("browser_major"):
+            log(f"Chrome aggiornato ({cache.get('browser_major')} → {_major(browser_version)}): "
+                f"aggiorno il driver...")
+
+        driver_path = _install(log)
+        save_cache(driver_path, browser_version)
+        return driver_path
@@ -0,0 +1,263 @@
+"""
+Bot TS - Parallel Runner
+Esecuzione parallela di un bot su più browser headless.
+
+Le righe vengono distribuite (round-robin) su N worker; ogni worker è
+un'istanza del bot con account, profilo Chrome e cartella download propri,
+e segue il normale `execute()` (login -> run -> cleanup). Log ed esiti per
+riga tornano al pannello attraverso le callback del runner, che espone la
+stessa interfaccia di un bot e può quindi girare in `BotWorker`.
+
+La concorrenza è adattiva: le righe fallite vengono ritentate in un nuovo
+giro e, se il portale dà errori (login falliti, molte righe in errore),
+il numero di browser viene dimezzato prima di riprovare.
+
+I worker contemporanei non superano gli account disponibili: il portale
+ammette una sola sessione per utente (il pop-up "Sessione attiva" chiude
+l'altra), quindi due browser con lo stesso account si disconnetterebbero.
+"""
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple, Type
+
+from src.core import config_manager
+from src.core.constants import BotStatus
+from src.bots.common.downloads import download_root
+
+
+class ParallelRunner:
+    """Distribuisce le righe di un bot su più browser headless."""
+
+    MAX_ROUNDS = 3
+    # Oltre questa quota di righe fallite in un giro si riduce la concorrenza
+    ERROR_RATE_THRESHOLD = 0.25
+    # Ritardo tra l'avvio di due worker (evita raffiche di login sul portale)
+    STAGGER_SECONDS = 2.0
+    RETRY_BACKOFF_SECONDS = 5.0
+
+    def __init__(
+        self,
+        bot_class: Type,
+        accounts: List[Tuple[str, str]],
+        workers: int,
+        **bot_kwargs
+    ):
+        """
+        Args:
+            bot_class: Classe del bot (es. ScaricaTSBot)
+            accounts: Lista (username, password); i worker li usano a rotazione
+            workers: Numero massimo di browser contemporanei (al più uno per account)
+            **bot_kwargs: Parametri comuni passati a ogni istanza del bot
+        """
+        if not accounts:
+            raise ValueError("Serve almeno un account per l'esecuzione parallela")
+        self.bot_class = bot_class
+        self.accounts = list(accounts)
+        self.requested_workers = max(1, int(workers))
+        self.workers = min(self.requested_workers, len(self.accounts))
+        self.bot_kwargs = bot_kwargs
+        self.bot_kwargs["headless"] = True
+
+        self.status = BotStatus.IDLE
+        self.row_results: List[Dict[str, Any]] = []
+        self._results: Dict[int, Dict[str, Any]] = {}
+        self._active: List[Any] = []
+        self._lock = threading.Lock()
+        self._stop_requested = False
+        self._log_callback: Optional[Callable[[str], None]] = None
+        self._input_callback: Optional[Callable[[str], str]] = None
+        self._row_callback: Optional[Callable[[Dict[str, Any]], None]] = None
+
+    @property
+    def name(self) -> str:
+        return f"{self.bot_class.get_name()} (parallelo)"
+
+    # --- Interfaccia bot (BotWorker) ---
+
+    def set_log_callback(self, callback: Callable[[str], None]):
+        self._log_callback = callback
+
+    def set_input_callback(self, callback: Callable[[str], str]):
+        self._input_callback = callback
+
+    def set_row_callback(self, callback: Callable[[Dict[str, Any]], None]):
+        """Esito di ogni riga appena completata da un worker (indice globale)."""
+        self._row_callback = callback
+
+    def log(self, message: str):
+        print(f"[{self.name}] {message}")
+        if self._log_callback:
+            self._log_callback(message)
+
+    def request_stop(self):
+        self._stop_requested = True
+        self.log("⚠️ Interruzione richiesta...")
+        with self._lock:
+            bots = list(self._active)
+        for bot in bots:
+            bot.request_stop()
+
+    def execute(self, data) -> bool:
+        """Esegue tutte le righe in parallelo; True se tutte hanno successo."""
+        self._stop_requested = False
+        self._results = {}
+        self.status = BotStatus.RUNNING
+
+        if isinstance(data, dict):
+            rows = data.get("rows", [])
+            params = {k: v for k, v in data.items() if k != "rows"}
+        else:
+            rows, params = data, {}
+
+        if not rows:
+            self.status = BotStatus.COMPLETED
+            return True
+
+        start = time.monotonic()
+        pending = list(enumerate(rows, 1))
+        if self.workers < self.requested_workers:
+            self.log(f"ℹ️ {self.requested_workers} browser richiesti ma {len(self.accounts)} account: "
+                     f"al più {self.workers} browser (una sessione per account)")
+        concurrency = min(self.workers, len(pending))
+
+        for round_no in range(1, self.MAX_ROUNDS + 1):
+            if not pending or self._stop_requested:
+                break
+            concurrency = min(concurrency, len(pending))
+            self.log(f"🚀 Giro {round_no}: {len(pending)} righe su {concurrency} browser paralleli")
+
+            portal_errors = self._run_round(pending, concurrency, params)
+            # Le righe con errori definitivi (retry=False) non vengono ritentate
+            failed = [(i, row) for i, row in pending
+                      if not self._results.get(i, {}).get("ok") and self._results.get(i, {}).get("retry", True)]
+
+            if not failed or self._stop_requested or round_no == self.MAX_ROUNDS:
+                pending = failed
+                break
+
+            # ⚡ BOLT: concorrenza adattiva agli errori del portale
+            if portal_errors or len(failed) > len(pending) * self.ERROR_RATE_THRESHOLD:
+                concurrency = max(1, concurrency // 2)
+            self.log(f"🔁 {len(failed)} righe da ritentare con {min(concurrency, len(failed))} browser "
+                     f"tra {self.RETRY_BACKOFF_SECONDS * round_no:.0f}s...")
+            if not self._sleep(self.RETRY_BACKOFF_SECONDS * round_no):
+                break
+            pending = failed
+
+        self.row_results = [
+            {"index": i, "row": row, **self._results.get(i, {"ok": False, "message": "Non elaborata"})}
+            for i, row in enumerate(rows, 1)
+        ]
+        ok_count = sum(1 for r in self.row_results if r["ok"])
+        self.log(f"✨ Parallelo: {ok_count}/{len(rows)} righe completate in "
+                 f"{time.monotonic() - start:.0f}s.")
+        for result in self.row_results:
+            if not result["ok"]:
+                self.log(f"  ❌ Riga {result['index']}: {result['message']}")
+
+        if self._stop_requested:
+            self.status = BotStatus.STOPPED
+            return False
+        success = ok_count == len(rows)
+        self.status = BotStatus.COMPLETED if success else BotStatus.ERROR
+        return success
+
+    # --- Worker ---
+
+    def _run_round(self, pending: List[Tuple[int, Any]], concurrency: int, params: Dict) -> int:
+        """Esegue un giro; ritorna il numero di worker falliti senza elaborare righe."""
+        shards = [pending[w::concurrency] for w in range(concurrency)]
+        portal_errors = [0]
+        threads = []
+
+        for worker_no, shard in enumerate(shards, 1):
+            if worker_no > 1 and not self._sleep(self.STAGGER_SECONDS):
+                break
+            thread = threading.Thread(
+                target=self._run_shard,
+                args=(worker_no, shard, params, portal_errors),
+                name=f"parallel-worker-{worker_no}",
+                daemon=True,
+            )
+            thread.start()
+            threads.append(thread)
+
+        for thread in threads:
+            thread.join()
+        return portal_errors[0]
+
+    def _run_shard(self, worker_no: int, shard: List[Tuple[int, Any]], params: Dict, portal_errors: List[int]):
+        username, password = self.accounts[(worker_no - 1) % len(self.accounts)]
+        prefix = f"[W{worker_no}]"
+
+        bot = self.bot_class(username=username, password=password, **self.bot_kwargs)
+        bot.worker_id = f"w{worker_no}"
+        bot.browser_download_dir = self._worker_download_dir(bot.worker_id)
+        bot.set_log_callback(lambda message: self.log(f"{prefix} {message}"))
+        bot.set_row_callback(lambda result: self._on_row(shard, result))
+        if self._input_callback:
+            bot.set_input_callback(self._input_callback)
+
+        with self._lock:
+            self._active.append(bot)
+        try:
+            if self._stop_requested:
+                return
+            bot.execute({**params, "rows": [row for _, row in shard]})
+        except Exception as e:
+            self.log(f"{prefix} ✗ Errore worker: {e}")
+        finally:
+            with self._lock:
+                self._active.remove(bot)
+
+        # Gli esiti arrivano riga per riga (_on_row): un worker senza esiti
+        # non è riuscito nemmeno ad arrivare alle righe
+        if not getattr(bot, "row_results", []):
+            with self._lock:
+                portal_errors[0] += 1
+
+    def _on_row(self, shard: List[Tuple[int, Any]], result: Dict[str, Any]):
+        """Esito di una riga di uno shard (indice relativo allo shard)."""
+        position = result["index"] - 1
+        if not 0 <= position < len(shard):
+            return
+        global_index = shard[position][0]
+        entry = {
+            "ok": result["ok"], "message": result.get("message", ""),
+            "output": result.get("output"), "retry": result.get("retry", True),
+        }
+        with self._lock:
+            self._results[global_index] = entry
+        if self._row_callback:
+            self._row_callback({"index": global_index, **entry})
+
+    @staticmethod
+    def _worker_download_dir(worker_id: str) -> Path:
+        path = download_root(worker_id)
+        path.mkdir(parents=True, exist_ok=True)
+        return path
+
+    def _sleep(self, seconds: float) -> bool:
+        """Attesa interrompibile; False se è stato richiesto lo stop."""
+        deadline = time.monotonic() + seconds
+        while time.monotonic() < deadline:
+            if self._stop_requested:
+                return False
+            time.sleep(0.1)
+        return not self._stop_requested
+
+
+def parallel_accounts(username: str, password: str) -> List[Tuple[str, str]]:
+    """
+    Account da usare per l'esecuzione parallela: quello corrente, più gli
+    altri account configurati se `parallel_use_all_accounts` è attivo.
+    """
+    accounts = [(username, password)]
+    config = config_manager.load_config()
+    if config.get("parallel_use_all_accounts", False):
+        for acc in config.get("accounts", []):
+            user, pwd = acc.get("username"), acc.get("password")
+            if user and pwd and user != username:
+                accounts.append((user, pwd))
+    return accounts
@@ -0,0 +1,167 @@
+"""
+Bot TS - Browser Session Pool
+Sessioni Chrome già autenticate, mantenute tra un'esecuzione e l'altra.
+
+Un bot che termina restituisce il browser al pool invece di chiuderlo; il
+bot successivo sullo stesso account lo riprende (lease) e salta avvio di
+Chrome e login. Ogni sessione è verificata prima del riuso
+(`BaseBot._resume_session`); quelle inattive oltre il timeout, o in
+eccesso rispetto alla dimensione massima, vengono chiuse.
+
+Un worker parallelo (ParallelRunner) riprende anche la sessione del suo
+account aperta da un'esecuzione singola: il portale ammette una sola
+sessione per utente e il worker non subentra a quella esistente, quindi
+un nuovo login fallirebbe su "Sessione attiva".
+"""
+import atexit
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import List, Optional, Tuple
+
+from src.core import config_manager
+
+
+@dataclass
+class BrowserSession:
+    """Browser inattivo e autenticato per un account."""
+    driver: object
+    key: Tuple[str, bool, Optional[str], bool]   # (username, headless, worker_id, eventi di rete)
+    released_at: float = field(default_factory=time.monotonic)
+
+
+class SessionPool:
+    """Pool di sessioni browser inattive (thread-safe)."""
+
+    DEFAULT_SIZE = 2
+    DEFAULT_IDLE_MINUTES = 10
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._idle: List[BrowserSession] = []
+        self._reaper = None
+
+    # --- Configurazione ---
+
+    @staticmethod
+    def enabled() -> bool:
+        return bool(config_manager.load_config().get("browser_session_pool", True))
+
+    def _max_size(self) -> int:
+        return max(0, int(config_manager.load_config().get("browser_pool_size", self.DEFAULT_SIZE)))
+
+    def _idle_timeout(self) -> float:
+        minutes = config_manager.load_config().get("browser_pool_idle_minutes", self.DEFAULT_IDLE_MINUTES)
+        return max(0.0, float(minutes) * 60)
+
+    @staticmethod
+    def _key(bot) -> Tuple[str, bool, Optional[str], bool]:
+        # Le opzioni di avvio di Chrome non cambiano dopo il lancio: il log
+        # degli eventi di rete (perfLoggingPrefs) deve coincidere con quello
+        # richiesto dal bot, altrimenti la cattura dell'export HTTP non vede
+        # nulla o un altro bot riempie inutilmente il buffer di chromedriver
+        return (bot.username, bool(bot.headless), bot.worker_id, bool(bot.log_network_events))
+
+    def __len__(self):
+        with self._lock:
+            return len(self._idle)
+
+    # --- Lease / release ---
+
+    def lease(self, bot) -> bool:
+        """
+        Assegna al bot una sessione inattiva del suo account, se esiste ed è
+        ancora autenticata. Ritorna False se il bot deve avviare un browser.
+        """
+        if not self.enabled():
+            return False
+
+        key = self._key(bot)
+        with self._lock:
+            session = next((s for s in reversed(self._idle) if s.key == key), None)
+            if session is None and bot.worker_id:
+                # Stesso account ed eventi di rete; headless e cartella download
+                # del worker non contano (la cartella viene reimpostata)
+                session = next((s for s in reversed(self._idle)
+                                if (s.key[0], s.key[3]) == (key[0], key[3])), None)
+            if session is None:
+                return False
+            self._idle.remove(session)
+
+        bot.log("♻️ Riutilizzo sessione browser già autenticata...")
+        bot.driver = session.driver
+        bot._setup_waits()
+        if bot._resume_session():
+            return True
+
+        bot.log("⚠️ Sessione non più valida: avvio un nuovo browser.")
+        bot._quit_driver()
+        return False
+
+    def release(self, bot) -> bool:
+        """
+        Rimette nel pool il browser del bot. Ritorna False se il pool è
+        disattivato o pieno: in quel caso il chiamante chiude il browser.
+        """
+        if not self.enabled() or self._max_size() == 0:
+            return False
+
+        driver = bot.driver
+        if not bot.headless:
+            try:
+                driver.minimize_window()
+            except Exception:
+                pass
+
+        with self._lock:
+            self._idle.append(BrowserSession(driver, self._key(bot)))
+            evicted = self._idle[:-self._max_size()] if len(self._idle) > self._max_size() else []
+            del self._idle[:len(evicted)]
+
+        for session in evicted:
+            self._quit(session)
+        self._schedule_reaper()
+        return True
+
+    def close_all(self):
+        """Chiude tutte le sessioni inattive (uscita dall'applicazione)."""
+        with self._lock:
+            sessions, self._idle = self._idle, []
+            if self._reaper is not None:
+                self._reaper.cancel()
+                self._reaper = None
+        for session in sessions:
+            self._quit(session)
+
+    # --- Scadenza ---
+
+    def _schedule_reaper(self):
+        with self._lock:
+            if self._reaper is not None or not self._idle:
+                return
+            self._reaper = threading.Timer(self._idle_timeout() + 1, self._reap)
+            self._reaper.daemon = True
+            self._reaper.start()
+
+    def _reap(self):
+        timeout = self._idle_timeout()
+        now = time.monotonic()
+        with self._lock:
+            self._reaper = None
+            expired = [s for s in self._idle if now - s.released_at >= timeout]
+            self._idle = [s for s in self._idle if now - s.released_at < timeout]
+        for session in expired:
+            self._quit(session)
+        self._schedule_reaper()
+
+    @staticmethod
+    def _quit(session: BrowserSession):
+        try:
+            session.driver.quit()
+        except Exception:
+            pass
+
+
+# Singleton instance
+session_pool = SessionPool()
+atexit.register(session_pool.close_all)
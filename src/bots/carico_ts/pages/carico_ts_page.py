@@ -2,34 +2,29 @@
 Bot TS - Carico TS Page
 Page Object Model for Carico TS.
 """
-import time
 from selenium.webdriver.remote.webdriver import WebDriver
 from selenium.webdriver.common.action_chains import ActionChains
-from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.common.by import By
 
 from src.core.constants import Timeouts
+from src.bots.common import waits
+from src.bots.common.tracing import traced
+from src.bots.common.waits import TimedWait
 from src.bots.carico_ts.locators import CaricoTSLocators
 
 class CaricoTSPage:
     def __init__(self, driver: WebDriver, log_callback=None):
         self.driver = driver
-        self.wait = WebDriverWait(driver, Timeouts.DEFAULT)
+        self.wait = TimedWait(driver, Timeouts.DEFAULT)
         self.log = log_callback or print
 
     def _wait_overlay(self):
-        try:
-            xpath = "//div[contains(@class, 'x-mask-msg') or contains(@class, 'x-mask')][not(contains(@style,'display: none'))]"
-            WebDriverWait(self.driver, Timeouts.OVERLAY).until(
-                EC.invisibility_of_element_located((By.XPATH, xpath))
-            )
-            time.sleep(0.3)
-        except Exception:
-            # Overlay timeout is common if overlay didn't appear fast enough or stuck.
-            # We ignore it to proceed, but debug log could be useful.
-            pass
+        # ⚡ BOLT: pronto appena il portale ExtJS è inattivo, senza pausa fissa.
+        # Il timeout è ignorato: si prosegue comunque, come in passato.
+        waits.wait_idle(self.driver, Timeouts.OVERLAY, label="overlay")
 
+    @traced("navigazione")
     def navigate(self) -> bool:
         try:
             self.log("Navigazione Gestione Timesheet...")
@@ -40,6 +35,7 @@ class CaricoTSPage:
             self.log(f"Errore navigazione: {e}")
             return False
 
+    @traced("fornitore")
     def select_supplier(self, supplier: str) -> bool:
         try:
             self.log(f"Selezione {supplier}...")
@@ -47,9 +43,9 @@ class CaricoTSPage:
             ActionChains(self.driver).move_to_element(arrow).click().perform()
 
             opt_xpath = f"//li[contains(text(), '{supplier}')]"
-            opt = WebDriverWait(self.driver, 5).until(EC.presence_of_element_located((By.XPATH, opt_xpath)))
+            opt = TimedWait(self.driver, 5).until(EC.presence_of_element_located((By.XPATH, opt_xpath)))
             self.driver.execute_script("arguments[0].scrollIntoView({block:'nearest'});", opt)
-            time.sleep(0.3)
+            waits.wait_idle(self.driver, Timeouts.SHORT, label="tendina fornitore")
             self.driver.execute_script("arguments[0].click();", opt)
             self._wait_overlay()
             return True
@@ -57,6 +53,7 @@ class CaricoTSPage:
             self.log(f"Errore fornitore: {e}")
             return False
 
+    @traced("oda")
     def process_oda(self, oda: str) -> bool:
         try:
             self.log(f"Inserimento OdA: {oda}")
@@ -64,7 +61,7 @@ class CaricoTSPage:
 
             # JS Click to focus/activate
             self.driver.execute_script("arguments[0].click();", inp)
-            time.sleep(0.2)
+            waits.wait_idle(self.driver, Timeouts.SHORT)
 
             # Use JS to set value + dispatch events
             js = """
@@ -82,7 +79,7 @@ class CaricoTSPage:
             self.log("Estrai OdA cliccato.")
 
             # Just stopping here as per original logic (it stops after extract)
-            time.sleep(2)
+            waits.wait_idle(self.driver, Timeouts.SHORT, label="estrazione OdA")
             return True
         except Exception as e:
             self.log(f"Errore processo OdA: {e}")
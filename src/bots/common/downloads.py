@@ -0,0 +1,180 @@
+"""
+Bot TS - Download Manager
+Download in cartelle dedicate per job, con completamento guidato dagli eventi.
+
+Ogni download avviene in una cartella nuova e vuota, impostata su Chrome
+con CDP `Browser.setDownloadBehavior`: il file atteso è l'unico che vi
+compare, senza confronti tra listing di `~/Downloads` né ipotesi sull'mtime,
+e più browser (o più job) non si contendono gli stessi file.
+
+Il completamento arriva dagli eventi CDP `downloadWillBegin` /
+`downloadProgress` (letti dal log "performance" di chromedriver, abilitato
+in `BaseBot._init_driver`). Se il driver non espone quel log, si osserva la
+sola cartella del job: il file definitivo compare solo a download concluso
+(fino ad allora Chrome scrive su `.crdownload`).
+"""
+import json
+import shutil
+import time
+import uuid
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+from src.core import config_manager
+from src.core.constants import Timeouts
+
+# Suffissi dei file temporanei di Chrome
+PARTIAL_SUFFIXES = ('.crdownload', '.tmp')
+
+_WILL_BEGIN = ("Browser.downloadWillBegin", "Page.downloadWillBegin")
+_PROGRESS = ("Browser.downloadProgress", "Page.downloadProgress")
+
+# Intervallo di lettura degli eventi accumulati da chromedriver
+_EVENT_INTERVAL = 0.2
+
+
+def download_root(worker_id: Optional[str] = None) -> Path:
+    """Cartella base dei job di download (una per worker in esecuzione parallela)."""
+    return config_manager.CONFIG_DIR / "data" / "downloads" / (worker_id or "main")
+
+
+class DownloadJob:
+    """Un download atteso in una cartella dedicata."""
+
+    def __init__(self, manager: "DownloadManager", directory: Path):
+        self.manager = manager
+        self.directory = directory
+        self._names: Dict[str, str] = {}   # guid -> suggestedFilename
+        self._urls: Dict[str, str] = {}    # guid -> url della richiesta
+        self._completed: Optional[str] = None
+        self._canceled = False
+
+    def wait(self, timeout: float = Timeouts.DOWNLOAD) -> Optional[Path]:
+        """Attende la fine del download e ritorna il percorso del file (o None)."""
+        deadline = time.monotonic() + timeout
+        try:
+            while time.monotonic() < deadline:
+                self._consume_events()
+                if self._canceled:
+                    self.manager.log("  ✗ Download annullato dal browser.")
+                    return None
+                if self._completed is not None:
+                    path = self.directory / self._names.get(self._completed, "")
+                    if path.is_file():
+                        return path
+                found = self._finished_file()
+                if found is not None:
+                    return found
+                time.sleep(_EVENT_INTERVAL)
+            return None
+        finally:
+            self.manager._restore_default()
+
+    def _consume_events(self):
+        for event in self.manager._drain_events():
+            params = event.get("params", {})
+            method = event.get("method")
+            if method in _WILL_BEGIN:
+                self._names[params.get("guid", "")] = params.get("suggestedFilename", "")
+                self._urls[params.get("guid", "")] = params.get("url", "")
+            elif method in _PROGRESS and params.get("guid") in self._names:
+                if params.get("state") == "completed":
+                    self._completed = params["guid"]
+                elif params.get("state") == "canceled":
+                    self._canceled = True
+
+    @property
+    def url(self) -> Optional[str]:
+        """URL da cui il browser ha scaricato il file (dagli eventi CDP), se noto."""
+        if self._completed is not None:
+            return self._urls.get(self._completed) or None
+        return next(iter(self._urls.values()), None) or None
+
+    def _finished_file(self) -> Optional[Path]:
+        """Il file della cartella del job, se il download è concluso."""
+        try:
+            entries = [p for p in self.directory.iterdir() if p.is_file()]
+        except OSError:
+            return None
+        if any(p.name.endswith(PARTIAL_SUFFIXES) for p in entries):
+            return None
+        return entries[0] if len(entries) == 1 else None
+
+    def move_to(self, path: Path, target: Path) -> Path:
+        """Sposta il file scaricato in `target` e rimuove la cartella del job."""
+        target.parent.mkdir(parents=True, exist_ok=True)
+        shutil.move(str(path), str(target))
+        self.discard()
+        return target
+
+    def discard(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+
+class DownloadManager:
+    """Crea job di download isolati sul driver Chrome indicato."""
+
+    def __init__(self, driver, root: Path, log: Callable[[str], None] = print,
+                 record_network: bool = False):
+        """
+        Args:
+            record_network: Conserva anche gli eventi Network.* del log
+                "performance" in `network_events` (richiede enableNetwork)
+        """
+        self.driver = driver
+        self.root = Path(root)
+        self.log = log
+        self.record_network = record_network
+        self.network_events: List[dict] = []
+
+    def start(self) -> DownloadJob:
+        """
+        Prepara un job: da chiamare PRIMA del click che avvia il download.
+        Scarta gli eventi precedenti e punta Chrome sulla cartella del job.
+        """
+        directory = self.root / f"job_{uuid.uuid4().hex[:12]}"
+        directory.mkdir(parents=True, exist_ok=True)
+        self._drain_events()
+        self.network_events = []
+        self._set_download_dir(directory)
+        return DownloadJob(self, directory)
+
+    def _set_download_dir(self, directory: Path):
+        try:
+            self.driver.execute_cdp_cmd(
+                "Browser.setDownloadBehavior",
+                {"behavior": "allow", "downloadPath": str(directory), "eventsEnabled": True}
+            )
+        except Exception:
+            # Versioni/target senza dominio Browser: comando equivalente a livello pagina
+            try:
+                self.driver.execute_cdp_cmd(
+                    "Page.setDownloadBehavior",
+                    {"behavior": "allow", "downloadPath": str(directory)}
+                )
+            except Exception as e:
+                self.log(f"  ⚠️ Impossibile impostare la cartella di download: {e}")
+
+    def _restore_default(self):
+        """Download successivi fuori da un job: nella cartella base (non in un job rimosso)."""
+        self.root.mkdir(parents=True, exist_ok=True)
+        self._set_download_dir(self.root)
+
+    def _drain_events(self):
+        """Eventi CDP di download accumulati nel log "performance" di chromedriver."""
+        try:
+            entries = self.driver.get_log("performance")
+        except Exception:
+            return []
+        events = []
+        for entry in entries or []:
+            try:
+                message = json.loads(entry["message"])["message"]
+            except (KeyError, TypeError, ValueError):
+                continue
+            method = message.get("method", "")
+            if method in _WILL_BEGIN + _PROGRESS:
+                events.append(message)
+            elif self.record_network and method.startswith("Network."):
+                self.network_events.append(message)
+        return events
@@ -0,0 +1,94 @@
+"""
+Bot TS - Resource Blocking
+Profili di blocco delle risorse che i bot non usano (immagini, media,
+font, tracker) applicati al browser via CDP `Network.setBlockedURLs`.
+
+`setBlockedURLs` non ha eccezioni: ogni pattern (di profilo o aggiunto in
+configurazione) viene quindi provato su URL di esempio del portale (pagina,
+script ExtJS, chiamate dati, export) e scartato se ne bloccherebbe uno.
+È un controllo sui pattern, non un filtro per richiesta: i profili con le
+immagini bloccano anche quelle del tema ExtJS (icone assenti, nessun effetto
+sui bot).
+"""
+import re
+from typing import Iterable, List
+
+from src.core import config_manager
+from src.core.constants import BrowserConfig, URLs
+
+PROFILE_OFF, PROFILE_MINIMAL, PROFILE_STANDARD, PROFILE_AGGRESSIVE = BrowserConfig.RESOURCE_BLOCKING_PROFILES
+DEFAULT_PROFILE = BrowserConfig.RESOURCE_BLOCKING_DEFAULT
+
+_TRACKERS = [
+    "*google-analytics.com*", "*googletagmanager.com*", "*doubleclick.net*",
+    "*facebook.net*", "*hotjar.com*", "*clarity.ms*",
+]
+_IMAGES = ["*.png*", "*.jpg*", "*.jpeg*", "*.gif*", "*.svg*", "*.ico*", "*.webp*", "*.bmp*"]
+_MEDIA = ["*.mp4*", "*.webm*", "*.mp3*", "*.ogg*", "*.wav*"]
+_FONTS = ["*.woff*", "*.ttf*", "*.otf*", "*.eot*"]
+
+# Pattern (sintassi CDP: '*' come jolly) per profilo, dal più prudente al più spinto
+PROFILES = {
+    PROFILE_OFF: [],
+    PROFILE_MINIMAL: _TRACKERS,
+    PROFILE_STANDARD: _TRACKERS + _IMAGES + _MEDIA,
+    # Senza font le icone ExtJS (glyph) spariscono: i bot non ne hanno bisogno
+    PROFILE_AGGRESSIVE: _TRACKERS + _IMAGES + _MEDIA + _FONTS,
+}
+
+# URL di esempio che devono sempre caricarsi: pagina del portale, script e
+# stili ExtJS, chiamate dati (con il `_dc` anti-cache di ExtJS) ed export.
+# `resource_blocking_allow` in configurazione aggiunge altri URL reali.
+PROTECTED_URLS = [
+    URLs.ISAB_PORTAL,
+    URLs.ISAB_PORTAL + "ext/ext-all.js",
+    URLs.ISAB_PORTAL + "app.js?_dc=1700000000000",
+    URLs.ISAB_PORTAL + "ext/resources/css/ext-all.css",
+    URLs.ISAB_PORTAL + "api/Timesheet/Read?_dc=1700000000000&page=1&start=0&limit=25",
+    URLs.ISAB_PORTAL + "api/Timesheet/Export?oda=4500012345&posizione=10",
+    URLs.ISAB_PORTAL + "export/download?file=TS_4500012345-10.xlsx",
+    URLs.ISAB_PORTAL + "Download/TS_4500012345-10.xls",
+    URLs.ISAB_PORTAL + "Download/Dettagli_OdA.csv",
+]
+
+
+def profile_from_config() -> str:
+    profile = config_manager.get_config_value("resource_blocking_profile", DEFAULT_PROFILE)
+    return profile if profile in PROFILES else DEFAULT_PROFILE
+
+
+def blocks_images(profile: str) -> bool:
+    """True se il profilo blocca le immagini (anche via preferenza di Chrome)."""
+    return "*.png*" in PROFILES.get(profile, [])
+
+
+def pattern_matches(pattern: str, url: str) -> bool:
+    """Corrispondenza come in `setBlockedURLs`: URL intero, solo '*' come jolly."""
+    regex = ".*".join(re.escape(part) for part in pattern.split("*"))
+    return re.fullmatch(regex, url, re.DOTALL) is not None
+
+
+def blocked_patterns(profile: str, extra: Iterable[str] = (), allow: Iterable[str] = ()) -> List[str]:
+    """
+    Pattern da bloccare per il profilo più quelli extra, esclusi quelli che
+    bloccherebbero uno degli URL protetti (PROTECTED_URLS più `allow`).
+    """
+    protected = PROTECTED_URLS + [a for a in allow if a]
+    patterns = []
+    for pattern in list(PROFILES.get(profile, [])) + [e for e in extra if e]:
+        if pattern in patterns:
+            continue
+        if any(pattern_matches(pattern, url) for url in protected):
+            continue
+        patterns.append(pattern)
+    return patterns
+
+
+def apply(driver, patterns: List[str]) -> bool:
+    """Imposta i pattern bloccati sulla sessione CDP; False se il comando non è supportato."""
+    try:
+        driver.execute_cdp_cmd("Network.enable", {})
+        driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": patterns})
+        return True
+    except Exception:
+        return False
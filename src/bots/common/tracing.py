@@ -0,0 +1,215 @@
+"""
+Bot TS - Run Tracing
+Tempi dei passi di una run (login, navigazione, filtri, ricerca, download,
+logout) come span annidati.
+
+Una run del bot apre un `Tracer` per il thread corrente (`recording()`, da
+`BaseBot._measured_run`); bot e page object aprono span con `span(nome)`,
+senza riferimenti al bot (se nessuna run è attiva lo span non registra
+nulla). A fine run il trace viene salvato come JSON "trace event" di Chrome
+(apribile in chrome://tracing o Perfetto) con una tabella riassuntiva
+p50/p95 per passo, e le durate aggregate finiscono in `StatsManager`.
+"""
+import functools
+import json
+import math
+import os
+import re
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from src.core import config_manager
+
+# Trace conservati su disco (i più vecchi vengono rimossi)
+MAX_TRACE_FILES = 50
+
+
+def trace_dir() -> Path:
+    return config_manager.CONFIG_DIR / "data" / "traces"
+
+
+def _percentile(sorted_values: List[float], pct: float) -> float:
+    """Percentile nearest-rank su valori già ordinati."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(pct / 100 * len(sorted_values)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+class Span:
+    """Passo in corso; `fail()` ne segna l'esito senza sollevare eccezioni."""
+
+    def __init__(self, name: str, args: Dict[str, Any]):
+        self.name = name
+        self.args = args
+        self.outcome = "ok"
+
+    def fail(self, reason: str = "errore"):
+        self.outcome = reason
+
+    def set(self, **args):
+        self.args.update(args)
+
+
+class Tracer:
+    """Span registrati durante una run, in formato trace event di Chrome."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.started = time.perf_counter()
+        self.wall_started = time.time()
+        self.events: List[Dict[str, Any]] = []
+        self._depth = 0
+
+    def _us(self, t: float) -> int:
+        return int((t - self.started) * 1_000_000)
+
+    @contextmanager
+    def span(self, name: str, **args):
+        span = Span(name, {k: str(v) for k, v in args.items()})
+        start = time.perf_counter()
+        self._depth += 1
+        try:
+            yield span
+        except InterruptedError:
+            span.outcome = "interrotto"
+            raise
+        except Exception as e:
+            span.outcome = f"errore: {type(e).__name__}"
+            raise
+        finally:
+            self._depth -= 1
+            end = time.perf_counter()
+            self.events.append({
+                "name": name,
+                "cat": "bot",
+                "ph": "X",
+                "ts": self._us(start),
+                "dur": self._us(end) - self._us(start),
+                "pid": os.getpid(),
+                "tid": threading.get_native_id(),
+                "args": {**span.args, "outcome": span.outcome, "depth": self._depth},
+            })
+
+    def durations(self) -> Dict[str, List[float]]:
+        """Durate (secondi) per nome di passo."""
+        result: Dict[str, List[float]] = {}
+        for event in self.events:
+            result.setdefault(event["name"], []).append(event["dur"] / 1_000_000)
+        return result
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        """Per passo: conteggio, totale, p50, p95, massimo (secondi) ed errori."""
+        failures: Dict[str, int] = {}
+        for event in self.events:
+            if event["args"].get("outcome") != "ok":
+                failures[event["name"]] = failures.get(event["name"], 0) + 1
+        summary = {}
+        for name, values in self.durations().items():
+            ordered = sorted(values)
+            summary[name] = {
+                "count": len(ordered),
+                "total": sum(ordered),
+                "p50": _percentile(ordered, 50),
+                "p95": _percentile(ordered, 95),
+                "max": ordered[-1],
+                "errors": failures.get(name, 0),
+            }
+        return summary
+
+    def summary_table(self, top: int = 10) -> str:
+        summary = self.summary()
+        if not summary:
+            return ""
+        lines = [f"📊 Passi della run ({len(self.events)} span):",
+                 f"   {'passo':<24}{'n':>4}{'p50':>8}{'p95':>8}{'totale':>9}"]
+        ranked = sorted(summary.items(), key=lambda kv: kv[1]["total"], reverse=True)[:top]
+        for name, s in ranked:
+            errors = f"  ✗{s['errors']}" if s["errors"] else ""
+            lines.append(f"   {name[:24]:<24}{s['count']:>4}{s['p50']:>7.1f}s{s['p95']:>7.1f}s"
+                         f"{s['total']:>8.1f}s{errors}")
+        return "\n".join(lines)
+
+    def to_chrome_trace(self) -> Dict[str, Any]:
+        return {
+            "traceEvents": sorted(self.events, key=lambda e: e["ts"]),
+            "displayTimeUnit": "ms",
+            "otherData": {
+                "run": self.name,
+                "started": time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(self.wall_started)),
+                "summary": self.summary(),
+            },
+        }
+
+    def write(self, directory: Optional[Path] = None) -> Optional[Path]:
+        """Salva il trace della run; None se non ci sono span o in caso di errore."""
+        if not self.events:
+            return None
+        directory = Path(directory or trace_dir())
+        stamp = time.strftime("%Y%m%d_%H%M%S", time.localtime(self.wall_started))
+        stamp += f"_{int(self.wall_started * 1000) % 1000:03d}"
+        safe_name = re.sub(r"[^\w-]+", "_", self.name).strip("_") or "run"
+        path = directory / f"{safe_name}_{stamp}.json"
+        try:
+            directory.mkdir(parents=True, exist_ok=True)
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(self.to_chrome_trace(), f)
+            _prune(directory)
+            return path
+        except OSError:
+            return None
+
+
+def _prune(directory: Path):
+    files = sorted(directory.glob("*.json"), key=lambda p: p.stat().st_mtime)
+    for old in files[:-MAX_TRACE_FILES]:
+        try:
+            old.unlink()
+        except OSError:
+            pass
+
+
+_local = threading.local()
+
+
+def current_tracer() -> Optional[Tracer]:
+    return getattr(_local, "tracer", None)
+
+
+@contextmanager
+def recording(name: str):
+    """Attiva un Tracer per il thread corrente (una run del bot)."""
+    previous = current_tracer()
+    _local.tracer = tracer = Tracer(name)
+    try:
+        yield tracer
+    finally:
+        _local.tracer = previous
+
+
+@contextmanager
+def span(name: str, **args):
+    """Span nel Tracer attivo; senza run attiva non registra nulla."""
+    tracer = current_tracer()
+    if tracer is None:
+        yield Span(name, dict(args))
+        return
+    with tracer.span(name, **args) as active:
+        yield active
+
+
+def traced(name: str):
+    """Decoratore: ogni chiamata è uno span; un ritorno False ne segna il fallimento."""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(name) as active:
+                result = func(*args, **kwargs)
+                if result is False:
+                    active.fail("fallito")
+                return result
+        return wrapper
+    return decorator
@@ -0,0 +1,154 @@
+"""
+Bot TS - ExtJS Waits
+Attese adattive al posto delle pause fisse, e bilancio attesa/azione per run.
+
+Il portale ISAB è un'applicazione ExtJS: una pagina è pronta quando il
+documento è caricato, non ci sono richieste Ext.Ajax né animazioni in corso
+e nessuna maschera di caricamento è visibile. `wait_idle()` verifica queste
+condizioni con polling rapido (50 ms) e ritorna appena sono vere, invece di
+dormire sempre per il caso peggiore.
+
+Ogni attesa (`TimedWait`, `wait_idle`, pause residue con `pause()`) viene
+cronometrata nel `WaitStats` attivo per il thread corrente: i bot lo aprono
+a inizio run (`BaseBot._measured_run`) e a fine run registrano quanto tempo
+è stato speso in attesa rispetto alle azioni.
+"""
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Optional, Tuple
+
+from selenium.common.exceptions import TimeoutException, WebDriverException
+from selenium.webdriver.support.ui import WebDriverWait
+
+from src.core.constants import Timeouts
+
+POLL_INTERVAL = 0.05
+
+# Pronto = documento caricato, nessuna richiesta Ext.Ajax pendente, nessuna
+# maschera di caricamento visibile, nessuna animazione Ext.fx in corso (menu,
+# tendine, sidebar). Le maschere modali delle finestre non hanno
+# `.x-mask-msg` e non bloccano.
+EXTJS_IDLE_JS = """
+if (document.readyState !== 'complete') { return false; }
+var msgs = document.querySelectorAll('.x-mask-msg');
+for (var i = 0; i < msgs.length; i++) {
+    var el = msgs[i];
+    if (el.offsetParent !== null && window.getComputedStyle(el).visibility !== 'hidden') { return false; }
+}
+if (window.Ext && Ext.Ajax) {
+    if (Ext.Ajax.requests && Object.keys(Ext.Ajax.requests).length > 0) { return false; }
+    if (typeof Ext.Ajax.isLoading === 'function' && Ext.Ajax.isLoading()) { return false; }
+}
+try {
+    if (window.Ext && Ext.fx && Ext.fx.Manager && Ext.fx.Manager.items.getCount() > 0) { return false; }
+} catch (e) {}
+return true;
+"""
+
+
+class WaitStats:
+    """Tempo di una run speso in attesa (per etichetta) rispetto al totale."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.waits: Dict[str, Tuple[int, float]] = {}   # etichetta -> (conteggio, secondi)
+
+    def add(self, label: str, seconds: float):
+        count, total = self.waits.get(label, (0, 0.0))
+        self.waits[label] = (count + 1, total + seconds)
+
+    @property
+    def wall(self) -> float:
+        return time.perf_counter() - self.started
+
+    @property
+    def waiting(self) -> float:
+        return sum(total for _, total in self.waits.values())
+
+    def report(self, top: int = 5) -> str:
+        wall = self.wall
+        waiting = min(self.waiting, wall)
+        share = (waiting / wall * 100) if wall > 0 else 0.0
+        lines = [f"⏱️ Tempo run {wall:.1f}s: attesa {waiting:.1f}s ({share:.0f}%), azioni {wall - waiting:.1f}s"]
+        ranked = sorted(self.waits.items(), key=lambda kv: kv[1][1], reverse=True)[:top]
+        for label, (count, total) in ranked:
+            lines.append(f"   {total:6.1f}s  {label} (x{count})")
+        return "\n".join(lines)
+
+
+_local = threading.local()
+
+
+def current_stats() -> Optional[WaitStats]:
+    return getattr(_local, "stats", None)
+
+
+@contextmanager
+def recording():
+    """Attiva un WaitStats per il thread corrente (una run del bot)."""
+    previous = current_stats()
+    _local.stats = stats = WaitStats()
+    try:
+        yield stats
+    finally:
+        _local.stats = previous
+
+
+@contextmanager
+def timed(label: str):
+    """Cronometra un'attesa nel WaitStats attivo (se presente)."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        stats = current_stats()
+        if stats is not None:
+            stats.add(label, time.perf_counter() - start)
+
+
+class TimedWait(WebDriverWait):
+    """WebDriverWait con polling rapido, cronometrato nel bilancio della run."""
+
+    def __init__(self, driver, timeout: float, poll_frequency: float = POLL_INTERVAL,
+                 ignored_exceptions=None, label: str = "attesa elemento"):
+        super().__init__(driver, timeout, poll_frequency, ignored_exceptions)
+        self.label = label
+
+    def until(self, method, message: str = ""):
+        with timed(self.label):
+            return super().until(method, message)
+
+    def until_not(self, method, message: str = ""):
+        with timed(self.label):
+            return super().until_not(method, message)
+
+
+def pause(seconds: float, label: str = "pausa fissa"):
+    """Pausa fissa residua (animazioni senza condizione osservabile), conteggiata nel bilancio."""
+    with timed(label):
+        time.sleep(seconds)
+
+
+def is_idle(driver) -> bool:
+    try:
+        return bool(driver.execute_script(EXTJS_IDLE_JS))
+    except WebDriverException:
+        return False
+
+
+def wait_idle(driver, timeout: float = Timeouts.OVERLAY, label: str = "pagina pronta") -> bool:
+    """Attende che il portale sia inattivo (niente Ajax/maschere/animazioni); False al timeout."""
+    try:
+        TimedWait(driver, timeout, label=label).until(is_idle)
+        return True
+    except TimeoutException:
+        return False
+
+
+def wait_optional(driver, condition: Callable, timeout: float, label: str = "condizione"):
+    """Attende una condizione expected_conditions; None al timeout (elementi che possono non comparire)."""
+    try:
+        return TimedWait(driver, timeout, label=label).until(condition)
+    except TimeoutException:
+        return None
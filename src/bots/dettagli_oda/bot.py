@@ -4,9 +4,10 @@ Bot for Dettagli OdA using POM.
 """
 from pathlib import Path
 from typing import List, Dict, Any
-import time
 
 from src.bots.base import BaseBot
+from src.bots.common import waits
+from src.core.constants import Timeouts
 from src.bots.dettagli_oda.pages.dettagli_oda_page import DettagliOdAPage
 
 class DettagliOdABot(BaseBot):
@@ -49,13 +50,14 @@ class DettagliOdABot(BaseBot):
         else:
             rows = data
             
+        self.row_results = []
         if not rows: return True
         
         self.log(f"🚀 Avvio scarico dettagli per {len(rows)} OdA...")
         page = DettagliOdAPage(self.driver, self.log)
         
         # Define source (System Downloads) and destination (Configured Path)
-        source_dir = Path.home() / "Downloads"
+        source_dir = self._downloads_dir()
         dest_dir = Path(self.download_path) if self.download_path else source_dir
 
         success = 0
@@ -74,16 +76,23 @@ class DettagliOdABot(BaseBot):
             # Pass (i==1) to let the page know if it's the first row
             if not page.navigate_to_dettagli(is_first_row=(i==1)):
                 self.log("❌ Problema nella navigazione.")
+                self._record_row(i, False, "Problema nella navigazione")
                 continue
             if not page.setup_supplier(self.fornitore):
                 self.log("❌ Fornitore non selezionabile.")
+                self._record_row(i, False, "Fornitore non selezionabile", retry=False)
                 continue
 
             if page.process_oda(oda, contract, self.data_da, self.data_a, source_dir, dest_dir):
                 success += 1
+                self._record_row(i, True)
+            else:
+                self._record_row(i, False, "Download non riuscito")
             
-            time.sleep(1)
+            # ⚡ BOLT: riga successiva appena il portale è inattivo (era time.sleep(1))
+            waits.wait_idle(self.driver, Timeouts.SHORT)
 
-        page.logout()
+        if not self._keeps_session():
+            page.logout()
         self.log("✨ Procedura conclusa.")
         return success == len(rows)
@@ -3,7 +3,6 @@ Bot TS - Dettagli OdA Page
 Page Object Model for Dettagli OdA.
 """
 
-import time
 import traceback
 from pathlib import Path
 from typing import Optional
@@ -12,7 +11,6 @@ from selenium.webdriver.remote.webdriver import WebDriver
 from selenium.webdriver.common.by import By
 from selenium.webdriver.common.action_chains import ActionChains
 from selenium.webdriver.common.keys import Keys
-from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import TimeoutException
 
@@ -20,33 +18,32 @@ from src.core.constants import Timeouts
 from src.utils.helpers import sanitize_filename
 from src.bots.dettagli_oda.locators import DettagliOdALocators
 from src.bots.common.locators import LoginLocators, CommonLocators
+from src.bots.common import waits
+from src.bots.common.downloads import DownloadManager
+from src.bots.common.tracing import traced
+from src.bots.common.waits import TimedWait
 
 class DettagliOdAPage:
 
     def __init__(self, driver: WebDriver, log_callback: Optional[callable] = None):
         self.driver = driver
-        self.wait = WebDriverWait(driver, Timeouts.DEFAULT)
-        self.long_wait = WebDriverWait(driver, Timeouts.PAGE_LOAD)
+        self.wait = TimedWait(driver, Timeouts.DEFAULT)
+        self.long_wait = TimedWait(driver, Timeouts.PAGE_LOAD)
         self._log = log_callback or print
 
     def log(self, msg):
         self._log(msg)
 
     def _wait_for_overlay(self):
-        try:
-            xpath = "//div[contains(@class, 'x-mask-msg') or contains(@class, 'x-mask')][not(contains(@style,'display: none'))]"
-            WebDriverWait(self.driver, Timeouts.OVERLAY).until(
-                EC.invisibility_of_element_located((By.XPATH, xpath))
-            )
-            time.sleep(0.3)
-        except TimeoutException:
-            pass
+        # ⚡ BOLT: pronto appena il portale ExtJS è inattivo, senza pausa fissa
+        waits.wait_idle(self.driver, Timeouts.OVERLAY, label="overlay")
 
+    @traced("navigazione")
     def navigate_to_dettagli(self, is_first_row: bool = True) -> bool:
         try:
             self.expand_sidebar_if_collapsed()
             self.log("Navigazione menu Report -> Oda...")
-            time.sleep(1) # Ensure UI is idle
+            waits.wait_idle(self.driver, Timeouts.SHORT)
 
             # Click Report (using JS to avoid interception/crash)
             # Dalla seconda riga in poi, a volte è necessario cliccare due volte
@@ -54,8 +51,8 @@ class DettagliOdAPage:
             self.driver.execute_script("arguments[0].click();", report_btn)
 
             if not is_first_row:
-                 # Strategia robustezza: piccolo sleep e secondo click se necessario
-                 time.sleep(0.5)
+                 # Strategia robustezza: secondo click a portale inattivo
+                 waits.wait_idle(self.driver, Timeouts.SHORT)
                  self.driver.execute_script("arguments[0].click();", report_btn)
 
             self._wait_for_overlay()
@@ -72,6 +69,7 @@ class DettagliOdAPage:
             self.log(f"Stacktrace: {traceback.format_exc()}")
             return False
 
+    @traced("fornitore")
     def setup_supplier(self, supplier: str) -> bool:
         try:
             self.log(f"Selezione fornitore: {supplier}")
@@ -81,7 +79,7 @@ class DettagliOdAPage:
             option_xpath = f"//li[contains(text(), '{supplier}')]"
             option = self.long_wait.until(EC.presence_of_element_located((By.XPATH, option_xpath)))
             self.driver.execute_script("arguments[0].scrollIntoView({block: 'nearest'});", option)
-            time.sleep(0.5)
+            waits.wait_idle(self.driver, Timeouts.SHORT, label="tendina fornitore")
             self.driver.execute_script("arguments[0].click();", option)
             self._wait_for_overlay()
             return True
@@ -89,13 +87,14 @@ class DettagliOdAPage:
             self.log(f"✗ Selezione fornitore fallita: {e}")
             return False
 
+    @traced("logout")
     def logout(self):
         try:
             self.log("Esecuzione logout...")
             # 1. Click Settings (using specific ID provided)
             settings_btn = self.wait.until(EC.element_to_be_clickable(DettagliOdALocators.LOGOUT_SETTINGS_BUTTON))
             self.driver.execute_script("arguments[0].click();", settings_btn)
-            time.sleep(0.5)
+            waits.wait_idle(self.driver, Timeouts.SHORT)
 
             # 2. Click Logout
             try:
@@ -120,7 +119,7 @@ class DettagliOdAPage:
             except TimeoutException:
                 self.log("⚠️ Popup conferma non apparso o timeout.")
 
-            time.sleep(1)
+            waits.wait_idle(self.driver, Timeouts.SHORT)
         except Exception as e:
             self.log(f"⚠️ Errore durante logout: {e}")
 
@@ -133,12 +132,13 @@ class DettagliOdAPage:
                 self.log("  Menu laterale collassato, espansione in corso...")
                 # Usa JS click per robustezza
                 self.driver.execute_script("arguments[0].click();", expand_btn)
-                time.sleep(0.5)
+                waits.wait_idle(self.driver, Timeouts.SHORT)
                 self.log("  Menu espanso.")
         except Exception:
             # Se l'elemento non c'è o non è visibile, assumiamo sia già espanso
             pass
 
+    @traced("oda")
     def process_oda(self, oda: str, contract: str, date_da: str, date_a: str, source_dir: Path, dest_dir: Path) -> bool:
         try:
             # 1. Fill Form
@@ -172,7 +172,7 @@ class DettagliOdAPage:
             if not checkbox.is_selected():
                  self.driver.execute_script("arguments[0].click();", checkbox)
 
-            time.sleep(0.5)
+            waits.wait_idle(self.driver, Timeouts.SHORT)
 
             # Click Search
             self.wait.until(EC.element_to_be_clickable(DettagliOdALocators.SEARCH_BUTTON)).click()
@@ -247,7 +247,7 @@ class DettagliOdAPage:
                     close_btn = self.driver.find_element(*DettagliOdALocators.TAB_CLOSE_BTN)
                     if close_btn.is_displayed():
                         self.driver.execute_script("arguments[0].click();", close_btn)
-                        time.sleep(0.5)
+                        waits.wait_idle(self.driver, Timeouts.SHORT)
                     else:
                         break
                 except Exception:
@@ -256,32 +256,22 @@ class DettagliOdAPage:
         except Exception as e:
             self.log(f"  ⚠️ Errore chiusura tab: {e}")
 
+    @traced("download")
     def _download(self, source_dir: Path, dest_dir: Path, target_filename: str, button_locator: tuple) -> bool:
+        job = None
         try:
-            files_before = {f for f in source_dir.iterdir() if f.is_file() and f.suffix.lower() == '.xlsx'}
+            # Cartella dedicata al job (sotto source_dir): niente confronto tra listing
+            job = DownloadManager(self.driver, source_dir, self.log).start()
 
             btn = self.wait.until(EC.presence_of_element_located(button_locator))
             self.driver.execute_script("arguments[0].scrollIntoView({block: 'center'});", btn)
-            time.sleep(0.5)
+            waits.wait_idle(self.driver, Timeouts.SHORT)
             try:
                 btn.click()
             except:
                 self.driver.execute_script("arguments[0].click();", btn)
 
-            downloaded_file = None
-            start_time = time.time()
-            while time.time() - start_time < Timeouts.DOWNLOAD:
-                # Check for active downloads
-                if any(f.suffix == '.crdownload' for f in source_dir.iterdir()):
-                    time.sleep(0.5)
-                    continue
-
-                current_files = {f for f in source_dir.iterdir() if f.is_file() and f.suffix.lower() == '.xlsx'}
-                new_files = current_files - files_before
-                if new_files:
-                    downloaded_file = max(list(new_files), key=lambda f: f.stat().st_mtime)
-                    break
-                time.sleep(0.5)
+            downloaded_file = job.wait(Timeouts.DOWNLOAD)
 
             if downloaded_file and downloaded_file.exists():
                 # Assicura dest dir
@@ -302,14 +292,16 @@ class DettagliOdAPage:
                     except:
                          pass
 
-                import shutil
-                shutil.move(str(downloaded_file), str(target_path))
+                job.move_to(downloaded_file, target_path)
 
                 self.log(f"  ✓ Scaricato: {target_path.name}")
                 return True
             else:
                 self.log("  ✗ File non trovato nella cartella Download.")
+                job.discard()
                 return False
         except Exception as e:
             self.log(f"  ✗ Errore download: {e}")
+            if job:
+                job.discard()
             return False
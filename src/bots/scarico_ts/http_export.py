@@ -0,0 +1,227 @@
+"""
+Bot TS - Scarico TS HTTP Export
+Export diretto dei timesheet via HTTP, con la sessione autenticata del browser.
+
+Il primo timesheet viene scaricato dall'interfaccia; dagli eventi CDP di rete
+(log "performance" di chromedriver) si ricava la richiesta di export della
+griglia ExtJS e i parametri che contengono Numero/Posizione OdA. Per le
+righe successive la richiesta viene ripetuta con `requests`, su una
+`Session` con i cookie del browser e un pool di connessioni, con più
+richieste in parallelo. Le righe che non riescono tornano al flusso
+dall'interfaccia.
+"""
+import json
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from src.core.constants import Timeouts
+
+# Intestazioni gestite da requests/dalla sessione, da non copiare
+_SKIP_HEADERS = {"cookie", "content-length", "host", "connection", "accept-encoding"}
+
+# Un .xlsx è un archivio zip
+_XLSX_MAGIC = b"PK"
+
+
+class ExportError(Exception):
+    """Export HTTP non riuscito per una riga."""
+
+
+class SessionExpired(ExportError):
+    """Il portale risponde con una pagina HTML: sessione non più valida."""
+
+
+def _replace_value(value: Any, sample: Dict[str, str], values: Dict[str, str]) -> Any:
+    """Sostituisce un valore uguale a quello della richiesta catturata (anche dentro JSON)."""
+    if isinstance(value, dict):
+        return {k: _replace_value(v, sample, values) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_replace_value(v, sample, values) for v in value]
+    if isinstance(value, bool) or not isinstance(value, (str, int)):
+        return value
+    for key, old in sample.items():
+        if str(value) == old:
+            return values.get(key, old)
+    # Filtri ExtJS serializzati in un parametro (es. filter=[{"property":...}])
+    if isinstance(value, str) and value[:1] in "[{":
+        try:
+            data = json.loads(value)
+        except ValueError:
+            return value
+        return json.dumps(_replace_value(data, sample, values), separators=(",", ":"))
+    return value
+
+
+@dataclass
+class ExportTemplate:
+    """Richiesta di export catturata, con i valori di esempio da sostituire."""
+    url: str
+    method: str = "GET"
+    headers: Dict[str, str] = field(default_factory=dict)
+    body: Optional[str] = None
+    sample: Dict[str, str] = field(default_factory=dict)   # campo -> valore nella richiesta catturata
+
+    @classmethod
+    def from_request(cls, url: str, method: str, headers: Dict[str, str], body: Optional[str],
+                     sample: Dict[str, str]) -> Optional["ExportTemplate"]:
+        """Template dalla richiesta catturata; None se Numero OdA non compare nei parametri."""
+        template = cls(url, method.upper(), dict(headers or {}), body,
+                       {k: str(v) for k, v in sample.items() if str(v)})
+        # Un valore presente in più parametri (es. posizione "1" e page=1) è ambiguo:
+        # quel campo non si sostituisce e le righe che lo usano passano dall'interfaccia
+        counts = template._occurrences()
+        template.sample = {k: v for k, v in template.sample.items() if counts.get(k) == 1}
+        if "numero_oda" not in template.fields:
+            return None
+        return template
+
+    def _occurrences(self) -> Dict[str, int]:
+        markers = {key: f"__bots_{key}__" for key in self.sample}
+        url, body = self.render(markers)
+        rendered = url + (body or "")
+        return {key: rendered.count(marker) for key, marker in markers.items()}
+
+    @property
+    def fields(self) -> set:
+        """Campi sostituibili nei parametri della richiesta."""
+        return {key for key, count in self._occurrences().items() if count}
+
+    def supports(self, values: Dict[str, str]) -> bool:
+        """La riga è riproducibile se ogni valore non vuoto ha un parametro in cui andare."""
+        fields = self.fields
+        return all(key in fields for key, value in values.items() if value)
+
+    def render(self, values: Dict[str, str]) -> Tuple[str, Optional[str]]:
+        """URL e corpo della richiesta con i valori della riga."""
+        parts = urlsplit(self.url)
+        query = [(k, _replace_value(v, self.sample, values))
+                 for k, v in parse_qsl(parts.query, keep_blank_values=True)]
+        url = urlunsplit(parts._replace(query=urlencode(query)))
+
+        body = self.body
+        if body:
+            if body.lstrip()[:1] in "[{":
+                body = _replace_value(body, self.sample, values)
+            else:
+                form = parse_qsl(body, keep_blank_values=True)
+                body = urlencode([(k, _replace_value(v, self.sample, values)) for k, v in form])
+        return url, body
+
+
+def capture_template(driver, job, network_events: List[dict], sample: Dict[str, str]) -> Optional[ExportTemplate]:
+    """
+    Ricava la richiesta di export dagli eventi Network.* registrati durante
+    il download `job`. None se il file non arriva da una richiesta HTTP
+    riproducibile (es. export generato nel browser come blob:).
+    """
+    url = job.url
+    if not url or not url.lower().startswith(("http://", "https://")):
+        return None
+
+    for event in reversed(network_events):
+        if event.get("method") != "Network.requestWillBeSent":
+            continue
+        params = event.get("params", {})
+        request = params.get("request", {})
+        if request.get("url") != url:
+            continue
+        body = request.get("postData")
+        if body is None and request.get("hasPostData"):
+            try:
+                body = driver.execute_cdp_cmd(
+                    "Network.getRequestPostData", {"requestId": params.get("requestId")}
+                ).get("postData")
+            except Exception:
+                return None
+        return ExportTemplate.from_request(url, request.get("method", "GET"),
+                                           request.get("headers", {}), body, sample)
+    return None
+
+
+class HttpExporter:
+    """Ripete la richiesta di export con i cookie del browser, in parallelo."""
+
+    def __init__(self, template: ExportTemplate, cookies: List[dict], workers: int = 4,
+                 timeout: float = Timeouts.DOWNLOAD):
+        self.template = template
+        self.workers = max(1, int(workers))
+        self.timeout = timeout
+        self.expired = threading.Event()
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.workers)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.session.headers.update(
+            {k: v for k, v in template.headers.items() if k.lower() not in _SKIP_HEADERS}
+        )
+        for cookie in cookies:
+            self.session.cookies.set(
+                cookie["name"], cookie["value"],
+                domain=cookie.get("domain", ""), path=cookie.get("path", "/")
+            )
+
+    @classmethod
+    def from_driver(cls, driver, template: ExportTemplate, **kwargs) -> "HttpExporter":
+        return cls(template, driver.get_cookies(), **kwargs)
+
+    def fetch(self, values: Dict[str, str]) -> bytes:
+        """Contenuto del file Excel per i valori della riga."""
+        url, body = self.template.render(values)
+        response = self.session.request(self.template.method, url, data=body, timeout=self.timeout)
+        if response.status_code != 200:
+            raise ExportError(f"HTTP {response.status_code}")
+        content = response.content
+        if not content.startswith(_XLSX_MAGIC):
+            if "html" in response.headers.get("Content-Type", "").lower():
+                raise SessionExpired("Risposta HTML invece del file (sessione scaduta?)")
+            raise ExportError("Risposta non è un file Excel")
+        return content
+
+    def download(self, values: Dict[str, str], target: Union[Path, Callable[[], Path]]) -> Path:
+        """
+        Scarica il file della riga in `target`. Se `target` è una funzione
+        viene risolto solo a contenuto ricevuto: un file esistente viene
+        sostituito solo se il nuovo è arrivato davvero.
+        """
+        content = self.fetch(values)
+        if callable(target):
+            target = target()
+        target.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = target.with_name(target.name + ".part")
+        tmp_path.write_bytes(content)
+        os.replace(tmp_path, target)
+        return target
+
+    def export_all(self, jobs: List[Tuple[Any, Dict[str, str], Union[Path, Callable[[], Path]]]],
+                   should_stop: Callable[[], bool] = lambda: False) -> Dict[Any, Optional[Path]]:
+        """
+        Scarica `jobs` (chiave, valori, destinazione) in parallelo.
+        Ritorna chiave -> percorso (None se fallita). Alla prima sessione
+        scaduta le richieste rimanenti non vengono inviate.
+        """
+        def run(job):
+            key, values, target = job
+            if should_stop() or self.expired.is_set():
+                return key, None
+            try:
+                return key, self.download(values, target)
+            except SessionExpired:
+                self.expired.set()
+            except (ExportError, requests.RequestException, OSError):
+                pass
+            return key, None
+
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="http-export") as pool:
+            return dict(pool.map(run, jobs))
+
+    def close(self):
+        self.session.close()
@@ -9,11 +9,14 @@ from typing import Optional
 
 from selenium.webdriver.remote.webdriver import WebDriver
 from selenium.webdriver.common.action_chains import ActionChains
-from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import TimeoutException, ElementClickInterceptedException
 
 from src.core.constants import Timeouts
+from src.bots.common import waits
+from src.bots.common.downloads import DownloadManager
+from src.bots.common.tracing import traced
+from src.bots.common.waits import TimedWait
 from src.bots.scarico_ts.locators import ScaricoTSLocators
 from selenium.webdriver.common.by import By # Explicit import for internal use
 
@@ -22,8 +25,8 @@ class ScaricoTSPage:
 
     def __init__(self, driver: WebDriver, log_callback: Optional[callable] = None):
         self.driver = driver
-        self.wait = WebDriverWait(driver, Timeouts.DEFAULT)
-        self.long_wait = WebDriverWait(driver, Timeouts.PAGE_LOAD)
+        self.wait = TimedWait(driver, Timeouts.DEFAULT)
+        self.long_wait = TimedWait(driver, Timeouts.PAGE_LOAD)
         self._log = log_callback or print
 
     def log(self, msg: str):
@@ -31,15 +34,11 @@ class ScaricoTSPage:
 
     def _wait_for_overlay(self):
         """Waits for loading overlay to disappear."""
-        try:
-            xpath = "//div[contains(@class, 'x-mask-msg') or contains(@class, 'x-mask')][not(contains(@style,'display: none'))]"
-            WebDriverWait(self.driver, Timeouts.OVERLAY).until(
-                EC.invisibility_of_element_located((By.XPATH, xpath))
-            )
-            time.sleep(0.3)
-        except TimeoutException:
+        # ⚡ BOLT: pronto appena il portale ExtJS è inattivo, senza pausa fissa
+        if not waits.wait_idle(self.driver, Timeouts.OVERLAY, label="overlay"):
             self.log("⚠️ Timeout attesa overlay.")
 
+    @traced("navigazione")
     def navigate_to_timesheet(self) -> bool:
         """Navigates to Report -> Timesheet."""
         try:
@@ -67,6 +66,7 @@ class ScaricoTSPage:
             self.log(f"✗ Errore navigazione menu: {e}")
             return False
 
+    @traced("filtri")
     def setup_filters(self, supplier: str, date_from: str) -> bool:
         """Sets the initial filters (Supplier and Date)."""
         try:
@@ -83,7 +83,7 @@ class ScaricoTSPage:
                 EC.presence_of_element_located((By.XPATH, option_xpath))
             )
             self.driver.execute_script("arguments[0].scrollIntoView({block: 'nearest'});", option)
-            time.sleep(0.5)
+            waits.wait_idle(self.driver, Timeouts.SHORT, label="tendina fornitore")
             self.driver.execute_script("arguments[0].click();", option)
             self._wait_for_overlay()
 
@@ -100,6 +100,7 @@ class ScaricoTSPage:
             self.log(f"✗ Errore impostazione filtri: {e}")
             return False
 
+    @traced("oda")
     def search_and_download(self, oda_number: str, oda_position: str, download_dir: Path) -> bool:
         """Performs search for specific OdA and downloads the Excel."""
         try:
@@ -135,24 +136,17 @@ class ScaricoTSPage:
 
     def _download_excel(self, download_dir: Path, oda_number: str, oda_position: str) -> bool:
         """Handles the file download logic."""
+        job = None
         try:
-            files_before = {f for f in download_dir.iterdir() if f.is_file() and f.suffix.lower() == '.xlsx'}
+            job = DownloadManager(self.driver, download_dir, self.log).start()
 
             # Click Export
             self.wait.until(
                 EC.element_to_be_clickable(ScaricoTSLocators.EXPORT_EXCEL_BUTTON)
             ).click()
 
-            # Wait for file
-            downloaded_file = None
-            start_time = time.time()
-            while time.time() - start_time < Timeouts.DOWNLOAD:
-                current_files = {f for f in download_dir.iterdir() if f.is_file() and f.suffix.lower() == '.xlsx'}
-                new_files = current_files - files_before
-                if new_files:
-                    downloaded_file = max(list(new_files), key=lambda f: f.stat().st_mtime)
-                    break
-                time.sleep(0.5)
+            # Wait for file (completamento via eventi CDP)
+            downloaded_file = job.wait(Timeouts.DOWNLOAD)
 
             if downloaded_file and downloaded_file.exists():
                 # Rename
@@ -162,18 +156,21 @@ class ScaricoTSPage:
 
                 # Handle duplicates
                 counter = 1
-                while new_path.exists() and new_path.resolve() != downloaded_file.resolve():
+                while new_path.exists():
                     timestamp = time.strftime("%Y%m%d-%H%M%S")
                     new_path = download_dir / f"{oda_number}{pos_suffix}-{timestamp}_{counter}.xlsx"
                     counter += 1
 
-                downloaded_file.rename(new_path)
+                job.move_to(downloaded_file, new_path)
                 self.log(f"  ✓ File scaricato: {new_path.name}")
                 return True
             else:
                 self.log("  ✗ Download fallito o file non trovato.")
+                job.discard()
                 return False
 
         except Exception as e:
             self.log(f"  ✗ Errore click download: {e}")
+            if job:
+                job.discard()
             return False
@@ -95,15 +95,16 @@ class TimbratureBot(BaseBot):
 
     def execute(self, data: Any) -> bool:
         """Executes full workflow with login/logout."""
-        try:
-            if not self._safe_login_with_retry():
-                return False
+        with self._measured_run():
+            try:
+                if not self._safe_login_with_retry():
+                    return False
 
-            result = self.run(data)
-            self._logout()
-            return result
-        except Exception as e:
-            self.log(f"Errore critico: {e}")
-            return False
-        finally:
-            self.cleanup()
+                result = self.run(data)
+                self._logout()
+                return result
+            except Exception as e:
+                self.log(f"Errore critico: {e}")
+                return False
+            finally:
+                self.cleanup()
@@ -12,11 +12,14 @@ from typing import Optional
 from selenium.webdriver.remote.webdriver import WebDriver
 from selenium.webdriver.common.keys import Keys
 from selenium.webdriver.common.action_chains import ActionChains
-from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import TimeoutException, ElementClickInterceptedException
 
 from src.core.constants import Timeouts
+from src.bots.common import waits
+from src.bots.common.downloads import DownloadManager, download_root
+from src.bots.common.tracing import traced
+from src.bots.common.waits import TimedWait
 from src.bots.timbrature.locators import TimbratureLocators
 
 class TimbraturePage:
@@ -24,33 +27,20 @@ class TimbraturePage:
 
     def __init__(self, driver: WebDriver, log_callback: Optional[callable] = None):
         self.driver = driver
-        self.wait = WebDriverWait(driver, Timeouts.DEFAULT)
-        self.long_wait = WebDriverWait(driver, Timeouts.PAGE_LOAD)
+        self.wait = TimedWait(driver, Timeouts.DEFAULT)
+        self.long_wait = TimedWait(driver, Timeouts.PAGE_LOAD)
         self._log = log_callback or print
 
     def log(self, msg: str):
         self._log(msg)
 
     def _wait_for_overlay(self):
-        """Waits for loading overlay to disappear."""
-        try:
-            xpath = "//div[contains(@class, 'x-mask-msg') or contains(@class, 'x-mask')][not(contains(@style,'display: none'))]"
-            # Fix: EC does not contain By. Use By directly.
-            from selenium.webdriver.common.by import By
-            WebDriverWait(self.driver, Timeouts.OVERLAY).until(
-                EC.invisibility_of_element_located((By.XPATH, xpath))
-            )
-            time.sleep(0.3)
-        except TimeoutException:
+        """Waits for the ExtJS portal to be idle (no loading mask, Ajax or animations)."""
+        # ⚡ BOLT: niente pausa fissa dopo la maschera
+        if not waits.wait_idle(self.driver, Timeouts.OVERLAY, label="overlay"):
             self.log("⚠️ Timeout attesa overlay.")
-        except AttributeError:
-             # Fallback if EC.By is not available (Selenium version differences or mixup)
-            from selenium.webdriver.common.by import By
-            WebDriverWait(self.driver, Timeouts.OVERLAY).until(
-                EC.invisibility_of_element_located((By.XPATH, xpath))
-            )
-            time.sleep(0.3)
 
+    @traced("navigazione")
     def navigate_to_timbrature(self) -> bool:
         """Navigates to Report -> Timbrature."""
         try:
@@ -59,7 +49,7 @@ class TimbraturePage:
                 EC.element_to_be_clickable(TimbratureLocators.REPORT_MENU)
             )
             report_element.click()
-            time.sleep(1.5)
+            waits.wait_idle(self.driver, Timeouts.SHORT, label="menu Report")
 
             # Keyboard navigation to tab
             actions = ActionChains(self.driver)
@@ -68,13 +58,13 @@ class TimbraturePage:
             actions.send_keys(Keys.TAB).pause(0.3)
             actions.send_keys(Keys.ENTER).perform()
 
-            time.sleep(1.0)
             self._wait_for_overlay()
             return True
         except Exception as e:
             self.log(f"Errore navigazione: {e}")
             return False
 
+    @traced("filtri")
     def set_filters(self, fornitore: str, data_da: str, data_a: str) -> bool:
         """Sets the search filters."""
         try:
@@ -132,8 +122,8 @@ class TimbraturePage:
             self.log("Attendo caricamento risultati...")
             self._wait_for_overlay()
             
-            # Wait for results table or empty message
-            time.sleep(1.0) # Grace period for table render
+            # Wait for results table render (ExtJS idle)
+            waits.wait_idle(self.driver, Timeouts.SHORT, label="tabella risultati")
             
             self.log("Caricamento terminato.")
             return True
@@ -170,43 +160,42 @@ class TimbraturePage:
                             self.driver.execute_script("arguments[0].click();", arrow_element)
                         break
                 except Exception:
-                    time.sleep(1)
+                    waits.pause(1, label="retry fornitore")
 
             if not arrow_element:
                 raise Exception("Impossibile trovare la freccia del fornitore.")
 
-            time.sleep(0.5) # Wait for list animation
+            waits.wait_idle(self.driver, Timeouts.SHORT, label="tendina fornitore")
 
             # Select option with retry
             from selenium.webdriver.common.by import By
             option_xpath = f"//li[contains(text(), '{fornitore}')]"
 
             # Wait specifically for the option to be visible
-            option = WebDriverWait(self.driver, 5).until(
+            option = TimedWait(self.driver, 5).until(
                 EC.presence_of_element_located((By.XPATH, option_xpath))
             )
 
             self.driver.execute_script("arguments[0].scrollIntoView({block: 'nearest'});", option)
-            time.sleep(0.3)
 
             try:
                 option.click()
             except (ElementClickInterceptedException, Exception):
                 self.driver.execute_script("arguments[0].click();", option)
 
-            time.sleep(0.5)
             self._wait_for_overlay()
 
         except Exception as e:
             self.log(f"⚠️ Errore selezione fornitore: {e}")
             # Non-blocking, might work anyway if default is correct, but logged.
 
+    @traced("download")
     def download_excel(self) -> str:
         """Finds and clicks the Excel download button, returning the file path."""
         downloaded_file = ""
         try:
             self.log("Cerco pulsante Excel...")
-            time.sleep(1.0)
+            waits.wait_idle(self.driver, Timeouts.SHORT)
             excel_btn = self._find_excel_button()
 
             if not excel_btn:
@@ -214,7 +203,9 @@ class TimbraturePage:
                 return ""
 
             self.driver.execute_script("arguments[0].scrollIntoView({block: 'center'});", excel_btn)
-            time.sleep(0.5)
+            waits.wait_idle(self.driver, Timeouts.SHORT)
+
+            job = DownloadManager(self.driver, download_root(), self.log).start()
 
             self.log("Clicco su Excel...")
             try:
@@ -223,8 +214,7 @@ class TimbraturePage:
                 self.driver.execute_script("arguments[0].click();", excel_btn)
 
             self.log("Attendo download...")
-            time.sleep(3.0)
-            downloaded_file = self._rename_latest_download("timbrature_temp")
+            downloaded_file = self._rename_latest_download(job, "timbrature_temp")
             return downloaded_file
 
         except Exception as e:
@@ -241,42 +231,27 @@ class TimbraturePage:
 
         for locator in strategies:
             try:
-                return WebDriverWait(self.driver, 2).until(
+                return TimedWait(self.driver, 2).until(
                     EC.element_to_be_clickable(locator)
                 )
             except TimeoutException:
                 continue
         return None
 
-    def _rename_latest_download(self, new_name_base: str) -> str:
-        """Finds latest download in system Downloads and moves it to temp folder."""
-        source_dir = Path.home() / "Downloads"
+    def _rename_latest_download(self, job, new_name_base: str) -> str:
+        """Waits for the job's download and moves it to the temp folder."""
         from src.core.config_manager import CONFIG_DIR
         dest_dir = CONFIG_DIR / "temp"
         dest_dir.mkdir(parents=True, exist_ok=True)
 
-        timeout = Timeouts.DOWNLOAD
-        start_time = time.time()
-        latest_file = None
-
-        while time.time() - start_time < timeout:
-            files = list(source_dir.glob("*"))
-            files = [f for f in files if not f.name.endswith(('.crdownload', '.tmp')) and f.is_file()]
-
-            if files:
-                latest_file = max(files, key=lambda f: f.stat().st_mtime)
-                if time.time() - latest_file.stat().st_mtime < 20:
-                    break
-            time.sleep(1)
-
-        if not latest_file:
+        downloaded = job.wait(Timeouts.DOWNLOAD)
+        if not downloaded:
+            job.discard()
             return ""
 
         try:
-            ext = latest_file.suffix
-            new_path = dest_dir / f"{new_name_base}_{int(time.time())}{ext}"
-            shutil.move(str(latest_file), str(new_path))
-            return str(new_path)
+            new_path = dest_dir / f"{new_name_base}_{int(time.time())}{downloaded.suffix}"
+            return str(job.move_to(downloaded, new_path))
         except Exception as e:
             self.log(f"Errore spostamento file: {e}")
             return ""
@@ -23,6 +23,17 @@ DEFAULT_CONFIG: Dict[str, Any] = {
     "default_contract": "",
     "browser_headless": False,
     "browser_timeout": 30,
+    "browser_session_pool": True,
+    "browser_pool_size": 2,
+    "browser_pool_idle_minutes": 10,
+    "parallel_workers": 1,
+    "parallel_use_all_accounts": False,
+    "http_export_fast_path": False,
+    "http_export_workers": 4,
+    "download_skip_unchanged_hours": 0,
+    "resource_blocking_profile": "minimo",
+    "resource_blocking_extra": [],
+    "resource_blocking_allow": [],
     "download_path": "",
     "fornitori": [],
     "last_ts_data": [],
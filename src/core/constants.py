@@ -34,3 +34,6 @@ class BrowserConfig:
     WINDOW_SIZE = "1920,1080"
     USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
     CACHE_DIR_NAME = "chrome_profile"
+    # Profili di blocco risorse (src.bots.common.resource_blocking), dal più prudente
+    RESOURCE_BLOCKING_PROFILES = ("disattivato", "minimo", "standard", "aggressivo")
+    RESOURCE_BLOCKING_DEFAULT = "minimo"
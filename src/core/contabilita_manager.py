@@ -11,6 +11,8 @@ import warnings
 import io
 import json
 import zipfile
+from collections import Counter
+from dataclasses import dataclass, field
 from typing import List, Dict, Tuple, Optional, Callable
 from datetime import datetime
 from src.utils.parsing import parse_currency
@@ -30,6 +32,17 @@ try:
 except ImportError:
     openpyxl = None
 
+@dataclass
+class ScaricoOreDelta:
+    """
+    Differenza applicata da import_scarico_ore.
+    `added_rows` sono righe SCARICO_ORE_COLS seguite dall'id assegnato.
+    """
+    removed_ids: List[int] = field(default_factory=list)
+    added_rows: List[Tuple] = field(default_factory=list)
+    db_version: str = ""
+
+
 class ContabilitaManager:
     """Manager per la gestione del database e dell'importazione Excel."""
 
@@ -585,14 +598,21 @@ class ContabilitaManager:
             return False, f"Errore importazione Attività Programmate: {e}", 0, 0
 
     @classmethod
-    def import_scarico_ore(cls, file_path: str, progress_callback: Optional[Callable[[int, int], None]] = None) -> Tuple[bool, str, int, int]:
-        """Importa il file Scarico Ore Cantiere con supporto a stili e gestione zeri."""
+    def import_scarico_ore(cls, file_path: str, progress_callback: Optional[Callable[[int, int], None]] = None) -> Tuple[bool, str, int, int, Optional[ScaricoOreDelta]]:
+        """
+        Importa il file Scarico Ore Cantiere con supporto a stili e gestione zeri.
+
+        Il DB viene aggiornato per differenza (multinsieme di righe): si
+        cancellano solo le righe sparite e si inseriscono solo quelle nuove.
+        Oltre ai conteggi ritorna la differenza concreta (ScaricoOreDelta),
+        che la GUI applica al modello in memoria senza ricaricare tutto.
+        """
         path = Path(file_path)
         if not path.exists():
-            return False, f"File Scarico Ore non trovato: {file_path}", 0, 0
+            return False, f"File Scarico Ore non trovato: {file_path}", 0, 0, None
 
         if not openpyxl:
-            return False, "Modulo 'openpyxl' mancante.", 0, 0
+            return False, "Modulo 'openpyxl' mancante.", 0, 0, None
 
         total_added = 0
         total_removed = 0
@@ -629,7 +649,7 @@ class ContabilitaManager:
                 wb_data = openpyxl.load_workbook(wb_file, data_only=True, read_only=False)
 
             if "SCARICO ORE" not in wb_data.sheetnames:
-                 return False, "Foglio 'SCARICO ORE' non trovato.", 0, 0
+                 return False, "Foglio 'SCARICO ORE' non trovato.", 0, 0, None
             ws_data = wb_data["SCARICO ORE"]
 
             # 2. Iterate and Extract
@@ -741,29 +761,50 @@ class ContabilitaManager:
             with db_manager.get_connection(cls.DB_PATH) as conn:
                 cursor = conn.cursor()
 
-                # Diff Logic
+                # ⚡ BOLT: Diff per multinsieme (le righe duplicate contano).
+                # Le righe invariate mantengono il loro id: niente DELETE totale + reinserimento.
                 cols = cls.SCARICO_ORE_COLS
-                cursor.execute(f"SELECT {', '.join(cols)} FROM scarico_ore")
-                existing_rows_set = set(cursor.fetchall())
-
-                new_rows_set = set(rows_to_insert)
+                cursor.execute(f"SELECT id, {', '.join(cols)} FROM scarico_ore")
+                existing: Dict[Tuple, List[int]] = {}
+                for row in cursor.fetchall():
+                    existing.setdefault(tuple(row[1:]), []).append(row[0])
+
+                available = Counter({key: len(ids) for key, ids in existing.items()})
+                new_rows = []
+                for db_row in rows_to_insert:
+                    if available[db_row] > 0:
+                        available[db_row] -= 1
+                    else:
+                        new_rows.append(db_row)
+                removed_ids = [
+                    row_id
+                    for key, ids in existing.items()
+                    for row_id in ids[:available[key]]
+                ]
 
-                total_added = len(new_rows_set - existing_rows_set)
-                total_removed = len(existing_rows_set - new_rows_set)
+                total_added = len(new_rows)
+                total_removed = len(removed_ids)
 
-                cursor.execute("DELETE FROM scarico_ore") # Full refresh
+                if removed_ids:
+                    cursor.executemany("DELETE FROM scarico_ore WHERE id = ?", [(i,) for i in removed_ids])
 
-                if rows_to_insert:
+                added_rows = []
+                if new_rows:
+                    cursor.execute("SELECT COALESCE(MAX(id), 0) FROM scarico_ore")
+                    last_id = cursor.fetchone()[0]
                     placeholders = ', '.join(['?'] * len(cols))
                     query = f"INSERT INTO scarico_ore ({', '.join(cols)}) VALUES ({placeholders})"
-                    cursor.executemany(query, rows_to_insert)
+                    cursor.executemany(query, new_rows)
+                    cursor.execute(f"SELECT {', '.join(cols)}, id FROM scarico_ore WHERE id > ?", (last_id,))
+                    added_rows = cursor.fetchall()
 
                 conn.commit()
 
-            return True, f"Importate {len(rows_to_insert)} righe da Scarico Ore.", total_added, total_removed
+            delta = ScaricoOreDelta(removed_ids, added_rows, cls.get_scarico_ore_version())
+            return True, f"Importate {len(rows_to_insert)} righe da Scarico Ore.", total_added, total_removed, delta
 
         except Exception as e:
-            return False, f"Errore importazione Scarico Ore: {e}", 0, 0
+            return False, f"Errore importazione Scarico Ore: {e}", 0, 0, None
 
     @classmethod
     def get_available_years(cls) -> List[int]:
@@ -942,13 +983,16 @@ class ContabilitaManager:
         except: return []
 
     @classmethod
-    def get_scarico_ore_data(cls) -> List[Tuple]:
-        """Restituisce tutti i dati della tabella scarico_ore inclusi gli stili."""
+    def get_scarico_ore_data(cls, include_id: bool = False) -> List[Tuple]:
+        """
+        Restituisce tutti i dati della tabella scarico_ore inclusi gli stili.
+        Con include_id=True l'id è accodato come ultimo campo di ogni riga.
+        """
         if not cls.DB_PATH.exists(): return []
         try:
             with db_manager.get_connection(cls.DB_PATH, read_only=True) as conn:
                 cursor = conn.cursor()
-                cols = cls.SCARICO_ORE_COLS
+                cols = list(cls.SCARICO_ORE_COLS) + (['id'] if include_id else [])
                 query = f"SELECT {', '.join(cols)} FROM scarico_ore ORDER BY id DESC"
                 cursor.execute(query)
                 rows = cursor.fetchall()
@@ -956,6 +1000,42 @@ class ContabilitaManager:
         except:
             return []
 
+    @classmethod
+    def get_year_version(cls, year: int) -> str:
+        """
+        Versione dei dati di un anno (Dati + Giornaliere), per validare i KPI in cache.
+        Le importazioni cancellano e reinseriscono l'anno: COUNT/MAX(id) cambiano sempre.
+        """
+        if not cls.DB_PATH.exists(): return "0-0:0-0"
+        try:
+            with db_manager.get_connection(cls.DB_PATH, read_only=True) as conn:
+                cursor = conn.cursor()
+                parts = []
+                for table in ("contabilita", "giornaliere"):
+                    cursor.execute(f"SELECT COUNT(*), COALESCE(MAX(id), 0) FROM {table} WHERE year = ?", (year,))
+                    count, max_id = cursor.fetchone()
+                    parts.append(f"{count}-{max_id}")
+                return ":".join(parts)
+        except:
+            return "0-0:0-0"
+
+    @classmethod
+    def get_scarico_ore_version(cls) -> str:
+        """
+        Versione dei dati scarico_ore, per validare le cache derivate.
+        Con AUTOINCREMENT gli id non vengono riusati: ogni inserimento fa
+        crescere MAX(id) e ogni cancellazione cambia COUNT(*).
+        """
+        if not cls.DB_PATH.exists(): return "0-0"
+        try:
+            with db_manager.get_connection(cls.DB_PATH, read_only=True) as conn:
+                cursor = conn.cursor()
+                cursor.execute("SELECT COUNT(*), COALESCE(MAX(id), 0) FROM scarico_ore")
+                count, max_id = cursor.fetchone()
+                return f"{count}-{max_id}"
+        except:
+            return "0-0"
+
     @classmethod
     def get_year_stats(cls, year: int) -> Dict:
         """Calcola statistiche avanzate per l'anno specificato (Tabella Dati) + KPI Diretti/Indiretti."""
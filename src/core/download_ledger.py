@@ -0,0 +1,160 @@
+"""
+Bot TS - Download Ledger
+Registro dei timesheet scaricati (SQLite).
+
+Per ogni OdA/posizione, periodo e fornitore conserva l'ultimo file
+scaricato con dimensione, hash del contenuto e data del download. Scarico TS
+lo usa per non ripassare dal portale le righe scaricate da meno di N ore
+(opzione "salta invariati") e per riconoscere un nuovo download identico al
+precedente (stesso hash).
+"""
+import hashlib
+import sqlite3
+import threading
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import NamedTuple, Optional
+
+from src.core import config_manager
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS downloads (
+    oda TEXT NOT NULL,
+    posizione TEXT NOT NULL,
+    data_da TEXT NOT NULL,
+    data_a TEXT NOT NULL,
+    fornitore TEXT NOT NULL,
+    file_path TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    content_hash TEXT NOT NULL,
+    downloaded_at TEXT NOT NULL,
+    changed_at TEXT NOT NULL,
+    PRIMARY KEY (oda, posizione, data_da, data_a, fornitore)
+);
+"""
+
+_TIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+
+def _now() -> str:
+    return datetime.now().strftime(_TIME_FORMAT)
+
+
+def file_digest(path: Path) -> str:
+    """SHA-256 del contenuto del file."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class DownloadKey(NamedTuple):
+    """Identità di un timesheet: stessa riga e stessi filtri del portale."""
+    oda: str
+    posizione: str
+    data_da: str
+    data_a: str
+    fornitore: str
+
+
+@dataclass
+class LedgerEntry:
+    key: DownloadKey
+    file_path: str
+    size: int
+    content_hash: str
+    downloaded_at: str
+    changed_at: str
+
+    @property
+    def path(self) -> Path:
+        return Path(self.file_path)
+
+    def age_hours(self, now: Optional[datetime] = None) -> float:
+        downloaded = datetime.strptime(self.downloaded_at, _TIME_FORMAT)
+        return ((now or datetime.now()) - downloaded).total_seconds() / 3600
+
+    def file_intact(self) -> bool:
+        """Il file registrato è ancora al suo posto, con la stessa dimensione."""
+        try:
+            return self.path.stat().st_size == self.size
+        except OSError:
+            return False
+
+
+class DownloadLedger:
+    """Accesso al registro dei download (thread-safe, una connessione per operazione)."""
+
+    def __init__(self, db_path: Optional[Path] = None):
+        self.db_path = Path(db_path or config_manager.CONFIG_DIR / "data" / "download_ledger.db")
+        self._lock = threading.Lock()
+        self._ready = False
+
+    @contextmanager
+    def _connect(self):
+        with self._lock:
+            if not self._ready:
+                self.db_path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(str(self.db_path), timeout=10)
+            try:
+                conn.row_factory = sqlite3.Row
+                if not self._ready:
+                    conn.execute("PRAGMA journal_mode=WAL;")
+                    conn.executescript(_SCHEMA)
+                    self._ready = True
+                yield conn
+                conn.commit()
+            finally:
+                conn.close()
+
+    @staticmethod
+    def _entry(row: sqlite3.Row) -> LedgerEntry:
+        return LedgerEntry(
+            key=DownloadKey(row["oda"], row["posizione"], row["data_da"], row["data_a"], row["fornitore"]),
+            file_path=row["file_path"], size=row["size"], content_hash=row["content_hash"],
+            downloaded_at=row["downloaded_at"], changed_at=row["changed_at"],
+        )
+
+    def lookup(self, key: DownloadKey) -> Optional[LedgerEntry]:
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT * FROM downloads WHERE oda = ? AND posizione = ? AND data_da = ? "
+                "AND data_a = ? AND fornitore = ?", tuple(key)
+            ).fetchone()
+        return self._entry(row) if row else None
+
+    def fresh(self, key: DownloadKey, max_age_hours: float) -> Optional[LedgerEntry]:
+        """Ultimo download se più recente di `max_age_hours` e con il file ancora intatto."""
+        if max_age_hours <= 0:
+            return None
+        entry = self.lookup(key)
+        if entry and entry.age_hours() < max_age_hours and entry.file_intact():
+            return entry
+        return None
+
+    def record(self, key: DownloadKey, path: Path, content_hash: Optional[str] = None) -> LedgerEntry:
+        """
+        Registra un download appena concluso. `changed_at` resta quello del
+        download precedente se il contenuto (hash) non è cambiato.
+        """
+        path = Path(path)
+        content_hash = content_hash or file_digest(path)
+        now = _now()
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT INTO downloads (oda, posizione, data_da, data_a, fornitore, file_path, size, "
+                "content_hash, downloaded_at, changed_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT (oda, posizione, data_da, data_a, fornitore) DO UPDATE SET "
+                "changed_at = CASE WHEN content_hash = excluded.content_hash "
+                "THEN changed_at ELSE excluded.changed_at END, "
+                "file_path = excluded.file_path, size = excluded.size, "
+                "content_hash = excluded.content_hash, downloaded_at = excluded.downloaded_at",
+                (*key, str(path), path.stat().st_size, content_hash, now, now)
+            )
+        return self.lookup(key)
+
+
+download_ledger = DownloadLedger()
@@ -0,0 +1,375 @@
+"""
+Bot TS - Job Queue
+Coda persistente dei lavori dei bot (SQLite), con stato per riga e ripresa.
+
+Ogni esecuzione di un bot a righe (Scarico TS, Dettagli OdA) è un job: le
+righe sono task con stato, tentativi, ultimo messaggio e file prodotto,
+salvati appena la riga termina (checkpoint). Il `JobRunner` esegue solo i
+task non ancora completati e ritenta quelli falliti con backoff esponenziale, creando un bot nuovo a ogni tentativo (browser
+pulito dopo un crash o un logout del portale). Un job interrotto, anche da
+una chiusura dell'applicazione, può essere ripreso: le righe già completate
+non vengono rieseguite.
+"""
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from src.core import config_manager
+from src.core.constants import BotStatus
+
+# Stati del job
+JOB_QUEUED = "in coda"
+JOB_RUNNING = "in esecuzione"
+JOB_COMPLETED = "completato"
+JOB_FAILED = "fallito"
+JOB_INTERRUPTED = "interrotto"
+
+# Stati del task (riga)
+TASK_PENDING = "pending"
+TASK_DONE = "done"
+TASK_FAILED = "failed"
+# Errore definitivo (es. dati della riga mancanti): non viene ritentato
+TASK_REJECTED = "rejected"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    bot_id TEXT NOT NULL,
+    fingerprint TEXT NOT NULL,
+    params TEXT NOT NULL,
+    bot_kwargs TEXT NOT NULL,
+    status TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    created_at TEXT NOT NULL,
+    updated_at TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS tasks (
+    job_id INTEGER NOT NULL REFERENCES jobs(id) ON DELETE CASCADE,
+    idx INTEGER NOT NULL,
+    row TEXT NOT NULL,
+    status TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    message TEXT NOT NULL DEFAULT '',
+    output_path TEXT,
+    updated_at TEXT NOT NULL,
+    PRIMARY KEY (job_id, idx)
+);
+CREATE INDEX IF NOT EXISTS idx_jobs_lookup ON jobs(bot_id, fingerprint, status);
+"""
+
+
+def _now() -> str:
+    return datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+
+def fingerprint(bot_id: str, rows: List[Any], params: Dict[str, Any]) -> str:
+    """Identità di un lavoro: stesso bot, stesse righe, stessi parametri."""
+    payload = json.dumps({"bot": bot_id, "rows": rows, "params": params}, sort_keys=True, default=str)
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+
+@dataclass
+class Job:
+    id: int
+    bot_id: str
+    params: Dict[str, Any]
+    bot_kwargs: Dict[str, Any]
+    status: str
+    attempts: int
+    created_at: str
+    updated_at: str
+    total: int = 0
+    done: int = 0
+    failed: int = 0
+
+    @property
+    def remaining(self) -> int:
+        return self.total - self.done
+
+
+class JobQueue:
+    """Accesso alla coda dei job (thread-safe, una connessione per operazione)."""
+
+    def __init__(self, db_path: Optional[Path] = None):
+        self.db_path = Path(db_path or config_manager.CONFIG_DIR / "data" / "bot_jobs.db")
+        self._lock = threading.Lock()
+        self._ready = False
+
+    @contextmanager
+    def _connect(self):
+        with self._lock:
+            if not self._ready:
+                self.db_path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(str(self.db_path), timeout=10)
+            try:
+                conn.row_factory = sqlite3.Row
+                conn.execute("PRAGMA foreign_keys=ON;")
+                if not self._ready:
+                    conn.execute("PRAGMA journal_mode=WAL;")
+                    conn.executescript(_SCHEMA)
+                    # Job rimasti "in esecuzione" da una sessione terminata male
+                    conn.execute("UPDATE jobs SET status = ? WHERE status = ?", (JOB_INTERRUPTED, JOB_RUNNING))
+                    self._ready = True
+                yield conn
+                conn.commit()
+            finally:
+                conn.close()
+
+    # --- Job ---
+
+    def create_job(self, bot_id: str, rows: List[Dict[str, Any]], params: Dict[str, Any],
+                   bot_kwargs: Optional[Dict[str, Any]] = None) -> int:
+        now = _now()
+        with self._connect() as conn:
+            cursor = conn.execute(
+                "INSERT INTO jobs (bot_id, fingerprint, params, bot_kwargs, status, created_at, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (bot_id, fingerprint(bot_id, rows, params), json.dumps(params, default=str),
+                 json.dumps(bot_kwargs or {}, default=str), JOB_QUEUED, now, now)
+            )
+            job_id = cursor.lastrowid
+            conn.executemany(
+                "INSERT INTO tasks (job_id, idx, row, status, updated_at) VALUES (?, ?, ?, ?, ?)",
+                [(job_id, i, json.dumps(row, default=str), TASK_PENDING, now) for i, row in enumerate(rows, 1)]
+            )
+        return job_id
+
+    def find_resumable(self, bot_id: str, rows: List[Dict[str, Any]], params: Dict[str, Any]) -> Optional[int]:
+        """Job non completato con le stesse righe e parametri, se esiste (il più recente)."""
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT id FROM jobs WHERE bot_id = ? AND fingerprint = ? AND status IN (?, ?, ?) "
+                "ORDER BY id DESC LIMIT 1",
+                (bot_id, fingerprint(bot_id, rows, params), JOB_QUEUED, JOB_FAILED, JOB_INTERRUPTED)
+            ).fetchone()
+        return row["id"] if row else None
+
+    def get_job(self, job_id: int) -> Optional[Job]:
+        jobs = self._select_jobs("WHERE j.id = ?", (job_id,))
+        return jobs[0] if jobs else None
+
+    def list_jobs(self, bot_id: Optional[str] = None, limit: int = 100) -> List[Job]:
+        if bot_id:
+            return self._select_jobs("WHERE j.bot_id = ? ORDER BY j.id DESC LIMIT ?", (bot_id, limit))
+        return self._select_jobs("ORDER BY j.id DESC LIMIT ?", (limit,))
+
+    def _select_jobs(self, clause: str, params: tuple) -> List[Job]:
+        query = f"""
+            SELECT j.*,
+                   (SELECT COUNT(*) FROM tasks t WHERE t.job_id = j.id) AS total,
+                   (SELECT COUNT(*) FROM tasks t WHERE t.job_id = j.id AND t.status = '{TASK_DONE}') AS done,
+                   (SELECT COUNT(*) FROM tasks t WHERE t.job_id = j.id
+                    AND t.status IN ('{TASK_FAILED}', '{TASK_REJECTED}')) AS failed
+            FROM jobs j {clause}
+        """
+        with self._connect() as conn:
+            rows = conn.execute(query, params).fetchall()
+        return [
+            Job(r["id"], r["bot_id"], json.loads(r["params"]), json.loads(r["bot_kwargs"]), r["status"],
+                r["attempts"], r["created_at"], r["updated_at"], r["total"], r["done"], r["failed"])
+            for r in rows
+        ]
+
+    def set_status(self, job_id: int, status: str, new_attempt: bool = False):
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE jobs SET status = ?, attempts = attempts + ?, updated_at = ? WHERE id = ?",
+                (status, 1 if new_attempt else 0, _now(), job_id)
+            )
+
+    def set_bot_kwargs(self, job_id: int, bot_kwargs: Dict[str, Any]):
+        """Opzioni del bot correnti (es. cartella download) per la ripresa del job."""
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE jobs SET bot_kwargs = ?, updated_at = ? WHERE id = ?",
+                (json.dumps(bot_kwargs, default=str), _now(), job_id)
+            )
+
+    def delete_job(self, job_id: int):
+        with self._connect() as conn:
+            conn.execute("DELETE FROM jobs WHERE id = ?", (job_id,))
+
+    def clear_completed(self):
+        with self._connect() as conn:
+            conn.execute("DELETE FROM jobs WHERE status = ?", (JOB_COMPLETED,))
+
+    # --- Task ---
+
+    def pending_tasks(self, job_id: int) -> List[Tuple[int, Dict[str, Any]]]:
+        """Righe ancora da eseguire (idx 1-based, riga), esclusi gli errori definitivi."""
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT idx, row FROM tasks WHERE job_id = ? AND status NOT IN (?, ?) ORDER BY idx",
+                (job_id, TASK_DONE, TASK_REJECTED)
+            ).fetchall()
+        return [(r["idx"], json.loads(r["row"])) for r in rows]
+
+    def tasks(self, job_id: int) -> List[Dict[str, Any]]:
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT idx, row, status, attempts, message, output_path FROM tasks WHERE job_id = ? ORDER BY idx",
+                (job_id,)
+            ).fetchall()
+        return [{**dict(r), "row": json.loads(r["row"])} for r in rows]
+
+    def record_results(self, job_id: int, results: List[Tuple]):
+        """
+        Esiti (idx, ok, messaggio, file prodotto[, ritentabile]) di righe
+        appena eseguite; una riga fallita non ritentabile diventa TASK_REJECTED.
+        """
+        now = _now()
+
+        def status(ok: bool, retry: bool) -> str:
+            if ok:
+                return TASK_DONE
+            return TASK_FAILED if retry else TASK_REJECTED
+
+        with self._connect() as conn:
+            conn.executemany(
+                "UPDATE tasks SET status = ?, attempts = attempts + 1, message = ?, "
+                "output_path = COALESCE(?, output_path), updated_at = ? WHERE job_id = ? AND idx = ?",
+                [(status(ok, rest[0] if rest else True), message or "", output, now, job_id, idx)
+                 for idx, ok, message, output, *rest in results]
+            )
+            conn.execute("UPDATE jobs SET updated_at = ? WHERE id = ?", (now, job_id))
+
+
+class JobRunner:
+    """
+    Esegue un job della coda con l'interfaccia di un bot (eseguibile in
+    `BotWorker`): solo righe non completate, retry con backoff esponenziale.
+    """
+
+    MAX_ATTEMPTS = 3
+    BACKOFF_BASE_SECONDS = 10.0
+    BACKOFF_MAX_SECONDS = 120.0
+
+    def __init__(self, queue: JobQueue, job_id: int, bot_factory: Callable[[List[Dict[str, Any]]], Any]):
+        """
+        Args:
+            queue: Coda dei job
+            job_id: Job da eseguire
+            bot_factory: Crea il bot (o ParallelRunner) per le righe indicate
+        """
+        self.queue = queue
+        self.job_id = job_id
+        self.bot_factory = bot_factory
+        self.status = BotStatus.IDLE
+        self.bot = None
+        self._stop_requested = False
+        self._log_callback: Optional[Callable[[str], None]] = None
+        self._input_callback: Optional[Callable[[str], str]] = None
+
+    @property
+    def name(self) -> str:
+        return f"Job #{self.job_id}"
+
+    def set_log_callback(self, callback: Callable[[str], None]):
+        self._log_callback = callback
+
+    def set_input_callback(self, callback: Callable[[str], str]):
+        self._input_callback = callback
+
+    def log(self, message: str):
+        print(f"[{self.name}] {message}")
+        if self._log_callback:
+            self._log_callback(message)
+
+    def request_stop(self):
+        self._stop_requested = True
+        if self.bot is not None:
+            self.bot.request_stop()
+
+    def backoff(self, attempt: int) -> float:
+        """Attesa prima del tentativo `attempt` (2 -> base, 3 -> 2*base, ...)."""
+        return min(self.BACKOFF_MAX_SECONDS, self.BACKOFF_BASE_SECONDS * 2 ** (attempt - 2))
+
+    def execute(self, data=None) -> bool:
+        """Esegue i task non completati del job; True se tutte le righe sono completate."""
+        self._stop_requested = False
+        self.status = BotStatus.RUNNING
+        job = self.queue.get_job(self.job_id)
+        if job is None:
+            self.log("❌ Job non trovato nella coda.")
+            self.status = BotStatus.ERROR
+            return False
+        if job.done:
+            self.log(f"⏩ Ripresa job #{self.job_id}: {job.done}/{job.total} righe già completate, saltate.")
+
+        for attempt in range(1, self.MAX_ATTEMPTS + 1):
+            pending = self.queue.pending_tasks(self.job_id)
+            if not pending or self._stop_requested:
+                break
+            if attempt > 1:
+                delay = self.backoff(attempt)
+                self.log(f"🔁 Tentativo {attempt}/{self.MAX_ATTEMPTS} per {len(pending)} righe tra {delay:.0f}s...")
+                if not self._sleep(delay):
+                    break
+
+            self.queue.set_status(self.job_id, JOB_RUNNING, new_attempt=True)
+            self._run_attempt(job, pending)
+
+        job = self.queue.get_job(self.job_id)
+        if self._stop_requested:
+            final, self.status = JOB_INTERRUPTED, BotStatus.STOPPED
+        elif job.remaining == 0:
+            final, self.status = JOB_COMPLETED, BotStatus.COMPLETED
+        else:
+            final, self.status = JOB_FAILED, BotStatus.ERROR
+        self.queue.set_status(self.job_id, final)
+        self.log(f"📋 Job #{self.job_id} {final}: {job.done}/{job.total} righe completate.")
+        return final == JOB_COMPLETED
+
+    def _run_attempt(self, job: Job, pending: List[Tuple[int, Dict[str, Any]]]):
+        self.bot = bot = self.bot_factory([row for _, row in pending])
+        if self._log_callback:
+            bot.set_log_callback(self._log_callback)
+        if self._input_callback and hasattr(bot, "set_input_callback"):
+            bot.set_input_callback(self._input_callback)
+        # Checkpoint: ogni riga è salvata appena il bot la completa, così una
+        # chiusura a metà non fa rieseguire le righe già fatte
+        saved = set()
+        if hasattr(bot, "set_row_callback"):
+            bot.set_row_callback(lambda result: self._checkpoint(pending, result, saved))
+        try:
+            bot.execute({**job.params, "rows": [row for _, row in pending]})
+        except Exception as e:
+            self.log(f"✗ Errore tentativo: {e}")
+        finally:
+            self.bot = None
+
+        # Esiti non arrivati dal checkpoint (bot senza callback)
+        for result in getattr(bot, "row_results", []) or []:
+            if result["index"] not in saved:
+                self._checkpoint(pending, result, saved)
+
+    def _checkpoint(self, pending: List[Tuple[int, Dict[str, Any]]], result: Dict[str, Any], saved: set):
+        """Salva l'esito di una riga; l'indice è relativo alle righe passate al bot."""
+        position = result["index"] - 1
+        if not 0 <= position < len(pending):
+            return
+        saved.add(result["index"])
+        self.queue.record_results(self.job_id, [(
+            pending[position][0], bool(result["ok"]), result.get("message", ""),
+            result.get("output"), result.get("retry", True),
+        )])
+
+    def _sleep(self, seconds: float) -> bool:
+        """Attesa interrompibile; False se è stato richiesto lo stop."""
+        deadline = time.monotonic() + seconds
+        while time.monotonic() < deadline:
+            if self._stop_requested:
+                return False
+            time.sleep(0.1)
+        return not self._stop_requested
+
+
+# Singleton instance
+job_queue = JobQueue()
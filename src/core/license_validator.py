@@ -7,6 +7,7 @@ import subprocess
 import json
 import hashlib
 import platform
+import threading
 import uuid
 from datetime import date
 from cryptography.fernet import Fernet
@@ -31,10 +32,99 @@ def _calculate_sha256(filepath):
     return sha256_hash.hexdigest()
 
 
+# ⚡ BOLT: l'ID hardware richiede fino a tre processi esterni (wmic,
+# PowerShell) o lsblk. Viene calcolato una volta, salvato cifrato con
+# PasswordManager e riusato finché l'impronta economica non cambia.
+_HW_CACHE_FILE = "hwid.cache"
+_hw_lock = threading.Lock()
+_hw_id = None
+
+
+def _get_hw_cache_path():
+    from src.core import config_manager
+    return os.path.join(config_manager.CONFIG_DIR, _HW_CACHE_FILE)
+
+
+def _cheap_fingerprint():
+    """
+    Impronta della macchina senza processi esterni: machine-id (Linux) o
+    MachineGuid dal registro (Windows), più il MAC address.
+    """
+    parts = []
+    system = platform.system()
+    if system == 'Windows':
+        try:
+            import winreg
+            with winreg.OpenKey(winreg.HKEY_LOCAL_MACHINE, r"SOFTWARE\Microsoft\Cryptography") as key:
+                parts.append(winreg.QueryValueEx(key, "MachineGuid")[0])
+        except Exception:
+            pass
+    elif system == 'Linux':
+        try:
+            with open('/etc/machine-id', 'r') as f:
+                parts.append(f.read().strip())
+        except Exception:
+            pass
+    parts.append(str(uuid.getnode()))
+    return "|".join(parts)
+
+
+def _load_cached_hardware_id(fingerprint):
+    """ID in cache se l'impronta coincide, altrimenti None."""
+    path = _get_hw_cache_path()
+    if not os.path.exists(path):
+        return None
+    try:
+        from src.utils.security import password_manager
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.loads(password_manager.decrypt(f.read()) or "{}")
+        if data.get("fingerprint") == fingerprint and data.get("hw_id"):
+            return data["hw_id"]
+    except Exception:
+        pass
+    return None
+
+
+def _save_cached_hardware_id(fingerprint, hw_id):
+    try:
+        from src.utils.security import password_manager
+        token = password_manager.encrypt(json.dumps({"fingerprint": fingerprint, "hw_id": hw_id}))
+        if not token:
+            return
+        path = _get_hw_cache_path()
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(token)
+    except Exception as e:
+        print(f"[LICENZA] Impossibile salvare la cache Hardware ID: {e}")
+
+
 def get_hardware_id():
     """
     Ottiene un ID hardware univoco per la macchina.
+
+    Memorizzato nel processo e su disco (cifrato); l'interrogazione
+    dell'hardware si ripete solo se l'impronta economica cambia.
     """
+    global _hw_id
+    with _hw_lock:
+        if _hw_id is not None:
+            return _hw_id
+
+        fingerprint = _cheap_fingerprint()
+        hw_id = _load_cached_hardware_id(fingerprint)
+        if hw_id is None:
+            hw_id = _probe_hardware_id()
+            if hw_id == "ERROR_GETTING_ID":
+                return hw_id
+            _save_cached_hardware_id(fingerprint, hw_id)
+
+        _hw_id = hw_id
+        return hw_id
+
+
+def _probe_hardware_id():
+    """Interroga l'hardware (processi esterni) per l'ID della macchina."""
     system = platform.system()
 
     if system == 'Windows':
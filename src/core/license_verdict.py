@@ -0,0 +1,152 @@
+"""
+Bot TS - License Verdict
+Verdetto di licenza firmato e cache per l'avvio non bloccante.
+
+All'avvio si riusa l'ultimo verdetto VALID salvato localmente (controlli
+solo su file e orologio locale); la validazione completa (Hardware ID,
+orario di rete, download licenza) gira in un thread e interrompe l'utente
+solo se il verdetto cambia.
+"""
+import os
+import json
+import threading
+from datetime import datetime, date, timedelta, timezone
+from cryptography.fernet import Fernet, InvalidToken
+from PyQt6.QtCore import QObject, pyqtSignal
+
+from src.core import license_validator
+from src.core.license_validator import LicenseStatus
+
+# Il token è cifrato e autenticato (Fernet = AES + HMAC-SHA256) con la
+# stessa chiave dei token di grazia: un verdetto alterato non decifra.
+VERDICT_KEY = b'8kHs_rmwqaRUk1AQLGX65g4AEkWUDapWVsMFUQpN9Ek='
+
+# Oltre questa età il verdetto non basta: validazione completa bloccante
+# (stessa finestra del periodo di grazia offline)
+VERDICT_MAX_AGE = timedelta(days=3)
+
+# Tolleranza sull'orologio locale rispetto all'istante della validazione
+CLOCK_TOLERANCE = timedelta(minutes=5)
+
+
+def _get_verdict_path():
+    return os.path.join(license_validator._get_license_paths()["dir"], "verdict.token")
+
+
+def save_verdict(status: LicenseStatus, message: str):
+    """Salva il verdetto VALID corrente; per ogni altro stato lo rimuove."""
+    path = _get_verdict_path()
+    if status != LicenseStatus.VALID:
+        clear_verdict()
+        return
+
+    try:
+        paths = license_validator._get_license_paths()
+        info = license_validator.get_license_info() or {}
+        payload = {
+            "status": status.name,
+            "message": message,
+            "validated_at": datetime.now(timezone.utc).isoformat(),
+            "config_sha256": license_validator._calculate_sha256(paths["config"]),
+            "expiry": info.get("Scadenza Licenza", ""),
+        }
+        token = Fernet(VERDICT_KEY).encrypt(json.dumps(payload).encode("utf-8"))
+
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(token)
+        os.replace(tmp_path, path)
+    except Exception as e:
+        print(f"[LICENZA] Impossibile salvare il verdetto: {e}")
+
+
+def clear_verdict():
+    try:
+        os.remove(_get_verdict_path())
+    except OSError:
+        pass
+
+
+def load_cached_verdict(now: datetime = None):
+    """
+    Ritorna (LicenseStatus.VALID, messaggio) se l'ultimo verdetto è ancora
+    utilizzabile, altrimenti None. Nessuna rete e nessun processo esterno:
+    solo decifratura del token, hash di config.dat e orologio locale.
+    """
+    path = _get_verdict_path()
+    if not os.path.exists(path):
+        return None
+
+    try:
+        with open(path, "rb") as f:
+            payload = json.loads(Fernet(VERDICT_KEY).decrypt(f.read()).decode("utf-8"))
+
+        if payload.get("status") != LicenseStatus.VALID.name:
+            return None
+
+        # La licenza su disco deve essere quella validata
+        config_path = license_validator._get_license_paths()["config"]
+        if not os.path.exists(config_path):
+            return None
+        if license_validator._calculate_sha256(config_path) != payload.get("config_sha256"):
+            return None
+
+        now = now or datetime.now(timezone.utc)
+        validated_at = datetime.fromisoformat(payload["validated_at"])
+        if now < validated_at - CLOCK_TOLERANCE:
+            return None  # Orologio riportato indietro
+        if now - validated_at > VERDICT_MAX_AGE:
+            return None
+
+        expiry_str = payload.get("expiry", "")
+        if expiry_str:
+            day, month, year = map(int, expiry_str.split('/'))
+            if now.date() > date(year, month, day):
+                return None
+
+        return LicenseStatus.VALID, payload.get("message", "")
+    except (InvalidToken, OSError, ValueError, KeyError, TypeError):
+        return None
+
+
+def revalidate():
+    """
+    Validazione completa: stato licenza, download da GitHub se non valida,
+    nuovo controllo. Aggiorna (o rimuove) il verdetto in cache.
+
+    Returns:
+        tuple: (LicenseStatus, message_str)
+    """
+    from src.core.license_updater import run_update
+
+    status, msg = license_validator.get_detailed_license_status()
+
+    # Se la licenza non è valida, proviamo a scaricarla di nuovo
+    if status != LicenseStatus.VALID:
+        print(f"[LICENZA] Stato: {status.name} ({msg}). Tentativo aggiornamento...")
+        run_update() # Forza il download
+        status, msg = license_validator.get_detailed_license_status() # Ricontrolla
+
+    save_verdict(status, msg)
+    return status, msg
+
+
+class LicenseRevalidator(QObject):
+    """
+    Esegue revalidate() in background ed emette (LicenseStatus, messaggio)
+    nel thread della GUI. Il thread è daemon: offline i timeout di rete
+    arrivano a decine di secondi e la chiusura dell'app non deve attenderli.
+    """
+
+    finished_signal = pyqtSignal(object, str)
+
+    def start(self):
+        threading.Thread(target=self._run, name="license-revalidation", daemon=True).start()
+
+    def _run(self):
+        try:
+            status, msg = revalidate()
+        except Exception as e:
+            status, msg = LicenseStatus.ERROR, f"Errore validazione licenza: {e}"
+        self.finished_signal.emit(status, msg)
@@ -3,7 +3,6 @@ Lyra Sentinel
 Monitoraggio proattivo delle anomalie in background.
 """
 from PyQt6.QtCore import QThread, pyqtSignal
-from src.core.contabilita_manager import ContabilitaManager
 from pathlib import Path
 import sqlite3
 
@@ -13,6 +12,9 @@ class LyraSentinel(QThread):
     anomalies_found = pyqtSignal(int) # Emette il numero di anomalie trovate
 
     def run(self):
+        # Import nel thread: pandas/openpyxl non pesano sull'avvio della GUI
+        from src.core.contabilita_manager import ContabilitaManager
+
         anomaly_count = 0
 
         # 1. Check Timbrature (Uscite mancanti recenti)
@@ -0,0 +1,507 @@
+"""
+Bot TS - Scarico Ore Cache
+Cache colonnare su disco per la tabella virtuale Scarico Ore.
+
+Un file per versione dati del DB (vedi ContabilitaManager.get_scarico_ore_version):
+    MAGIC | uint32 lunghezza header | header JSON | array allineati a 64 byte
+
+Le stringhe sono offsets int64 (n+1) + blob UTF-8; le colonne visualizzate
+sono codificate a dizionario (valori distinti + un codice per riga + righe per
+valore), i totali un array float64, gli stili un id per riga (uint16) con la tabella degli stili distinti
+nell'header; la colonna di ricerca ha accanto il suo indice di trigrammi.
+Per ogni riga è salvato anche l'id del DB, così un'importazione può essere
+applicata come differenza (vedi ScaricoOreCache.apply_delta).
+All'avvio il file viene mappato in memoria (np.memmap): nessuna
+deserializzazione riga per riga.
+"""
+import json
+import os
+import struct
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from src.core.config_manager import CONFIG_DIR
+from src.utils.parsing import parse_currency
+from src.utils.search_index import TrigramIndex
+
+MAGIC = b"BTSCOLS\x00"
+FORMAT_VERSION = 4
+_ALIGN = 64
+
+CACHE_DIR = CONFIG_DIR / "data"
+CACHE_PREFIX = "scarico_ore_"
+CACHE_SUFFIX = ".cols"
+
+# Vecchia cache pickle (relativa alla working directory), rimossa al primo salvataggio
+LEGACY_CACHE_PATH = Path("data/scarico_ore_cache.pkl")
+
+# Chiavi del JSON stili, nell'ordine delle colonne visualizzate
+STYLE_KEYS = [
+    'data', 'pers1', 'pers2', 'odc', 'pos', 'dalle', 'alle',
+    'totale_ore', 'descrizione', 'finito', 'commessa'
+]
+N_COLUMNS = len(STYLE_KEYS)
+COL_TOTALE_ORE = 7
+# Posizione dell'id nelle righe lette con get_scarico_ore_data(include_id=True)
+ID_INDEX = N_COLUMNS + 1
+
+
+def _align(offset: int) -> int:
+    return (offset + _ALIGN - 1) // _ALIGN * _ALIGN
+
+
+class StringColumn:
+    """Colonna di stringhe: offsets int64 (n+1) su un blob di byte UTF-8."""
+
+    def __init__(self, offsets: np.ndarray, blob: np.ndarray):
+        self.offsets = offsets
+        self.blob = blob
+        self._list = None
+
+    @classmethod
+    def from_strings(cls, values) -> "StringColumn":
+        encoded = [v.encode("utf-8") for v in values]
+        offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        np.cumsum([len(e) for e in encoded], out=offsets[1:])
+        blob = np.frombuffer(b"".join(encoded), dtype=np.uint8)
+        return cls(offsets, blob)
+
+    @classmethod
+    def concat(cls, head: "StringColumn", tail: "StringColumn") -> "StringColumn":
+        offsets = np.concatenate([head.offsets[:-1], tail.offsets + head.offsets[-1]])
+        return cls(offsets, np.concatenate([head.blob, tail.blob]))
+
+    def take(self, mask: np.ndarray) -> "StringColumn":
+        """Sottoinsieme delle righe con mask=True (senza decodificare le stringhe)."""
+        lengths = np.diff(self.offsets)
+        blob = self.blob[np.repeat(mask, lengths)]
+        offsets = np.zeros(int(mask.sum()) + 1, dtype=np.int64)
+        np.cumsum(lengths[mask], out=offsets[1:])
+        return StringColumn(offsets, blob)
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i) -> str:
+        return self.blob[self.offsets[i]:self.offsets[i + 1]].tobytes().decode("utf-8")
+
+    def to_list(self) -> List[str]:
+        """Tutte le stringhe decodificate (calcolato una volta, poi riusato)."""
+        if self._list is None:
+            data = self.blob.tobytes()
+            offs = self.offsets.tolist()
+            self._list = [data[offs[i]:offs[i + 1]].decode("utf-8") for i in range(len(offs) - 1)]
+        return self._list
+
+
+class DictColumn:
+    """
+    Colonna codificata a dizionario.
+
+    `values` contiene le stringhe distinte (ordinate), `codes[i]` il codice
+    della riga i; le righe di ogni valore sono in forma CSR
+    (`rows[starts[k]:starts[k + 1]]`, ordinate). Valori distinti, conteggi e
+    filtri per valore non richiedono scansioni delle righe.
+    """
+
+    def __init__(self, values: StringColumn, codes: np.ndarray, starts: np.ndarray, rows: np.ndarray):
+        self.values = values
+        self.codes = codes
+        self.starts = starts
+        self.rows = rows
+
+    @classmethod
+    def from_strings(cls, strings) -> "DictColumn":
+        distinct, codes = np.unique(np.array(strings, dtype=object), return_inverse=True)
+        return cls.from_codes(distinct, codes)
+
+    @classmethod
+    def from_codes(cls, distinct: np.ndarray, codes: np.ndarray) -> "DictColumn":
+        """Da valori distinti ordinati + codici; i valori non usati vengono scartati."""
+        counts = np.bincount(codes, minlength=len(distinct))
+        used = counts > 0
+        if not used.all():
+            remap = np.cumsum(used) - 1
+            distinct, codes, counts = distinct[used], remap[codes], counts[used]
+        codes = np.asarray(codes).astype(np.uint32)
+        rows = np.argsort(codes, kind="stable").astype(np.uint32)
+        starts = np.zeros(len(distinct) + 1, dtype=np.int64)
+        np.cumsum(counts, out=starts[1:])
+        return cls(StringColumn.from_strings(distinct.tolist()), codes, starts, rows)
+
+    @classmethod
+    def concat(cls, head: "DictColumn", tail: "DictColumn", keep: np.ndarray) -> "DictColumn":
+        """Righe di `head` seguite dalle righe di `tail` con keep=True (fusione dei dizionari)."""
+        head_values = np.array(head.distinct(), dtype=object)
+        tail_values = np.array(tail.distinct(), dtype=object)
+        merged = np.unique(np.concatenate([head_values, tail_values]))
+        codes = np.concatenate([
+            np.searchsorted(merged, head_values).astype(np.int64)[head.codes],
+            np.searchsorted(merged, tail_values).astype(np.int64)[tail.codes[keep]],
+        ])
+        return cls.from_codes(merged, codes)
+
+    def __len__(self):
+        return len(self.codes)
+
+    def __getitem__(self, i) -> str:
+        return self.values[self.codes[i]]
+
+    def to_list(self) -> List[str]:
+        distinct = self.values.to_list()
+        return [distinct[c] for c in self.codes.tolist()]
+
+    def distinct(self) -> List[str]:
+        return self.values.to_list()
+
+    def counts(self) -> np.ndarray:
+        return np.diff(self.starts)
+
+    def rows_matching(self, allowed) -> np.ndarray:
+        """Righe (ordinate) il cui valore, in minuscolo, è in `allowed`."""
+        postings = [
+            self.rows[self.starts[code]:self.starts[code + 1]]
+            for code, value in enumerate(self.distinct())
+            if value.lower() in allowed
+        ]
+        if not postings:
+            return np.zeros(0, dtype=np.intp)
+        return np.sort(np.concatenate(postings)).astype(np.intp)
+
+
+def _format_date(val) -> str:
+    """YYYY-MM-DD[ hh:mm:ss] -> DD/MM/YYYY; altri formati invariati."""
+    if not val:
+        return ""
+    s_val = str(val)
+    if '-' not in s_val:
+        return s_val
+    try:
+        if len(s_val) >= 10 and s_val[4] == '-' and s_val[7] == '-':
+            return f"{s_val[8:10]}/{s_val[5:7]}/{s_val[0:4]}"
+        parts = s_val.split(' ')[0].split('-')
+        if len(parts) == 3:
+            return f"{parts[2]}/{parts[1]}/{parts[0]}"
+    except Exception:
+        pass
+    return s_val
+
+
+def display_row(row) -> List[str]:
+    """Valori visualizzati di una riga del DB (SCARICO_ORE_COLS): data DD/MM/YYYY, NULL -> ""."""
+    values = [_format_date(row[0])]
+    for i in range(1, N_COLUMNS):
+        val = row[i]
+        values.append("" if val is None else str(val))
+    return values
+
+
+# --- Chiavi di ordinamento tipizzate (valore mancante/non valido in fondo) ---
+
+def _text_sort_key(value: str):
+    return (0 if value else 1, value.casefold())
+
+
+def _date_sort_key(value: str):
+    """DD/MM/YYYY -> YYYYMMDD."""
+    parts = value.split('/')
+    if len(parts) == 3 and all(p.isdigit() for p in parts):
+        return (0, int(parts[2]) * 10000 + int(parts[1]) * 100 + int(parts[0]))
+    return (1, 0) if not value else (2, 0)
+
+
+def _time_sort_key(value: str):
+    """HH:MM[:SS] -> minuti."""
+    parts = value.strip().split(':')
+    if len(parts) >= 2 and parts[0].isdigit() and parts[1].isdigit():
+        return (0, int(parts[0]) * 60 + int(parts[1]))
+    return (1, 0) if not value else (2, 0)
+
+
+def _number_sort_key(value: str):
+    if not value.strip():
+        return (1, 0.0)
+    return (0, to_total(value))
+
+
+SORT_KEYS = {0: _date_sort_key, 5: _time_sort_key, 6: _time_sort_key, COL_TOTALE_ORE: _number_sort_key}
+
+
+def sort_key(col: int, value: str):
+    """(gruppo, chiave) del valore visualizzato; la stessa chiave ordina anche in SQL (ScaricoOreQuery)."""
+    return SORT_KEYS.get(col, _text_sort_key)(value)
+
+
+def to_total(val) -> float:
+    try:
+        if isinstance(val, (int, float)):
+            return float(val)
+        return parse_currency(val)
+    except Exception:
+        return 0.0
+
+
+class ScaricoOreCache:
+    """
+    Dati pre-formattati della tabella Scarico Ore in forma colonnare.
+
+    `columns[c][i]` è la stringa visualizzata (DictColumn), `search[i]` la riga minuscola per
+    la ricerca (indicizzata da `trigrams`), `totals[i]` le ore come float,
+    `styles[style_ids[i]]` il dict stili della riga (id 0 = nessuno stile),
+    `ids[i]` l'id della riga nel DB (0 se non noto).
+    """
+
+    def __init__(self, db_version: str, columns: List[DictColumn], search: StringColumn,
+                 totals: np.ndarray, style_ids: np.ndarray, styles: List[Optional[Dict]],
+                 trigrams: TrigramIndex, ids: Optional[np.ndarray] = None):
+        self.db_version = db_version
+        self.columns = columns
+        self.search = search
+        self.totals = totals
+        self.style_ids = style_ids
+        self.styles = styles
+        self.trigrams = trigrams
+        self.ids = ids if ids is not None else np.zeros(len(totals), dtype=np.int64)
+        self._sort_perms = {}
+
+    def __len__(self):
+        return len(self.totals)
+
+    def sort_permutation(self, col: int, descending: bool = False) -> np.ndarray:
+        """
+        Permutazione delle righe ordinate per colonna (stabile, calcolata alla
+        prima richiesta e poi riusata). Le chiavi tipizzate (data, ora, numero)
+        si calcolano una volta per valore distinto del dizionario. Valori
+        vuoti e non validi restano in fondo in entrambe le direzioni.
+        """
+        perm = self._sort_perms.get((col, descending))
+        if perm is None:
+            column = self.columns[col]
+            distinct = column.distinct()
+            keys = [sort_key(col, value) for value in distinct]
+            order = sorted(range(len(distinct)), key=keys.__getitem__)
+
+            rank = np.empty(len(distinct), dtype=np.int64)
+            rank[order] = np.arange(len(distinct))
+            if descending:
+                # Al contrario solo dentro il gruppo (validi, vuoti, non validi)
+                groups = np.array([key[0] for key in keys], dtype=np.int64)
+                rank = groups * len(distinct) + (len(distinct) - 1 - rank)
+            row_rank = rank[column.codes]
+            perm = np.argsort(row_rank, kind="stable").astype(np.intp)
+            self._sort_perms[(col, descending)] = perm
+        return perm
+
+    # --- Costruzione ---
+
+    @classmethod
+    def build(cls, rows, db_version: str) -> "ScaricoOreCache":
+        """Formatta le righe del DB (SCARICO_ORE_COLS [+ id]) una volta sola."""
+        col_values = [[] for _ in range(N_COLUMNS)]
+        search_values = []
+        totals = np.zeros(len(rows), dtype=np.float64)
+        style_ids = np.zeros(len(rows), dtype=np.uint32)
+        ids = np.zeros(len(rows), dtype=np.int64)
+        style_lookup = {"": 0}
+        styles: List[Optional[Dict]] = [None]
+
+        for row_idx, row in enumerate(rows):
+            values = display_row(row)
+            for col, d_val in enumerate(values):
+                col_values[col].append(d_val)
+            search_values.append(" ".join(v for v in values if v).lower())
+
+            totals[row_idx] = to_total(row[COL_TOTALE_ORE])
+            if len(row) > ID_INDEX:
+                ids[row_idx] = row[ID_INDEX]
+
+            style_json = row[N_COLUMNS] if len(row) > N_COLUMNS else ""
+            style_json = style_json or ""
+            style_id = style_lookup.get(style_json)
+            if style_id is None:
+                try:
+                    parsed = json.loads(style_json) or None
+                except (TypeError, ValueError):
+                    parsed = None
+                style_id = len(styles)
+                styles.append(parsed)
+                style_lookup[style_json] = style_id
+            style_ids[row_idx] = style_id
+
+        id_dtype = np.uint16 if len(styles) <= np.iinfo(np.uint16).max else np.uint32
+        search = StringColumn.from_strings(search_values)
+        return cls(
+            db_version,
+            [DictColumn.from_strings(values) for values in col_values],
+            search,
+            totals,
+            style_ids.astype(id_dtype),
+            styles,
+            TrigramIndex.build(search.offsets, search.blob),
+            ids,
+        )
+
+    def apply_delta(self, removed_ids, added_rows, db_version: str) -> "ScaricoOreCache":
+        """
+        Nuova cache con le righe `removed_ids` tolte e `added_rows` (con id,
+        vedi ID_INDEX) aggiunte in testa, come in get_scarico_ore_data (id DESC).
+
+        Solo le righe aggiunte vengono formattate; dizionari, indice di
+        trigrammi e tabella stili delle righe esistenti si fondono con
+        operazioni vettoriali, senza rileggere né riformattare il resto.
+        """
+        keep = ~np.isin(self.ids, np.asarray(list(removed_ids), dtype=np.int64))
+        head = ScaricoOreCache.build(
+            sorted(added_rows, key=lambda r: r[ID_INDEX], reverse=True), db_version
+        )
+
+        styles = list(self.styles)
+        lookup = {json.dumps(style, sort_keys=True): i for i, style in enumerate(styles)}
+        remap = np.zeros(len(head.styles), dtype=np.int64)
+        for i, style in enumerate(head.styles):
+            key = json.dumps(style, sort_keys=True)
+            if key not in lookup:
+                lookup[key] = len(styles)
+                styles.append(style)
+            remap[i] = lookup[key]
+        style_ids = np.concatenate([remap[head.style_ids], self.style_ids[keep]])
+        id_dtype = np.uint16 if len(styles) <= np.iinfo(np.uint16).max else np.uint32
+
+        return ScaricoOreCache(
+            db_version,
+            [DictColumn.concat(h, c, keep) for h, c in zip(head.columns, self.columns)],
+            StringColumn.concat(head.search, self.search.take(keep)),
+            np.concatenate([head.totals, self.totals[keep]]),
+            style_ids.astype(id_dtype),
+            styles,
+            self.trigrams.splice(keep, head.trigrams, len(head)),
+            np.concatenate([head.ids, self.ids[keep]]),
+        )
+
+    # --- Persistenza ---
+
+    @staticmethod
+    def path_for(db_version: str) -> Path:
+        return CACHE_DIR / f"{CACHE_PREFIX}{db_version}{CACHE_SUFFIX}"
+
+    def _arrays(self) -> Dict[str, np.ndarray]:
+        arrays = {}
+        for col, column in enumerate(self.columns):
+            arrays[f"col{col}.values.offsets"] = column.values.offsets
+            arrays[f"col{col}.values.blob"] = column.values.blob
+            arrays[f"col{col}.codes"] = column.codes
+            arrays[f"col{col}.starts"] = column.starts
+            arrays[f"col{col}.rows"] = column.rows
+        arrays["search.offsets"] = self.search.offsets
+        arrays["search.blob"] = self.search.blob
+        arrays["totals"] = self.totals
+        arrays["style_ids"] = self.style_ids
+        arrays["ids"] = self.ids
+        arrays["trigram.codes"] = self.trigrams.codes
+        arrays["trigram.starts"] = self.trigrams.starts
+        arrays["trigram.rows"] = self.trigrams.rows
+        return arrays
+
+    def save(self, path: Optional[Path] = None) -> Path:
+        """Scrive il file (tmp + rename) e ritorna il percorso."""
+        path = path or self.path_for(self.db_version)
+        arrays = self._arrays()
+
+        header = {
+            "format": FORMAT_VERSION,
+            "db_version": self.db_version,
+            "rows": len(self),
+            "styles": self.styles,
+            "arrays": {},
+        }
+        offset = 0
+        for name, arr in arrays.items():
+            offset = _align(offset)
+            header["arrays"][name] = {"dtype": arr.dtype.str, "offset": offset, "length": len(arr)}
+            offset += arr.nbytes
+
+        header_bytes = json.dumps(header).encode("utf-8")
+        data_start = _align(len(MAGIC) + 4 + len(header_bytes))
+
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(path.name + ".tmp")
+        with open(tmp_path, "wb") as f:
+            f.write(MAGIC)
+            f.write(struct.pack("<I", len(header_bytes)))
+            f.write(header_bytes)
+            for name, arr in arrays.items():
+                f.seek(data_start + header["arrays"][name]["offset"])
+                f.write(np.ascontiguousarray(arr).tobytes())
+        os.replace(tmp_path, path)
+        return path
+
+    @classmethod
+    def load(cls, path: Path) -> "ScaricoOreCache":
+        """Mappa il file in memoria. Solleva ValueError se il formato non è valido."""
+        with open(path, "rb") as f:
+            if f.read(len(MAGIC)) != MAGIC:
+                raise ValueError(f"Cache non valida: {path}")
+            (header_len,) = struct.unpack("<I", f.read(4))
+            header = json.loads(f.read(header_len).decode("utf-8"))
+
+        if header.get("format") != FORMAT_VERSION:
+            raise ValueError(f"Formato cache non supportato: {header.get('format')}")
+
+        data_start = _align(len(MAGIC) + 4 + header_len)
+        raw = np.memmap(path, dtype=np.uint8, mode="r")
+
+        def array(name):
+            spec = header["arrays"][name]
+            dtype = np.dtype(spec["dtype"])
+            start = data_start + spec["offset"]
+            return raw[start:start + spec["length"] * dtype.itemsize].view(dtype)
+
+        columns = [
+            DictColumn(
+                StringColumn(array(f"col{col}.values.offsets"), array(f"col{col}.values.blob")),
+                array(f"col{col}.codes"),
+                array(f"col{col}.starts"),
+                array(f"col{col}.rows"),
+            )
+            for col in range(N_COLUMNS)
+        ]
+        return cls(
+            header["db_version"],
+            columns,
+            StringColumn(array("search.offsets"), array("search.blob")),
+            array("totals"),
+            array("style_ids"),
+            header["styles"],
+            TrigramIndex(array("trigram.codes"), array("trigram.starts"), array("trigram.rows")),
+            array("ids"),
+        )
+
+    @classmethod
+    def load_for_version(cls, db_version: str) -> Optional["ScaricoOreCache"]:
+        """Cache valida per la versione dati indicata, se presente."""
+        path = cls.path_for(db_version)
+        if not path.exists():
+            return None
+        try:
+            cache = cls.load(path)
+        except Exception as e:
+            print(f"Error loading cache: {e}")
+            return None
+        return cache if cache.db_version == db_version else None
+
+    @classmethod
+    def remove_stale(cls, keep_version: str):
+        """Elimina le cache di altre versioni e la vecchia cache pickle (best effort)."""
+        keep = cls.path_for(keep_version).name
+        candidates = [LEGACY_CACHE_PATH]
+        if CACHE_DIR.exists():
+            candidates += [p for p in CACHE_DIR.glob(f"{CACHE_PREFIX}*{CACHE_SUFFIX}") if p.name != keep]
+        for path in candidates:
+            try:
+                if path.exists():
+                    path.unlink()
+            except OSError:
+                # Su Windows un file ancora mappato non si può cancellare: riprova al prossimo salvataggio
+                pass
@@ -0,0 +1,157 @@
+"""
+Bot TS - Scarico Ore Query
+Accesso a finestre alla tabella scarico_ore, per storici troppo grandi da
+tenere in memoria (vedi ScaricoOreSqlModel).
+
+Ricerca, filtri colonna e ordinamento sono tradotti in SQL sugli stessi
+valori visualizzati dalla cache colonnare (data DD/MM/YYYY, NULL come
+stringa vuota). Il DB restituisce solo gli id ordinati delle righe visibili;
+le righe vere e proprie si leggono a pagine per id (chiave primaria).
+"""
+import json
+from contextlib import contextmanager
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from src.core.contabilita_manager import ContabilitaManager
+from src.core.database import db_manager
+from src.core.scarico_ore_cache import N_COLUMNS, sort_key, to_total
+
+DB_COLUMNS = ContabilitaManager.SCARICO_ORE_COLS[:N_COLUMNS]
+
+# Data ISO (YYYY-MM-DD[ hh:mm:ss]) -> DD/MM/YYYY, come _format_date
+_DATE_DISPLAY = (
+    "CASE WHEN substr(data, 5, 1) = '-' AND substr(data, 8, 1) = '-' "
+    "THEN substr(data, 9, 2) || '/' || substr(data, 6, 2) || '/' || substr(data, 1, 4) "
+    "ELSE COALESCE(data, '') END"
+)
+
+_FETCH_CHUNK = 65536
+
+_TOTAL = "to_total(totale_ore)"
+
+
+def _lower(value):
+    return value.lower() if isinstance(value, str) else value
+
+
+@lru_cache(maxsize=1 << 16)
+def _sort_key(col: int, value: str):
+    # Una chiamata per riga, ma pochi valori distinti: chiave calcolata una volta per valore
+    return sort_key(col, value)
+
+
+@contextmanager
+def _connect():
+    """Connessione in sola lettura con le funzioni SQL del modulo."""
+    with db_manager.get_connection(ContabilitaManager.DB_PATH, read_only=True) as conn:
+        # LOWER() di SQLite converte solo l'ASCII ("À" resta maiuscola): stessa
+        # str.lower della cache e dei termini cercati
+        conn.create_function("py_lower", 1, _lower, deterministic=True)
+        # Ordinamento tipizzato e totali con le stesse funzioni della cache in
+        # memoria: l'ordine non cambia quando la tabella passa al modello SQL
+        conn.create_function("sort_group", 2, lambda col, value: _sort_key(col, value)[0], deterministic=True)
+        conn.create_function("sort_value", 2, lambda col, value: _sort_key(col, value)[1], deterministic=True)
+        conn.create_function("to_total", 1, to_total, deterministic=True)
+        yield conn
+
+
+def _display_expr(col: int) -> str:
+    return _DATE_DISPLAY if col == 0 else f"COALESCE({DB_COLUMNS[col]}, '')"
+
+
+class ScaricoOreQuery:
+    """
+    Vista filtrata e ordinata di scarico_ore.
+
+    `search_terms` sono termini minuscoli (AND di sottostringhe sulla riga),
+    `col_filters` {colonna: set(valori minuscoli ammessi)}, come in
+    ScaricoOreTableModel.set_filter. A parità di chiave vale l'ordine del DB
+    (id DESC).
+    """
+
+    def __init__(self, search_terms=(), col_filters: Optional[Dict[int, set]] = None,
+                 sort_column: Optional[int] = None, descending: bool = False):
+        self.search_terms = list(search_terms)
+        self.col_filters = dict(col_filters or {})
+        self.sort_column = sort_column
+        self.descending = descending
+
+    def _where(self) -> Tuple[str, list]:
+        clauses, params = [], []
+        if self.search_terms:
+            # I termini non contengono spazi: basta cercarli nel testo unito delle colonne
+            row_text = " || ' ' || ".join(_display_expr(c) for c in range(N_COLUMNS))
+            for term in self.search_terms:
+                clauses.append(f"instr(py_lower({row_text}), ?) > 0")
+                params.append(term)
+        for col, allowed in sorted(self.col_filters.items()):
+            clauses.append(f"py_lower({_display_expr(col)}) IN (SELECT value FROM json_each(?))")
+            params.append(json.dumps(sorted(allowed)))
+        return (" WHERE " + " AND ".join(clauses)) if clauses else "", params
+
+    def _order_by(self) -> str:
+        keys = []
+        if self.sort_column is not None:
+            direction = " DESC" if self.descending else ""
+            # Il gruppo (validi, vuoti, non validi) è sempre crescente: vuoti in fondo
+            # in entrambe le direzioni. A parità di chiave tipizzata decide il
+            # valore visualizzato, come il rango per valore distinto.
+            col, expr = self.sort_column, _display_expr(self.sort_column)
+            keys = [f"sort_group({col}, {expr})", f"sort_value({col}, {expr}){direction}", expr + direction]
+        return " ORDER BY " + ", ".join(keys + ["id DESC"])
+
+    def visible_rows(self) -> Tuple[np.ndarray, np.ndarray]:
+        """(id, ore) delle righe visibili, nell'ordine di visualizzazione."""
+        empty = (np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float64))
+        if not ContabilitaManager.DB_PATH.exists():
+            return empty
+        where, params = self._where()
+        chunks = []
+        with _connect() as conn:
+            cursor = conn.execute(f"SELECT id, {_TOTAL} FROM scarico_ore{where}{self._order_by()}", params)
+            # A blocchi: niente lista Python con una tupla per riga
+            while True:
+                chunk = cursor.fetchmany(_FETCH_CHUNK)
+                if not chunk:
+                    break
+                chunks.append(np.array(chunk, dtype=np.float64))
+        if not chunks:
+            return empty
+        data = np.concatenate(chunks)
+        return data[:, 0].astype(np.int64), data[:, 1]
+
+    @staticmethod
+    def fetch_rows(ids: List[int]) -> Dict[int, Tuple]:
+        """{id: riga SCARICO_ORE_COLS} per gli id indicati (una pagina)."""
+        if not ids or not ContabilitaManager.DB_PATH.exists():
+            return {}
+        cols = ContabilitaManager.SCARICO_ORE_COLS
+        with _connect() as conn:
+            rows = conn.execute(
+                f"SELECT id, {', '.join(cols)} FROM scarico_ore WHERE id IN (SELECT value FROM json_each(?))",
+                (json.dumps(ids),),
+            ).fetchall()
+        return {row[0]: row[1:] for row in rows}
+
+    @staticmethod
+    def value_counts(col: int) -> Dict[str, int]:
+        """{valore visualizzato: numero di righe} su tutta la tabella."""
+        if not ContabilitaManager.DB_PATH.exists():
+            return {}
+        expr = _display_expr(col)
+        with _connect() as conn:
+            return dict(conn.execute(f"SELECT {expr}, COUNT(*) FROM scarico_ore GROUP BY 1").fetchall())
+
+    @staticmethod
+    def count() -> int:
+        """Numero totale di righe (per scegliere il modello della tabella)."""
+        if not ContabilitaManager.DB_PATH.exists():
+            return 0
+        try:
+            with _connect() as conn:
+                return conn.execute("SELECT COUNT(*) FROM scarico_ore").fetchone()[0]
+        except Exception:
+            return 0
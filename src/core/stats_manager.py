@@ -3,11 +3,13 @@ Bot TS - Statistics Manager
 Gestisce il salvataggio persistente delle statistiche di utilizzo.
 """
 import json
+import threading
 from pathlib import Path
 from src.core import config_manager
 
 class StatsManager:
     _instance = None
+    _lock = threading.Lock()
 
     def __new__(cls):
         if cls._instance is None:
@@ -19,41 +21,71 @@ class StatsManager:
         """Inizializza il manager caricando i dati."""
         self.stats_file = config_manager.CONFIG_DIR / "statistics.json"
         self.stats = self._load_stats()
+        # Durate dei passi in un file a parte: `stats` ha una voce runs/errors
+        # per bot e viene elencato così com'è nelle statistiche
+        self.steps_file = config_manager.CONFIG_DIR / "step_durations.json"
+        self.steps = self._load_stats(self.steps_file)
 
-    def _load_stats(self) -> dict:
+    def _load_stats(self, path: Path = None) -> dict:
         """Carica le statistiche dal file JSON."""
-        if not self.stats_file.exists():
+        path = path or self.stats_file
+        if not path.exists():
             return {}
         try:
-            with open(self.stats_file, 'r', encoding='utf-8') as f:
+            with open(path, 'r', encoding='utf-8') as f:
                 return json.load(f)
         except Exception as e:
             print(f"Errore caricamento statistiche: {e}")
             return {}
 
-    def _save_stats(self):
-        """Salva le statistiche su file."""
+    def _save_stats(self, path: Path = None, data: dict = None):
+        """Salva le statistiche su file (da chiamare con _lock acquisito)."""
         try:
-            with open(self.stats_file, 'w', encoding='utf-8') as f:
-                json.dump(self.stats, f, indent=4)
+            with open(path or self.stats_file, 'w', encoding='utf-8') as f:
+                json.dump(self.stats if data is None else data, f, indent=4)
         except Exception as e:
             print(f"Errore salvataggio statistiche: {e}")
 
     def increment_usage(self, bot_id: str):
         """Incrementa il contatore di utilizzo per un bot."""
-        if bot_id not in self.stats:
-            self.stats[bot_id] = {"runs": 0, "errors": 0}
+        with self._lock:
+            if bot_id not in self.stats:
+                self.stats[bot_id] = {"runs": 0, "errors": 0}
 
-        self.stats[bot_id]["runs"] += 1
-        self._save_stats()
+            self.stats[bot_id]["runs"] += 1
+            self._save_stats()
 
     def increment_error(self, bot_id: str):
         """Incrementa il contatore di errori per un bot."""
-        if bot_id not in self.stats:
-            self.stats[bot_id] = {"runs": 0, "errors": 0}
+        with self._lock:
+            if bot_id not in self.stats:
+                self.stats[bot_id] = {"runs": 0, "errors": 0}
 
-        self.stats[bot_id]["errors"] += 1
-        self._save_stats()
+            self.stats[bot_id]["errors"] += 1
+            self._save_stats()
+
+    def record_step_durations(self, bot_id: str, summary: dict):
+        """
+        Accumula le durate dei passi di una run (riepilogo di
+        src.bots.common.tracing.Tracer.summary()). Chiamato anche dai thread
+        dei worker paralleli.
+        """
+        with self._lock:
+            steps = self.steps.setdefault(bot_id, {})
+            for name, step in summary.items():
+                entry = steps.setdefault(name, {"count": 0, "total": 0.0, "max": 0.0, "errors": 0})
+                entry["count"] += step["count"]
+                entry["total"] = round(entry["total"] + step["total"], 3)
+                entry["max"] = round(max(entry["max"], step["max"]), 3)
+                entry["errors"] += step.get("errors", 0)
+                entry["last_p50"] = round(step["p50"], 3)
+                entry["last_p95"] = round(step["p95"], 3)
+            self._save_stats(self.steps_file, self.steps)
+
+    def get_step_stats(self, bot_id: str) -> dict:
+        """Durate aggregate dei passi di un bot (passo -> count/total/max/...)."""
+        with self._lock:
+            return {name: dict(entry) for name, entry in self.steps.get(bot_id, {}).items()}
 
     def get_all_stats(self) -> dict:
         """Restituisce tutte le statistiche."""
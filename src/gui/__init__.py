@@ -1,10 +1,34 @@
 """
 Bot TS - GUI Module
 """
-from src.gui.widgets import EditableDataTable, LogWidget, StatusIndicator
-from src.gui.panels import ScaricaTSPanel, CaricoTSPanel, DettagliOdAPanel, BaseBotPanel, BotWorker
-from src.gui.settings_panel import SettingsPanel
-from src.gui.main_window import MainWindow, SidebarButton, create_splash_screen
+import importlib
+
+# ⚡ BOLT: export risolti al primo accesso (PEP 562). Importare un
+# sottomodulo (es. src.gui.main_window) non carica più tutti i pannelli.
+_EXPORTS = {
+    'EditableDataTable': 'src.gui.widgets',
+    'LogWidget': 'src.gui.widgets',
+    'StatusIndicator': 'src.gui.widgets',
+    'ScaricaTSPanel': 'src.gui.panels',
+    'CaricoTSPanel': 'src.gui.panels',
+    'DettagliOdAPanel': 'src.gui.panels',
+    'BaseBotPanel': 'src.gui.panels',
+    'BotWorker': 'src.gui.panels',
+    'SettingsPanel': 'src.gui.settings_panel',
+    'MainWindow': 'src.gui.main_window',
+    'SidebarButton': 'src.gui.main_window',
+    'create_splash_screen': 'src.gui.main_window',
+}
+
+
+def __getattr__(name):
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module), name)
+    globals()[name] = value
+    return value
+
 
 __all__ = [
     'EditableDataTable',
@@ -1,10 +1,17 @@
 """
 Bot TS - Contabilita KPI Panel
 Pannello per l'analisi KPI della Contabilità Strumentale.
+
+⚡ BOLT: calcolo KPI e disegno dei grafici avvengono in un worker: i grafici
+sono renderizzati fuori schermo (backend Agg) in immagini, messe in cache per
+(anno, versione dati). Tornare su un anno già visto mostra subito le immagini;
+si ricalcola solo se i dati dell'anno cambiano.
 """
-# Rimosso matplotlib.use('Qt5Agg') per lasciare auto-detection o default
-# e usare il backend corretto per PyQt6
-from matplotlib.backends.backend_qtagg import FigureCanvasQTAgg as FigureCanvas
+import math
+from collections import OrderedDict
+
+# Rendering fuori schermo: nessun FigureCanvas Qt, le figure non toccano la GUI
+from matplotlib.backends.backend_agg import FigureCanvasAgg
 from matplotlib.figure import Figure
 import matplotlib.pyplot as plt
 import pandas as pd
@@ -15,8 +22,8 @@ from PyQt6.QtWidgets import (
     QFrame, QGridLayout, QScrollArea, QGraphicsDropShadowEffect, QSizePolicy, QGraphicsOpacityEffect,
     QToolTip, QPushButton, QApplication
 )
-from PyQt6.QtCore import Qt, QPropertyAnimation, QEasingCurve, QParallelAnimationGroup, QAbstractAnimation, QPoint
-from PyQt6.QtGui import QColor, QCursor, QFont, QScreen
+from PyQt6.QtCore import Qt, QPropertyAnimation, QEasingCurve, QParallelAnimationGroup, QAbstractAnimation, QPoint, QThread, QTimer, pyqtSignal
+from PyQt6.QtGui import QColor, QCursor, QFont, QScreen, QImage, QPixmap
 
 from src.core.contabilita_manager import ContabilitaManager
 from src.gui.widgets import InfoLabel, KPIBigCard
@@ -24,6 +31,83 @@ from src.gui.widgets import InfoLabel, KPIBigCard
 # Costante per il costo orario aziendale standard
 HOURLY_COST_STD = 30.00
 
+MONTHS_ORDER = [
+    'gennaio', 'febbraio', 'marzo', 'aprile', 'maggio', 'giugno',
+    'luglio', 'agosto', 'settembre', 'ottobre', 'novembre', 'dicembre'
+]
+
+# Dimensioni (px logici) usate se il grafico non è ancora stato disposto a schermo
+DEFAULT_CHART_SIZE = (500, 400)
+DEFAULT_BAR_SIZE = (500, 200)
+
+# Anni (per versione dati) tenuti in cache
+KPI_CACHE_SIZE = 8
+
+
+def compute_year_kpi(year):
+    """Metriche delle card e DataFrame dei grafici per un anno (nessun accesso alla GUI)."""
+    # Use get_year_stats which now computes direct/indirect hours
+    stats = ContabilitaManager.get_year_stats(year)
+
+    tot_prev = stats.get('total_prev', 0.0)
+    tot_ore = stats.get('total_ore', 0.0)
+
+    # Recalculate derived metrics for display
+    costo_totale_stimato = tot_ore * HOURLY_COST_STD
+    margine_operativo = tot_prev - costo_totale_stimato
+    valore_per_ora = (tot_prev / tot_ore) if tot_ore > 0 else 0
+
+    # I grafici (e la resa media) richiedono le righe dell'anno
+    data = ContabilitaManager.get_data_by_year(year)
+    cols = [
+        'data_prev', 'mese', 'n_prev', 'totale_prev', 'attivita', 'tcl', 'odc',
+        'stato_attivita', 'tipologia', 'ore_sp', 'resa', 'annotazioni',
+        'indirizzo_consuntivo', 'nome_file'
+    ]
+    df = pd.DataFrame(data, columns=cols)
+
+    # Clean DF as before
+    df['totale_prev'] = pd.to_numeric(df['totale_prev'], errors='coerce').fillna(0)
+    df['ore_sp'] = pd.to_numeric(df['ore_sp'], errors='coerce').fillna(0)
+    df['resa'] = pd.to_numeric(df['resa'], errors='coerce')
+
+    avg_resa = df['resa'].mean()
+    if pd.isna(avg_resa): avg_resa = 0
+
+    metrics = {
+        'tot_prev': tot_prev,
+        'tot_ore': tot_ore,
+        'count': stats.get('count_total', 0),
+        'ore_dirette': stats.get('ore_dirette', 0.0),
+        'ore_indirette': stats.get('ore_indirette', 0.0),
+        'avg_resa': avg_resa,
+        'margine_operativo': margine_operativo,
+        'marginalita_perc': (margine_operativo / tot_prev * 100) if tot_prev > 0 else 0,
+        'valore_per_ora': valore_per_ora,
+        'utile_netto_orario': valore_per_ora - HOURLY_COST_STD,
+    }
+    return metrics, df
+
+
+def render_chart(plot_fn, df, size, dpr):
+    """
+    Disegna un grafico fuori schermo alla dimensione (px logici) indicata.
+    Ritorna (QImage, dati hover o None).
+    """
+    width, height = size
+    fig = Figure(figsize=(width / 100, height / 100), dpi=100 * dpr)
+    fig.patch.set_alpha(0)
+    canvas = FigureCanvasAgg(fig)
+
+    post_draw = plot_fn(fig, df.copy())
+    canvas.draw()
+    hover = post_draw() if post_draw else None
+
+    rgba = np.asarray(canvas.buffer_rgba())
+    image = QImage(rgba.data, rgba.shape[1], rgba.shape[0], QImage.Format.Format_RGBA8888).copy()
+    image.setDevicePixelRatio(dpr)
+    return image, hover
+
 
 class ContabilitaKPIPanel(QWidget):
     """Pannello Dashboard KPI."""
@@ -36,12 +120,26 @@ class ContabilitaKPIPanel(QWidget):
         except:
             pass
 
+        # Cache dei KPI renderizzati: (anno, versione dati) -> risultato del worker
+        self._kpi_cache = OrderedDict()
+        self._current_key = None
+        self._workers = set()
+        self._load_pending = False
+        # Un solo KPIWorker alla volta (matplotlib non è thread-safe): le
+        # richieste arrivate nel frattempo restano in attesa, vale l'ultima.
+        # La generazione scarta i risultati superati da una richiesta più recente.
+        self._generation = 0
+        self._next_request = None
+
+        # Ridimensionamento: ri-renderizza (senza ricalcolare) a finestra ferma
+        self._resize_timer = QTimer(self)
+        self._resize_timer.setSingleShot(True)
+        self._resize_timer.setInterval(300)
+        self._resize_timer.timeout.connect(self._rerender_if_resized)
+
         self._setup_ui()
         self.refresh_years()
 
-        # Variabili per annotazioni interattive
-        self.annot = None
-
     def _setup_ui(self):
         main_layout = QVBoxLayout(self)
         main_layout.setContentsMargins(20, 20, 20, 20)
@@ -141,55 +239,45 @@ class ContabilitaKPIPanel(QWidget):
         charts_grid.setSpacing(20)
 
         # Chart 1: Stato Attività (Pie) - Interactive
-        self.fig1 = Figure(figsize=(5, 4), dpi=100)
-        self.fig1.patch.set_alpha(0)
-        self.canvas1 = FigureCanvas(self.fig1)
+        self.chart1 = ChartImage()
         self.container1 = self._create_chart_container(
-            self.canvas1,
+            self.chart1,
             title="Distribuzione Stato Attività",
             info_callback=lambda: "Distribuzione percentuale delle attività per stato (esclusa FORNITURA)."
         )
         charts_grid.addWidget(self.container1, 0, 0)
 
         # Chart 2: Preventivato vs Ore per Mese (Bar)
-        self.fig2 = Figure(figsize=(5, 4), dpi=100)
-        self.fig2.patch.set_alpha(0)
-        self.canvas2 = FigureCanvas(self.fig2)
+        self.chart2 = ChartImage()
         self.container2 = self._create_chart_container(
-            self.canvas2,
+            self.chart2,
             title="Preventivato vs Ore per Mese",
             info_callback=lambda: "Confronto mensile tra valore preventivato e ore spese."
         )
         charts_grid.addWidget(self.container2, 0, 1)
 
         # Chart 3: Analisi Margine per Tipologia (Nuovo Chart)
-        self.fig3 = Figure(figsize=(5, 4), dpi=100)
-        self.fig3.patch.set_alpha(0)
-        self.canvas3 = FigureCanvas(self.fig3)
+        self.chart3 = ChartImage()
         self.container3 = self._create_chart_container(
-            self.canvas3,
+            self.chart3,
             title="Redditività: Ricavi vs Costi",
             info_callback=lambda: "Confronto diretto tra Ricavi (Preventivato) e Costi Stimati per tipologia."
         )
         charts_grid.addWidget(self.container3, 1, 0)
 
         # Chart 4: Andamento Resa Mensile (Line)
-        self.fig4 = Figure(figsize=(5, 4), dpi=100)
-        self.fig4.patch.set_alpha(0)
-        self.canvas4 = FigureCanvas(self.fig4)
+        self.chart4 = ChartImage()
         self.container4 = self._create_chart_container(
-            self.canvas4,
+            self.chart4,
             title="Andamento Resa Media",
             info_callback=lambda: "Andamento mensile del valore medio di Resa."
         )
         charts_grid.addWidget(self.container4, 1, 1)
 
         # Chart 5: Completamento Attività
-        self.fig5 = Figure(figsize=(5, 2), dpi=100)
-        self.fig5.patch.set_alpha(0)
-        self.canvas5 = FigureCanvas(self.fig5)
+        self.chart5 = ChartImage()
         self.container5 = self._create_chart_container(
-            self.canvas5,
+            self.chart5,
             height=200,
             title="Stato Avanzamento Globale",
             info_callback=lambda: "Dettaglio avanzamento: Contabilizzate vs In Attesa/Da Completare."
@@ -206,6 +294,7 @@ class ContabilitaKPIPanel(QWidget):
         self.cards = [self.card_totale, self.card_ore, self.card_resa, self.card_count,
                       self.card_margine, self.card_margine_perc, self.card_eff_resa, self.card_val_ora]
         self.charts = [self.container1, self.container2, self.container3, self.container4, self.container5]
+        self.chart_images = [self.chart1, self.chart2, self.chart3, self.chart4, self.chart5]
 
     def _create_chart_container(self, widget, height=450, title="", info_callback=None):
         """Crea un container stilizzato per il grafico."""
@@ -295,378 +384,506 @@ class ContabilitaKPIPanel(QWidget):
         return f"{value:,.2f}".replace(",", "X").replace(".", ",").replace("X", ".")
 
     def _load_kpi_data(self):
-        """Carica i dati e aggiorna grafici."""
+        """Mostra i KPI dell'anno: dalla cache se i dati non sono cambiati, altrimenti in background."""
         year_text = self.year_combo.currentText()
         if not year_text:
             return
 
+        if not self.isVisible():
+            # Pannello nascosto (tab non attivo): si calcola al primo show, alla dimensione reale
+            self._load_pending = True
+            return
+        self._load_pending = False
+
         try:
             year = int(year_text)
-            # Use get_year_stats which now computes direct/indirect hours
-            stats = ContabilitaManager.get_year_stats(year)
-
-            if not stats: return
-
-            # Extract metrics
-            tot_prev = stats.get('total_prev', 0.0)
-            tot_ore = stats.get('total_ore', 0.0)
-            count = stats.get('count_total', 0)
-            ore_dirette = stats.get('ore_dirette', 0.0)
-            ore_indirette = stats.get('ore_indirette', 0.0)
-
-            # Recalculate derived metrics for display (some might duplicate get_year_stats logic but safer here for display formatting)
-            costo_totale_stimato = tot_ore * HOURLY_COST_STD
-            margine_operativo = tot_prev - costo_totale_stimato
-            marginalita_perc = (margine_operativo / tot_prev * 100) if tot_prev > 0 else 0
-            valore_per_ora = (tot_prev / tot_ore) if tot_ore > 0 else 0
-            utile_netto_orario = valore_per_ora - HOURLY_COST_STD
-
-            # --- 1. Update General Scorecards ---
-            self.card_totale.lbl_value.setText(f"€ {self._format_currency(tot_prev)}")
-
-            # Aggiorna la card Ore con il breakdown dirette/indirette
-            self.card_ore.lbl_value.setText(f"{self._format_currency(tot_ore)}")
-            self.card_ore.set_info_callback(lambda: (
-                f"<b>Totale Ore: {self._format_currency(tot_ore)} h</b><br>"
-                f"--------------------------------<br>"
-                f"• Ore Dirette (su ODC/Prev): {self._format_currency(ore_dirette)} h<br>"
-                f"• Ore Indirette: {self._format_currency(ore_indirette)} h"
-            ))
-
-            # Resa media (calcolata nel manager? No, qui dobbiamo ricalcolarla o prenderla se disponibile.
-            # get_year_stats non ritorna avg_resa. Ricalcoliamo dai dati raw per coerenza col vecchio codice o aggiungiamo a stats.
-            # Per ora lasciamo 0 se non disponibile, o facciamo query rapida.
-            # Dato che get_year_stats è ottimizzato, meglio aggiungere lì se serve.
-            # Ma il vecchio codice caricava TUTTO il dataframe qui.
-            # Per performance, meglio usare stats già pronte.
-            # Se avg_resa non c'è, mettiamo N/D o 0.
-            # *Correction*: The user didn't explicitly ask for Resa update, just Direct/Indirect.
-            # I will reuse the existing logic for Resa if possible, but I replaced `_load_kpi_data` logic with `get_year_stats`.
-            # Let's restore full data loading if needed for charts?
-            # Yes, the charts need the DF. `get_year_stats` is good for summary cards but charts need data.
-            # So I will call `get_data_by_year` again to get the DF for charts.
-
-            data = ContabilitaManager.get_data_by_year(year)
-            cols = [
-                'data_prev', 'mese', 'n_prev', 'totale_prev', 'attivita', 'tcl', 'odc',
-                'stato_attivita', 'tipologia', 'ore_sp', 'resa', 'annotazioni',
-                'indirizzo_consuntivo', 'nome_file'
-            ]
-            df = pd.DataFrame(data, columns=cols)
-
-            # Clean DF as before
-            df['totale_prev'] = pd.to_numeric(df['totale_prev'], errors='coerce').fillna(0)
-            df['ore_sp'] = pd.to_numeric(df['ore_sp'], errors='coerce').fillna(0)
-            df['resa'] = pd.to_numeric(df['resa'], errors='coerce')
-
-            avg_resa = df['resa'].mean()
-            if pd.isna(avg_resa): avg_resa = 0
-
-            self.card_resa.lbl_value.setText(f"{self._format_currency(avg_resa)}")
-            self.card_count.lbl_value.setText(str(count))
-
-            # --- 2. Update Technical Scorecards ---
-            self.card_margine.lbl_value.setText(f"€ {self._format_currency(margine_operativo)}")
-            self.card_margine.lbl_value.setStyleSheet(f"color: {'#20c997' if margine_operativo >= 0 else '#dc3545'}; font-size: 28px; font-weight: 800; border: none; background: transparent;")
-
-            self.card_margine_perc.lbl_value.setText(f"{marginalita_perc:.1f} %".replace(".", ","))
-            self.card_margine_perc.lbl_value.setStyleSheet(f"color: {'#20c997' if marginalita_perc >= 0 else '#dc3545'}; font-size: 28px; font-weight: 800; border: none; background: transparent;")
-
-            self.card_eff_resa.lbl_value.setText(f"€ {self._format_currency(utile_netto_orario)} / h")
-            self.card_eff_resa.lbl_value.setStyleSheet(f"color: {'#20c997' if utile_netto_orario >= 0 else '#dc3545'}; font-size: 28px; font-weight: 800; border: none; background: transparent;")
-
-            self.card_val_ora.lbl_value.setText(f"€ {self._format_currency(valore_per_ora)} / h")
-
-            # --- 3. Update Charts ---
-            self._plot_stato_attivita(df)
-            self._plot_prev_ore_mese(df)
-            self._plot_margine_tipologia(df)
-            self._plot_andamento_resa(df)
-            self._plot_completamento(df)
+        except ValueError:
+            return
 
-        except Exception as e:
-            print(f"Errore caricamento KPI: {e}")
+        key = (year, ContabilitaManager.get_year_version(year))
+        self._current_key = key
 
-    def _plot_stato_attivita(self, df):
-        """Pie chart interattivo: mostra etichette solo al passaggio del mouse."""
-        self.fig1.clear()
-        ax = self.fig1.add_subplot(111)
+        entry = self._kpi_cache.get(key)
+        if entry is not None:
+            self._kpi_cache.move_to_end(key)
+            self._show_kpi(entry)
+            self._rerender_if_resized()
+            return
 
-        if df.empty:
-            self.canvas1.draw()
+        self._start_worker(key)
+
+    def _chart_sizes(self):
+        sizes = []
+        for i, chart in enumerate(self.chart_images):
+            default = DEFAULT_BAR_SIZE if i == len(self.chart_images) - 1 else DEFAULT_CHART_SIZE
+            size = chart.size()
+            visible = chart.isVisible() and size.width() > 50 and size.height() > 50
+            sizes.append((size.width(), size.height()) if visible else default)
+        return sizes
+
+    def _start_worker(self, key, kpi=None):
+        self._generation += 1
+        if self._workers:
+            self._next_request = (key, kpi)
+            return
+        self._launch_worker(key, kpi)
+
+    def _launch_worker(self, key, kpi):
+        # Dimensioni lette all'avvio: una richiesta in attesa usa quelle attuali
+        worker = KPIWorker(key, self._chart_sizes(), self.devicePixelRatioF(), kpi, self._generation)
+        worker.finished_signal.connect(self._on_worker_finished)
+        self._workers.add(worker)
+        worker.start()
+
+    def _on_worker_finished(self, entry):
+        worker = self.sender()
+        if worker in self._workers:
+            worker.wait()
+            self._workers.discard(worker)
+
+        if self._next_request is not None:
+            request, self._next_request = self._next_request, None
+            self._launch_worker(*request)
+        if entry is None or entry['generation'] != self._generation:
+            return # errore, oppure superato da una richiesta più recente
+
+        self._kpi_cache[entry['key']] = entry
+        self._kpi_cache.move_to_end(entry['key'])
+        while len(self._kpi_cache) > KPI_CACHE_SIZE:
+            self._kpi_cache.popitem(last=False)
+
+        if entry['key'] == self._current_key:
+            self._show_kpi(entry)
+            self._rerender_if_resized()
+
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        self._resize_timer.start()
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        if self._load_pending:
+            # Dopo il layout: i grafici hanno la loro dimensione reale
+            QTimer.singleShot(0, self._load_kpi_data)
+
+    def _rerender_if_resized(self):
+        """Ridisegna i grafici dell'anno corrente se le dimensioni sono cambiate (dati dalla cache)."""
+        entry = self._kpi_cache.get(self._current_key)
+        if entry is None:
             return
+        sizes = self._chart_sizes()
+        changed = any(
+            abs(w - old_w) > 8 or abs(h - old_h) > 8
+            for (w, h), (old_w, old_h) in zip(sizes, entry['sizes'])
+        )
+        if changed or entry['dpr'] != self.devicePixelRatioF():
+            self._start_worker(entry['key'], (entry['metrics'], entry['df']))
+
+    def _show_kpi(self, entry):
+        """Aggiorna card e grafici da un risultato del worker (solo operazioni leggere)."""
+        m = entry['metrics']
+        tot_ore = m['tot_ore']
+        ore_dirette = m['ore_dirette']
+        ore_indirette = m['ore_indirette']
+        margine_operativo = m['margine_operativo']
+        marginalita_perc = m['marginalita_perc']
+        utile_netto_orario = m['utile_netto_orario']
+
+        # --- 1. Update General Scorecards ---
+        self.card_totale.lbl_value.setText(f"€ {self._format_currency(m['tot_prev'])}")
+
+        # Aggiorna la card Ore con il breakdown dirette/indirette
+        self.card_ore.lbl_value.setText(f"{self._format_currency(tot_ore)}")
+        self.card_ore.set_info_callback(lambda: (
+            f"<b>Totale Ore: {self._format_currency(tot_ore)} h</b><br>"
+            f"--------------------------------<br>"
+            f"• Ore Dirette (su ODC/Prev): {self._format_currency(ore_dirette)} h<br>"
+            f"• Ore Indirette: {self._format_currency(ore_indirette)} h"
+        ))
+
+        self.card_resa.lbl_value.setText(f"{self._format_currency(m['avg_resa'])}")
+        self.card_count.lbl_value.setText(str(m['count']))
+
+        # --- 2. Update Technical Scorecards ---
+        self.card_margine.lbl_value.setText(f"€ {self._format_currency(margine_operativo)}")
+        self.card_margine.lbl_value.setStyleSheet(f"color: {'#20c997' if margine_operativo >= 0 else '#dc3545'}; font-size: 28px; font-weight: 800; border: none; background: transparent;")
+
+        self.card_margine_perc.lbl_value.setText(f"{marginalita_perc:.1f} %".replace(".", ","))
+        self.card_margine_perc.lbl_value.setStyleSheet(f"color: {'#20c997' if marginalita_perc >= 0 else '#dc3545'}; font-size: 28px; font-weight: 800; border: none; background: transparent;")
+
+        self.card_eff_resa.lbl_value.setText(f"€ {self._format_currency(utile_netto_orario)} / h")
+        self.card_eff_resa.lbl_value.setStyleSheet(f"color: {'#20c997' if utile_netto_orario >= 0 else '#dc3545'}; font-size: 28px; font-weight: 800; border: none; background: transparent;")
+
+        self.card_val_ora.lbl_value.setText(f"€ {self._format_currency(m['valore_per_ora'])} / h")
+
+        # --- 3. Update Charts (immagini già renderizzate) ---
+        for chart, image, hover in zip(self.chart_images, entry['images'], entry['hover']):
+            chart.set_image(image, hover)
+
+
+class KPIWorker(QThread):
+    """Calcola i KPI di un anno e renderizza i grafici fuori schermo."""
+    finished_signal = pyqtSignal(object) # dict risultato (None se errore)
+
+    def __init__(self, key, sizes, dpr, kpi=None, generation=0):
+        super().__init__()
+        self.key = key
+        self.sizes = sizes
+        self.dpr = dpr
+        self.kpi = kpi # (metriche, df) già calcolati: solo nuovo rendering
+        self.generation = generation
+
+    def run(self):
+        try:
+            metrics, df = self.kpi if self.kpi is not None else compute_year_kpi(self.key[0])
+            images, hover = [], []
+            for plot_fn, size in zip(CHART_PLOTTERS, self.sizes):
+                image, regions = render_chart(plot_fn, df, size, self.dpr)
+                images.append(image)
+                hover.append(regions)
+            self.finished_signal.emit({
+                'key': self.key, 'metrics': metrics, 'df': df,
+                'images': images, 'hover': hover, 'sizes': self.sizes, 'dpr': self.dpr,
+                'generation': self.generation,
+            })
+        except Exception as e:
+            print(f"Errore caricamento KPI: {e}")
+            self.finished_signal.emit(None)
+
 
-        # FILTRO ESCLUSIONE FORNITURA
-        df_filtered = df[~df['stato_attivita'].str.contains('FORNITURA', case=False, na=False)]
+class ChartImage(QLabel):
+    """
+    Grafico pre-renderizzato. Con dati hover di una torta (centro, raggi,
+    spicchi) mostra al passaggio del mouse il tooltip dello spicchio.
+    """
 
-        counts = df_filtered['stato_attivita'].value_counts()
-        if counts.empty:
-            ax.text(0.5, 0.5, 'Nessun dato', ha='center', va='center')
-            self.canvas1.draw()
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setAlignment(Qt.AlignmentFlag.AlignCenter)
+        self.setSizePolicy(QSizePolicy.Policy.Expanding, QSizePolicy.Policy.Expanding)
+        self.setMinimumSize(1, 1)
+        self.setStyleSheet("border: none; background: transparent;")
+        self._image = None
+        self._hover = None
+        self.setMouseTracking(True)
+
+    def set_image(self, image, hover=None):
+        self._image = image
+        self._hover = hover
+        self._update_pixmap()
+
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        self._update_pixmap()
+
+    def _update_pixmap(self):
+        if self._image is None:
+            self.clear()
             return
+        pixmap = QPixmap.fromImage(self._image)
+        logical = pixmap.deviceIndependentSize()
+        if abs(logical.width() - self.width()) > 1 or abs(logical.height() - self.height()) > 1:
+            # In attesa del nuovo rendering: scala l'immagine esistente
+            dpr = pixmap.devicePixelRatio()
+            pixmap = pixmap.scaled(
+                int(self.width() * dpr), int(self.height() * dpr),
+                Qt.AspectRatioMode.KeepAspectRatio, Qt.TransformationMode.SmoothTransformation,
+            )
+            pixmap.setDevicePixelRatio(dpr)
+        self.setPixmap(pixmap)
+
+    def mouseMoveEvent(self, event):
+        super().mouseMoveEvent(event)
+        text = self._hover_text(event.position())
+        if text:
+            QToolTip.showText(event.globalPosition().toPoint(), text, self)
+        else:
+            QToolTip.hideText()
+
+    def _hover_text(self, pos):
+        pixmap = self.pixmap()
+        if not self._hover or pixmap is None or pixmap.isNull():
+            return None
+
+        # Coordinate del mouse -> coordinate dell'immagine renderizzata (px logici)
+        shown = pixmap.deviceIndependentSize()
+        rendered = self._image.deviceIndependentSize()
+        scale = rendered.width() / shown.width() if shown.width() else 1.0
+        x = (pos.x() - (self.width() - shown.width()) / 2) * scale
+        y = (pos.y() - (self.height() - shown.height()) / 2) * scale
+
+        hover = self._hover
+        dx, dy = x - hover['center'][0], hover['center'][1] - y
+        radius = math.hypot(dx, dy)
+        if not hover['r_inner'] <= radius <= hover['r_outer']:
+            return None
+        angle = math.degrees(math.atan2(dy, dx)) % 360
+        for theta1, theta2, text in hover['wedges']:
+            if theta1 <= angle < theta2 or theta1 <= angle + 360 < theta2:
+                return text
+        return None
+
+
+# --- Grafici: funzioni pure su una Figure (eseguite nel worker) ---
+
+def _plot_stato_attivita(fig, df):
+    """Pie chart interattivo: mostra etichette solo al passaggio del mouse."""
+    fig.clear()
+    ax = fig.add_subplot(111)
+
+    if df.empty:
+        return
+
+    # FILTRO ESCLUSIONE FORNITURA
+    df_filtered = df[~df['stato_attivita'].str.contains('FORNITURA', case=False, na=False)]
+
+    counts = df_filtered['stato_attivita'].value_counts()
+    if counts.empty:
+        ax.text(0.5, 0.5, 'Nessun dato', ha='center', va='center')
+        return
+
+    colors = ['#0d6efd', '#198754', '#ffc107', '#dc3545', '#6f42c1', '#0dcaf0']
+
+    # Create pie without labels and autopct (hidden by default)
+    wedges, texts = ax.pie(
+        counts,
+        labels=None, # No static labels
+        startangle=90,
+        colors=colors[:len(counts)],
+        wedgeprops=dict(width=0.6, edgecolor='w') # Donut style for cleaner look
+    )
+
+    # ax.set_title('Distribuzione Stato Attività', fontsize=14, fontweight='bold', color='#495057', pad=20)
+
+    # --- Interactive Annotation ---
+    # Niente canvas interattivo: dopo il disegno si calcolano le regioni degli
+    # spicchi, ChartImage mostra etichetta e percentuale al passaggio del mouse
+    fig.tight_layout()
+
+    def hover_regions():
+        return _pie_hover_regions(fig, ax, wedges, counts, inner_ratio=0.4)
+
+    return hover_regions
+
+
+def _pie_hover_regions(fig, ax, wedges, counts, inner_ratio):
+    """Centro e raggi (px logici, origine in alto a sinistra) e spicchi con il testo del tooltip."""
+    dpr = fig.dpi / 100
+    fig_height = fig.bbox.height
+    cx, cy = ax.transData.transform((0, 0))
+    edge_x, _ = ax.transData.transform((1, 0))
+    r_outer = (edge_x - cx) / dpr
+
+    total = counts.sum()
+    regions = []
+    for idx, wedge in enumerate(wedges):
+        count = counts.iloc[idx]
+        percent = count / total * 100
+        label = counts.index[idx]
+        regions.append((wedge.theta1, wedge.theta2, f"{label}\n{percent:.1f}% ({count})"))
+
+    return {
+        'center': (cx / dpr, (fig_height - cy) / dpr),
+        'r_outer': r_outer,
+        'r_inner': r_outer * inner_ratio,
+        'wedges': regions,
+    }
 
-        colors = ['#0d6efd', '#198754', '#ffc107', '#dc3545', '#6f42c1', '#0dcaf0']
 
-        # Create pie without labels and autopct (hidden by default)
-        wedges, texts = ax.pie(
-            counts,
-            labels=None, # No static labels
-            startangle=90,
-            colors=colors[:len(counts)],
-            wedgeprops=dict(width=0.6, edgecolor='w') # Donut style for cleaner look
-        )
+def _plot_prev_ore_mese(fig, df):
+    fig.clear()
+    ax = fig.add_subplot(111)
 
-        # ax.set_title('Distribuzione Stato Attività', fontsize=14, fontweight='bold', color='#495057', pad=20)
-
-        # --- Interactive Annotation ---
-        self.annot = ax.annotate("", xy=(0,0), xytext=(0,0), textcoords="offset points",
-                                bbox=dict(boxstyle="round", fc="black", ec="none", alpha=0.9),
-                                color="white", fontweight="bold", fontsize=10,
-                                arrowprops=dict(arrowstyle="-", color="black"))
-        self.annot.set_visible(False)
-
-        def update_annot(wedge, idx):
-            # Posizione angolare media
-            ang = (wedge.theta2 - wedge.theta1)/2. + wedge.theta1
-            y = np.sin(np.deg2rad(ang))
-            x = np.cos(np.deg2rad(ang))
-
-            # Posiziona annotazione un po' fuori dal centro
-            self.annot.xy = (x*0.7, y*0.7)
-
-            count = counts.iloc[idx]
-            total = counts.sum()
-            percent = count / total * 100
-            label = counts.index[idx]
-
-            text = f"{label}\n{percent:.1f}% ({count})"
-            self.annot.set_text(text)
-            self.annot.get_bbox_patch().set_alpha(0.9)
-
-        def hover(event):
-            vis = self.annot.get_visible()
-            if event.inaxes == ax:
-                found = False
-                for i, wedge in enumerate(wedges):
-                    contains, _ = wedge.contains(event)
-                    if contains:
-                        update_annot(wedge, i)
-                        self.annot.set_visible(True)
-                        self.fig1.canvas.draw_idle()
-                        found = True
-                        break
-                if not found and vis:
-                    self.annot.set_visible(False)
-                    self.fig1.canvas.draw_idle()
-
-        self.fig1.canvas.mpl_connect("motion_notify_event", hover)
-
-        self.fig1.tight_layout()
-        self.canvas1.draw()
-
-    def _plot_prev_ore_mese(self, df):
-        self.fig2.clear()
-        ax = self.fig2.add_subplot(111)
-
-        if df.empty:
-            self.canvas2.draw()
-            return
+    if df.empty:
+        return
 
-        months_order = [
-            'gennaio', 'febbraio', 'marzo', 'aprile', 'maggio', 'giugno',
-            'luglio', 'agosto', 'settembre', 'ottobre', 'novembre', 'dicembre'
-        ]
-        df['mese_lower'] = df['mese'].str.lower().str.strip()
-        df['mese_cat'] = pd.Categorical(df['mese_lower'], categories=months_order, ordered=True)
+    df['mese_lower'] = df['mese'].str.lower().str.strip()
+    df['mese_cat'] = pd.Categorical(df['mese_lower'], categories=MONTHS_ORDER, ordered=True)
 
-        grouped = df.groupby('mese_cat', observed=True)[['totale_prev', 'ore_sp']].sum()
+    grouped = df.groupby('mese_cat', observed=True)[['totale_prev', 'ore_sp']].sum()
 
-        if grouped.empty:
-            return
+    if grouped.empty:
+        return
 
-        x = range(len(grouped))
-        ax.bar(x, grouped['totale_prev'], width=0.4, label='Totale Prev (€)', color='#198754', align='center', alpha=0.9)
+    x = range(len(grouped))
+    ax.bar(x, grouped['totale_prev'], width=0.4, label='Totale Prev (€)', color='#198754', align='center', alpha=0.9)
 
-        ax2 = ax.twinx()
-        line = ax2.plot(x, grouped['ore_sp'], label='Ore Spese', color='#0d6efd', marker='o', linewidth=3, markersize=8)
+    ax2 = ax.twinx()
+    line = ax2.plot(x, grouped['ore_sp'], label='Ore Spese', color='#0d6efd', marker='o', linewidth=3, markersize=8)
 
-        ax.set_xticks(x)
-        ax.set_xticklabels([m.capitalize()[:3] for m in grouped.index], rotation=45)
+    ax.set_xticks(x)
+    ax.set_xticklabels([m.capitalize()[:3] for m in grouped.index], rotation=45)
 
-        # ax.set_title('Preventivato (€) e Ore Spese per Mese', fontsize=14, fontweight='bold', color='#495057', pad=20)
+    # ax.set_title('Preventivato (€) e Ore Spese per Mese', fontsize=14, fontweight='bold', color='#495057', pad=20)
 
-        lines, labels = ax.get_legend_handles_labels()
-        lines2, labels2 = ax2.get_legend_handles_labels()
-        # LEGEND UPPER RIGHT as requested
-        ax2.legend(lines + lines2, labels + labels2, loc='upper right')
+    lines, labels = ax.get_legend_handles_labels()
+    lines2, labels2 = ax2.get_legend_handles_labels()
+    # LEGEND UPPER RIGHT as requested
+    ax2.legend(lines + lines2, labels + labels2, loc='upper right')
 
-        ax.grid(True, axis='y', alpha=0.3)
-        ax2.grid(False)
+    ax.grid(True, axis='y', alpha=0.3)
+    ax2.grid(False)
 
-        self.fig2.tight_layout()
-        self.canvas2.draw()
+    fig.tight_layout()
 
-    def _plot_margine_tipologia(self, df):
-        """Grafico a Barre: Ricavi vs Costi per Tipologia."""
-        self.fig3.clear()
-        ax = self.fig3.add_subplot(111)
+def _plot_margine_tipologia(fig, df):
+    """Grafico a Barre: Ricavi vs Costi per Tipologia."""
+    fig.clear()
+    ax = fig.add_subplot(111)
 
-        if df.empty:
-            self.canvas3.draw()
-            return
+    if df.empty:
+        return
 
-        target_types = ['SQUADRA', 'FERMATA', 'CANONE', 'MISURA', 'CHIAMATA']
-        df['tipologia_upper'] = df['tipologia'].str.upper().str.strip()
+    target_types = ['SQUADRA', 'FERMATA', 'CANONE', 'MISURA', 'CHIAMATA']
+    df['tipologia_upper'] = df['tipologia'].str.upper().str.strip()
 
-        filtered_df = df[df['tipologia_upper'].isin(target_types)]
+    filtered_df = df[df['tipologia_upper'].isin(target_types)]
 
-        if filtered_df.empty:
-            ax.text(0.5, 0.5, 'Nessun dato per le tipologie target',
-                    ha='center', va='center')
-            self.canvas3.draw()
-            return
+    if filtered_df.empty:
+        ax.text(0.5, 0.5, 'Nessun dato per le tipologie target',
+                ha='center', va='center')
+        return
 
-        # Raggruppa e calcola Ricavi (Prev) e Costi
-        grouped_sums = filtered_df.groupby('tipologia_upper')[['totale_prev', 'ore_sp']].sum()
-        grouped_sums['Costo'] = grouped_sums['ore_sp'] * HOURLY_COST_STD
-        grouped_sums['Margine'] = grouped_sums['totale_prev'] - grouped_sums['Costo']
+    # Raggruppa e calcola Ricavi (Prev) e Costi
+    grouped_sums = filtered_df.groupby('tipologia_upper')[['totale_prev', 'ore_sp']].sum()
+    grouped_sums['Costo'] = grouped_sums['ore_sp'] * HOURLY_COST_STD
+    grouped_sums['Margine'] = grouped_sums['totale_prev'] - grouped_sums['Costo']
 
-        # Ordina per Ricavi descrescente
-        grouped = grouped_sums.sort_values(by='totale_prev', ascending=True)
+    # Ordina per Ricavi descrescente
+    grouped = grouped_sums.sort_values(by='totale_prev', ascending=True)
 
-        if grouped.empty:
-            return
+    if grouped.empty:
+        return
 
-        y = np.arange(len(grouped))
-        height = 0.35
+    y = np.arange(len(grouped))
+    height = 0.35
 
-        # Bar 1: Ricavi (Totale Preventivato) - Green/Teal
-        ax.barh(y + height/2, grouped['totale_prev'], height, label='Totale Preventivato (Ricavi)', color='#20c997', alpha=0.9)
+    # Bar 1: Ricavi (Totale Preventivato) - Green/Teal
+    ax.barh(y + height/2, grouped['totale_prev'], height, label='Totale Preventivato (Ricavi)', color='#20c997', alpha=0.9)
 
-        # Bar 2: Costi (Ore * Standard) - Red
-        ax.barh(y - height/2, grouped['Costo'], height, label='Costo Stimato', color='#dc3545', alpha=0.8)
+    # Bar 2: Costi (Ore * Standard) - Red
+    ax.barh(y - height/2, grouped['Costo'], height, label='Costo Stimato', color='#dc3545', alpha=0.8)
 
-        ax.set_yticks(y)
-        ax.set_yticklabels(grouped.index)
-        # Legenda posizionata in basso a destra con frame semi-trasparente
-        ax.legend(loc='lower right', framealpha=0.8)
+    ax.set_yticks(y)
+    ax.set_yticklabels(grouped.index)
+    # Legenda posizionata in basso a destra con frame semi-trasparente
+    ax.legend(loc='lower right', framealpha=0.8)
 
-        # Aggiunge etichette numeriche
-        for i, (idx, row) in enumerate(grouped.iterrows()):
-            # Etichetta Ricavi + Margine
-            margine_k = row['Margine'] / 1000
-            txt_ric = f" € {row['totale_prev']/1000:.1f}k (Margine: {margine_k:+.1f}k)"
-            ax.text(row['totale_prev'], i + height/2, txt_ric,
-                    va='center', fontsize=9, color='#198754', fontweight='bold')
+    # Aggiunge etichette numeriche
+    for i, (idx, row) in enumerate(grouped.iterrows()):
+        # Etichetta Ricavi + Margine
+        margine_k = row['Margine'] / 1000
+        txt_ric = f" € {row['totale_prev']/1000:.1f}k (Margine: {margine_k:+.1f}k)"
+        ax.text(row['totale_prev'], i + height/2, txt_ric,
+                va='center', fontsize=9, color='#198754', fontweight='bold')
 
-            # Etichetta Costi
-            ax.text(row['Costo'], i - height/2, f" € {row['Costo']/1000:.1f}k",
-                    va='center', fontsize=9, color='#dc3545')
+        # Etichetta Costi
+        ax.text(row['Costo'], i - height/2, f" € {row['Costo']/1000:.1f}k",
+                va='center', fontsize=9, color='#dc3545')
 
-        ax.grid(axis='x', linestyle='--', alpha=0.5)
+    ax.grid(axis='x', linestyle='--', alpha=0.5)
 
-        # Ottimizzazione spazi: riduce i margini per riempire la card
-        # Lascia spazio a sinistra per le etichette (tipologie)
-        self.fig3.subplots_adjust(left=0.15, right=0.95, top=0.95, bottom=0.1)
-        self.canvas3.draw()
+    # Ottimizzazione spazi: riduce i margini per riempire la card
+    # Lascia spazio a sinistra per le etichette (tipologie)
+    fig.subplots_adjust(left=0.15, right=0.95, top=0.95, bottom=0.1)
 
-    def _plot_andamento_resa(self, df):
-        self.fig4.clear()
-        ax = self.fig4.add_subplot(111)
+def _plot_andamento_resa(fig, df):
+    fig.clear()
+    ax = fig.add_subplot(111)
 
-        if df.empty:
-            self.canvas4.draw()
-            return
+    if df.empty:
+        return
 
-        months_order = [
-            'gennaio', 'febbraio', 'marzo', 'aprile', 'maggio', 'giugno',
-            'luglio', 'agosto', 'settembre', 'ottobre', 'novembre', 'dicembre'
-        ]
-        df['mese_lower'] = df['mese'].str.lower().str.strip()
-        df['mese_cat'] = pd.Categorical(df['mese_lower'], categories=months_order, ordered=True)
+    df['mese_lower'] = df['mese'].str.lower().str.strip()
+    df['mese_cat'] = pd.Categorical(df['mese_lower'], categories=MONTHS_ORDER, ordered=True)
 
-        # Qui usiamo dropna() implicito se ci sono NaN in resa
-        df_resa = df[df['resa'] > 0]
-        grouped = df_resa.groupby('mese_cat', observed=True)['resa'].mean()
+    # Qui usiamo dropna() implicito se ci sono NaN in resa
+    df_resa = df[df['resa'] > 0]
+    grouped = df_resa.groupby('mese_cat', observed=True)['resa'].mean()
 
-        if grouped.empty:
-            ax.text(0.5, 0.5, 'Nessun dato Resa', ha='center', va='center')
-            self.canvas4.draw()
-            return
+    if grouped.empty:
+        ax.text(0.5, 0.5, 'Nessun dato Resa', ha='center', va='center')
+        return
 
-        x = range(len(grouped))
-        ax.plot(x, grouped.values, color='#6f42c1', marker='o', linewidth=3, markersize=8)
+    x = range(len(grouped))
+    ax.plot(x, grouped.values, color='#6f42c1', marker='o', linewidth=3, markersize=8)
 
-        ax.fill_between(x, grouped.values, color='#6f42c1', alpha=0.1)
+    ax.fill_between(x, grouped.values, color='#6f42c1', alpha=0.1)
 
-        ax.set_xticks(x)
-        ax.set_xticklabels([m.capitalize()[:3] for m in grouped.index], rotation=45)
+    ax.set_xticks(x)
+    ax.set_xticklabels([m.capitalize()[:3] for m in grouped.index], rotation=45)
 
-        for i, v in enumerate(grouped.values):
-            ax.text(i, v + (v*0.05), f"{v:.1f}", ha='center', fontsize=9, fontweight='bold', color='#6f42c1')
+    for i, v in enumerate(grouped.values):
+        ax.text(i, v + (v*0.05), f"{v:.1f}", ha='center', fontsize=9, fontweight='bold', color='#6f42c1')
 
-        # ax.set_title('Andamento Resa Media Mensile', fontsize=14, fontweight='bold', color='#495057', pad=20)
-        ax.grid(True, linestyle='--', alpha=0.5)
+    # ax.set_title('Andamento Resa Media Mensile', fontsize=14, fontweight='bold', color='#495057', pad=20)
+    ax.grid(True, linestyle='--', alpha=0.5)
 
-        self.fig4.tight_layout()
-        self.canvas4.draw()
+    fig.tight_layout()
 
-    def _plot_completamento(self, df):
-        """Barra di avanzamento impilata."""
-        self.fig5.clear()
-        ax = self.fig5.add_axes([0.05, 0.4, 0.9, 0.3]) # Adjust layout
+def _plot_completamento(fig, df):
+    """Barra di avanzamento impilata."""
+    fig.clear()
+    ax = fig.add_axes([0.05, 0.4, 0.9, 0.3]) # Adjust layout
 
-        if df.empty:
-            self.canvas5.draw()
-            return
+    if df.empty:
+        return
 
-        total = len(df)
-        if total == 0:
-            return
+    total = len(df)
+    if total == 0:
+        return
+
+    # Definisci categorie
+    completed = df[df['stato_attivita'].str.contains('CONTABILIZZA|CHIUSA', case=False, na=False)]
+    pending_tcl = df[df['stato_attivita'].str.contains('IN ATTESA TCL', case=False, na=False)]
+    to_complete = df[df['stato_attivita'].str.contains('DA COMPLETARE', case=False, na=False)]
 
-        # Definisci categorie
-        completed = df[df['stato_attivita'].str.contains('CONTABILIZZA|CHIUSA', case=False, na=False)]
-        pending_tcl = df[df['stato_attivita'].str.contains('IN ATTESA TCL', case=False, na=False)]
-        to_complete = df[df['stato_attivita'].str.contains('DA COMPLETARE', case=False, na=False)]
+    count_completed = len(completed)
+    count_tcl = len(pending_tcl)
+    count_todo = len(to_complete)
+    # Il resto sono "Altro" o "Aperta" generica
+    count_other = total - count_completed - count_tcl - count_todo
 
-        count_completed = len(completed)
-        count_tcl = len(pending_tcl)
-        count_todo = len(to_complete)
-        # Il resto sono "Altro" o "Aperta" generica
-        count_other = total - count_completed - count_tcl - count_todo
+    # Percentuali
+    pct_completed = (count_completed / total) * 100
+    pct_tcl = (count_tcl / total) * 100
+    pct_todo = (count_todo / total) * 100
+    pct_other = (count_other / total) * 100
 
-        # Percentuali
-        pct_completed = (count_completed / total) * 100
-        pct_tcl = (count_tcl / total) * 100
-        pct_todo = (count_todo / total) * 100
-        pct_other = (count_other / total) * 100
+    # Plot Stacked Bar
+    # Order: Completed (Green), TCL (Yellow), Todo (Red), Other (Gray)
 
-        # Plot Stacked Bar
-        # Order: Completed (Green), TCL (Yellow), Todo (Red), Other (Gray)
+    p1 = ax.barh(0, pct_completed, height=0.6, color='#198754', label='Contabilizzate', edgecolor='white')
+    p2 = ax.barh(0, pct_tcl, left=pct_completed, height=0.6, color='#ffc107', label='In Attesa TCL', edgecolor='white')
+    p3 = ax.barh(0, pct_todo, left=pct_completed + pct_tcl, height=0.6, color='#dc3545', label='Da Completare', edgecolor='white')
+    p4 = ax.barh(0, pct_other, left=pct_completed + pct_tcl + pct_todo, height=0.6, color='#e9ecef', label='Altro', edgecolor='white')
 
-        p1 = ax.barh(0, pct_completed, height=0.6, color='#198754', label='Contabilizzate', edgecolor='white')
-        p2 = ax.barh(0, pct_tcl, left=pct_completed, height=0.6, color='#ffc107', label='In Attesa TCL', edgecolor='white')
-        p3 = ax.barh(0, pct_todo, left=pct_completed + pct_tcl, height=0.6, color='#dc3545', label='Da Completare', edgecolor='white')
-        p4 = ax.barh(0, pct_other, left=pct_completed + pct_tcl + pct_todo, height=0.6, color='#e9ecef', label='Altro', edgecolor='white')
+    # Label Helper Function to prevent overlap
+    def add_label(pct, current_left, color='white'):
+        # Only show if at least 2% width to avoid clutter (reduced from 5% to show TCL)
+        if pct > 2:
+            ax.text(current_left + pct/2, 0, f"{pct:.1f}%", ha='center', va='center', color=color, fontweight='bold')
 
-        # Label Helper Function to prevent overlap
-        def add_label(pct, current_left, color='white'):
-            # Only show if at least 2% width to avoid clutter (reduced from 5% to show TCL)
-            if pct > 2:
-                ax.text(current_left + pct/2, 0, f"{pct:.1f}%", ha='center', va='center', color=color, fontweight='bold')
+    add_label(pct_completed, 0)
+    add_label(pct_tcl, pct_completed, color='black') # Yellow bg needs black text
+    add_label(pct_todo, pct_completed + pct_tcl)
 
-        add_label(pct_completed, 0)
-        add_label(pct_tcl, pct_completed, color='black') # Yellow bg needs black text
-        add_label(pct_todo, pct_completed + pct_tcl)
+    # Other might be small, skip if tiny
+    add_label(pct_other, pct_completed + pct_tcl + pct_todo, color='black')
 
-        # Other might be small, skip if tiny
-        add_label(pct_other, pct_completed + pct_tcl + pct_todo, color='black')
+    ax.set_xlim(0, 100)
+    ax.set_ylim(-0.5, 0.5)
+    ax.axis('off')
 
-        ax.set_xlim(0, 100)
-        ax.set_ylim(-0.5, 0.5)
-        ax.axis('off')
+    # Legend below
+    ax.legend(loc='upper center', bbox_to_anchor=(0.5, -0.2), ncol=4, frameon=False, fontsize=9)
 
-        # Legend below
-        ax.legend(loc='upper center', bbox_to_anchor=(0.5, -0.2), ncol=4, frameon=False, fontsize=9)
 
-        self.canvas5.draw()
+# Un grafico per ChartImage, nell'ordine di ContabilitaKPIPanel.chart_images
+CHART_PLOTTERS = [
+    _plot_stato_attivita,
+    _plot_prev_ore_mese,
+    _plot_margine_tipologia,
+    _plot_andamento_resa,
+    _plot_completamento,
+]
@@ -4,22 +4,27 @@ Pannello per la visualizzazione della Contabilità Strumentale.
 """
 import os
 import re
+from collections import OrderedDict
 from datetime import datetime
 from PyQt6.QtWidgets import (
     QWidget, QVBoxLayout, QHBoxLayout, QTabWidget, QMessageBox, QMenu, QTableWidget,
     QHeaderView, QTableWidgetItem, QLabel, QLineEdit, QPushButton, QCheckBox, QComboBox, QAbstractItemView,
     QTreeWidget, QTreeWidgetItem
 )
-from PyQt6.QtCore import Qt, pyqtSignal, QThread
+from PyQt6.QtCore import Qt, pyqtSignal, QThread, QTimer
 from PyQt6.QtGui import QAction, QFont, QColor
 import time
 import json
 import tempfile
 import subprocess
 
+import numpy as np
+
 from src.core.contabilita_manager import ContabilitaManager
 from src.core import config_manager
 from src.gui.widgets import ExcelTableWidget, StatusIndicator
+from src.utils.parsing import parse_currency
+from src.utils.search_index import RowSearchIndex
 
 
 class ContabilitaWorker(QThread):
@@ -111,12 +116,260 @@ class ContabilitaWorker(QThread):
         self.finished_signal.emit(success, msg + msg_giornaliere + msg_attivita + msg_certificati, total_added, total_removed)
 
 
+class LazyLoadMixin:
+    """
+    Caricamento differito dei dati per i tab del pannello Strumentale.
+
+    Il widget nasce come segnaposto leggero (solo UI) e legge il DB alla prima
+    attivazione. Dopo un'importazione viene marcato obsoleto e ricaricato solo
+    quando torna visibile; `unload()` libera i dati (eviction LRU).
+    """
+
+    _loaded = False
+    _stale = False
+
+    @property
+    def is_loaded(self) -> bool:
+        return self._loaded
+
+    def ensure_loaded(self) -> bool:
+        """Carica i dati se mai caricati o obsoleti. Ritorna True se ha letto dal DB."""
+        if self._loaded and not self._stale:
+            return False
+        self._load_data()
+        self._loaded = True
+        self._stale = False
+        return True
+
+    def mark_stale(self):
+        """Segnala che i dati in memoria non riflettono più il DB."""
+        if self._loaded:
+            self._stale = True
+
+    def unload(self):
+        """Libera i dati in memoria; verranno ricaricati alla prossima attivazione."""
+        self._clear_data()
+        self._loaded = False
+        self._stale = False
+
+    def _clear_data(self):
+        self.table.setSortingEnabled(False)
+        self.table.setRowCount(0)
+
+
+# Ruolo Qt che lega la riga visualizzata al suo indice nei dati caricati
+ROW_INDEX_ROLE = Qt.ItemDataRole.UserRole + 1
+
+# Worker di filtro in esecuzione (riferimento forte finché il thread non termina)
+_FILTER_WORKERS = set()
+
+
+class FilterWorker(QThread):
+    """Valuta la ricerca testuale su un RowSearchIndex fuori dal thread GUI."""
+    finished_signal = pyqtSignal(int, object)  # generation, mask
+
+    def __init__(self, index, text, generation):
+        super().__init__()
+        self.index = index
+        self.text = text
+        self.generation = generation
+
+    def run(self):
+        self.finished_signal.emit(self.generation, self.index.match(self.text))
+
+
+class SearchFilterMixin:
+    """
+    Filtro della barra di ricerca con indice precalcolato.
+
+    Il testo di ogni riga è indicizzato una volta al caricamento
+    (`_set_search_rows`); la ricerca gira in un FilterWorker e l'esito si
+    applica in un unico passaggio a repaint sospeso, toccando solo le righe
+    che cambiano stato. Le righe si mappano ai dati tramite ROW_INDEX_ROLE,
+    quindi l'ordinamento della tabella non rompe la corrispondenza.
+    """
+
+    _search_index = None
+    _search_mask = None
+    _visible_mask = np.zeros(0, dtype=bool)
+    _filter_text = ""
+    _filter_generation = 0
+    _filter_worker = None
+    _row_order = None
+    _hidden_rows = None
+    _sort_hook_connected = False
+
+    def _set_search_rows(self, row_texts):
+        """Indicizza i testi visualizzati delle righe appena caricate."""
+        if not self._sort_hook_connected:
+            self.table.horizontalHeader().sortIndicatorChanged.connect(self._invalidate_row_order)
+            self._sort_hook_connected = True
+        self._search_index = RowSearchIndex(row_texts)
+        self._search_mask = None
+        self._visible_mask = np.ones(len(self._search_index), dtype=bool)
+        self._filter_generation += 1
+        self._invalidate_row_order()
+
+    def filter_data(self, text):
+        self._filter_text = text
+        self._filter_generation += 1
+        if self._search_index is None:
+            return
+        if not text.split():
+            self._search_mask = None
+            self._apply_visibility()
+        elif self._filter_worker is None:
+            self._start_filter_worker()
+        # Altrimenti il worker in corso risulterà superato e ripartirà col testo attuale
+
+    def _start_filter_worker(self):
+        worker = FilterWorker(self._search_index, self._filter_text, self._filter_generation)
+        worker.finished_signal.connect(self._on_filter_finished)
+        worker.finished.connect(lambda w=worker: _FILTER_WORKERS.discard(w))
+        _FILTER_WORKERS.add(worker)
+        self._filter_worker = worker
+        worker.start()
+
+    def _on_filter_finished(self, generation, mask):
+        self._filter_worker = None
+        if generation == self._filter_generation:
+            self._search_mask = mask
+            self._apply_visibility()
+        elif self._search_index is not None and self._filter_text.split():
+            self._start_filter_worker()
+
+    def _base_filter_mask(self):
+        """Filtri aggiuntivi del tab (in AND con la ricerca); None se assenti."""
+        return None
+
+    def _on_visibility_changed(self):
+        """Hook chiamato dopo ogni aggiornamento della visibilità."""
+
+    def _invalidate_row_order(self, *args):
+        self._row_order = None
+        self._hidden_rows = None
+
+    def _view_row_order(self) -> np.ndarray:
+        """Indice dati per ogni riga visualizzata (-1 per righe extra, es. TOTALI)."""
+        if self._row_order is None:
+            order = np.full(self.table.rowCount(), -1, dtype=np.intp)
+            for row in range(len(order)):
+                item = self.table.item(row, 0)
+                idx = item.data(ROW_INDEX_ROLE) if item else None
+                if idx is not None:
+                    order[row] = idx
+            self._row_order = order
+        return self._row_order
+
+    def _apply_visibility(self):
+        if self._search_index is None:
+            return
+        if self._search_mask is None:
+            visible = np.ones(len(self._search_index), dtype=bool)
+        else:
+            visible = self._search_mask.copy()
+        base = self._base_filter_mask()
+        if base is not None:
+            visible &= base
+        self._visible_mask = visible
+
+        order = self._view_row_order()
+        hidden = np.zeros(len(order), dtype=bool)
+        data_rows = order >= 0
+        hidden[data_rows] = ~visible[order[data_rows]]
+
+        if self._hidden_rows is None or len(self._hidden_rows) != len(hidden):
+            changed = np.arange(len(hidden))
+        else:
+            changed = np.flatnonzero(hidden != self._hidden_rows)
+
+        if len(changed):
+            self.table.setUpdatesEnabled(False)
+            try:
+                for row in changed:
+                    self.table.setRowHidden(int(row), bool(hidden[row]))
+            finally:
+                self.table.setUpdatesEnabled(True)
+        self._hidden_rows = hidden
+        self._on_visibility_changed()
+
+    def _clear_data(self):
+        self._search_index = None
+        self._search_mask = None
+        self._visible_mask = np.zeros(0, dtype=bool)
+        self._filter_generation += 1
+        self._invalidate_row_order()
+        super()._clear_data()
+
+
+def _to_float(val) -> float:
+    """Valore numerico grezzo dal DB (stringa o numero); 0.0 se non interpretabile."""
+    if val is None:
+        return 0.0
+    try:
+        return float(str(val).strip())
+    except ValueError:
+        return parse_currency(val)
+
+
+class ShadowTotalsMixin:
+    """
+    Colonne numeriche "ombra" costruite una volta al caricamento.
+
+    Gli array sono indicizzati come i dati caricati (ROW_INDEX_ROLE).
+    Totali delle righe visibili e della selezione sono somme vettoriali:
+    il testo formattato delle celle non viene mai riletto.
+    """
+
+    _ore_values = np.zeros(0)
+
+    @staticmethod
+    def _numeric_column(data, col_idx) -> np.ndarray:
+        values = np.fromiter((_to_float(row[col_idx]) for row in data), dtype=np.float64, count=len(data))
+        return np.nan_to_num(values, nan=0.0, posinf=0.0, neginf=0.0)
+
+    def _shadow_index(self, row):
+        item = self.table.item(row, 0)
+        return item.data(ROW_INDEX_ROLE) if item else None
+
+    def _shadow_indices(self, rows) -> np.ndarray:
+        """Indici negli array per le righe date, escluse nascoste e riga TOTALI."""
+        indices = []
+        for row in rows:
+            if self.table.isRowHidden(row):
+                continue
+            idx = self._shadow_index(row)
+            if idx is not None:
+                indices.append(idx)
+        return np.asarray(indices, dtype=np.intp)
+
+    def selection_totals(self, rows):
+        """Ritorna (numero righe, somma ORE) per le righe selezionate."""
+        indices = self._shadow_indices(rows)
+        return len(indices), float(self._ore_values[indices].sum())
+
+    def _on_visibility_changed(self):
+        self._update_totals()
+
+    def _clear_data(self):
+        self._ore_values = np.zeros(0)
+        super()._clear_data()
+
+
 class ContabilitaPanel(QWidget):
     """Pannello principale Strumentale."""
 
+    # Numero massimo di tab anno con dati in memoria (politica LRU)
+    MAX_LOADED_YEAR_TABS = 4
+    # Attesa dopo l'ultimo tasto prima di filtrare (ms)
+    SEARCH_DEBOUNCE_MS = 200
+
     def __init__(self, parent=None):
         super().__init__(parent)
         self.worker = None
+        self._loaded_year_tabs = OrderedDict()  # tab -> None, ordine = uso recente
+        self._kpi_stale = False
+        self._tabs_initialized = False
         self._setup_ui()
 
         # Carica i dati iniziali
@@ -148,7 +401,12 @@ class ContabilitaPanel(QWidget):
                 border-color: #0d6efd;
             }
         """)
-        self.search_input.textChanged.connect(self._filter_current_tab)
+        # Debounce: il filtro parte solo quando l'utente smette di digitare
+        self._search_timer = QTimer(self)
+        self._search_timer.setSingleShot(True)
+        self._search_timer.setInterval(self.SEARCH_DEBOUNCE_MS)
+        self._search_timer.timeout.connect(lambda: self._filter_current_tab(self.search_input.text()))
+        self.search_input.textChanged.connect(lambda _: self._search_timer.start())
         top_layout.addWidget(self.search_input)
 
         top_layout.addStretch()
@@ -288,6 +546,8 @@ class ContabilitaPanel(QWidget):
 
     def _on_main_tab_changed(self, index):
         """Handle visibility of search bar based on main tab."""
+        self._activate_visible_tab()
+
         tab_text = self.main_tabs.tabText(index)
         if "Analisi KPI" in tab_text:
             self.search_input.hide()
@@ -300,77 +560,136 @@ class ContabilitaPanel(QWidget):
             self._connect_selection_signal()
 
     def refresh_tabs(self):
-        """Ricarica i tab in base agli anni nel DB."""
-        # Salva l'anno corrente selezionato per ripristinarlo
-        current_year_dati = self.year_tabs_widget.tabText(self.year_tabs_widget.currentIndex())
-        current_year_giorn = self.giornaliere_tabs_widget.tabText(self.giornaliere_tabs_widget.currentIndex())
-
-        self.year_tabs_widget.clear()
-        self.giornaliere_tabs_widget.clear()
+        """
+        Allinea i tab anno agli anni presenti nel DB.
 
+        I tab sono segnaposto che caricano i dati alla prima attivazione.
+        Se gli anni non cambiano i tab esistenti vengono solo marcati obsoleti:
+        si ricarica subito soltanto quello visibile, gli altri alla prossima
+        attivazione. Lo stesso vale per KPI, Attività e Certificati.
+        """
         years = ContabilitaManager.get_available_years()
-        if not years:
-            no_data = QLabel("Nessun dato disponibile. Configura il file nelle impostazioni e riavvia/aggiorna.")
-            no_data.setAlignment(Qt.AlignmentFlag.AlignCenter)
-            self.year_tabs_widget.addTab(no_data, "Info")
-            return
 
-        # Popola tab Dati e Giornaliere
-        for year in years:
-            # Dati
-            tab_dati = ContabilitaYearTab(year)
-            self.year_tabs_widget.addTab(tab_dati, str(year))
+        if years and years == self._current_years():
+            for tab in self._year_tabs():
+                tab.mark_stale()
+        else:
+            self._rebuild_year_tabs(years)
 
-            # Giornaliere
-            tab_giorn = GiornaliereYearTab(year)
-            self.giornaliere_tabs_widget.addTab(tab_giorn, str(year))
+        if self._tabs_initialized:
+            self.attivita_widget.mark_stale()
+            self.certificati_widget.mark_stale()
+            self._kpi_stale = True
+        self._tabs_initialized = True
 
-        # Ripristina selezione Dati
-        for i in range(self.year_tabs_widget.count()):
-            if self.year_tabs_widget.tabText(i) == current_year_dati:
-                self.year_tabs_widget.setCurrentIndex(i)
-                break
+        self._activate_visible_tab()
+        self._filter_current_tab(self.search_input.text())
+        self._connect_selection_signal()
 
-        # Ripristina selezione Giornaliere
-        for i in range(self.giornaliere_tabs_widget.count()):
-            if self.giornaliere_tabs_widget.tabText(i) == current_year_giorn:
-                self.giornaliere_tabs_widget.setCurrentIndex(i)
-                break
+    def _year_tabs(self):
+        """Tutti i tab anno (Preventivi e Giornaliere)."""
+        tabs = []
+        for tab_widget in (self.year_tabs_widget, self.giornaliere_tabs_widget):
+            for i in range(tab_widget.count()):
+                tab = tab_widget.widget(i)
+                if isinstance(tab, (ContabilitaYearTab, GiornaliereYearTab)):
+                    tabs.append(tab)
+        return tabs
+
+    def _current_years(self):
+        """Anni attualmente rappresentati dai tab Preventivi."""
+        return [
+            tab.year for tab in self._year_tabs() if isinstance(tab, ContabilitaYearTab)
+        ]
+
+    def _rebuild_year_tabs(self, years):
+        """Ricrea i tab anno come segnaposto leggeri (nessuna lettura dal DB)."""
+        # Salva l'anno corrente selezionato per ripristinarlo
+        current_year_dati = self.year_tabs_widget.tabText(self.year_tabs_widget.currentIndex())
+        current_year_giorn = self.giornaliere_tabs_widget.tabText(self.giornaliere_tabs_widget.currentIndex())
 
-        # Connect signals for initial tabs
-        self._connect_selection_signal()
+        self.year_tabs_widget.blockSignals(True)
+        self.giornaliere_tabs_widget.blockSignals(True)
+        try:
+            for tab_widget in (self.year_tabs_widget, self.giornaliere_tabs_widget):
+                old_tabs = [tab_widget.widget(i) for i in range(tab_widget.count())]
+                tab_widget.clear()
+                for tab in old_tabs:
+                    tab.deleteLater()
+            self._loaded_year_tabs.clear()
+
+            if not years:
+                no_data = QLabel("Nessun dato disponibile. Configura il file nelle impostazioni e riavvia/aggiorna.")
+                no_data.setAlignment(Qt.AlignmentFlag.AlignCenter)
+                self.year_tabs_widget.addTab(no_data, "Info")
+                return
 
-        # Aggiorna anche i dati KPI
-        if hasattr(self, 'kpi_panel'):
-            self.kpi_panel.refresh_years()
+            for year in years:
+                self.year_tabs_widget.addTab(ContabilitaYearTab(year), str(year))
+                self.giornaliere_tabs_widget.addTab(GiornaliereYearTab(year), str(year))
+
+            # Ripristina selezione Dati e Giornaliere
+            for tab_widget, current_text in (
+                (self.year_tabs_widget, current_year_dati),
+                (self.giornaliere_tabs_widget, current_year_giorn),
+            ):
+                for i in range(tab_widget.count()):
+                    if tab_widget.tabText(i) == current_text:
+                        tab_widget.setCurrentIndex(i)
+                        break
+        finally:
+            self.year_tabs_widget.blockSignals(False)
+            self.giornaliere_tabs_widget.blockSignals(False)
 
-        # Aggiorna Attività Programmate
-        if hasattr(self, 'attivita_widget'):
-            self.attivita_widget.refresh_data()
+    def _visible_data_widget(self):
+        """Restituisce il widget dati attualmente visibile (tab anno o tab principale)."""
+        current_main_widget = self.main_tabs.currentWidget()
+        if current_main_widget == self.year_tabs_widget:
+            return self.year_tabs_widget.currentWidget()
+        if current_main_widget == self.giornaliere_tabs_widget:
+            return self.giornaliere_tabs_widget.currentWidget()
+        return current_main_widget
+
+    def _activate_visible_tab(self):
+        """Carica (o ricarica se obsoleto) solo il widget visibile."""
+        widget = self._visible_data_widget()
+        if widget is None:
+            return
 
-        # Aggiorna Certificati Campione
-        if hasattr(self, 'certificati_widget'):
-            self.certificati_widget.refresh_data()
+        if widget == getattr(self, 'kpi_panel', None):
+            if self._kpi_stale:
+                self._kpi_stale = False
+                self.kpi_panel.refresh_years()
+            return
+
+        if hasattr(widget, 'ensure_loaded'):
+            widget.ensure_loaded()
+            if isinstance(widget, (ContabilitaYearTab, GiornaliereYearTab)):
+                self._touch_year_tab(widget)
+
+    def _touch_year_tab(self, tab):
+        """Aggiorna l'ordine LRU e libera i dati dei tab anno fuori schermo in eccesso."""
+        self._loaded_year_tabs[tab] = None
+        self._loaded_year_tabs.move_to_end(tab)
+
+        # Il tab corrente di entrambi i sotto-pannelli resta sempre in memoria
+        pinned = {self.year_tabs_widget.currentWidget(), self.giornaliere_tabs_widget.currentWidget()}
+        while len(self._loaded_year_tabs) > self.MAX_LOADED_YEAR_TABS:
+            victim = next((t for t in self._loaded_year_tabs if t not in pinned), None)
+            if victim is None:
+                break
+            del self._loaded_year_tabs[victim]
+            victim.unload()
 
     def _on_tab_changed(self, index):
         """Chiamato quando cambia la tab ANNO (in uno dei sub-tabwidget)."""
+        self._activate_visible_tab()
         self._filter_current_tab(self.search_input.text())
         self._connect_selection_signal() # Connect new tab table
 
     def _connect_selection_signal(self):
         """Connects the selection change signal of the current table to update totals."""
-        current_main_idx = self.main_tabs.currentIndex()
-        current_main_widget = self.main_tabs.widget(current_main_idx)
-
-        target_widget = None
-        if current_main_widget == self.year_tabs_widget:
-            target_widget = self.year_tabs_widget.currentWidget()
-        elif current_main_widget == self.giornaliere_tabs_widget:
-            target_widget = self.giornaliere_tabs_widget.currentWidget()
-        elif current_main_widget == getattr(self, 'attivita_widget', None):
-            target_widget = self.attivita_widget
-        elif current_main_widget == getattr(self, 'certificati_widget', None):
-            target_widget = self.certificati_widget
+        target_widget = self._visible_data_widget()
 
         if target_widget:
             # Table-based widgets
@@ -381,7 +700,7 @@ class ContabilitaPanel(QWidget):
                     except Exception: pass
                     # Connect
                     target_widget.table.selectionModel().selectionChanged.connect(
-                        lambda s, d: self._update_selection_total(target_widget.table)
+                        lambda s, d: self._update_selection_total(target_widget.table, target_widget)
                     )
                 except Exception as e:
                     print(f"Errore connessione segnali selezione (Table): {e}")
@@ -398,7 +717,7 @@ class ContabilitaPanel(QWidget):
                 except Exception as e:
                     print(f"Errore connessione segnali selezione (Tree): {e}")
 
-    def _update_selection_total(self, widget):
+    def _update_selection_total(self, widget, owner=None):
         """Calculates total of selected ORE SP column and row count."""
         try:
             # Handle QTreeWidget (Certificati)
@@ -419,6 +738,13 @@ class ContabilitaPanel(QWidget):
                 self.selection_sum_label.setText("Totale ORE SP: 0")
                 return
 
+            # Tab anno: somma vettoriale sulle colonne numeriche ombra
+            if isinstance(owner, ShadowTotalsMixin):
+                count, total_ore = owner.selection_totals({idx.row() for idx in indexes})
+                self.selection_count_label.setText(f"Righe: {count}")
+                self.selection_sum_label.setText(f"Totale ORE SP: {self._format_selection_ore(total_ore)}")
+                return
+
             # Identifica la colonna "ORE" o "ORE SP" per la tabella corrente
             target_col_idx = -1
             # Controlla header per trovare la colonna corretta dinamicamente
@@ -462,33 +788,20 @@ class ContabilitaPanel(QWidget):
                         except ValueError:
                             pass # Ignora errori di parsing numerico (es. celle vuote)
 
-            # Format
-            if total_ore % 1 == 0:
-                fmt_ore = f"{int(total_ore)}"
-            else:
-                fmt_ore = f"{total_ore:,.2f}".replace(",", "X").replace(".", ",").replace("X", ".")
-
             self.selection_count_label.setText(f"Righe: {len(selected_rows)}")
-            self.selection_sum_label.setText(f"Totale ORE SP: {fmt_ore}")
+            self.selection_sum_label.setText(f"Totale ORE SP: {self._format_selection_ore(total_ore)}")
         except Exception as e:
             print(f"Errore calcolo selezione: {e}")
 
+    @staticmethod
+    def _format_selection_ore(total_ore: float) -> str:
+        if total_ore % 1 == 0:
+            return f"{int(total_ore)}"
+        return f"{total_ore:,.2f}".replace(",", "X").replace(".", ",").replace("X", ".")
+
     def _filter_current_tab(self, text):
         """Filtra la tabella nella tab corrente attiva."""
-        # Trova quale sub-tabwidget è visibile
-        current_main_idx = self.main_tabs.currentIndex()
-        current_main_widget = self.main_tabs.widget(current_main_idx)
-
-        target_widget = None
-
-        if current_main_widget == self.year_tabs_widget:
-            target_widget = self.year_tabs_widget.currentWidget()
-        elif current_main_widget == self.giornaliere_tabs_widget:
-            target_widget = self.giornaliere_tabs_widget.currentWidget()
-        elif current_main_widget == getattr(self, 'attivita_widget', None):
-            target_widget = self.attivita_widget
-        elif current_main_widget == getattr(self, 'certificati_widget', None):
-            target_widget = self.certificati_widget
+        target_widget = self._visible_data_widget()
 
         if target_widget and hasattr(target_widget, 'filter_data'):
             target_widget.filter_data(text)
@@ -531,8 +844,8 @@ class ContabilitaPanel(QWidget):
         self.refresh_btn.setDisabled(False) # Re-enable button
 
 
-class ContabilitaYearTab(QWidget):
-    """Tab per un singolo anno (Tabella Dati)."""
+class ContabilitaYearTab(ShadowTotalsMixin, SearchFilterMixin, LazyLoadMixin, QWidget):
+    """Tab per un singolo anno (Tabella Dati). I dati si caricano alla prima attivazione."""
 
     COLUMNS = [
         "DATA\nPREV.", "MESE", "N°\nPREV.", "TOTALE\nPREV.", "ATTIVITA'",
@@ -556,7 +869,6 @@ class ContabilitaYearTab(QWidget):
         super().__init__(parent)
         self.year = year
         self._setup_ui()
-        self._load_data()
 
     def _setup_ui(self):
         layout = QVBoxLayout(self)
@@ -633,26 +945,41 @@ class ContabilitaYearTab(QWidget):
         self.table.blockSignals(True)
 
         try:
+            self.table.setRowCount(0)
             self.table.setRowCount(len(data))
 
             align_right_flags = Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter
             right_aligned_cols = {self.COL_TOTALE, self.COL_ORE, self.COL_RESA}
             columns_count = len(self.COLUMNS)
+            row_texts = []
 
             for row_idx, row_data in enumerate(data):
+                texts = []
                 for col_idx in range(columns_count):
                     val = row_data[col_idx]
                     formatted_val = self._format_value(col_idx, val)
+                    texts.append(formatted_val)
 
                     item = QTableWidgetItem(formatted_val)
                     if col_idx in right_aligned_cols:
                         item.setTextAlignment(align_right_flags)
 
                     self.table.setItem(row_idx, col_idx, item)
+                row_texts.append(texts)
 
                 indirizzo = row_data[self.IDX_INDIRIZZO]
                 if self.table.item(row_idx, 0):
                     self.table.item(row_idx, 0).setData(Qt.ItemDataRole.UserRole, indirizzo)
+                    self.table.item(row_idx, 0).setData(ROW_INDEX_ROLE, row_idx)
+
+            # Colonne numeriche ombra (una sola volta per caricamento)
+            self._totale_prev = self._numeric_column(data, self.COL_TOTALE)
+            self._ore_values = self._numeric_column(data, self.COL_ORE)
+            self._resa_excluded = np.fromiter(
+                ("INS.ORE SP" in str(row[self.COL_RESA] or "").upper() for row in data),
+                dtype=bool, count=len(data)
+            )
+            self._set_search_rows(row_texts)
 
             self.table.resizeRowsToContents()  # Ensure full content is visible
 
@@ -698,34 +1025,14 @@ class ContabilitaYearTab(QWidget):
 
         if total_row_idx == -1: return
 
-        rows = total_row_idx
-        count_prev = 0
-        sum_totale_prev = 0.0
-        sum_ore_sp = 0.0
-        # Variabili per calcolo media (ora usate solo per compatibilità futura se richiesto)
-        sum_resa = 0.0
-        count_resa = 0
-
-        for r in range(rows):
-            if not self.table.isRowHidden(r):
-                count_prev += 1
-                is_excluded = False
-                r_item = self.table.item(r, self.COL_RESA)
-                if r_item:
-                    resa_text = r_item.text().strip()
-                    if "INS.ORE SP" in resa_text.upper():
-                        is_excluded = True
-
-                # Totale Prev (solo righe valide)
-                if not is_excluded:
-                    t_item = self.table.item(r, self.COL_TOTALE)
-                    if t_item:
-                        sum_totale_prev += self._parse_currency(t_item.text())
-
-                # Ore Spese (TUTTE le righe, incluse INS.ORE SP per il costo totale)
-                o_item = self.table.item(r, self.COL_ORE)
-                if o_item:
-                    sum_ore_sp += self._parse_float(o_item.text())
+        visible = self._visible_mask
+        count_prev = int(np.count_nonzero(visible))
+
+        # Totale Prev (solo righe valide, escluse INS.ORE SP)
+        sum_totale_prev = float(self._totale_prev[visible & ~self._resa_excluded].sum())
+
+        # Ore Spese (TUTTE le righe, incluse INS.ORE SP per il costo totale)
+        sum_ore_sp = float(self._ore_values[visible].sum())
 
         self.table.item(total_row_idx, self.COL_N_PREV).setText(str(count_prev))
         self.table.item(total_row_idx, self.COL_TOTALE).setText(self._format_currency(sum_totale_prev))
@@ -739,15 +1046,10 @@ class ContabilitaYearTab(QWidget):
 
         self.table.item(total_row_idx, self.COL_RESA).setText(self._format_number(weighted_resa))
 
-    def _parse_currency(self, text):
-        try:
-            clean = text.replace("€", "").replace(".", "").replace(",", ".").strip()
-            return float(clean)
-        except: return 0.0
-
-    def _parse_float(self, text):
-        try: return float(text)
-        except: return 0.0
+    def _clear_data(self):
+        self._totale_prev = np.zeros(0)
+        self._resa_excluded = np.zeros(0, dtype=bool)
+        super()._clear_data()
 
     def _format_currency(self, val):
         return f"€ {val:,.2f}".replace(",", "X").replace(".", ",").replace("X", ".")
@@ -791,38 +1093,6 @@ class ContabilitaYearTab(QWidget):
 
         return str_val
 
-    def filter_data(self, text):
-        total_rows = self.table.rowCount()
-        data_rows = total_rows
-        if total_rows > 0:
-            last_item = self.table.item(total_rows - 1, 0)
-            if last_item and last_item.text() == "TOTALI":
-                data_rows = total_rows - 1
-
-        search_terms = text.lower().split()
-        cols = self.table.columnCount()
-
-        for r in range(data_rows):
-            if not text:
-                self.table.setRowHidden(r, False)
-                continue
-            row_visible = False
-            for c in range(cols):
-                item = self.table.item(r, c)
-                if item and item.text():
-                    if text.lower() in item.text().lower():
-                         row_visible = True
-                         break
-            if not row_visible:
-                row_full_text = " ".join([self.table.item(r, c).text().lower() for c in range(cols) if self.table.item(r, c)])
-                if all(term in row_full_text for term in search_terms):
-                    row_visible = True
-            self.table.setRowHidden(r, not row_visible)
-
-        if data_rows < total_rows:
-            self.table.setRowHidden(data_rows, False)
-        self._update_totals()
-
     def _show_context_menu(self, pos):
         item = self.table.itemAt(pos)
         if not item: return
@@ -857,8 +1127,8 @@ class ContabilitaYearTab(QWidget):
             QMessageBox.warning(self, "Errore Apertura", f"Impossibile aprire il file:\n{path_str}\n\nErrore: {e}")
 
 
-class GiornaliereYearTab(QWidget):
-    """Tab per un singolo anno (Giornaliere)."""
+class GiornaliereYearTab(ShadowTotalsMixin, SearchFilterMixin, LazyLoadMixin, QWidget):
+    """Tab per un singolo anno (Giornaliere). I dati si caricano alla prima attivazione."""
 
     # data, personale, tcl, descrizione, n_prev, odc, pdl, inizio, fine, ore
     COLUMNS = [
@@ -877,7 +1147,6 @@ class GiornaliereYearTab(QWidget):
         super().__init__(parent)
         self.year = year
         self._setup_ui()
-        self._load_data()
 
     def _setup_ui(self):
         layout = QVBoxLayout(self)
@@ -955,29 +1224,40 @@ class GiornaliereYearTab(QWidget):
         self.table.blockSignals(True)
 
         try:
+            self.table.setRowCount(0)
             self.table.setRowCount(len(data))
             align_right_flags = Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter
 
             # Ore a destra
             right_cols = {self.COL_ORE}
+            row_texts = []
 
             for row_idx, row_data in enumerate(data):
                 # row_data includes all columns + nome_file
+                texts = []
                 for col_idx in range(len(self.COLUMNS)):
                     val = row_data[col_idx]
                     formatted_val = self._format_value(col_idx, val)
+                    texts.append(formatted_val)
 
                     item = QTableWidgetItem(formatted_val)
                     if col_idx in right_cols:
                         item.setTextAlignment(align_right_flags)
 
                     self.table.setItem(row_idx, col_idx, item)
+                row_texts.append(texts)
 
                 # Store filename in first column's user data
                 if len(row_data) > self.IDX_NOMEFILE:
                     filename = row_data[self.IDX_NOMEFILE]
                     if self.table.item(row_idx, 0):
                         self.table.item(row_idx, 0).setData(Qt.ItemDataRole.UserRole, filename)
+                if self.table.item(row_idx, 0):
+                    self.table.item(row_idx, 0).setData(ROW_INDEX_ROLE, row_idx)
+
+            # Colonna numerica ombra ORE
+            self._ore_values = self._numeric_column(data, self.COL_ORE)
+            self._set_search_rows(row_texts)
 
             # Resize per contenuto multiriga
             self.table.resizeRowsToContents()
@@ -1027,24 +1307,11 @@ class GiornaliereYearTab(QWidget):
 
         if total_row_idx == -1: return
 
-        rows = total_row_idx
-        sum_ore = 0.0
-
-        for r in range(rows):
-            if not self.table.isRowHidden(r):
-                item = self.table.item(r, self.COL_ORE)
-                if item:
-                    # Parse localizing the comma back to dot for float calc
-                    text_val = item.text().replace(',', '.')
-                    sum_ore += self._parse_float(text_val)
+        sum_ore = float(self._ore_values[self._visible_mask].sum())
 
         # Format total with the same helper
         self.table.item(total_row_idx, self.COL_ORE).setText(self._format_number(sum_ore))
 
-    def _parse_float(self, text):
-        try: return float(text)
-        except: return 0.0
-
     def _format_number(self, val):
         """Formatta ORE: max 2 decimali, virgola, niente .0 finale."""
         try:
@@ -1081,41 +1348,6 @@ class GiornaliereYearTab(QWidget):
 
         return str_val
 
-    def filter_data(self, text):
-        total_rows = self.table.rowCount()
-        data_rows = total_rows
-        if total_rows > 0:
-            last_item = self.table.item(total_rows - 1, 0)
-            if last_item and last_item.text() == "TOTALI":
-                data_rows = total_rows - 1
-
-        search_terms = text.lower().split()
-        cols = self.table.columnCount()
-
-        for r in range(data_rows):
-            if not text:
-                self.table.setRowHidden(r, False)
-                continue
-
-            row_visible = False
-            for c in range(cols):
-                item = self.table.item(r, c)
-                if item and item.text():
-                    if text.lower() in item.text().lower():
-                        row_visible = True
-                        break
-
-            if not row_visible:
-                row_full_text = " ".join([self.table.item(r, c).text().lower() for c in range(cols) if self.table.item(r, c)])
-                if all(term in row_full_text for term in search_terms):
-                    row_visible = True
-
-            self.table.setRowHidden(r, not row_visible)
-
-        if data_rows < total_rows:
-            self.table.setRowHidden(data_rows, False)
-        self._update_totals()
-
     def _show_context_menu(self, pos):
         item = self.table.itemAt(pos)
         if not item: return
@@ -1185,8 +1417,8 @@ class GiornaliereYearTab(QWidget):
             QMessageBox.warning(self, "File non trovato", f"Non riesco a trovare '{filename}' nella cartella giornaliere.")
 
 
-class AttivitaProgrammateTab(QWidget):
-    """Tab per Attività Programmate."""
+class AttivitaProgrammateTab(SearchFilterMixin, LazyLoadMixin, QWidget):
+    """Tab per Attività Programmate. I dati si caricano alla prima attivazione."""
 
     COLUMNS = [
         'PS', 'AREA', 'PdL', 'IMP.', "DESCRIZIONE\nATTIVITA'", 'LUN', 'MAR', 'MER',
@@ -1197,7 +1429,6 @@ class AttivitaProgrammateTab(QWidget):
     def __init__(self, parent=None):
         super().__init__(parent)
         self._setup_ui()
-        self._load_data()
 
     def _setup_ui(self):
         layout = QVBoxLayout(self)
@@ -1323,7 +1554,8 @@ class AttivitaProgrammateTab(QWidget):
 
     def refresh_data(self):
         """Metodo pubblico per ricaricare i dati."""
-        self._load_data()
+        self._loaded = False
+        self.ensure_loaded()
 
     def _load_data(self):
         """Carica i dati dal database."""
@@ -1341,7 +1573,9 @@ class AttivitaProgrammateTab(QWidget):
             # In DB query: SELECT ..., styles FROM ...
             # So if COLUMNS is length 16, row_data length is 17
 
+            row_texts = []
             for row_idx, row_data in enumerate(data):
+                texts = []
                 # Check for styles
                 row_styles = {}
                 if len(row_data) > len(self.COLUMNS):
@@ -1364,6 +1598,7 @@ class AttivitaProgrammateTab(QWidget):
                          except ValueError:
                              pass
 
+                    texts.append(val_str)
                     item = QTableWidgetItem(val_str)
 
                     # Apply Styles
@@ -1387,6 +1622,17 @@ class AttivitaProgrammateTab(QWidget):
 
                     self.table.setItem(row_idx, col_idx, item)
 
+                self.table.item(row_idx, 0).setData(ROW_INDEX_ROLE, row_idx)
+                row_texts.append(texts)
+
+            # Colonne dei filtri a tendina/checkbox, per indice dati
+            # Indices: PS=0, AREA=1, STATO PdL=10, PO=14
+            self._ps_filled = np.array([bool(t[0].strip()) for t in row_texts], dtype=bool)
+            self._po_filled = np.array([bool(t[14].strip()) for t in row_texts], dtype=bool)
+            self._area_values = np.array([t[1] for t in row_texts], dtype=object)
+            self._stato_values = np.array([t[10] for t in row_texts], dtype=object)
+            self._set_search_rows(row_texts)
+
             self.table.resizeRowsToContents()
             self._populate_filters()
 
@@ -1396,19 +1642,8 @@ class AttivitaProgrammateTab(QWidget):
 
     def _populate_filters(self):
         """Popola i combobox con i valori unici."""
-        areas = set()
-        stati = set()
-
-        # Scan table directly (safer than re-querying DB if filtered)
-        # AREA is col 1, STATO PdL is col 10
-        for r in range(self.table.rowCount()):
-            item_area = self.table.item(r, 1)
-            if item_area and item_area.text():
-                areas.add(item_area.text())
-
-            item_stato = self.table.item(r, 10)
-            if item_stato and item_stato.text():
-                stati.add(item_stato.text())
+        areas = {a for a in self._area_values if a}
+        stati = {st for st in self._stato_values if st}
 
         # Update Area Combo
         curr_area = self.combo_area.currentText()
@@ -1429,41 +1664,32 @@ class AttivitaProgrammateTab(QWidget):
         self.combo_stato.blockSignals(False)
 
     def apply_filters(self):
-        """Applica i filtri alla tabella."""
-        filter_ps = self.chk_ps.isChecked()
-        filter_po = self.chk_po.isChecked()
-        filter_area = self.combo_area.currentText()
-        filter_stato = self.combo_stato.currentText()
+        """Applica i filtri alla tabella (in AND con la barra di ricerca)."""
+        self._apply_visibility()
 
-        # Indices: PS=0, AREA=1, STATO PdL=10, PO=14
-        for r in range(self.table.rowCount()):
-            hide = False
+    def _base_filter_mask(self):
+        mask = np.ones(len(self._area_values), dtype=bool)
 
-            # PS Filter (Show only if PS is NOT empty)
-            if filter_ps:
-                item = self.table.item(r, 0)
-                if not item or not item.text().strip():
-                    hide = True
+        # PS / PO: mostra solo se il campo NON è vuoto
+        if self.chk_ps.isChecked():
+            mask &= self._ps_filled
+        if self.chk_po.isChecked():
+            mask &= self._po_filled
 
-            # PO Filter (Show only if PO is NOT empty)
-            if not hide and filter_po:
-                item = self.table.item(r, 14)
-                if not item or not item.text().strip():
-                    hide = True
+        filter_area = self.combo_area.currentText()
+        if filter_area != "Tutte":
+            mask &= self._area_values == filter_area
 
-            # Area Filter
-            if not hide and filter_area != "Tutte":
-                item = self.table.item(r, 1)
-                if not item or item.text() != filter_area:
-                    hide = True
+        filter_stato = self.combo_stato.currentText()
+        if filter_stato != "Tutti":
+            mask &= self._stato_values == filter_stato
 
-            # Stato Filter
-            if not hide and filter_stato != "Tutti":
-                item = self.table.item(r, 10)
-                if not item or item.text() != filter_stato:
-                    hide = True
+        return mask
 
-            self.table.setRowHidden(r, hide)
+    def _clear_data(self):
+        self._ps_filled = self._po_filled = np.zeros(0, dtype=bool)
+        self._area_values = self._stato_values = np.zeros(0, dtype=object)
+        super()._clear_data()
 
     def _reset_filters(self):
         self.chk_ps.setChecked(False)
@@ -1476,60 +1702,6 @@ class AttivitaProgrammateTab(QWidget):
         """Doppio click seleziona l'intera riga."""
         self.table.selectRow(row)
 
-    def filter_data(self, text):
-        """Filtra la tabella (Search Bar globale)."""
-        # Reset specific filters temporarily or apply strictly?
-        # Usually search bar adds to existing filters.
-        # But for simplicity, let's say Search Bar overrides or works with AND.
-        # Let's apply standard text search AND logic.
-
-        search_terms = text.lower().split()
-        cols = self.table.columnCount()
-
-        for r in range(self.table.rowCount()):
-            # First check specific filters by calling logic manually or trusting state?
-            # Re-evaluating filters for every row is expensive if we do full loop.
-            # Efficient way: Check if hidden by filters first?
-            # Actually, `apply_filters` resets visibility.
-            # Let's modify logic: Search bar is "extra".
-
-            # 1. Check strict filters
-            filter_ps = self.chk_ps.isChecked()
-            filter_po = self.chk_po.isChecked()
-            filter_area = self.combo_area.currentText()
-            filter_stato = self.combo_stato.currentText()
-
-            hide = False
-            if filter_ps:
-                item = self.table.item(r, 0)
-                if not item or not item.text().strip(): hide = True
-            if not hide and filter_po:
-                item = self.table.item(r, 14)
-                if not item or not item.text().strip(): hide = True
-            if not hide and filter_area != "Tutte":
-                item = self.table.item(r, 1)
-                if not item or item.text() != filter_area: hide = True
-            if not hide and filter_stato != "Tutti":
-                item = self.table.item(r, 10)
-                if not item or item.text() != filter_stato: hide = True
-
-            # 2. Check Search Text
-            if not hide and text:
-                row_visible = False
-                for c in range(cols):
-                    item = self.table.item(r, c)
-                    if item and item.text():
-                        if text.lower() in item.text().lower():
-                            row_visible = True
-                            break
-                if not row_visible:
-                    # Check combined terms
-                    row_text = " ".join([self.table.item(r, c).text().lower() for c in range(cols) if self.table.item(r, c)])
-                    if not all(term in row_text for term in search_terms):
-                        hide = True
-
-            self.table.setRowHidden(r, hide)
-
     def _show_context_menu(self, pos):
         """Menu contestuale."""
         menu = QMenu(self)
@@ -1588,8 +1760,8 @@ class SortableTreeWidgetItem(QTreeWidgetItem):
         return text1.lower() < text2.lower()
 
 
-class CertificatiCampioneTab(QWidget):
-    """Tab per Certificati Campione (Tree View)."""
+class CertificatiCampioneTab(LazyLoadMixin, QWidget):
+    """Tab per Certificati Campione (Tree View). I dati si caricano alla prima attivazione."""
 
     HEADERS = [
         "Modello /\nTipo", "Costruttore", "Matricola", "Range\nStrumento", "Errore\nmax %",
@@ -1611,7 +1783,6 @@ class CertificatiCampioneTab(QWidget):
     def __init__(self, parent=None):
         super().__init__(parent)
         self._setup_ui()
-        self._load_data()
 
     def _setup_ui(self):
         layout = QVBoxLayout(self)
@@ -1715,7 +1886,11 @@ class CertificatiCampioneTab(QWidget):
         layout.addWidget(self.tree)
 
     def refresh_data(self):
-        self._load_data()
+        self._loaded = False
+        self.ensure_loaded()
+
+    def _clear_data(self):
+        self.tree.clear()
 
     def _load_data(self):
         data = ContabilitaManager.get_certificati_campione_data()
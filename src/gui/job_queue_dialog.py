@@ -0,0 +1,129 @@
+"""
+Bot TS - Job Queue Dialog
+Vista della coda persistente dei lavori di un bot (src.core.job_queue).
+"""
+from PyQt6.QtCore import Qt, pyqtSignal
+from PyQt6.QtWidgets import (
+    QDialog, QVBoxLayout, QHBoxLayout, QPushButton, QTableWidget, QTableWidgetItem,
+    QHeaderView, QAbstractItemView, QLabel, QMessageBox
+)
+
+from src.core.job_queue import JobQueue, JOB_COMPLETED, JOB_RUNNING, TASK_DONE
+
+
+class JobQueueDialog(QDialog):
+    """Elenco dei job di un bot, con dettaglio righe, ripresa ed eliminazione."""
+
+    resume_requested = pyqtSignal(int)
+
+    COLUMNS = ["Job", "Creato", "Stato", "Completate", "Fallite", "Tentativi", "Aggiornato"]
+
+    def __init__(self, queue: JobQueue, bot_id: str, running: bool = False, parent=None):
+        super().__init__(parent)
+        self.queue = queue
+        self.bot_id = bot_id
+        self.running = running
+        self.setWindowTitle("Coda lavori")
+        self.resize(820, 520)
+
+        layout = QVBoxLayout(self)
+
+        self.jobs_table = self._make_table(self.COLUMNS)
+        self.jobs_table.itemSelectionChanged.connect(self._on_selection)
+        layout.addWidget(self.jobs_table, 2)
+
+        layout.addWidget(QLabel("Righe del job selezionato:"))
+        self.tasks_table = self._make_table(["Riga", "Dati", "Stato", "Tentativi", "Messaggio", "File"])
+        layout.addWidget(self.tasks_table, 3)
+
+        buttons = QHBoxLayout()
+        self.refresh_btn = QPushButton("🔄 Aggiorna")
+        self.refresh_btn.clicked.connect(self.refresh)
+        buttons.addWidget(self.refresh_btn)
+        self.resume_btn = QPushButton("▶ Riprendi")
+        self.resume_btn.setToolTip("Esegue solo le righe non ancora completate")
+        self.resume_btn.clicked.connect(self._on_resume)
+        buttons.addWidget(self.resume_btn)
+        self.delete_btn = QPushButton("🗑 Elimina")
+        self.delete_btn.clicked.connect(self._on_delete)
+        buttons.addWidget(self.delete_btn)
+        self.clear_btn = QPushButton("Pulisci completati")
+        self.clear_btn.clicked.connect(self._on_clear)
+        buttons.addWidget(self.clear_btn)
+        buttons.addStretch()
+        close_btn = QPushButton("Chiudi")
+        close_btn.clicked.connect(self.accept)
+        buttons.addWidget(close_btn)
+        layout.addLayout(buttons)
+
+        self.refresh()
+
+    @staticmethod
+    def _make_table(headers) -> QTableWidget:
+        table = QTableWidget(0, len(headers))
+        table.setHorizontalHeaderLabels(headers)
+        table.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
+        table.setSelectionBehavior(QAbstractItemView.SelectionBehavior.SelectRows)
+        table.setSelectionMode(QAbstractItemView.SelectionMode.SingleSelection)
+        table.verticalHeader().setVisible(False)
+        table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.ResizeToContents)
+        table.horizontalHeader().setStretchLastSection(True)
+        return table
+
+    def _selected_job_id(self):
+        rows = self.jobs_table.selectionModel().selectedRows()
+        if not rows:
+            return None
+        return self.jobs_table.item(rows[0].row(), 0).data(Qt.ItemDataRole.UserRole)
+
+    def refresh(self):
+        selected = self._selected_job_id()
+        self.jobs = self.queue.list_jobs(self.bot_id)
+        self.jobs_table.setRowCount(len(self.jobs))
+        for r, job in enumerate(self.jobs):
+            values = [f"#{job.id}", job.created_at, job.status, f"{job.done}/{job.total}",
+                      str(job.failed), str(job.attempts), job.updated_at]
+            for c, value in enumerate(values):
+                item = QTableWidgetItem(value)
+                if c == 0:
+                    item.setData(Qt.ItemDataRole.UserRole, job.id)
+                self.jobs_table.setItem(r, c, item)
+            if job.id == selected:
+                self.jobs_table.selectRow(r)
+        self._on_selection()
+
+    def _on_selection(self):
+        job_id = self._selected_job_id()
+        job = next((j for j in self.jobs if j.id == job_id), None)
+        self.resume_btn.setEnabled(
+            job is not None and not self.running and job.status not in (JOB_COMPLETED, JOB_RUNNING)
+        )
+        self.delete_btn.setEnabled(job is not None and job.status != JOB_RUNNING)
+
+        tasks = self.queue.tasks(job_id) if job_id is not None else []
+        self.tasks_table.setRowCount(len(tasks))
+        for r, task in enumerate(tasks):
+            data = " / ".join(str(v) for v in task["row"].values() if v) if isinstance(task["row"], dict) else str(task["row"])
+            values = [str(task["idx"]), data, "✅" if task["status"] == TASK_DONE else task["status"],
+                      str(task["attempts"]), task["message"], task["output_path"] or ""]
+            for c, value in enumerate(values):
+                self.tasks_table.setItem(r, c, QTableWidgetItem(value))
+
+    def _on_resume(self):
+        job_id = self._selected_job_id()
+        if job_id is not None:
+            self.resume_requested.emit(job_id)
+            self.accept()
+
+    def _on_delete(self):
+        job_id = self._selected_job_id()
+        if job_id is None:
+            return
+        if QMessageBox.question(self, "Elimina job", f"Eliminare il job #{job_id} dalla coda?") \
+                == QMessageBox.StandardButton.Yes:
+            self.queue.delete_job(job_id)
+            self.refresh()
+
+    def _on_clear(self):
+        self.queue.clear_completed()
+        self.refresh()
@@ -12,17 +12,41 @@ from PyQt6.QtCore import Qt, QTimer, pyqtSignal
 from PyQt6.QtGui import QPixmap, QFont, QColor, QPainter, QKeySequence, QShortcut
 from datetime import datetime
 
-from src.gui.panels import ScaricaTSPanel, CaricoTSPanel, DettagliOdAPanel, TimbratureBotPanel, TimbratureDBPanel
-from src.gui.contabilita_panel import ContabilitaPanel
-from src.gui.scarico_ore_panel import ScaricoOrePanel
-from src.gui.settings_panel import SettingsPanel
+# ⚡ BOLT: solo la Dashboard (pagina iniziale) è importata qui. Gli altri
+# pannelli, e con loro pandas/matplotlib/selenium/openpyxl, vengono
+# importati e istanziati alla prima navigazione (vedi _ensure_page).
 from src.gui.toast import ToastOverlay
-from src.gui.help_panel import HelpPanel
 from src.gui.dashboard_panel import DashboardPanel
-from src.gui.lyra_panel import LyraPanel
-from src.core.lyra_sentinel import LyraSentinel
 from src.core.license_validator import get_license_info
 from src.core import config_manager
+from src.utils.startup_profiler import phase
+
+
+TAB_WIDGET_STYLE = """
+    QTabWidget::pane {
+        border: 1px solid #dee2e6;
+        border-radius: 6px;
+        background-color: white;
+    }
+    QTabBar::tab {
+        background: #f1f3f5;
+        border: 1px solid #dee2e6;
+        padding: 10px 20px;
+        margin-right: 2px;
+        border-top-left-radius: 6px;
+        border-top-right-radius: 6px;
+        color: #495057;
+        font-weight: bold;
+    }
+    QTabBar::tab:selected {
+        background: white;
+        border-bottom-color: white;
+        color: #0d6efd;
+    }
+    QTabBar::tab:hover {
+        background: #e9ecef;
+    }
+"""
 
 
 class SidebarButton(QPushButton):
@@ -99,13 +123,20 @@ class MainWindow(QMainWindow):
         self.toast = ToastOverlay(self)
 
         # Lyra Sentinel (Monitoraggio Anomalie)
-        self.sentinel = LyraSentinel()
-        self.sentinel.anomalies_found.connect(self._on_anomalies_found)
-        QTimer.singleShot(2000, self.sentinel.start) # Ritarda leggermente l'avvio
+        self.sentinel = None
+        QTimer.singleShot(2000, self._start_sentinel) # Ritarda leggermente l'avvio
 
         # Avvio automatico importazione contabilità se abilitato
         QTimer.singleShot(1000, self._check_and_start_contabilita_update)
     
+    def _start_sentinel(self):
+        """Avvia Lyra Sentinel (import differito: non pesa sull'avvio)."""
+        from src.core.lyra_sentinel import LyraSentinel
+
+        self.sentinel = LyraSentinel()
+        self.sentinel.anomalies_found.connect(self._on_anomalies_found)
+        self.sentinel.start()
+
     def _on_anomalies_found(self, count):
         """Gestisce le anomalie trovate da Lyra."""
         self.btn_lyra.set_badge(count)
@@ -337,75 +368,39 @@ class MainWindow(QMainWindow):
         # Stack per le pagine principali (Automazioni, Database, Settings)
         self.page_stack = QStackedWidget()
         
-        # Crea i pannelli individuali
-        self.dashboard_panel = DashboardPanel()
-        self.scarico_panel = ScaricaTSPanel()
-        self.carico_panel = CaricoTSPanel()
-        self.dettagli_panel = DettagliOdAPanel()
-        self.timbrature_bot_panel = TimbratureBotPanel()
-        self.timbrature_db_panel = TimbratureDBPanel()
-        self.contabilita_panel = ContabilitaPanel()
-        self.scarico_ore_panel = ScaricoOrePanel() # NEW: Scarico Ore Panel
-        self.settings_panel = SettingsPanel()
-        self.help_panel = HelpPanel()
-        self.lyra_panel = LyraPanel()
-        
-        # Collega il segnale di update dal bot al database
-        self.timbrature_bot_panel.data_updated.connect(self.timbrature_db_panel.refresh_data)
-
-        # --- Page 1: Automazioni (Tab Widget) ---
-        self.automazioni_widget = QTabWidget()
-        self.automazioni_widget.setStyleSheet("""
-            QTabWidget::pane {
-                border: 1px solid #dee2e6;
-                border-radius: 6px;
-                background-color: white;
-            }
-            QTabBar::tab {
-                background: #f1f3f5;
-                border: 1px solid #dee2e6;
-                padding: 10px 20px;
-                margin-right: 2px;
-                border-top-left-radius: 6px;
-                border-top-right-radius: 6px;
-                color: #495057;
-                font-weight: bold;
-            }
-            QTabBar::tab:selected {
-                background: white;
-                border-bottom-color: white;
-                color: #0d6efd;
-            }
-            QTabBar::tab:hover {
-                background: #e9ecef;
-            }
-        """)
-        # Order: Dettagli OdA, Scarico TS, Timbrature, Carico TS
-        self.automazioni_widget.addTab(self.dettagli_panel, "📋 Dettagli OdA")
-        self.automazioni_widget.addTab(self.scarico_panel, "📥 Scarico TS")
-        self.automazioni_widget.addTab(self.timbrature_bot_panel, "⏱️ Timbrature")
-        self.automazioni_widget.addTab(self.carico_panel, "📤 Carico TS")
-
-        # --- Page 3: Database (Tab Widget) ---
-        self.database_widget = QTabWidget()
-        self.database_widget.setStyleSheet(self.automazioni_widget.styleSheet()) # Same style
-        self.database_widget.addTab(self.timbrature_db_panel, "Timbrature Isab")
-        self.database_widget.addTab(self.contabilita_panel, "Strumentale")
-        self.database_widget.addTab(self.scarico_ore_panel, "DataEase") # Renamed from "Scarico Ore Cantiere"
-
-        # Aggiungi le pagine allo stack
+        # Pannelli delle pagine non ancora visitate: None fino a _ensure_page
+        self.scarico_panel = None
+        self.carico_panel = None
+        self.dettagli_panel = None
+        self.timbrature_bot_panel = None
+        self.timbrature_db_panel = None
+        self.contabilita_panel = None
+        self.scarico_ore_panel = None
+        self.settings_panel = None
+        self.help_panel = None
+        self.lyra_panel = None
+        self.automazioni_widget = None
+        self.database_widget = None
+
+        # Pagine dello stack
         # 0: Dashboard
         # 1: Automazioni
         # 2: Lyra
         # 3: Database
         # 4: Settings
         # 5: Help
+        self._page_builders = {
+            1: self._build_automazioni_page,
+            2: self._build_lyra_page,
+            3: self._build_database_page,
+            4: self._build_settings_page,
+            5: self._build_help_page,
+        }
+        with phase("init DashboardPanel"):
+            self.dashboard_panel = DashboardPanel()
         self.page_stack.addWidget(self.dashboard_panel)    # Index 0
-        self.page_stack.addWidget(self.automazioni_widget) # Index 1
-        self.page_stack.addWidget(self.lyra_panel)         # Index 2
-        self.page_stack.addWidget(self.database_widget)    # Index 3
-        self.page_stack.addWidget(self.settings_panel)     # Index 4
-        self.page_stack.addWidget(self.help_panel)         # Index 5
+        for _ in self._page_builders:
+            self.page_stack.addWidget(QWidget())           # Segnaposto 1..5
         
         content_layout.addWidget(self.page_stack)
         
@@ -421,6 +416,80 @@ class MainWindow(QMainWindow):
             self.btn_help
         ]
     
+    def _ensure_page(self, index: int):
+        """Costruisce la pagina `index` alla prima richiesta, al posto del segnaposto."""
+        builder = self._page_builders.pop(index, None)
+        if builder is None:
+            return
+
+        with phase(f"pagina {index}: {builder.__name__}"):
+            page = builder()
+        placeholder = self.page_stack.widget(index)
+        self.page_stack.removeWidget(placeholder)
+        self.page_stack.insertWidget(index, page)
+        placeholder.deleteLater()
+
+    def _build_automazioni_page(self):
+        """Pagina 1: bot di automazione (Tab Widget)."""
+        from src.gui.panels import ScaricaTSPanel, CaricoTSPanel, DettagliOdAPanel, TimbratureBotPanel
+
+        self.scarico_panel = ScaricaTSPanel()
+        self.carico_panel = CaricoTSPanel()
+        self.dettagli_panel = DettagliOdAPanel()
+        self.timbrature_bot_panel = TimbratureBotPanel()
+
+        # Collega il segnale di update dal bot al database
+        self.timbrature_bot_panel.data_updated.connect(self._on_timbrature_updated)
+
+        self.automazioni_widget = QTabWidget()
+        self.automazioni_widget.setStyleSheet(TAB_WIDGET_STYLE)
+        # Order: Dettagli OdA, Scarico TS, Timbrature, Carico TS
+        self.automazioni_widget.addTab(self.dettagli_panel, "📋 Dettagli OdA")
+        self.automazioni_widget.addTab(self.scarico_panel, "📥 Scarico TS")
+        self.automazioni_widget.addTab(self.timbrature_bot_panel, "⏱️ Timbrature")
+        self.automazioni_widget.addTab(self.carico_panel, "📤 Carico TS")
+        return self.automazioni_widget
+
+    def _build_lyra_page(self):
+        """Pagina 2: Lyra AI."""
+        from src.gui.lyra_panel import LyraPanel
+
+        self.lyra_panel = LyraPanel()
+        return self.lyra_panel
+
+    def _build_database_page(self):
+        """Pagina 3: Database (Tab Widget)."""
+        from src.gui.panels import TimbratureDBPanel
+        from src.gui.contabilita_panel import ContabilitaPanel
+        from src.gui.scarico_ore_panel import ScaricoOrePanel
+
+        self.timbrature_db_panel = TimbratureDBPanel()
+        self.contabilita_panel = ContabilitaPanel()
+        self.scarico_ore_panel = ScaricoOrePanel()
+
+        self.database_widget = QTabWidget()
+        self.database_widget.setStyleSheet(TAB_WIDGET_STYLE)
+        self.database_widget.addTab(self.timbrature_db_panel, "Timbrature Isab")
+        self.database_widget.addTab(self.contabilita_panel, "Strumentale")
+        self.database_widget.addTab(self.scarico_ore_panel, "DataEase") # Renamed from "Scarico Ore Cantiere"
+        return self.database_widget
+
+    def _build_settings_page(self):
+        """Pagina 4: Impostazioni."""
+        from src.gui.settings_panel import SettingsPanel
+
+        self.settings_panel = SettingsPanel()
+        # Aggiornamento live impostazioni
+        self.settings_panel.settings_saved.connect(self._on_settings_saved)
+        return self.settings_panel
+
+    def _build_help_page(self):
+        """Pagina 5: Guida."""
+        from src.gui.help_panel import HelpPanel
+
+        self.help_panel = HelpPanel()
+        return self.help_panel
+
     def _connect_signals(self):
         """Collega i segnali."""
         self.btn_home.clicked.connect(lambda: self._navigate_to(0))
@@ -430,14 +499,18 @@ class MainWindow(QMainWindow):
         self.btn_settings.clicked.connect(lambda: self._navigate_to(4))
         self.btn_help.clicked.connect(lambda: self._navigate_to(5))
 
-        # Aggiornamento live impostazioni
-        self.settings_panel.settings_saved.connect(self._on_settings_saved)
+    def _on_timbrature_updated(self):
+        """Nuove timbrature dal bot: aggiorna la vista DB se già costruita."""
+        if self.timbrature_db_panel is not None:
+            self.timbrature_db_panel.refresh_data()
 
     def _on_settings_saved(self):
         """Aggiorna i pannelli quando le impostazioni vengono salvate."""
-        self.scarico_panel.refresh_fornitori()
-        self.dettagli_panel.refresh_fornitori()
-        self.timbrature_bot_panel.refresh_fornitori()
+        # Le Automazioni non ancora aperte leggeranno i fornitori alla creazione
+        if self.automazioni_widget is not None:
+            self.scarico_panel.refresh_fornitori()
+            self.dettagli_panel.refresh_fornitori()
+            self.timbrature_bot_panel.refresh_fornitori()
 
         # Feedback Toast
         self.show_toast("Impostazioni salvate con successo!")
@@ -465,6 +538,7 @@ class MainWindow(QMainWindow):
                     return
         
         # Procedi con la navigazione
+        self._ensure_page(index)
         self._current_page_index = index
         self.page_stack.setCurrentIndex(index)
         
@@ -480,6 +554,7 @@ class MainWindow(QMainWindow):
         """Controlla la configurazione e avvia l'update contabilità se abilitato."""
         config = config_manager.load_config()
         if config.get("enable_auto_update_contabilita", False):
+            self._ensure_page(3)
             self.contabilita_panel.start_import_process()
     
     def show_settings(self):
@@ -501,6 +576,7 @@ class MainWindow(QMainWindow):
         }
 
         if panel_key in bot_map:
+            self._ensure_page(1)
             self._navigate_to(1)
             self.automazioni_widget.setCurrentIndex(bot_map[panel_key])
             return
@@ -513,19 +589,21 @@ class MainWindow(QMainWindow):
         }
 
         if panel_key in db_map:
+            self._ensure_page(3)
             self._navigate_to(3)
             self.database_widget.setCurrentIndex(db_map[panel_key])
             return
 
     def analyze_with_lyra(self, context_text: str):
         """Passa alla vista Lyra e analizza il contesto fornito."""
+        self._ensure_page(2)
         self._navigate_to(2) # Switch to Lyra
         self.lyra_panel.ask_lyra("Analizza questi dati e dimmi se ci sono anomalie o punti di attenzione.", context_text)
     
     def closeEvent(self, event):
         """Gestisce la chiusura della finestra."""
         # Controlla modifiche non salvate nelle impostazioni
-        if self.settings_panel.has_unsaved_changes():
+        if self.settings_panel is not None and self.settings_panel.has_unsaved_changes():
             can_close = self.settings_panel.prompt_save_if_needed()
             if not can_close:
                 event.ignore()
@@ -567,7 +645,7 @@ class MainWindow(QMainWindow):
             db_path = config_manager.CONFIG_DIR / "data" / "timbrature_Isab.db"
             success = TimbratureBot.import_to_db_static(path, db_path, lambda x: None)
             if success:
-                self.timbrature_db_panel.refresh_data()
+                self._on_timbrature_updated()
                 self.show_toast("Timbrature importate con successo!")
             else:
                 self.show_toast("Errore importazione Timbrature.")
@@ -580,7 +658,8 @@ class MainWindow(QMainWindow):
             from src.core.contabilita_manager import ContabilitaManager
             success, msg = ContabilitaManager.import_data_from_excel(path)
             if success:
-                self.contabilita_panel.refresh_tabs()
+                if self.contabilita_panel is not None:
+                    self.contabilita_panel.refresh_tabs()
                 self.show_toast("Contabilità importata con successo!")
             else:
                 self.show_toast(f"Errore: {msg}")
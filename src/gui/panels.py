@@ -24,7 +24,6 @@ from src.gui.widgets import (
 )
 from src.core import config_manager
 from src.core.stats_manager import StatsManager
-from src.bots.timbrature.storage import TimbratureStorage
 
 
 class BotWorker(QThread):
@@ -79,6 +78,9 @@ class BaseBotPanel(QWidget):
     bot_started = pyqtSignal()
     bot_stopped = pyqtSignal()
     bot_finished = pyqtSignal(bool)
+
+    # Bot a righe eseguiti tramite la coda persistente (src.core.job_queue)
+    queue_bot_id = None
     
     def __init__(self, bot_name: str, bot_description: str, parent=None):
         super().__init__(parent)
@@ -131,6 +133,12 @@ class BaseBotPanel(QWidget):
         
         # Buttons
         btn_layout = QHBoxLayout()
+        if self.queue_bot_id:
+            self.queue_btn = QPushButton("📋 Coda lavori")
+            self.queue_btn.setMinimumHeight(40)
+            self.queue_btn.setToolTip("Job precedenti: stato per riga, ripresa dei lavori interrotti")
+            self.queue_btn.clicked.connect(self._on_show_queue)
+            btn_layout.addWidget(self.queue_btn)
         btn_layout.addStretch()
         
         self.start_btn = QPushButton("▶ Avvia")
@@ -251,9 +259,109 @@ class BaseBotPanel(QWidget):
             return account.get("username", ""), account.get("password", "")
         return "", ""
 
+    def _create_bot(self, bot_id: str, rows: list, **kwargs):
+        """
+        Crea il bot. Con `parallel_workers` > 1 e più righe restituisce un
+        ParallelRunner che distribuisce le righe su più browser headless.
+        """
+        from src.bots import create_bot, get_bot_info
+
+        workers = int(config_manager.get_config_value("parallel_workers", 1) or 1)
+        if workers > 1 and len(rows) > 1:
+            from src.bots.base.parallel_runner import ParallelRunner, parallel_accounts
+            # Un browser per account: con un solo account si resta sul bot singolo
+            accounts = parallel_accounts(kwargs["username"], kwargs["password"])
+            if len(accounts) > 1:
+                for key in ("username", "password", "headless"):
+                    kwargs.pop(key, None)
+                return ParallelRunner(get_bot_info(bot_id)["class"], accounts, workers, **kwargs)
+        return create_bot(bot_id, **kwargs)
+
+    # --- Coda lavori persistente ---
+
+    def _queued_bot(self, bot_id: str, rows: list, params: dict, **kwargs):
+        """
+        JobRunner per le righe: un job identico non completato viene ripreso
+        (su conferma) saltando le righe già completate, altrimenti se ne crea
+        uno nuovo. Credenziali e opzioni del browser non vengono salvate.
+        """
+        from src.core.job_queue import job_queue
+
+        bot_kwargs = {k: v for k, v in kwargs.items() if k not in ("username", "password", "headless", "timeout")}
+        job_id = job_queue.find_resumable(bot_id, rows, params)
+        if job_id is not None:
+            job = job_queue.get_job(job_id)
+            answer = QMessageBox.question(
+                self, "Lavoro interrotto",
+                f"Il job #{job_id} con gli stessi dati è {job.status} ({job.done}/{job.total} righe completate).\n\n"
+                "Riprendere eseguendo solo le righe mancanti?\n(No = esegui di nuovo tutte le righe)"
+            )
+            if answer != QMessageBox.StandardButton.Yes:
+                job_id = None
+            else:
+                # Le righe restanti seguono le opzioni attuali del pannello
+                # (es. cartella di destinazione cambiata dopo l'interruzione)
+                job_queue.set_bot_kwargs(job_id, bot_kwargs)
+        if job_id is None:
+            job_id = job_queue.create_job(bot_id, rows, params, bot_kwargs)
+        return self._job_runner(job_id)
+
+    def _job_runner(self, job_id: int):
+        from src.core.job_queue import JobRunner, job_queue
+
+        job = job_queue.get_job(job_id)
+        username, password = self.get_credentials()
+        config = config_manager.load_config()
+
+        def factory(rows):
+            return self._create_bot(
+                job.bot_id, rows,
+                username=username,
+                password=password,
+                headless=config.get("browser_headless", False),
+                timeout=config.get("browser_timeout", 30),
+                **job.bot_kwargs
+            )
+        return JobRunner(job_queue, job_id, factory)
+
+    def _on_show_queue(self):
+        from src.core.job_queue import job_queue
+        from src.gui.job_queue_dialog import JobQueueDialog
+
+        dialog = JobQueueDialog(job_queue, self.queue_bot_id, running=self.worker is not None, parent=self)
+        dialog.resume_requested.connect(self._resume_job)
+        dialog.exec()
+
+    def _resume_job(self, job_id: int):
+        """Riprende un job dalla vista coda (solo righe non completate)."""
+        username, password = self.get_credentials()
+        if not username or not password:
+            QMessageBox.warning(self, "Credenziali mancanti", "Configura le credenziali ISAB nelle Impostazioni.")
+            return
+
+        BaseBotPanel._on_start(self)
+        runner = self._job_runner(job_id)
+        self.worker = BotWorker(runner, None)
+        self.worker.log_signal.connect(self._on_log)
+        self.worker.status_signal.connect(self._on_status)
+        self.worker.finished_signal.connect(self._on_worker_finished)
+        if hasattr(self, "_ask_user_input"):
+            self.worker.request_input_signal.connect(self._ask_user_input)
+
+        self.start_btn.setEnabled(False)
+        self.stop_btn.setEnabled(True)
+        self.status_indicator.set_status("running")
+
+        self.log_widget.clear()
+        self.log_widget.append(f"▶ Ripresa job #{job_id} ({self.bot_name})")
+        self.worker.start()
+        self.bot_started.emit()
+
 
 class ScaricaTSPanel(BaseBotPanel):
     """Pannello per il bot Scarico TS."""
+
+    queue_bot_id = "scarico_ts"
     
     def __init__(self, parent=None):
         super().__init__(
@@ -594,35 +702,28 @@ class ScaricaTSPanel(BaseBotPanel):
         if not download_path:
             download_path = str(Path.home() / "Downloads")
 
-        # Crea e avvia il worker
-        from src.bots import create_bot
-        
+        # Prepara i dati con la data e il fornitore
+        params = {
+            "data_da": data_da,
+            "fornitore": fornitore,
+            "elabora_ts": self.elabora_ts_check.isChecked()
+        }
+
+        # Crea e avvia il worker (job nella coda persistente: ripresa e retry per riga)
         config = config_manager.load_config()
-        bot = create_bot(
+        bot = self._queued_bot(
             "scarico_ts",
+            data,
+            params,
             username=username,
             password=password,
             headless=config.get("browser_headless", False),
             timeout=config.get("browser_timeout", 30),
             download_path=download_path,
-            data_da=data_da,
-            fornitore=fornitore,
-            elabora_ts=self.elabora_ts_check.isChecked()
+            **params
         )
         
-        if not bot:
-            QMessageBox.critical(self, "Errore", "Impossibile creare il bot.")
-            return
-        
-        # Prepara i dati con la data e il fornitore
-        bot_data = {
-            "rows": data,
-            "data_da": data_da,
-            "fornitore": fornitore,
-            "elabora_ts": self.elabora_ts_check.isChecked()
-        }
-        
-        self.worker = BotWorker(bot, bot_data)
+        self.worker = BotWorker(bot, {"rows": data, **params})
         self.worker.log_signal.connect(self._on_log)
         self.worker.status_signal.connect(self._on_status)
         self.worker.finished_signal.connect(self._on_worker_finished)
@@ -637,6 +738,10 @@ class ScaricaTSPanel(BaseBotPanel):
         self.log_widget.append(f"  Fornitore: {fornitore}")
         self.log_widget.append(f"  Data: {data_da}")
         self.log_widget.append(f"  Elaborazione file: {'Sì' if self.elabora_ts_check.isChecked() else 'No'}")
+        self.log_widget.append(f"  Job: #{bot.job_id}")
+        workers = int(config.get("parallel_workers", 1) or 1)
+        if workers > 1 and len(data) > 1:
+            self.log_widget.append(f"  Browser paralleli: fino a {workers} (uno per account)")
         
         self.worker.start()
         self.bot_started.emit()
@@ -644,6 +749,8 @@ class ScaricaTSPanel(BaseBotPanel):
 
 class DettagliOdAPanel(BaseBotPanel):
     """Pannello per il bot Dettagli OdA."""
+
+    queue_bot_id = "dettagli_oda"
     
     def __init__(self, parent=None):
         super().__init__(
@@ -963,31 +1070,26 @@ class DettagliOdAPanel(BaseBotPanel):
         if not download_path:
             download_path = str(Path.home() / "Downloads")
 
-        from src.bots import create_bot
         config = config_manager.load_config()
 
-        bot = create_bot(
+        params = {
+            "fornitore": fornitore,
+            "data_da": data_da,
+            "data_a": data_a
+        }
+        bot = self._queued_bot(
             "dettagli_oda",
+            data,
+            params,
             username=username,
             password=password,
             headless=config.get("browser_headless", False),
             timeout=config.get("browser_timeout", 30),
             download_path=download_path,
-            fornitore=fornitore,
-            data_da=data_da,
-            data_a=data_a
+            **params
         )
         
-        if not bot:
-            QMessageBox.critical(self, "Errore", "Impossibile creare il bot.")
-            return
-        
-        self.worker = BotWorker(bot, {
-            "rows": data,
-            "fornitore": fornitore,
-            "data_da": data_da,
-            "data_a": data_a
-        })
+        self.worker = BotWorker(bot, {"rows": data, **params})
         self.worker.log_signal.connect(self._on_log)
         self.worker.status_signal.connect(self._on_status)
         self.worker.finished_signal.connect(self._on_worker_finished)
@@ -1000,6 +1102,10 @@ class DettagliOdAPanel(BaseBotPanel):
         self.log_widget.append("▶ Avvio bot Dettagli OdA...")
         self.log_widget.append(f"  Fornitore: {fornitore}")
         self.log_widget.append(f"  Periodo: {data_da} - {data_a}")
+        self.log_widget.append(f"  Job: #{bot.job_id}")
+        workers = int(config.get("parallel_workers", 1) or 1)
+        if workers > 1 and len(data) > 1:
+            self.log_widget.append(f"  Browser paralleli: fino a {workers} (uno per account)")
         
         self.worker.start()
         self.bot_started.emit()
@@ -1438,6 +1544,8 @@ class TimbratureDBPanel(QWidget):
     def __init__(self, parent=None):
         super().__init__(parent)
         self.db_path = config_manager.CONFIG_DIR / "data" / "timbrature_Isab.db"
+        # Import differito: src.bots carica selenium e pandas
+        from src.bots.timbrature.storage import TimbratureStorage
         self.storage = TimbratureStorage(self.db_path)
         self._setup_ui()
         self.refresh_data()
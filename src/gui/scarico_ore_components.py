@@ -5,233 +5,154 @@ from PyQt6.QtWidgets import (
     QVBoxLayout, QWidget, QPushButton, QHBoxLayout, QLabel, QScrollArea, QListView, QLineEdit, QTreeView
 )
 import json
-import pickle
-from pathlib import Path
-from datetime import datetime
-from src.utils.parsing import parse_currency
+from collections import OrderedDict
+import numpy as np
+from src.core.contabilita_manager import ContabilitaManager
+from src.core.scarico_ore_cache import ScaricoOreCache, STYLE_KEYS, N_COLUMNS, display_row
+from src.core.scarico_ore_query import ScaricoOreQuery
 
 class CacheWorker(QThread):
     """
     ⚡ BOLT OPTIMIZATION: Background worker for heavy cache operations.
-    Handles file I/O (pickle) and data processing.
-    Now builds a PRE-FORMATTED display cache for max speed.
+    Legge la versione dati del DB e mappa la cache colonnare corrispondente;
+    se manca (o se riceve righe nuove) la ricostruisce dal DB e la salva.
+    Con `delta` (+ `base_cache`) applica invece solo la differenza di
+    un'importazione alla cache esistente.
     """
-    finished = pyqtSignal(object, object, object, object) # display_data, search_index, float_totals, style_cache
+    finished = pyqtSignal(object) # ScaricoOreCache (None se errore)
     progress = pyqtSignal(str)
 
-    def __init__(self, cache_path, data_source=None):
+    def __init__(self, data_source=None, base_cache=None, delta=None):
         super().__init__()
-        self.cache_path = cache_path
         self.data_source = data_source # If provided, we build cache from this data.
+        self.base_cache = base_cache
+        self.delta = delta
 
     def run(self):
-        if self.data_source:
-            # Build cache from raw data (e.g. from DB)
-            self.progress.emit("Elaborazione dati...")
-            display_data, search_index, float_totals, style_cache = self._build_caches(self.data_source)
-            # Save to disk
-            self.progress.emit("Salvataggio cache...")
-            self._save_cache(display_data, search_index, float_totals, style_cache)
-            self.finished.emit(display_data, search_index, float_totals, style_cache)
-        else:
-            # Load from file
-            if not self.cache_path.exists():
-                self.finished.emit([], [], [], [])
-                return
-
-            try:
+        try:
+            db_version = ContabilitaManager.get_scarico_ore_version()
+
+            if self.delta is not None:
+                if db_version != self.delta.db_version:
+                    self.finished.emit(None)  # DB cambiato nel frattempo: serve un ricaricamento completo
+                    return
+                self.progress.emit("Aggiornamento dati...")
+                cache = self.base_cache.apply_delta(self.delta.removed_ids, self.delta.added_rows, db_version)
+            elif self.data_source is None:
                 self.progress.emit("Caricamento cache...")
-                with open(self.cache_path, 'rb') as f:
-                    # Legacy support: check pickle structure
-                    loaded = pickle.load(f)
-                    if len(loaded) == 3:
-                        # Old format: data, search, totals
-                        # We must rebuild because 'data' is raw, we need 'display_data'
-                        raw_data = loaded[0]
-                        display_data, search_index, float_totals, style_cache = self._build_caches(raw_data)
-                    elif len(loaded) == 4:
-                        # Version 2 format: raw_data, search, totals, style
-                        # Checking if we need to rebuild (if data is not pre-formatted strings)
-                        d, s, t, st = loaded
-                        if d and len(d) > 0 and (d[0][0] is None or not isinstance(d[0][0], str)):
-                             # Likely raw data or None, rebuild
-                             display_data, search_index, float_totals, style_cache = self._build_caches(d)
-                        else:
-                             # Already formatted
-                             display_data, search_index, float_totals, style_cache = d, s, t, st
-                    else:
-                        display_data, search_index, float_totals, style_cache = [], [], [], []
-
-                self.finished.emit(display_data, search_index, float_totals, style_cache)
-            except Exception as e:
-                print(f"Error loading cache: {e}")
-                self.finished.emit([], [], [], [])
-
-    def _build_style_cache_only(self, data):
-        """Helper to build only style cache from data."""
-        style_cache = []
-        append_style = style_cache.append
-
-        for row in data:
-            if len(row) > 11:
-                style_json = row[11]
-                if style_json:
-                    try:
-                        append_style(json.loads(style_json))
-                    except:
-                        append_style(None)
-                else:
-                    append_style(None)
+                cache = ScaricoOreCache.load_for_version(db_version)
+                if cache is not None:
+                    self.finished.emit(cache)
+                    return
+                self.progress.emit("Lettura database...")
+                rows = ContabilitaManager.get_scarico_ore_data(include_id=True)
+                self.progress.emit("Elaborazione dati...")
+                cache = ScaricoOreCache.build(rows, db_version)
             else:
-                append_style(None)
-        return style_cache
+                # Build cache from raw data
+                self.progress.emit("Elaborazione dati...")
+                cache = ScaricoOreCache.build(self.data_source, db_version)
 
-    def _build_caches(self, data):
-        """
-        Pre-computa tutto: Stringhe visualizzate, Indice ricerca, Totali, Stili.
-        Optimized for speed.
-        """
-        display_data = [] # List of list of strings
-        search_index = []
-        float_totals = []
-        style_cache = []
-
-        append_display = display_data.append
-        append_search = search_index.append
-        append_total = float_totals.append
-        append_style = style_cache.append
-
-        str_converter = str
-
-        for row in data:
-            # --- 1. Display Strings & Search Index ---
-            # We want to format everything ONCE here.
-
-            # Date (Col 0)
-            val_0 = row[0]
-            str_0 = ""
-            if val_0:
-                s_val = str_converter(val_0)
-                if '-' in s_val:
-                    try:
-                        if len(s_val) >= 10 and s_val[4] == '-' and s_val[7] == '-':
-                             str_0 = f"{s_val[8:10]}/{s_val[5:7]}/{s_val[0:4]}"
-                        else:
-                             parts = s_val.split(' ')[0].split('-')
-                             if len(parts) == 3:
-                                 str_0 = f"{parts[2]}/{parts[1]}/{parts[0]}"
-                             else:
-                                 str_0 = s_val
-                    except:
-                        str_0 = s_val
-                else:
-                    str_0 = s_val
-
-            # Build Display Row (Cols 0-10)
-            display_row = [str_0]
-            search_parts = [str_0]
-
-            for i in range(1, 11):
-                val = row[i]
-                if val is None:
-                    d_val = ""
-                else:
-                    d_val = str_converter(val)
-
-                display_row.append(d_val)
-                if d_val:
-                    search_parts.append(d_val)
-
-            # Append full raw row just in case we need it? No, keep memory low.
-            # But wait, if we rebuild cache next time, do we have raw data?
-            # If we save PRE-FORMATTED data to disk, we lose raw data (e.g. floats are now strings).
-            # This means we CANNOT rebuild totals/styles correctly if we rely on raw types later?
-            # Float totals are stored separately. Styles are stored separately.
-            # So display_data being strings is fine for display and search.
-            # What if we need to export to Excel later with real types?
-            # The export usually uses the DB or the Table Model.
-            # If Table Model only has strings, export will have strings.
-            # User might want numbers.
-            # However, for PERFORMANCE of the VIEW, strings are key.
-            # If export is needed, we can load from DB again or keep raw data in memory (doubles RAM).
-            # For 130k rows, RAM is cheap (100MB).
-            # Let's keep display_data as the main source for the View.
-            # If needed, we can add raw_data later.
-
-            append_display(display_row)
-
-            # Search Index (lowercase joined)
-            append_search(" ".join(search_parts).lower())
-
-            # --- 2. Float Totals (Col 7) ---
-            val_7 = row[7]
+            self.progress.emit("Salvataggio cache...")
             try:
-                if isinstance(val_7, (int, float)):
-                    append_total(float(val_7))
-                else:
-                    append_total(parse_currency(val_7))
-            except:
-                append_total(0.0)
-
-            # --- 3. Style Cache (Pre-parse JSON) ---
-            if len(row) > 11:
-                style_json = row[11]
-                if style_json:
-                    try:
-                        append_style(json.loads(style_json))
-                    except:
-                        append_style(None)
-                else:
-                    append_style(None)
-            else:
-                append_style(None)
-
-        return display_data, search_index, float_totals, style_cache
+                cache.save()
+                ScaricoOreCache.remove_stale(db_version)
+            except Exception as e:
+                print(f"Error saving cache: {e}")
 
-    def _save_cache(self, data, search, totals, style_cache):
-        try:
-            self.cache_path.parent.mkdir(parents=True, exist_ok=True)
-            with open(self.cache_path, 'wb') as f:
-                pickle.dump((data, search, totals, style_cache), f)
+            self.finished.emit(cache)
         except Exception as e:
-            print(f"Error saving cache: {e}")
+            print(f"Error loading cache: {e}")
+            self.finished.emit(None)
 
-class ScaricoOreTableModel(QAbstractTableModel):
-    """
-    Modello virtuale ULTRA-RAPIDO per Scarico Ore (130k+ righe).
-    Integra la logica di filtraggio per evitare l'overhead di QSortFilterProxyModel.
-    Usa dati pre-formattati per rendering O(1).
-    """
+class ScaricoOreBaseModel(QAbstractTableModel):
+    """Parti comuni ai modelli Scarico Ore: colonne, allineamenti, pennelli, segnali."""
 
     COLUMNS = [
         'DATA', 'PERS1', 'PERS2', 'ODC', 'POS', 'DALLE', 'ALLE',
         'TOTALE ORE', 'DESCRIZIONE', 'FINITO', 'COMMESSA'
     ]
 
-    CACHE_PATH = Path("data/scarico_ore_cache.pkl")
+    _ALIGN_RIGHT = Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter
+    _ALIGN_CENTER = Qt.AlignmentFlag.AlignCenter | Qt.AlignmentFlag.AlignVCenter
+    _ALIGN_LEFT = Qt.AlignmentFlag.AlignLeft | Qt.AlignmentFlag.AlignVCenter
+    _ALIGNMENTS = (
+        _ALIGN_CENTER, _ALIGN_LEFT, _ALIGN_LEFT, _ALIGN_RIGHT, _ALIGN_RIGHT, _ALIGN_RIGHT,
+        _ALIGN_RIGHT, _ALIGN_RIGHT, _ALIGN_LEFT, _ALIGN_LEFT, _ALIGN_LEFT
+    )
+    _NO_BRUSHES = (None,) * len(COLUMNS)
+
+    cache_loaded = pyqtSignal()
+    loading_progress = pyqtSignal(str)
+    # Righe visibili cambiate da un filtro/ordinamento completato in background
+    rows_updated = pyqtSignal()
+
+    def request_value_counts(self, col, callback):
+        """Conteggi per valore della colonna passati a `callback` (subito, se in memoria)."""
+        callback(self.value_counts(col))
+
+    def columnCount(self, parent=QModelIndex()):
+        return len(self.COLUMNS)
+
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if orientation == Qt.Orientation.Horizontal and role == Qt.ItemDataRole.DisplayRole:
+            return self.COLUMNS[section]
+        return None
+
+    def _build_brushes(self, styles):
+        """
+        Per ogni id stile, una tupla di QBrush (o None) per colonna, sfondo e testo.
+        I pennelli sono condivisi per colore: uno solo per ogni esadecimale distinto.
+        """
+        brush_by_color = {}
+
+        def brush(color_hex):
+            if not color_hex:
+                return None
+            cached = brush_by_color.get(color_hex)
+            if cached is None:
+                cached = brush_by_color[color_hex] = QBrush(QColor(color_hex))
+            return cached
+
+        bg_table, fg_table = [], []
+        for style in styles:
+            if not style:
+                bg_table.append(self._NO_BRUSHES)
+                fg_table.append(self._NO_BRUSHES)
+                continue
+            cells = [style.get(key) if isinstance(style.get(key), dict) else {} for key in STYLE_KEYS]
+            bg_table.append(tuple(brush(cell.get('bg')) for cell in cells))
+            fg_table.append(tuple(brush(cell.get('fg')) for cell in cells))
+        return bg_table, fg_table
+
+
+class ScaricoOreTableModel(ScaricoOreBaseModel):
+    """
+    Modello virtuale ULTRA-RAPIDO per Scarico Ore (130k+ righe).
+    Integra la logica di filtraggio per evitare l'overhead di QSortFilterProxyModel.
+    Usa dati pre-formattati (cache colonnare mappata in memoria) per rendering O(1).
+    """
 
     # ⚡ SINGLETON CACHE
     _global_cache = {
-        'display_data': [], # List[List[str]]
-        'search_index': [], # List[str]
-        'totals': [],       # List[float]
-        'styles': [],       # List[dict]
+        'cache': None,      # ScaricoOreCache
         'loaded': False
     }
 
-    cache_loaded = pyqtSignal()
-    loading_progress = pyqtSignal(str)
-
     def __init__(self, data=None):
         super().__init__()
         # Data references
-        self._display_data = []
-        self._search_index = []
-        self._float_totals = []
-        self._styles_cache = []
+        self._cache = None
+        self._columns = []
+        self._search_index = None
+        self._float_totals = np.zeros(0)
+        self._style_ids = np.zeros(0, dtype=np.uint16)
+        self._styles = [None]
+        self._bg_brushes = [self._NO_BRUSHES]
+        self._fg_brushes = [self._NO_BRUSHES]
 
         # Filtering
-        self._visible_indices = [] # Indices into _display_data
+        self._visible_indices = np.zeros(0, dtype=np.intp) # Indices into the cache rows
         self._filtered_count = 0
 
         self._worker = None
@@ -240,19 +161,39 @@ class ScaricoOreTableModel(QAbstractTableModel):
         self._current_search_terms = []
         self._current_col_filters = {}
 
+        # Ordinamento corrente (None = ordine del DB)
+        self._sort_column = None
+        self._sort_order = Qt.SortOrder.AscendingOrder
+
+        # Ultima ricerca testuale (per raffinare invece di riscansionare)
+        self._last_search_query = None
+        self._last_search_rows = None
+
         # If global cache is loaded, use it immediately
         if self._global_cache['loaded']:
-            self._display_data = self._global_cache['display_data']
-            self._search_index = self._global_cache['search_index']
-            self._float_totals = self._global_cache['totals']
-            self._styles_cache = self._global_cache['styles']
-            # Reset filter (show all)
-            self._visible_indices = list(range(len(self._display_data)))
-            self._filtered_count = len(self._visible_indices)
+            self._set_cache(self._global_cache['cache'])
 
         if data:
             self.update_data(data)
 
+    def _set_cache(self, cache, keep_view=False):
+        self._cache = cache
+        self._columns = cache.columns
+        self._search_index = cache.search
+        self._float_totals = cache.totals
+        self._style_ids = cache.style_ids
+        self._styles = cache.styles
+        self._bg_brushes, self._fg_brushes = self._build_brushes(cache.styles)
+        self._last_search_query = None
+        self._last_search_rows = None
+        if keep_view:
+            return
+        # Reset filter (show all)
+        self._current_search_terms = []
+        self._current_col_filters = {}
+        self._visible_indices = self._sorted(np.arange(len(cache), dtype=np.intp))
+        self._filtered_count = len(self._visible_indices)
+
     def load_data_async(self, raw_data=None):
         if self._global_cache['loaded'] and raw_data is None:
             self.cache_loaded.emit()
@@ -264,103 +205,248 @@ class ScaricoOreTableModel(QAbstractTableModel):
         self.is_loading = True
         self.loading_progress.emit("Avvio..." if raw_data else "Caricamento Cache...")
 
-        self._worker = CacheWorker(self.CACHE_PATH, raw_data)
+        self._worker = CacheWorker(raw_data)
         self._worker.progress.connect(self.loading_progress.emit)
         self._worker.finished.connect(self._on_worker_finished)
         self._worker.start()
 
-    def _on_worker_finished(self, display_data, search, totals, style_cache):
-        self.beginResetModel()
-        self._display_data = display_data
-        self._search_index = search
-        self._float_totals = totals
-        self._styles_cache = style_cache
-
-        # Reset filters
-        self._visible_indices = list(range(len(display_data)))
-        self._filtered_count = len(self._visible_indices)
+    def _on_worker_finished(self, cache):
+        if cache is None:
+            cache = ScaricoOreCache.build([], "0-0")
 
+        self.beginResetModel()
+        self._set_cache(cache)
         self.endResetModel()
 
         # Update Singleton
-        self._global_cache['display_data'] = display_data
-        self._global_cache['search_index'] = search
-        self._global_cache['totals'] = totals
-        self._global_cache['styles'] = style_cache
+        self._global_cache['cache'] = cache
         self._global_cache['loaded'] = True
 
         self.is_loading = False
+        if self._worker is not None:
+            self._worker.wait()  # run() termina subito dopo l'emit: evita di distruggere un thread attivo
         self._worker = None
         self.cache_loaded.emit()
 
     def update_data(self, new_data):
         self.load_data_async(new_data)
 
+    def apply_delta(self, delta):
+        """
+        Applica la differenza di un'importazione (ScaricoOreDelta) alla cache
+        in memoria, in background; al termine le righe vengono rimosse e
+        inserite con rowsRemoved/rowsInserted, preservando filtri, ordinamento
+        e selezione. Ritorna False se serve un caricamento completo.
+        """
+        if self._cache is None or self.is_loading or delta is None:
+            return False
+        if not len(self._cache) or not self._cache.ids.any():
+            return False  # cache senza id (vuota o costruita da righe esterne)
+
+        self.is_loading = True
+        self.loading_progress.emit("Aggiornamento dati...")
+        self._worker = CacheWorker(base_cache=self._cache, delta=delta)
+        self._worker.progress.connect(self.loading_progress.emit)
+        self._worker.finished.connect(self._on_delta_finished)
+        self._worker.start()
+        return True
+
+    def _on_delta_finished(self, cache):
+        if self._worker is not None:
+            self._worker.wait()
+        self._worker = None
+        self.is_loading = False
+
+        if cache is None:
+            # Fallback: ricaricamento completo
+            self._global_cache['loaded'] = False
+            self.load_data_async()
+            return
+
+        self._splice(cache)
+        self._global_cache['cache'] = cache
+        self._global_cache['loaded'] = True
+        self.cache_loaded.emit()
+
+    # Oltre questo numero di blocchi contigui conviene un unico reset della vista
+    _MAX_SPLICE_BLOCKS = 64
+
+    def _splice(self, cache):
+        """
+        Passa a `cache` (= cache corrente - righe rimosse + righe nuove in
+        testa) emettendo solo le notifiche per le righe visibili cambiate.
+        """
+        old = self._cache
+        keep = np.isin(old.ids, cache.ids)  # gli id non vengono riusati
+        n_new = len(cache) - int(keep.sum())
+        new_index = np.cumsum(keep, dtype=np.intp) - 1 + n_new
+
+        visible = self._visible_indices
+        gone = np.flatnonzero(~keep[visible])
+        removed_blocks = self._blocks(gone)
+        kept_visible = new_index[np.delete(visible, gone)]
+
+        # Righe nuove che passano i filtri correnti, nella posizione data dall'ordinamento
+        self._set_cache(cache, keep_view=True)
+        final = self._sorted(np.union1d(self._filter_new_rows(n_new), kept_visible))
+        added = np.flatnonzero(final < n_new)
+        added_blocks = self._blocks(added)
+
+        if len(removed_blocks) + len(added_blocks) > self._MAX_SPLICE_BLOCKS:
+            self.beginResetModel()
+            self._visible_indices = final
+            self._filtered_count = len(final)
+            self.endResetModel()
+            return
+
+        # 1. Rimozioni (indici della vecchia cache), dal fondo
+        self._set_cache(old, keep_view=True)
+        for first, last in reversed(removed_blocks):
+            self.beginRemoveRows(QModelIndex(), first, last)
+            visible = np.delete(visible, np.s_[first:last + 1])
+            self._visible_indices = visible
+            self._filtered_count = len(visible)
+            self.endRemoveRows()
+
+        # 2. Cambio cache: stesse righe visibili, indici rinumerati (nessuna notifica)
+        self._set_cache(cache, keep_view=True)
+        self._visible_indices = kept_visible
+
+        # 3. Inserimenti, in ordine di posizione finale
+        pending = np.zeros(len(final), dtype=bool)
+        pending[added] = True
+        for first, last in added_blocks:
+            self.beginInsertRows(QModelIndex(), first, last)
+            pending[first:last + 1] = False
+            self._visible_indices = final[~pending]
+            self._filtered_count = len(self._visible_indices)
+            self.endInsertRows()
+
+    @staticmethod
+    def _blocks(positions):
+        """Posizioni ordinate -> lista di (prima, ultima) dei blocchi contigui."""
+        if not len(positions):
+            return []
+        breaks = np.flatnonzero(np.diff(positions) != 1) + 1
+        return [(int(b[0]), int(b[-1])) for b in np.split(positions, breaks)]
+
+    def _filter_new_rows(self, n_new):
+        """Tra le prime `n_new` righe, quelle che passano ricerca e filtri colonna correnti."""
+        new_rows = np.arange(n_new, dtype=np.intp)
+        if self._current_search_terms:
+            rows = self._search_index
+            new_rows = np.array(
+                [i for i in new_rows.tolist() if all(t in rows[i] for t in self._current_search_terms)],
+                dtype=np.intp,
+            )
+        for col, allowed in self._current_col_filters.items():
+            column = self._columns[col]
+            new_rows = new_rows[[column[i].lower() in allowed for i in new_rows.tolist()]]
+        return new_rows
+
+    def unique_values(self, col):
+        """Valori distinti di una colonna (su tutti i dati, non solo i filtrati)."""
+        if not self._columns:
+            return set()
+        return set(self._columns[col].distinct())
+
+    def value_counts(self, col):
+        """{valore: numero di righe} per una colonna, direttamente dal dizionario."""
+        if not self._columns:
+            return {}
+        column = self._columns[col]
+        return dict(zip(column.distinct(), column.counts().tolist()))
+
     def set_filter(self, text, col_filters=None):
         """
         Applica filtri (testo globale e colonne) e aggiorna _visible_indices.
-        Operazione pura Python ottimizzata.
+        La ricerca parte dai candidati dell'indice di trigrammi (o dal risultato
+        precedente, se la nuova ricerca lo estende) e verifica solo quelli; i
+        filtri colonna sono intersezioni delle righe dei valori ammessi.
         """
         text = text.lower().strip()
         search_terms = text.split() if text else []
+        row_count = len(self._float_totals)
+        self._current_search_terms = search_terms
+        self._current_col_filters = dict(col_filters or {})
 
         self.beginResetModel()
 
         # Optimize: if no filters, just range
         if not search_terms and not col_filters:
-            self._visible_indices = list(range(len(self._display_data)))
+            self._visible_indices = self._sorted(np.arange(row_count, dtype=np.intp))
         else:
-            # Filter Logic
-            # We use list comprehension for speed
-            indices = range(len(self._display_data))
+            indices = None  # None = tutte le righe
 
             # 1. Global Search
             if search_terms:
-                # Pre-bind
-                s_idx = self._search_index
-                # Efficient intersection
-                indices = [
-                    i for i in indices
-                    if all(t in s_idx[i] for t in search_terms)
-                ]
-
-            # 2. Column Filters
+                indices = self._search_rows(search_terms)
+
+            # 2. Column Filters: intersezione delle righe dei valori ammessi
             if col_filters:
                 # col_filters: {col_idx: set(lowercase_values)}
                 for col, allowed in col_filters.items():
-                    # allowed is a set of lowercase strings
-                    # Data is in self._display_data[i][col] (string)
-                    # We need to lower it? Yes.
-                    # This part is slower, O(N).
-                    d_data = self._display_data
-                    indices = [
-                        i for i in indices
-                        if d_data[i][col].lower() in allowed
-                    ]
-
-            self._visible_indices = indices
+                    matching = self._columns[col].rows_matching(allowed)
+                    indices = matching if indices is None else np.intersect1d(indices, matching, assume_unique=True)
+
+            self._visible_indices = self._sorted(np.asarray(indices, dtype=np.intp))
 
         self._filtered_count = len(self._visible_indices)
         self.endResetModel()
 
+    def _search_rows(self, search_terms):
+        """Righe (indici ordinati) che contengono tutti i termini."""
+        query = " ".join(search_terms)
+
+        candidates = None
+        if self._last_search_query is not None and query.startswith(self._last_search_query):
+            # Raffinamento: ogni termine precedente è sottostringa di uno nuovo
+            candidates = self._last_search_rows
+
+        for term in search_terms:
+            posting = self._cache.trigrams.candidates(term)
+            if posting is None:
+                continue  # termine troppo corto per l'indice
+            candidates = posting if candidates is None else np.intersect1d(candidates, posting, assume_unique=True)
+
+        rows = self._search_index.to_list()
+        if candidates is None:
+            # Solo termini cortissimi: scansione completa
+            result = [i for i in range(len(rows)) if all(t in rows[i] for t in search_terms)]
+        else:
+            result = [i for i in candidates.tolist() if all(t in rows[i] for t in search_terms)]
+
+        result = np.asarray(result, dtype=np.intp)
+        self._last_search_query, self._last_search_rows = query, result
+        return result
+
+    def sort(self, column, order=Qt.SortOrder.AscendingOrder):
+        """Ordina le righe visibili senza proxy: permutazione per colonna composta col filtro."""
+        self.beginResetModel()
+        self._sort_column, self._sort_order = column, order
+        self._visible_indices = self._sorted(self._visible_indices)
+        self._filtered_count = len(self._visible_indices)
+        self.endResetModel()
+
+    def _sorted(self, indices):
+        """Riordina `indices` secondo l'ordinamento corrente (O(n) su permutazione in cache)."""
+        if self._sort_column is None or self._cache is None:
+            return indices
+        perm = self._cache.sort_permutation(self._sort_column, self._sort_order == Qt.SortOrder.DescendingOrder)
+        if len(indices) == len(perm):
+            return perm
+        visible = np.zeros(len(perm), dtype=bool)
+        visible[indices] = True
+        return perm[visible[perm]]
+
     def get_float_total_for_visible(self):
         """Sum totals for visible rows."""
-        # This is fast: sum(list comprehension)
-        # accessing _float_totals via index
-        if not self._float_totals: return 0.0
-
-        # Direct index access
-        # Optimization: use numpy if available? No, stick to stdlib.
-        # map is fast.
-        total = sum(self._float_totals[i] for i in self._visible_indices)
-        return total
+        if not len(self._float_totals): return 0.0
+        return float(self._float_totals[self._visible_indices].sum())
 
     def rowCount(self, parent=QModelIndex()):
         return self._filtered_count
 
-    def columnCount(self, parent=QModelIndex()):
-        return len(self.COLUMNS)
-
     def data(self, index, role=Qt.ItemDataRole.DisplayRole):
         if not index.isValid():
             return None
@@ -375,47 +461,226 @@ class ScaricoOreTableModel(QAbstractTableModel):
 
         if role == Qt.ItemDataRole.DisplayRole:
             # Direct string access
-            return self._display_data[real_row_idx][col]
+            return self._columns[col][real_row_idx]
 
         elif role == Qt.ItemDataRole.BackgroundRole:
-            return self._get_style(real_row_idx, col, 'bg')
+            # ⚡ Pennelli pre-costruiti per id stile: nessuna allocazione durante il repaint
+            return self._bg_brushes[self._style_ids[real_row_idx]][col]
 
         elif role == Qt.ItemDataRole.ForegroundRole:
-            return self._get_style(real_row_idx, col, 'fg')
+            return self._fg_brushes[self._style_ids[real_row_idx]][col]
 
         elif role == Qt.ItemDataRole.TextAlignmentRole:
-            if col in [3, 4, 5, 6, 7]:
-                return Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter
-            if col == 0:
-                return Qt.AlignmentFlag.AlignCenter | Qt.AlignmentFlag.AlignVCenter
-            return Qt.AlignmentFlag.AlignLeft | Qt.AlignmentFlag.AlignVCenter
+            return self._ALIGNMENTS[col]
 
         return None
 
-    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
-        if orientation == Qt.Orientation.Horizontal and role == Qt.ItemDataRole.DisplayRole:
-            return self.COLUMNS[section]
-        return None
+class SqlQueryWorker(QThread):
+    """Esegue in background una query di ScaricoOreSqlModel (id visibili, conteggi)."""
+    finished = pyqtSignal(int, object) # (generazione, risultato) - risultato None se errore
 
-    def _get_style(self, real_row, col, style_type):
+    def __init__(self, generation, fn):
+        super().__init__()
+        self.generation = generation
+        self.fn = fn
+
+    def run(self):
         try:
-            if real_row >= len(self._styles_cache): return None
-            styles = self._styles_cache[real_row]
-            if not styles: return None
-
-            # Keys mapping (same as before)
-            keys = [
-                'data', 'pers1', 'pers2', 'odc', 'pos', 'dalle', 'alle',
-                'totale_ore', 'descrizione', 'finito', 'commessa'
-            ]
-            key = keys[col]
-            if key in styles:
-                color_hex = styles[key].get(style_type)
-                if color_hex:
-                    return QColor(color_hex)
-        except:
-            pass
-        return None
+            self.finished.emit(self.generation, self.fn())
+        except Exception as e:
+            print(f"Error querying scarico_ore: {e}")
+            self.finished.emit(self.generation, None)
+
+
+class ScaricoOreSqlModel(ScaricoOreBaseModel):
+    """
+    Modello Scarico Ore su SQLite, per storici più grandi della RAM.
+
+    In memoria restano solo id e ore delle righe visibili (16 byte a riga,
+    nell'ordine corrente) e un LRU di pagine di righe formattate, lette dal DB
+    per chiave primaria quando la vista le mostra. Ricerca, filtri colonna e
+    ordinamento sono eseguiti in SQL (vedi ScaricoOreQuery) su un SqlQueryWorker:
+    il thread GUI non attende mai la scansione della tabella. Ogni richiesta ha
+    un numero di generazione e i risultati superati da una richiesta più
+    recente vengono scartati.
+    Stessa interfaccia di ScaricoOreTableModel verso il pannello.
+    """
+
+    PAGE_SIZE = 256
+    MAX_PAGES = 64
+
+    def __init__(self):
+        super().__init__()
+        self._ids = np.zeros(0, dtype=np.int64)
+        self._totals = np.zeros(0, dtype=np.float64)
+        self._pages = OrderedDict() # n. pagina -> [(valori, pennelli sfondo, pennelli testo)]
+        self._brushes_by_style = {"": (self._NO_BRUSHES, self._NO_BRUSHES)}
+
+        self._current_search_terms = []
+        self._current_col_filters = {}
+        self._sort_column = None
+        self._sort_order = Qt.SortOrder.AscendingOrder
+
+        self._workers = set()
+        self._generation = 0
+        self._counts_generation = 0
+        self._counts_cache = {} # colonna -> {valore: conteggio}, fino al prossimo caricamento
+        self._pending_counts = None # (colonna, callback) della richiesta conteggi più recente
+        self.is_loading = False
+
+    def _query(self):
+        return ScaricoOreQuery(
+            self._current_search_terms, self._current_col_filters,
+            self._sort_column, self._sort_order == Qt.SortOrder.DescendingOrder,
+        )
+
+    def _set_rows(self, result):
+        ids, totals = result
+        self.beginResetModel()
+        self._ids, self._totals = ids, totals
+        self._pages.clear()
+        self.endResetModel()
+
+    def _start_worker(self, generation, fn, slot):
+        worker = SqlQueryWorker(generation, fn)
+        worker.finished.connect(slot)
+        self._workers.add(worker)
+        worker.start()
+
+    def _release_worker(self):
+        worker = self.sender()
+        if worker in self._workers:
+            worker.wait()
+            self._workers.discard(worker)
+
+    def _refresh_rows(self):
+        """Rilegge in background gli id visibili per filtri e ordinamento correnti."""
+        self._generation += 1
+        self._start_worker(self._generation, self._query().visible_rows, self._on_rows_ready)
+
+    def load_data_async(self, raw_data=None):
+        """Rilegge gli id visibili (i dati restano nel DB)."""
+        if self.is_loading:
+            return
+        self.is_loading = True
+        self._counts_cache.clear()
+        self.loading_progress.emit("Lettura database...")
+        self._refresh_rows()
+
+    def _on_rows_ready(self, generation, result):
+        self._release_worker()
+        if generation != self._generation:
+            return # superata da un filtro/ordinamento più recente
+        if result is not None:
+            self._set_rows(result)
+        self.rows_updated.emit()
+        if self.is_loading:
+            self.is_loading = False
+            self.cache_loaded.emit()
+
+    def apply_delta(self, delta):
+        # Nessuna copia in memoria da aggiornare: il pannello rilegge gli id
+        return False
+
+    def set_filter(self, text, col_filters=None):
+        text = text.lower().strip()
+        self._current_search_terms = text.split() if text else []
+        self._current_col_filters = dict(col_filters or {})
+        self._refresh_rows()
+
+    def sort(self, column, order=Qt.SortOrder.AscendingOrder):
+        self._sort_column, self._sort_order = column, order
+        self._refresh_rows()
+
+    def unique_values(self, col):
+        return set(self.value_counts(col))
+
+    def value_counts(self, col):
+        counts = self._counts_cache.get(col)
+        if counts is None:
+            counts = self._counts_cache[col] = ScaricoOreQuery.value_counts(col)
+        return counts
+
+    def request_value_counts(self, col, callback):
+        """Conteggi (GROUP BY su tutta la tabella) calcolati in background alla prima apertura."""
+        if col in self._counts_cache:
+            callback(self._counts_cache[col])
+            return
+        self._counts_generation += 1
+        self._pending_counts = (col, callback)
+        self._start_worker(self._counts_generation, lambda: ScaricoOreQuery.value_counts(col),
+                           self._on_counts_ready)
+
+    def _on_counts_ready(self, generation, result):
+        self._release_worker()
+        if generation != self._counts_generation or result is None:
+            return # popup di un'altra colonna richiesto nel frattempo
+        col, callback = self._pending_counts
+        self._counts_cache[col] = result
+        callback(result)
+
+    def get_float_total_for_visible(self):
+        return float(self._totals.sum())
+
+    def rowCount(self, parent=QModelIndex()):
+        return len(self._ids)
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid() or index.row() >= len(self._ids):
+            return None
+
+        col = index.column()
+        if role == Qt.ItemDataRole.TextAlignmentRole:
+            return self._ALIGNMENTS[col]
+        if role not in (Qt.ItemDataRole.DisplayRole, Qt.ItemDataRole.BackgroundRole, Qt.ItemDataRole.ForegroundRole):
+            return None
+
+        values, bg, fg = self._row(index.row())
+        if role == Qt.ItemDataRole.DisplayRole:
+            return values[col]
+        if role == Qt.ItemDataRole.BackgroundRole:
+            return bg[col]
+        return fg[col]
+
+    def _row(self, row):
+        page_no, offset = divmod(row, self.PAGE_SIZE)
+        page = self._pages.get(page_no)
+        if page is None:
+            page = self._load_page(page_no)
+        else:
+            self._pages.move_to_end(page_no)
+        return page[offset]
+
+    def _load_page(self, page_no):
+        """Legge e formatta una pagina di righe; scarta la pagina usata meno di recente."""
+        ids = self._ids[page_no * self.PAGE_SIZE:(page_no + 1) * self.PAGE_SIZE].tolist()
+        rows = ScaricoOreQuery.fetch_rows(ids)
+
+        page = []
+        for row_id in ids:
+            raw = rows.get(row_id)
+            if raw is None:
+                # Riga cancellata dopo la query degli id: vuota fino al prossimo caricamento
+                page.append((("",) * N_COLUMNS, self._NO_BRUSHES, self._NO_BRUSHES))
+                continue
+            page.append((display_row(raw), *self._brushes_for(raw[N_COLUMNS])))
+
+        self._pages[page_no] = page
+        while len(self._pages) > self.MAX_PAGES:
+            self._pages.popitem(last=False)
+        return page
+
+    def _brushes_for(self, style_json):
+        style_json = style_json or ""
+        brushes = self._brushes_by_style.get(style_json)
+        if brushes is None:
+            try:
+                style = json.loads(style_json) or None
+            except (TypeError, ValueError):
+                style = None
+            bg, fg = self._build_brushes([style])
+            brushes = self._brushes_by_style[style_json] = (bg[0], fg[0])
+        return brushes
 
 class FilterHeaderView(QHeaderView):
     """Header con menu a discesa ottimizzato."""
@@ -431,13 +696,14 @@ class FilterHeaderView(QHeaderView):
         super().mouseReleaseEvent(event)
 
     def _show_filter_menu(self, col_index, global_pos):
-        # Access the real model directly
-        # The view's model is now ScaricoOreTableModel (no proxy)
-        model = self.model()
+        # Valori distinti e conteggi su ALL data (not just filtered): dal dizionario
+        # della colonna in memoria, oppure da una query in background (modello SQL)
+        self.model().request_value_counts(
+            col_index, lambda value_counts: self._open_filter_menu(col_index, global_pos, value_counts)
+        )
 
-        # Collect unique values from ALL data (not just filtered)
-        # Optimization: Use set comprehension on _display_data
-        unique_values = {row[col_index] for row in model._display_data}
+    def _open_filter_menu(self, col_index, global_pos, value_counts):
+        unique_values = set(value_counts)
 
         # Check applied filter
         # We need to access current filters from panel?
@@ -450,12 +716,19 @@ class FilterHeaderView(QHeaderView):
 
         menu = QMenu(self)
 
+        # Ordinamento (come il menu filtro di Excel)
+        asc_action = menu.addAction("⬆️ Ordina crescente")
+        desc_action = menu.addAction("⬇️ Ordina decrescente")
+        asc_action.triggered.connect(lambda: self._sort_by(col_index, Qt.SortOrder.AscendingOrder))
+        desc_action.triggered.connect(lambda: self._sort_by(col_index, Qt.SortOrder.DescendingOrder))
+        menu.addSeparator()
+
         # Determine widget type
         if col_index == 0:
             filter_widget = DateFilterPopupWidget(unique_values, None)
         else:
             sorted_values = sorted(list(unique_values), key=lambda x: str(x).lower())
-            filter_widget = ListFilterPopupWidget(sorted_values, None)
+            filter_widget = ListFilterPopupWidget(sorted_values, None, value_counts)
 
         action = QWidgetAction(menu)
         action.setDefaultWidget(filter_widget)
@@ -473,6 +746,11 @@ class FilterHeaderView(QHeaderView):
             # Creating a signal here is best practice.
             self.filterChanged.emit(col_index, selected)
 
+    def _sort_by(self, col_index, order):
+        self.setSortIndicatorShown(True)
+        self.setSortIndicator(col_index, order)
+        self.model().sort(col_index, order)
+
     filterChanged = pyqtSignal(int, object) # col, values
 
 # ... (ListFilterPopupWidget and DateFilterPopupWidget remain mostly same,
@@ -480,7 +758,7 @@ class FilterHeaderView(QHeaderView):
 
 class ListFilterPopupWidget(QWidget):
     """Widget filtro con QListView e Search Bar per alte performance."""
-    def __init__(self, values, selected_values=None):
+    def __init__(self, values, selected_values=None, counts=None):
         super().__init__()
         self.values = values
         self.all_values = set(str(v).lower() for v in values)
@@ -524,7 +802,10 @@ class ListFilterPopupWidget(QWidget):
             selected_set = set(v.lower() for v in selected_values)
 
         for val in values:
-            item = QStandardItem(str(val))
+            # Il valore vero resta in UserRole: il testo può includere il conteggio righe
+            label = str(val) if counts is None else f"{val}  ({counts.get(val, 0)})"
+            item = QStandardItem(label)
+            item.setData(str(val), Qt.ItemDataRole.UserRole)
             item.setCheckable(True)
             if is_all_selected or (str(val).lower() in selected_set):
                 item.setCheckState(Qt.CheckState.Checked)
@@ -540,10 +821,11 @@ class ListFilterPopupWidget(QWidget):
         self.original_rows = [self.model.item(i) for i in range(self.model.rowCount())]
 
     def _filter_list(self, text):
+        # Sul valore, non sull'etichetta: "3" non deve trovare i valori con 3 righe
         text = text.lower()
         for i in range(self.model.rowCount()):
             item = self.model.item(i)
-            if text in item.text().lower():
+            if text in item.data(Qt.ItemDataRole.UserRole).lower():
                 self.list_view.setRowHidden(i, False)
             else:
                 self.list_view.setRowHidden(i, True)
@@ -579,7 +861,7 @@ class ListFilterPopupWidget(QWidget):
         for i in range(self.model.rowCount()):
             item = self.model.item(i)
             if item.checkState() == Qt.CheckState.Checked:
-                selected.append(item.text())
+                selected.append(item.data(Qt.ItemDataRole.UserRole))
             else:
                 all_checked = False
 
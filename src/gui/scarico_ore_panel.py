@@ -14,13 +14,18 @@ from datetime import datetime
 
 from src.core.contabilita_manager import ContabilitaManager
 from src.core import config_manager
-from src.gui.scarico_ore_components import ScaricoOreTableModel, FilterHeaderView
+from src.core.scarico_ore_query import ScaricoOreQuery
+from src.gui.scarico_ore_components import ScaricoOreTableModel, ScaricoOreSqlModel, FilterHeaderView
 from src.utils.parsing import parse_currency
 from pathlib import Path
 
+# Oltre questo numero di righe la tabella legge dal DB a pagine (ScaricoOreSqlModel)
+# invece di tenere in memoria la cache colonnare completa
+SQL_MODEL_THRESHOLD = 500_000
+
 class ScaricoOreWorker(QThread):
     """Worker per l'importazione in background (solo Scarico Ore)."""
-    finished_signal = pyqtSignal(bool, str, int, int) # Added args for added/removed
+    finished_signal = pyqtSignal(bool, str, int, int, object) # added/removed + ScaricoOreDelta
     progress_signal = pyqtSignal(str)
 
     def __init__(self, file_path: str):
@@ -59,8 +64,8 @@ class ScaricoOreWorker(QThread):
 
                 self.progress_signal.emit(f"⏳ Importazione: {percent}% completato ({current}/{real_total}) • Tempo stimato: {m}m {s}s")
 
-        success, msg, added, removed = ContabilitaManager.import_scarico_ore(self.file_path, progress_callback=progress_cb)
-        self.finished_signal.emit(success, msg, added, removed)
+        success, msg, added, removed, delta = ContabilitaManager.import_scarico_ore(self.file_path, progress_callback=progress_cb)
+        self.finished_signal.emit(success, msg, added, removed, delta)
 
 class ScaricoOrePanel(QWidget):
     """Pannello per la visualizzazione e gestione dello Scarico Ore Cantiere."""
@@ -186,8 +191,12 @@ class ScaricoOrePanel(QWidget):
 
         # Models
         # ⚡ BOLT: Use Virtual Model directly, no Proxy
-        self.source_model = ScaricoOreTableModel([])
+        if ScaricoOreQuery.count() > SQL_MODEL_THRESHOLD:
+            self.source_model = ScaricoOreSqlModel()
+        else:
+            self.source_model = ScaricoOreTableModel([])
         self.source_model.cache_loaded.connect(self._on_cache_loaded)
+        self.source_model.rows_updated.connect(self._update_totals)
         self.source_model.loading_progress.connect(self._on_loading_progress)
 
         self.table_view.setModel(self.source_model)
@@ -338,7 +347,7 @@ class ScaricoOrePanel(QWidget):
         self.worker.progress_signal.connect(self.status_label.setText)
         self.worker.start()
 
-    def _on_update_finished(self, success: bool, msg: str, added: int = 0, removed: int = 0):
+    def _on_update_finished(self, success: bool, msg: str, added: int = 0, removed: int = 0, delta=None):
         self.update_btn.setEnabled(True)
         self.table_view.setEnabled(True)
 
@@ -353,16 +362,14 @@ class ScaricoOrePanel(QWidget):
             self.status_label.setText(final_status)
             self._last_update_status = final_status # Store to persist after reload
 
-            # Invalidate cache by removing the file
-            try:
-                if ScaricoOreTableModel.CACHE_PATH.exists():
-                    ScaricoOreTableModel.CACHE_PATH.unlink()
-            except: pass
-
-            # Reset global cache to force reload
-            ScaricoOreTableModel._global_cache['loaded'] = False
-
-            self._load_data() # Reload data
+            # ⚡ BOLT: applica solo la differenza al modello in memoria (righe
+            # inserite/rimosse, filtri e selezione preservati). Se non è possibile
+            # si ricarica tutto: la cache su disco è legata alla versione dati del DB.
+            if self.source_model.apply_delta(delta):
+                self.update_btn.setEnabled(False)  # riabilitato in _on_cache_loaded
+            else:
+                ScaricoOreTableModel._global_cache['loaded'] = False
+                self._load_data() # Reload data
             # REMOVED: QMessageBox.information(self, "Successo", msg)
         else:
             self.status_label.setText("❌ Errore")
@@ -452,17 +459,9 @@ class ScaricoOrePanel(QWidget):
 
         self._set_ui_loading(True)
 
-        # ⚡ BOLT OPTIMIZATION:
-        if ScaricoOreTableModel.CACHE_PATH.exists():
-            self.source_model.load_data_async(raw_data=None)
-        else:
-            try:
-                # Fetch ALL rows (tuples) - SQLite is fast
-                rows = ContabilitaManager.get_scarico_ore_data()
-                self.source_model.load_data_async(raw_data=rows)
-            except Exception as e:
-                self.status_label.setText(f"Errore caricamento: {e}")
-                self._set_ui_loading(False)
+        # ⚡ BOLT OPTIMIZATION: il worker mappa la cache valida per la versione
+        # corrente del DB, oppure legge le righe e la ricostruisce in background
+        self.source_model.load_data_async(raw_data=None)
 
     def _resize_columns(self):
         # ⚡ BOLT OPTIMIZATION: REMOVED resizeColumnsToContents()
@@ -8,13 +8,15 @@ from PyQt6.QtWidgets import (
     QWidget, QVBoxLayout, QHBoxLayout, QLabel, QPushButton,
     QGroupBox, QLineEdit, QCheckBox, QSpinBox, QFileDialog,
     QMessageBox, QListWidget, QListWidgetItem, QInputDialog,
-    QFrame, QScrollArea, QDialog, QFormLayout, QMenu, QTabWidget, QTableWidget, QHeaderView
+    QFrame, QScrollArea, QDialog, QFormLayout, QMenu, QTabWidget, QTableWidget, QHeaderView,
+    QComboBox
 )
 from PyQt6.QtGui import QAction
 from PyQt6.QtCore import Qt, pyqtSignal
 
 from src.core import config_manager
 from src.core.stats_manager import StatsManager
+from src.core.constants import BrowserConfig
 
 
 class AccountDialog(QDialog):
@@ -517,6 +519,78 @@ class SettingsPanel(QWidget):
         timeout_layout.addWidget(self.timeout_spin)
         timeout_layout.addStretch()
         browser_layout.addLayout(timeout_layout)
+
+        workers_layout = QHBoxLayout()
+        workers_label = QLabel("Browser paralleli (Scarico TS / Dettagli OdA):")
+        workers_label.setStyleSheet("font-size: 15px;")
+        workers_layout.addWidget(workers_label)
+
+        self.parallel_workers_spin = QSpinBox()
+        self.parallel_workers_spin.setRange(1, 8)
+        self.parallel_workers_spin.setValue(1)
+        self.parallel_workers_spin.setMinimumHeight(40)
+        self.parallel_workers_spin.setMinimumWidth(100)
+        self.parallel_workers_spin.setToolTip(
+            "Con più di 1 browser le righe vengono divise tra più browser headless.\n"
+            "Al più un browser per account: il portale ammette una sola sessione per utente\n"
+            "(attivare \"Usa tutti gli account configurati in parallelo\")."
+        )
+        self._style_input(self.parallel_workers_spin)
+        workers_layout.addWidget(self.parallel_workers_spin)
+        workers_layout.addStretch()
+        browser_layout.addLayout(workers_layout)
+
+        self.parallel_accounts_check = QCheckBox("Usa tutti gli account configurati in parallelo")
+        self.parallel_accounts_check.setStyleSheet("QCheckBox { padding: 5px; font-size: 15px; }")
+        browser_layout.addWidget(self.parallel_accounts_check)
+
+        self.http_export_check = QCheckBox("Scarico TS: export diretto via HTTP (fallback interfaccia)")
+        self.http_export_check.setStyleSheet("QCheckBox { padding: 5px; font-size: 15px; }")
+        self.http_export_check.setToolTip(
+            "Dopo il primo download dall'interfaccia, i timesheet successivi vengono richiesti\n"
+            "direttamente al portale con la sessione del browser."
+        )
+        browser_layout.addWidget(self.http_export_check)
+
+        skip_layout = QHBoxLayout()
+        skip_label = QLabel("Scarico TS: salta i timesheet scaricati nelle ultime ore (0 = mai):")
+        skip_label.setStyleSheet("font-size: 15px;")
+        skip_layout.addWidget(skip_label)
+
+        self.skip_unchanged_spin = QSpinBox()
+        self.skip_unchanged_spin.setRange(0, 168)
+        self.skip_unchanged_spin.setValue(0)
+        self.skip_unchanged_spin.setMinimumHeight(40)
+        self.skip_unchanged_spin.setMinimumWidth(100)
+        self.skip_unchanged_spin.setToolTip(
+            "Le righe già scaricate in questo intervallo (registro download) non vengono\n"
+            "richieste di nuovo al portale, se il file è ancora nella cartella di destinazione."
+        )
+        self._style_input(self.skip_unchanged_spin)
+        skip_layout.addWidget(self.skip_unchanged_spin)
+        skip_layout.addStretch()
+        browser_layout.addLayout(skip_layout)
+
+        blocking_layout = QHBoxLayout()
+        blocking_label = QLabel("Blocco risorse del portale:")
+        blocking_label.setStyleSheet("font-size: 15px;")
+        blocking_layout.addWidget(blocking_label)
+
+        self.resource_blocking_combo = QComboBox()
+        self.resource_blocking_combo.addItems(list(BrowserConfig.RESOURCE_BLOCKING_PROFILES))
+        self.resource_blocking_combo.setMinimumHeight(40)
+        self.resource_blocking_combo.setMinimumWidth(160)
+        self.resource_blocking_combo.setStyleSheet("QComboBox { font-size: 15px; padding: 5px; }")
+        self.resource_blocking_combo.setToolTip(
+            "minimo: solo tracker · standard: anche immagini e media · aggressivo: anche i font.\n"
+            "I pattern che bloccherebbero pagine, script ExtJS, chiamate dati o export del portale\n"
+            "vengono scartati; con immagini bloccate mancano anche le icone del portale."
+        )
+        blocking_layout.addWidget(self.resource_blocking_combo)
+        blocking_layout.addStretch()
+        browser_layout.addLayout(blocking_layout)
+
+        scroll_layout.addWidget(browser_group)
         
         # --- Sezione Diagnostica ---
         diag_group = self._create_group_box("🛠️ Diagnostica & Licenza")
@@ -691,6 +765,11 @@ class SettingsPanel(QWidget):
     def _connect_change_signals(self):
         self.headless_check.stateChanged.connect(self._on_change)
         self.timeout_spin.valueChanged.connect(self._on_change)
+        self.parallel_workers_spin.valueChanged.connect(self._on_change)
+        self.parallel_accounts_check.stateChanged.connect(self._on_change)
+        self.http_export_check.stateChanged.connect(self._on_change)
+        self.skip_unchanged_spin.valueChanged.connect(self._on_change)
+        self.resource_blocking_combo.currentIndexChanged.connect(self._on_change)
         self.contabilita_path_edit.textChanged.connect(self._on_change)
         self.giornaliere_path_edit.textChanged.connect(self._on_change)
         self.attivita_path_edit.textChanged.connect(self._on_change)
@@ -960,6 +1039,13 @@ class SettingsPanel(QWidget):
         # Browser
         self.headless_check.setChecked(config.get("browser_headless", False))
         self.timeout_spin.setValue(config.get("browser_timeout", 30))
+        self.parallel_workers_spin.setValue(config.get("parallel_workers", 1))
+        self.parallel_accounts_check.setChecked(config.get("parallel_use_all_accounts", False))
+        self.http_export_check.setChecked(config.get("http_export_fast_path", False))
+        self.skip_unchanged_spin.setValue(config.get("download_skip_unchanged_hours", 0))
+        self.resource_blocking_combo.setCurrentText(
+            config.get("resource_blocking_profile", BrowserConfig.RESOURCE_BLOCKING_DEFAULT)
+        )
         
         # Contabilita
         self.contabilita_path_edit.setText(config.get("contabilita_file_path", ""))
@@ -992,6 +1078,11 @@ class SettingsPanel(QWidget):
         
         config_manager.set_config_value("browser_headless", self.headless_check.isChecked())
         config_manager.set_config_value("browser_timeout", self.timeout_spin.value())
+        config_manager.set_config_value("parallel_workers", self.parallel_workers_spin.value())
+        config_manager.set_config_value("parallel_use_all_accounts", self.parallel_accounts_check.isChecked())
+        config_manager.set_config_value("http_export_fast_path", self.http_export_check.isChecked())
+        config_manager.set_config_value("download_skip_unchanged_hours", self.skip_unchanged_spin.value())
+        config_manager.set_config_value("resource_blocking_profile", self.resource_blocking_combo.currentText())
 
         config_manager.set_config_value("contabilita_file_path", self.contabilita_path_edit.text())
         config_manager.set_config_value("giornaliere_path", self.giornaliere_path_edit.text())
@@ -7,257 +7,381 @@ from PyQt6.QtWidgets import (
     QTableWidget, QTableWidgetItem, QHeaderView, QMenu, 
     QTextEdit, QFrame, QAbstractItemView, QComboBox, QApplication,
     QToolTip, QGraphicsOpacityEffect, QDateEdit, QDialog, QSizePolicy, QGraphicsDropShadowEffect,
-    QListWidget, QListWidgetItem, QScrollArea, QScrollBar
+    QListWidget, QListWidgetItem, QScrollArea, QScrollBar, QAbstractScrollArea
+)
+from PyQt6.QtCore import (
+    Qt, pyqtSignal, QPropertyAnimation, QAbstractAnimation, QPoint, QSize, QUrl, QEasingCurve, QRect,
+    QTimer, QEvent
 )
-from PyQt6.QtCore import Qt, pyqtSignal, QPropertyAnimation, QAbstractAnimation, QPoint, QSize, QUrl, QEasingCurve, QRect
 from PyQt6.QtGui import QColor, QAction, QKeySequence, QCursor, QPainter, QBrush, QIcon, QFont, QDesktopServices, QPen
+from bisect import bisect_right
+from collections import deque
+from dataclasses import dataclass, field
 from datetime import datetime
 import re
 from pathlib import Path
 from src.utils.log_humanizer import SmartLogTranslator
 
 
-class HorizontalLogItem(QWidget):
-    """Widget per singolo elemento della timeline log orizzontale."""
-    def __init__(self, human_msg, tech_msg, category, timestamp, parent=None):
-        super().__init__(parent)
-        self.setFixedSize(180, 160) # Card Size
-
-        # Main Layout
-        layout = QVBoxLayout(self)
-        layout.setContentsMargins(10, 15, 10, 10)
-        layout.setSpacing(5)
-
-        # Style
-        self.setStyleSheet("""
-            QWidget {
-                background-color: white;
-                border: 1px solid #dee2e6;
-                border-radius: 8px;
-            }
-            QLabel {
-                background-color: transparent;
-                border: none;
-            }
-        """)
-
-        # Process Tags
-        snapshot_path = None
-        fixit_action = None
-
-        if "[IMG:" in tech_msg:
-            match = re.search(r"\[IMG:(.*?)\]", tech_msg)
+# Icone e colori per categoria della timeline
+TIMELINE_ICONS = {
+    "start": "🚀", "login": "🔐", "search": "🔍",
+    "download": "📥", "success": "✅", "error": "❌",
+    "wait": "⏳", "info": "ℹ️"
+}
+TIMELINE_COLORS = {
+    "start": "#0d6efd", "login": "#6f42c1", "search": "#fd7e14",
+    "download": "#0dcaf0", "success": "#198754", "error": "#dc3545",
+    "wait": "#ffc107", "info": "#6c757d"
+}
+
+
+@dataclass
+class TimelineEntry:
+    """Voce della timeline: log disegnato direttamente oppure widget reale (es. report)."""
+    human: str = ""
+    tech: str = ""
+    category: str = "info"
+    timestamp: str = ""
+    count: int = 1
+    # Pulsanti azione: (icona, tooltip, colore, percorso | "settings")
+    actions: list = field(default_factory=list)
+    widget: QWidget = None
+    width: int = 180
+
+    @classmethod
+    def from_message(cls, message: str, timestamp: str) -> "TimelineEntry":
+        human, tech, category = SmartLogTranslator.humanize(message)
+        actions = []
+
+        if "[IMG:" in tech:
+            match = re.search(r"\[IMG:(.*?)\]", tech)
             if match:
-                snapshot_path = match.group(1)
-                tech_msg = tech_msg.replace(match.group(0), "").strip()
+                actions.append(("📷", "Apri Screenshot", "#dc3545", match.group(1)))
+                tech = tech.replace(match.group(0), "").strip()
 
-        if "[FIXIT:" in tech_msg:
-            match = re.search(r"\[FIXIT:(.*?)\]", tech_msg)
+        if "[FIXIT:" in tech:
+            match = re.search(r"\[FIXIT:(.*?)\]", tech)
             if match:
-                fixit_action = match.group(1)
-                tech_msg = tech_msg.replace(match.group(0), "").strip()
-
-        # Icon Mapping
-        icons = {
-            "start": "🚀", "login": "🔐", "search": "🔍",
-            "download": "📥", "success": "✅", "error": "❌",
-            "wait": "⏳", "info": "ℹ️"
-        }
-        colors = {
-            "start": "#0d6efd", "login": "#6f42c1", "search": "#fd7e14",
-            "download": "#0dcaf0", "success": "#198754", "error": "#dc3545",
-            "wait": "#ffc107", "info": "#6c757d"
-        }
-
-        self.category_color = colors.get(category, "#6c757d")
-
-        # Top: Icon centered
-        icon_layout = QHBoxLayout()
-        lbl_icon = QLabel(icons.get(category, "•"))
-        lbl_icon.setStyleSheet(f"font-size: 24px; color: {self.category_color};")
-        lbl_icon.setAlignment(Qt.AlignmentFlag.AlignCenter)
-        icon_layout.addWidget(lbl_icon)
-        layout.addLayout(icon_layout)
-
-        # Time
-        lbl_time = QLabel(timestamp)
-        lbl_time.setStyleSheet("color: #adb5bd; font-size: 14px; font-family: monospace;")
-        lbl_time.setAlignment(Qt.AlignmentFlag.AlignCenter)
-        layout.addWidget(lbl_time)
-
-        # Text
-        self.lbl_human = QLabel(human_msg)
-        self.lbl_human.setStyleSheet("font-weight: bold; font-size: 16px; color: #212529;")
-        self.lbl_human.setWordWrap(True)
-        self.lbl_human.setAlignment(Qt.AlignmentFlag.AlignCenter)
-        layout.addWidget(self.lbl_human)
-
-        layout.addStretch()
-
-        # Action Buttons (Compact)
-        if snapshot_path:
-            btn = QPushButton("📷")
-            btn.setToolTip("Apri Screenshot")
-            btn.setCursor(Qt.CursorShape.PointingHandCursor)
-            btn.setStyleSheet(f"background-color: #dc3545; color: white; border-radius: 4px;")
-            btn.clicked.connect(lambda: QDesktopServices.openUrl(QUrl.fromLocalFile(snapshot_path)))
-            layout.addWidget(btn)
-
-        if fixit_action == "ACCOUNT":
-            btn = QPushButton("🔧 Fix")
-            btn.setToolTip("Configura Account")
-            btn.setCursor(Qt.CursorShape.PointingHandCursor)
-            btn.setStyleSheet(f"background-color: #ffc107; color: black; border-radius: 4px;")
-            btn.clicked.connect(self._open_settings)
-            layout.addWidget(btn)
+                if match.group(1) == "ACCOUNT":
+                    actions.append(("🔧 Fix", "Configura Account", "#ffc107", "settings"))
+                tech = tech.replace(match.group(0), "").strip()
 
         # Path Detection
-        path_matches = re.findall(r'([a-zA-Z]:\\[^ :<>|"\n]+|/(?:Users|home|tmp|var|usr|opt|app|data)/[^ :<>|"\n]+)', tech_msg)
+        path_matches = re.findall(r'([a-zA-Z]:\\[^ :<>|"\n]+|/(?:Users|home|tmp|var|usr|opt|app|data)/[^ :<>|"\n]+)', tech)
         seen = set()
         for path in path_matches:
             path = path.rstrip(".,';)]}").strip()
             if len(path) > 4 and "http" not in path and path not in seen:
                 seen.add(path)
-                btn = QPushButton("📂")
-                btn.setToolTip(f"Apri: {Path(path).name}")
-                btn.setCursor(Qt.CursorShape.PointingHandCursor)
-                btn.setStyleSheet(f"background-color: #17a2b8; color: white; border-radius: 4px;")
-                btn.clicked.connect(lambda c, p=path: QDesktopServices.openUrl(QUrl.fromLocalFile(p)))
-                layout.addWidget(btn)
-
-    def set_count(self, count):
-        """Update the message to show grouped count."""
-        # Use direct reference
-        current_text = self.lbl_human.text()
-        base = current_text.split(" (x")[0]
-        self.lbl_human.setText(f"{base} (x{count})")
-
-    def _open_settings(self):
-        parent = self.window()
-        if hasattr(parent, "show_settings"):
-            parent.show_settings()
-
-
-class HorizontalTimelineContainer(QWidget):
-    """Container interno che disegna la linea di connessione."""
-    def __init__(self, parent=None):
-        super().__init__(parent)
-        self.layout = QHBoxLayout(self)
-        self.layout.setContentsMargins(20, 10, 20, 10)
-        self.layout.setSpacing(15)
-        self.layout.setAlignment(Qt.AlignmentFlag.AlignLeft)
-        # Ensure minimal height
-        self.setMinimumHeight(180)
+                actions.append(("📂", f"Apri: {Path(path).name}", "#17a2b8", path))
 
-    def paintEvent(self, event):
-        """Disegna la linea 'metro map' dietro gli elementi."""
-        painter = QPainter(self)
-        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+        return cls(human, tech, category, timestamp, actions=actions)
 
-        # Line Y position: center of the icon roughly (top margin 15 + icon half height ~15 = 30)
-        # Fixed Y relative to top
-        line_y = 40
 
-        pen = QPen(QColor("#dee2e6"))
-        pen.setWidth(4)
-        painter.setPen(pen)
+class HorizontalTimelineWidget(QAbstractScrollArea):
+    """
+    Timeline orizzontale virtualizzata dei log.
 
-        # Draw line from first item center to last item center
-        if self.layout.count() > 0:
-            first = self.layout.itemAt(0).widget()
-            last = self.layout.itemAt(self.layout.count() - 1).widget()
-            if first and last:
-                start_x = first.geometry().center().x()
-                end_x = last.geometry().center().x()
-                painter.drawLine(start_x, line_y, end_x, line_y)
+    ⚡ BOLT: nessun widget per messaggio. Le voci stanno in un buffer
+    limitato (MAX_ENTRIES) e si disegnano solo le card visibili. I messaggi
+    in arrivo si accodano e vengono applicati a frequenza fissa
+    (FLUSH_INTERVAL_MS), con un solo repaint per lotto e senza animazioni
+    né processEvents.
+    """
 
+    CARD_WIDTH = 180
+    CARD_HEIGHT = 160
+    SPACING = 15
+    MARGIN_X = 20
+    MARGIN_Y = 10
+    LINE_Y = 40
+    ACTION_HEIGHT = 24
+    MAX_ENTRIES = 500
+    FLUSH_INTERVAL_MS = 50
 
-class HorizontalTimelineWidget(QScrollArea):
-    """Widget Timeline Orizzontale con animazioni."""
     def __init__(self, parent=None):
         super().__init__(parent)
-        self.setWidgetResizable(True)
         self.setHorizontalScrollBarPolicy(Qt.ScrollBarPolicy.ScrollBarAsNeeded)
         self.setVerticalScrollBarPolicy(Qt.ScrollBarPolicy.ScrollBarAlwaysOff)
         self.setFixedHeight(200) # Fixed height strip
-        self.setStyleSheet("border: none; background-color: transparent;")
-
-        self.container = HorizontalTimelineContainer()
-        self.setWidget(self.container)
+        self.setFrameShape(QFrame.Shape.NoFrame)
+        self.viewport().setMouseTracking(True)
+
+        self._entries = deque()
+        self._starts = []         # x virtuale di ogni voce
+        self._widget_entries = []
+        self._pending = []
+        self._background = None
+
+        self._flush_timer = QTimer(self)
+        self._flush_timer.setInterval(self.FLUSH_INTERVAL_MS)
+        self._flush_timer.timeout.connect(self._flush)
+
+        self._font_icon = QFont()
+        self._font_icon.setPixelSize(24)
+        self._font_time = QFont("monospace")
+        self._font_time.setStyleHint(QFont.StyleHint.Monospace)
+        self._font_time.setPixelSize(14)
+        self._font_text = QFont()
+        self._font_text.setPixelSize(16)
+        self._font_text.setBold(True)
+        self._font_action = QFont()
+        self._font_action.setPixelSize(12)
 
         # For focus mode logic
         self.last_category = None
         self.consecutive_count = 0
 
-    def wheelEvent(self, event):
-        """Reindirizza lo scroll della rotellina allo scorrimento orizzontale."""
-        delta = event.angleDelta().y()
-        if delta != 0:
-            scrollbar = self.horizontalScrollBar()
-            # Scorri: delta positivo (su) -> sinistra, negativo (giù) -> destra
-            # Invertiamo il segno per UX naturale (rotella giù -> vai avanti nel tempo/destra)
-            scrollbar.setValue(scrollbar.value() - delta)
-        else:
-            super().wheelEvent(event)
+    def __len__(self):
+        return len(self._entries) + len(self._pending)
+
+    # --- Ingresso dati ---
+
+    def add_log(self, message: str):
+        """Accoda il messaggio: verrà disegnato al prossimo flush."""
+        self._pending.append((message, datetime.now().strftime("%H:%M")))
+        if not self._flush_timer.isActive():
+            self._flush_timer.start()
 
     def add_widget(self, widget: QWidget):
         """Adds a generic widget to the timeline (e.g. MissionReport)."""
-        # Setup Animation
-        effect = QGraphicsOpacityEffect(widget)
-        widget.setGraphicsEffect(effect)
+        self._flush()  # Il widget va dopo i log già ricevuti
+        widget.setParent(self.viewport())
+        width = max(self.CARD_WIDTH, widget.sizeHint().width())
+        self._append(TimelineEntry(widget=widget, width=width))
+        self._relayout(follow=True)
+
+    def _flush(self):
+        if not self._pending:
+            self._flush_timer.stop()
+            return
+
+        pending, self._pending = self._pending, []
+        sb = self.horizontalScrollBar()
+        # Segue la coda solo se l'utente non sta consultando lo storico
+        follow = sb.value() >= sb.maximum() - self.CARD_WIDTH
+
+        for message, timestamp in pending:
+            entry = TimelineEntry.from_message(message, timestamp)
+            cat = entry.category
+
+            # Focus Mode (Grouping)
+            if cat == self.last_category and cat in ["download", "search"]:
+                self.consecutive_count += 1
+                last = self._entries[-1] if self._entries else None
+                if last is not None and last.widget is None:
+                    last.count = self.consecutive_count
+                    continue
+            else:
+                self.consecutive_count = 1
+                self.last_category = cat
 
-        self.container.layout.addWidget(widget)
+            self._append(entry)
 
-        self.anim = QPropertyAnimation(effect, b"opacity")
-        self.anim.setDuration(500)
-        self.anim.setStartValue(0)
-        self.anim.setEndValue(1)
-        self.anim.setEasingCurve(QEasingCurve.Type.OutQuad)
-        self.anim.start()
+        self._relayout(follow)
 
-        QApplication.processEvents()
-        self._smooth_scroll_to_end()
-        self.container.update()
+    def _append(self, entry: TimelineEntry):
+        self._entries.append(entry)
+        while len(self._entries) > self.MAX_ENTRIES:
+            evicted = self._entries.popleft()
+            if evicted.widget is not None:
+                evicted.widget.deleteLater()
 
-    def add_log(self, message: str):
-        human, tech, cat = SmartLogTranslator.humanize(message)
-        timestamp = datetime.now().strftime("%H:%M")
-
-        # Focus Mode (Grouping)
-        if cat == self.last_category and cat in ["download", "search"]:
-            self.consecutive_count += 1
-            # Update last item text
-            if self.container.layout.count() > 0:
-                last_widget = self.container.layout.itemAt(self.container.layout.count() - 1).widget()
-                if isinstance(last_widget, HorizontalLogItem):
-                    last_widget.set_count(self.consecutive_count)
-                    return
-        else:
-            self.consecutive_count = 1
-            self.last_category = cat
+    # --- Layout virtuale ---
 
-        item = HorizontalLogItem(human, tech, cat, timestamp)
-        self.add_widget(item)
+    def _relayout(self, follow: bool = False):
+        starts = []
+        x = self.MARGIN_X
+        for entry in self._entries:
+            starts.append(x)
+            x += entry.width + self.SPACING
+        self._starts = starts
+        self._widget_entries = [(i, e) for i, e in enumerate(self._entries) if e.widget is not None]
 
-    def _smooth_scroll_to_end(self):
+        content_width = x - self.SPACING + self.MARGIN_X if starts else 0
+        sb = self.horizontalScrollBar()
+        view_width = self.viewport().width()
+        sb.setPageStep(view_width)
+        sb.setSingleStep(self.CARD_WIDTH // 4)
+        sb.setRange(0, max(0, content_width - view_width))
+        if follow:
+            sb.setValue(sb.maximum())
+
+        self._place_widgets()
+        self.viewport().update()
+
+    def _place_widgets(self):
+        offset = self.horizontalScrollBar().value()
+        view_width = self.viewport().width()
+        view_height = self.viewport().height()
+        for i, entry in self._widget_entries:
+            x = self._starts[i] - offset
+            if x + entry.width < 0 or x > view_width:
+                entry.widget.hide()
+            else:
+                height = max(self.CARD_HEIGHT, min(entry.widget.sizeHint().height(), view_height - self.MARGIN_Y))
+                entry.widget.setGeometry(x, self.MARGIN_Y, entry.width, height)
+                entry.widget.show()
+
+    def _visible_range(self):
+        offset = self.horizontalScrollBar().value()
+        first = max(0, bisect_right(self._starts, offset) - 1)
+        last = bisect_right(self._starts, offset + self.viewport().width())
+        return first, last
+
+    def _card_rect(self, i: int) -> QRect:
+        x = self._starts[i] - self.horizontalScrollBar().value()
+        return QRect(x, self.MARGIN_Y, self._entries[i].width, self.CARD_HEIGHT)
+
+    def _action_rects(self, entry: TimelineEntry, card: QRect):
+        if not entry.actions:
+            return []
+        n = len(entry.actions)
+        gap = 4
+        inner = card.adjusted(10, 0, -10, -10)
+        width = (inner.width() - gap * (n - 1)) // n
+        top = inner.bottom() - self.ACTION_HEIGHT + 1
+        return [QRect(inner.left() + k * (width + gap), top, width, self.ACTION_HEIGHT) for k in range(n)]
+
+    def scrollContentsBy(self, dx, dy):
+        self._place_widgets()
+        self.viewport().update()
+
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
         sb = self.horizontalScrollBar()
-        start_val = sb.value()
-        end_val = sb.maximum()
+        self._relayout(follow=sb.value() >= sb.maximum())
+
+    # --- Disegno ---
+
+    def paintEvent(self, event):
+        painter = QPainter(self.viewport())
+        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+        if self._background is not None:
+            painter.fillRect(self.viewport().rect(), self._background)
+        if not self._entries:
+            return
 
-        self.scroll_anim = QPropertyAnimation(sb, b"value")
-        self.scroll_anim.setDuration(400)
-        self.scroll_anim.setStartValue(start_val)
-        self.scroll_anim.setEndValue(end_val)
-        self.scroll_anim.setEasingCurve(QEasingCurve.Type.OutQuad)
-        self.scroll_anim.start()
+        # Linea 'metro map' dalla prima all'ultima voce (clippata alla vista)
+        pen = QPen(QColor("#dee2e6"))
+        pen.setWidth(4)
+        painter.setPen(pen)
+        offset = self.horizontalScrollBar().value()
+        start_x = self._starts[0] + self._entries[0].width // 2 - offset
+        end_x = self._starts[-1] + self._entries[-1].width // 2 - offset
+        painter.drawLine(max(start_x, -10), self.LINE_Y, min(end_x, self.viewport().width() + 10), self.LINE_Y)
+
+        first, last = self._visible_range()
+        for i in range(first, last):
+            entry = self._entries[i]
+            if entry.widget is None:
+                self._draw_card(painter, entry, self._card_rect(i))
+
+    def _draw_card(self, painter: QPainter, entry: TimelineEntry, card: QRect):
+        color = QColor(TIMELINE_COLORS.get(entry.category, "#6c757d"))
+
+        painter.setPen(QPen(QColor("#dee2e6"), 1))
+        painter.setBrush(QColor("white"))
+        painter.drawRoundedRect(card, 8, 8)
+
+        inner = card.adjusted(10, 15, -10, -10)
+        center = Qt.AlignmentFlag.AlignHCenter
+
+        painter.setFont(self._font_icon)
+        painter.setPen(color)
+        icon_rect = QRect(inner.left(), inner.top(), inner.width(), 32)
+        painter.drawText(icon_rect, center | Qt.AlignmentFlag.AlignVCenter, TIMELINE_ICONS.get(entry.category, "•"))
+
+        painter.setFont(self._font_time)
+        painter.setPen(QColor("#adb5bd"))
+        time_rect = QRect(inner.left(), icon_rect.bottom() + 3, inner.width(), 20)
+        painter.drawText(time_rect, center | Qt.AlignmentFlag.AlignVCenter, entry.timestamp)
+
+        actions = self._action_rects(entry, card)
+        text_bottom = (actions[0].top() - 4) if actions else inner.bottom()
+        text_rect = QRect(inner.left(), time_rect.bottom() + 5, inner.width(), text_bottom - time_rect.bottom() - 5)
+        text = entry.human if entry.count <= 1 else f"{entry.human} (x{entry.count})"
+        painter.setFont(self._font_text)
+        painter.setPen(QColor("#212529"))
+        painter.drawText(text_rect, center | Qt.AlignmentFlag.AlignTop | Qt.TextFlag.TextWordWrap, text)
+
+        painter.setFont(self._font_action)
+        for (icon, _, bg, target), rect in zip(entry.actions, actions):
+            painter.setPen(Qt.PenStyle.NoPen)
+            painter.setBrush(QColor(bg))
+            painter.drawRoundedRect(rect, 4, 4)
+            painter.setPen(QColor("black" if target == "settings" else "white"))
+            painter.drawText(rect, Qt.AlignmentFlag.AlignCenter, icon)
+
+    # --- Interazione ---
+
+    def _hit(self, pos):
+        """(voce, azione | None) sotto il punto della viewport, o (None, None)."""
+        x = pos.x() + self.horizontalScrollBar().value()
+        i = bisect_right(self._starts, x) - 1
+        if i < 0:
+            return None, None
+        entry = self._entries[i]
+        card = self._card_rect(i)
+        if entry.widget is not None or not card.contains(pos):
+            return None, None
+        for action, rect in zip(entry.actions, self._action_rects(entry, card)):
+            if rect.contains(pos):
+                return entry, action
+        return entry, None
+
+    def mouseMoveEvent(self, event):
+        _, action = self._hit(event.position().toPoint())
+        shape = Qt.CursorShape.PointingHandCursor if action else Qt.CursorShape.ArrowCursor
+        self.viewport().setCursor(shape)
+
+    def mouseReleaseEvent(self, event):
+        if event.button() != Qt.MouseButton.LeftButton:
+            return
+        _, action = self._hit(event.position().toPoint())
+        if action is None:
+            return
+        target = action[3]
+        if target == "settings":
+            parent = self.window()
+            if hasattr(parent, "show_settings"):
+                parent.show_settings()
+        else:
+            QDesktopServices.openUrl(QUrl.fromLocalFile(target))
+
+    def viewportEvent(self, event):
+        if event.type() == QEvent.Type.ToolTip:
+            entry, action = self._hit(event.pos())
+            tip = action[1] if action else (entry.tech if entry else "")
+            if tip:
+                QToolTip.showText(event.globalPos(), tip, self.viewport())
+            else:
+                QToolTip.hideText()
+            return True
+        return super().viewportEvent(event)
+
+    def wheelEvent(self, event):
+        """Reindirizza lo scroll della rotellina allo scorrimento orizzontale."""
+        delta = event.angleDelta().y()
+        if delta != 0:
+            scrollbar = self.horizontalScrollBar()
+            # Scorri: delta positivo (su) -> sinistra, negativo (giù) -> destra
+            # Invertiamo il segno per UX naturale (rotella giù -> vai avanti nel tempo/destra)
+            scrollbar.setValue(scrollbar.value() - delta)
+        else:
+            super().wheelEvent(event)
 
     def clear(self):
-        # Remove all widgets
-        while self.container.layout.count():
-            item = self.container.layout.takeAt(0)
-            if item.widget():
-                item.widget().deleteLater()
-        self.container.update()
+        self._pending.clear()
+        self._flush_timer.stop()
+        for entry in self._entries:
+            if entry.widget is not None:
+                entry.widget.deleteLater()
+        self._entries.clear()
+        self.last_category = None
+        self.consecutive_count = 0
+        self._relayout()
 
     def set_mood(self, mood):
         # Could change background of scroll area slightly?
@@ -268,7 +392,8 @@ class HorizontalTimelineWidget(QScrollArea):
             "idle": "transparent"
         }
         col = colors.get(mood, "transparent")
-        self.setStyleSheet(f"border: none; background-color: {col};")
+        self._background = None if col == "transparent" else QColor(col)
+        self.viewport().update()
 
 
 class StatusIndicator(QWidget):
@@ -0,0 +1,138 @@
+"""
+Bot TS - Search Index
+Indice testuale per righe tabellari (barra di ricerca delle tabelle).
+"""
+import numpy as np
+
+
+class RowSearchIndex:
+    """
+    Testo minuscolo di ogni riga, costruito una sola volta al caricamento.
+
+    Una riga corrisponde se contiene tutti i termini della ricerca (AND di
+    sottostringhe sulla riga intera). Se la nuova ricerca estende la
+    precedente (l'utente continua a digitare) si rivalutano solo le righe
+    che già corrispondevano.
+    """
+
+    def __init__(self, rows=()):
+        self._texts = [" ".join(str(v) for v in row).lower() for row in rows]
+        self._last_query = None
+        self._last_mask = None
+
+    def __len__(self):
+        return len(self._texts)
+
+    def match(self, text: str) -> np.ndarray:
+        """Ritorna una maschera booleana (una voce per riga) delle corrispondenze."""
+        terms = text.lower().split()
+        if not terms:
+            return np.ones(len(self._texts), dtype=bool)
+
+        query = " ".join(terms)
+        last_query, last_mask = self._last_query, self._last_mask
+        if last_query is not None and query.startswith(last_query):
+            # Raffinamento: ogni termine precedente è sottostringa di uno nuovo
+            candidates = np.flatnonzero(last_mask)
+        else:
+            candidates = range(len(self._texts))
+
+        mask = np.zeros(len(self._texts), dtype=bool)
+        texts = self._texts
+        for i in candidates:
+            row_text = texts[i]
+            if all(term in row_text for term in terms):
+                mask[i] = True
+
+        self._last_query, self._last_mask = query, mask
+        return mask
+
+
+class TrigramIndex:
+    """
+    Indice invertito di trigrammi (di byte UTF-8) su una colonna di testo.
+
+    Le posting list sono array ordinati di indici riga, salvati in forma CSR:
+    `codes` (trigrammi distinti, ordinati), `starts` (offset in `rows`) e
+    `rows`. L'intersezione delle posting list dei termini dà le righe
+    candidate; il controllo esatto della sottostringa resta al chiamante.
+    """
+
+    def __init__(self, codes: np.ndarray, starts: np.ndarray, rows: np.ndarray):
+        self.codes = codes
+        self.starts = starts
+        self.rows = rows
+
+    @classmethod
+    def build(cls, offsets: np.ndarray, blob: np.ndarray) -> "TrigramIndex":
+        """Costruisce l'indice da una colonna offsets (n+1) + blob di byte (vettoriale)."""
+        if len(blob) < 3:
+            return cls(np.zeros(0, dtype=np.uint32), np.zeros(1, dtype=np.int64), np.zeros(0, dtype=np.uint32))
+
+        b = np.asarray(blob, dtype=np.uint32)
+        codes = (b[:-2] << 16) | (b[1:-1] << 8) | b[2:]
+
+        # Riga di ogni byte; un trigramma è valido solo se non attraversa due righe
+        row_of_pos = np.repeat(np.arange(len(offsets) - 1, dtype=np.int64), np.diff(offsets))
+        valid = row_of_pos[:-2] == row_of_pos[2:]
+
+        keys = (codes[valid].astype(np.int64) << 32) | row_of_pos[:-2][valid]
+        keys = np.unique(keys)  # ordina per (trigramma, riga) ed elimina i duplicati
+        return cls._from_sorted_keys(keys)
+
+    @classmethod
+    def _from_sorted_keys(cls, keys: np.ndarray) -> "TrigramIndex":
+        """Da chiavi (trigramma << 32 | riga) ordinate e senza duplicati."""
+        key_codes = (keys >> 32).astype(np.uint32)
+        rows = (keys & 0xFFFFFFFF).astype(np.uint32)
+        first = np.flatnonzero(np.diff(key_codes)) + 1
+        first = np.concatenate([[0], first]) if len(keys) else first
+        starts = np.append(first, len(rows)).astype(np.int64)
+        return cls(key_codes[first], starts, rows)
+
+    def _keys(self) -> np.ndarray:
+        codes = np.repeat(self.codes.astype(np.int64), np.diff(self.starts))
+        return (codes << 32) | self.rows
+
+    def splice(self, keep: np.ndarray, head: "TrigramIndex", n_head: int) -> "TrigramIndex":
+        """
+        Indice per le `n_head` righe di `head` seguite dalle righe con
+        keep=True di questo indice, senza ricalcolare i trigrammi esistenti:
+        le posting list restano ordinate (rinumerazione monotona) e quelle
+        nuove vengono inserite per fusione.
+        """
+        new_row = np.cumsum(keep, dtype=np.int64) - 1 + n_head
+        kept = keep[self.rows]
+        codes = np.repeat(self.codes.astype(np.int64), np.diff(self.starts))[kept]
+        old_keys = (codes << 32) | new_row[self.rows[kept]]
+        head_keys = head._keys()
+        keys = np.insert(old_keys, np.searchsorted(old_keys, head_keys), head_keys)
+        return self._from_sorted_keys(keys)
+
+    def __len__(self):
+        return len(self.codes)
+
+    def _posting(self, code: int) -> np.ndarray:
+        pos = np.searchsorted(self.codes, code)
+        if pos >= len(self.codes) or self.codes[pos] != code:
+            return self.rows[:0]
+        return self.rows[self.starts[pos]:self.starts[pos + 1]]
+
+    def candidates(self, term: str):
+        """
+        Righe che contengono tutti i trigrammi del termine (array ordinato).
+        None se il termine è troppo corto per usare l'indice.
+        """
+        data = term.encode("utf-8")
+        if len(data) < 3:
+            return None
+
+        trigrams = {(data[i] << 16) | (data[i + 1] << 8) | data[i + 2] for i in range(len(data) - 2)}
+        postings = sorted((self._posting(code) for code in trigrams), key=len)
+
+        result = postings[0]
+        for posting in postings[1:]:
+            if not len(result):
+                break
+            result = np.intersect1d(result, posting, assume_unique=True)
+        return result
@@ -0,0 +1,180 @@
+"""
+Bot TS - Startup Profiler
+Misura i tempi di avvio (`python main.py --profile-startup`): import per
+modulo e fasi di inizializzazione.
+"""
+import sys
+import time
+from contextlib import contextmanager
+from importlib.abc import MetaPathFinder
+
+# Obiettivo per l'avvio a freddo (dall'avvio del profiler alla prima
+# iterazione del ciclo eventi con la finestra visibile)
+STARTUP_TARGET_S = 2.0
+
+
+class _TimedLoader:
+    """Loader proxy: cronometra create_module/exec_module del loader reale."""
+
+    def __init__(self, loader, profiler):
+        self._loader = loader
+        self._profiler = profiler
+
+    def __getattr__(self, name):
+        return getattr(self._loader, name)
+
+    def create_module(self, spec):
+        # Per le estensioni C il caricamento avviene qui (dlopen + PyInit)
+        with self._profiler._timing(spec.name):
+            return self._loader.create_module(spec)
+
+    def exec_module(self, module):
+        # Il modulo vede solo il loader reale (isinstance, get_data, risorse)
+        module.__loader__ = self._loader
+        if module.__spec__ is not None:
+            module.__spec__.loader = self._loader
+        with self._profiler._timing(module.__name__):
+            self._loader.exec_module(module)
+
+
+class _ImportTimer(MetaPathFinder):
+    """Finder in testa a sys.meta_path che delega agli altri e avvolge il loader."""
+
+    def __init__(self, profiler):
+        self._profiler = profiler
+
+    def find_spec(self, fullname, path, target=None):
+        for finder in sys.meta_path:
+            if finder is self:
+                continue
+            find_spec = getattr(finder, "find_spec", None)
+            if find_spec is None:
+                continue
+            spec = find_spec(fullname, path, target)
+            if spec is not None:
+                break
+        else:
+            return None
+
+        if spec.loader is not None and hasattr(spec.loader, "exec_module"):
+            spec.loader = _TimedLoader(spec.loader, self._profiler)
+        return spec
+
+
+class StartupProfiler:
+    """
+    Raccoglie i tempi di import (inclusivi e propri, come `-X importtime`)
+    e delle fasi di avvio registrate con `phase()`.
+    """
+
+    def __init__(self):
+        self.t0 = time.perf_counter()
+        self.imports = {}   # modulo -> (proprio, inclusivo)
+        self.phases = []    # (nome, durata, profondità)
+        self._stack = []    # tempo dei figli accumulato per ogni import aperto
+        self._depth = 0
+        self._finder = _ImportTimer(self)
+
+    def install(self):
+        sys.meta_path.insert(0, self._finder)
+
+    def uninstall(self):
+        if self._finder in sys.meta_path:
+            sys.meta_path.remove(self._finder)
+
+    @contextmanager
+    def _timing(self, name):
+        self._stack.append(0.0)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            total = time.perf_counter() - start
+            children = self._stack.pop()
+            if self._stack:
+                self._stack[-1] += total
+            own, inclusive = self.imports.get(name, (0.0, 0.0))
+            self.imports[name] = (own + total - children, inclusive + total)
+
+    @contextmanager
+    def phase(self, name):
+        index = len(self.phases)
+        self.phases.append((name, 0.0, self._depth))
+        self._depth += 1
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._depth -= 1
+            self.phases[index] = (name, time.perf_counter() - start, self._depth)
+
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.t0
+
+    def report(self, top: int = 25, target: float = STARTUP_TARGET_S) -> str:
+        """Report testuale: fasi, import per pacchetto e moduli più lenti."""
+        total = self.elapsed()
+        lines = [f"=== Profilo avvio: {total * 1000:.0f} ms (target {target * 1000:.0f} ms) ==="]
+
+        lines.append("")
+        lines.append("Fasi di inizializzazione:")
+        for name, duration, depth in self.phases:
+            lines.append(f"  {duration * 1000:9.1f} ms  {'  ' * depth}{name}")
+
+        # Tempo proprio aggregato per pacchetto di primo livello
+        packages = {}
+        for name, (own, _) in self.imports.items():
+            root = name.partition(".")[0]
+            packages[root] = packages.get(root, 0.0) + own
+        import_total = sum(packages.values())
+
+        lines.append("")
+        lines.append(f"Import per pacchetto ({len(self.imports)} moduli, {import_total * 1000:.0f} ms):")
+        for root, own in sorted(packages.items(), key=lambda kv: kv[1], reverse=True)[:top]:
+            lines.append(f"  {own * 1000:9.1f} ms  {root}")
+
+        lines.append("")
+        lines.append(f"Moduli più lenti (inclusivo | proprio), primi {top}:")
+        slowest = sorted(self.imports.items(), key=lambda kv: kv[1][1], reverse=True)[:top]
+        for name, (own, inclusive) in slowest:
+            lines.append(f"  {inclusive * 1000:9.1f} | {own * 1000:7.1f} ms  {name}")
+
+        lines.append("")
+        verdict = "OK" if total <= target else "OLTRE IL TARGET"
+        lines.append(f"Avvio a freddo: {total * 1000:.0f} ms -> {verdict}")
+        return "\n".join(lines)
+
+
+_active = None
+
+
+def start() -> StartupProfiler:
+    """Attiva il profiler globale: da chiamare prima degli import da misurare."""
+    global _active
+    if _active is None:
+        _active = StartupProfiler()
+        _active.install()
+    return _active
+
+
+def stop():
+    """Disattiva il profiler globale e ritorna l'istanza (o None)."""
+    global _active
+    profiler, _active = _active, None
+    if profiler is not None:
+        profiler.uninstall()
+    return profiler
+
+
+def is_active() -> bool:
+    return _active is not None
+
+
+@contextmanager
+def phase(name: str):
+    """Registra una fase di avvio; no-op se il profiler non è attivo."""
+    if _active is None:
+        yield
+        return
+    with _active.phase(name):
+        yield
@@ -20,8 +20,8 @@ def base_bot():
 class TestBaseBotLogic:
 
     @patch('selenium.webdriver.Chrome')
-    @patch('webdriver_manager.chrome.ChromeDriverManager.install')
-    def test_init_driver(self, mock_install, mock_chrome, base_bot):
+    @patch('src.bots.base.base_bot.resolve_chromedriver', return_value="chromedriver")
+    def test_init_driver(self, mock_resolve, mock_chrome, base_bot):
         """Should initialize driver with correct options."""
         base_bot._init_driver()
 
@@ -57,3 +57,123 @@ class TestBaseBotLogic:
 
         base_bot.driver.current_url = "https://site.com/Ui/Dashboard"
         assert base_bot._verify_login() is True
+
+    def test_parallel_worker_does_not_take_over_active_session(self, base_bot):
+        """Il pop-up 'Sessione attiva' si conferma solo fuori dall'esecuzione parallela."""
+        si_button = MagicMock()
+        base_bot.popup_wait = MagicMock()
+        base_bot.popup_wait.until.return_value = si_button
+        base_bot._attendi_scomparsa_overlay = MagicMock()
+
+        base_bot.worker_id = "w2"
+        assert base_bot._handle_session_popup() is False
+        si_button.click.assert_not_called()
+
+        base_bot.worker_id = None
+        assert base_bot._handle_session_popup() is True
+        si_button.click.assert_called_once()
+
+
+@pytest.fixture
+def pool():
+    from src.bots.base.session_pool import SessionPool
+    config = {"browser_session_pool": True, "browser_pool_size": 1, "browser_pool_idle_minutes": 10}
+    with patch('src.core.config_manager.load_config', return_value=config):
+        pool = SessionPool()
+        yield pool
+        pool.close_all()
+
+class TestSessionPool:
+
+    def test_release_then_lease_reuses_driver(self, pool):
+        """A released session should be leased by the next bot on the same account."""
+        first = ConcreteBot("user", "pass", headless=True)
+        driver = first.driver = MagicMock()
+        assert pool.release(first) is True
+        driver.quit.assert_not_called()
+
+        second = ConcreteBot("user", "pass", headless=True)
+        with patch.object(ConcreteBot, '_resume_session', return_value=True):
+            assert pool.lease(second) is True
+        assert second.driver is driver
+        assert len(pool) == 0
+
+        other = ConcreteBot("other", "pass", headless=True)
+        assert pool.lease(other) is False
+
+    def test_network_logging_must_match(self, pool):
+        """A browser launched without network events must not serve a bot that needs them."""
+        first = ConcreteBot("user", "pass", headless=True)
+        first.driver = MagicMock()
+        pool.release(first)
+
+        capturing = ConcreteBot("user", "pass", headless=True)
+        capturing.log_network_events = True
+        assert pool.lease(capturing) is False
+        assert len(pool) == 1
+
+    def test_parallel_worker_leases_session_of_its_account(self, pool, tmp_path):
+        """
+        Dopo un'esecuzione singola il browser autenticato resta nel pool: il
+        worker dello stesso account lo riprende (un nuovo login troverebbe
+        'Sessione attiva') con la propria cartella download.
+        """
+        serial = ConcreteBot("user", "pass", headless=False)
+        driver = serial.driver = MagicMock()
+        pool.release(serial)
+
+        worker = ConcreteBot("user", "pass", headless=True)
+        worker.worker_id = "w1"
+        worker.browser_download_dir = tmp_path / "w1"
+        with patch.object(ConcreteBot, '_verify_logged_in_via_ui', return_value=True), \
+             patch.object(ConcreteBot, '_attendi_scomparsa_overlay'), \
+             patch.object(ConcreteBot, '_apply_resource_blocking'):
+            assert pool.lease(worker) is True
+        assert worker.driver is driver
+        driver.execute_cdp_cmd.assert_any_call(
+            "Browser.setDownloadBehavior", {"behavior": "allow", "downloadPath": str(tmp_path / "w1")}
+        )
+
+        # Un bot non parallelo resta legato a headless e worker della sessione
+        worker.driver = driver
+        pool.release(worker)
+        assert pool.lease(ConcreteBot("user", "pass", headless=False)) is False
+
+    def test_stale_session_is_closed(self, pool):
+        """A session failing the health check should be quit, not reused."""
+        first = ConcreteBot("user", "pass", headless=True)
+        driver = first.driver = MagicMock()
+        pool.release(first)
+
+        second = ConcreteBot("user", "pass", headless=True)
+        with patch.object(ConcreteBot, '_resume_session', return_value=False):
+            assert pool.lease(second) is False
+        driver.quit.assert_called_once()
+        assert second.driver is None
+
+    def test_max_size_and_idle_timeout(self, pool):
+        """Sessions beyond the max size are evicted; idle ones are reaped."""
+        drivers = []
+        for username in ("a", "b"):
+            bot = ConcreteBot(username, "pass", headless=True)
+            bot.driver = MagicMock()
+            drivers.append(bot.driver)
+            pool.release(bot)
+        drivers[0].quit.assert_called_once()
+        assert len(pool) == 1
+
+        with patch.object(pool, '_idle_timeout', return_value=0):
+            pool._reap()
+        drivers[1].quit.assert_called_once()
+        assert len(pool) == 0
+
+    def test_cleanup_returns_logged_in_driver_to_pool(self, base_bot):
+        """cleanup() should hand an authenticated browser to the pool instead of quitting it."""
+        driver = base_bot.driver = MagicMock()
+        base_bot._session_reusable = True
+        with patch('src.bots.base.base_bot.session_pool') as mock_pool:
+            mock_pool.release.return_value = True
+            base_bot.cleanup()
+        mock_pool.release.assert_called_once_with(base_bot)
+        driver.quit.assert_not_called()
+        assert base_bot.driver is None
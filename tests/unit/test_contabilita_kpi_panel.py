@@ -0,0 +1,47 @@
+"""
+Unit tests for the KPI panel render scheduling.
+"""
+from PyQt6.QtCore import QObject, pyqtSignal
+
+from src.gui import contabilita_kpi_panel
+from src.gui.contabilita_kpi_panel import ContabilitaKPIPanel
+
+
+class FakeWorker(QObject):
+    """KPIWorker senza thread: il test decide quando termina."""
+    finished_signal = pyqtSignal(object)
+    started = []
+
+    def __init__(self, key, sizes, dpr, kpi=None, generation=0):
+        super().__init__()
+        self.key, self.kpi, self.generation = key, kpi, generation
+
+    def start(self):
+        FakeWorker.started.append(self)
+
+    def wait(self):
+        pass
+
+    def finish(self):
+        self.finished_signal.emit({'key': self.key, 'kpi': self.kpi, 'generation': self.generation})
+
+
+def test_renders_are_serialized_and_stale_results_dropped(qapp, monkeypatch):
+    monkeypatch.setattr(contabilita_kpi_panel, "KPIWorker", FakeWorker)
+    FakeWorker.started = []
+    panel = ContabilitaKPIPanel()
+    key = (2025, "v1")
+
+    # Tre ridimensionamenti mentre il primo rendering è in corso
+    for kpi in ("a", "b", "c"):
+        panel._start_worker(key, kpi)
+    assert [w.kpi for w in FakeWorker.started] == ["a"]
+
+    # Il primo risultato è superato: scartato, parte solo l'ultima richiesta
+    FakeWorker.started[0].finish()
+    assert [w.kpi for w in FakeWorker.started] == ["a", "c"]
+    assert key not in panel._kpi_cache
+
+    FakeWorker.started[1].finish()
+    assert panel._kpi_cache[key]['kpi'] == "c"
+    assert not panel._workers
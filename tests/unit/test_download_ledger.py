@@ -0,0 +1,108 @@
+"""
+Unit tests for the download ledger and its use in Scarico TS.
+"""
+from datetime import datetime, timedelta
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from src.bots.scarico_ts.bot import ScaricaTSBot
+from src.core.download_ledger import DownloadKey, DownloadLedger, file_digest
+
+KEY = DownloadKey("4500012345", "10", "01.01.2025", "", "FORNITORE SRL")
+
+
+@pytest.fixture
+def ledger(tmp_path):
+    return DownloadLedger(tmp_path / "ledger.db")
+
+
+class TestDownloadLedger:
+
+    def test_record_keeps_changed_at_for_identical_content(self, ledger, tmp_path):
+        path = tmp_path / "TS_4500012345-10.xlsx"
+        path.write_bytes(b"PK-v1")
+        first = ledger.record(KEY, path)
+        assert (first.size, first.content_hash) == (5, file_digest(path))
+
+        # Stesso contenuto: changed_at resta quello del primo download
+        with ledger._connect() as conn:
+            conn.execute("UPDATE downloads SET changed_at = '2025-01-01 08:00:00'")
+        assert ledger.record(KEY, path).changed_at == "2025-01-01 08:00:00"
+
+        path.write_bytes(b"PK-v2")
+        assert ledger.record(KEY, path).changed_at != "2025-01-01 08:00:00"
+
+    def test_fresh_requires_recent_download_and_intact_file(self, ledger, tmp_path):
+        path = tmp_path / "TS.xlsx"
+        path.write_bytes(b"PK")
+        ledger.record(KEY, path)
+        assert ledger.fresh(KEY, 2).path == path
+        assert ledger.fresh(KEY, 0) is None
+
+        old = (datetime.now() - timedelta(hours=3)).strftime("%Y-%m-%d %H:%M:%S")
+        with ledger._connect() as conn:
+            conn.execute("UPDATE downloads SET downloaded_at = ?", (old,))
+        assert ledger.fresh(KEY, 2) is None
+        assert ledger.fresh(KEY, 4) is not None
+
+        path.write_bytes(b"PK modificato")
+        assert ledger.fresh(KEY, 4) is None
+
+
+@pytest.fixture
+def bot(ledger, tmp_path):
+    with patch('src.bots.base.BaseBot.__init__', return_value=None):
+        bot = ScaricaTSBot(data_da="01.01.2025", fornitore="FORNITORE SRL")
+    bot.log = MagicMock()
+    bot.driver = None
+    bot.download_path = str(tmp_path)
+    bot.ledger = ledger
+    bot.skip_unchanged_hours = 12
+    return bot
+
+
+class TestScaricaTSLedger:
+
+    def test_run_skips_portal_when_all_rows_are_fresh(self, bot, ledger, tmp_path):
+        path = tmp_path / "TS_4500012345-10.xlsx"
+        path.write_bytes(b"PK")
+        ledger.record(KEY, path)
+        bot._navigate_to_timesheet = MagicMock()
+
+        rows = [{"numero_oda": "4500012345", "posizione_oda": "10"}]
+        assert bot._all_fresh({"rows": rows}) is True
+        assert bot.run({"rows": rows}) is True
+        bot._navigate_to_timesheet.assert_not_called()
+        assert bot.row_results == [{"index": 1, "ok": True, "message": "Già scaricato (registro download)",
+                                    "output": str(path), "retry": True}]
+
+        bot.skip_unchanged_hours = 0
+        assert bot._all_fresh({"rows": rows}) is False
+
+    def test_identical_redownload_drops_timestamped_copy(self, bot, tmp_path):
+        original = tmp_path / "TS_4500012345-10.xlsx"
+        original.write_bytes(b"PK")
+        assert bot._settle_download(original, "4500012345", "10") == original
+
+        copy = tmp_path / "TS_4500012345-10_20250101-120000.xlsx"
+        copy.write_bytes(b"PK")
+        assert bot._settle_download(copy, "4500012345", "10") == original
+        assert not copy.exists()
+
+        copy.write_bytes(b"PK nuovo")
+        assert bot._settle_download(copy, "4500012345", "10") == copy
+        assert bot.ledger.lookup(KEY).path == copy
+
+    def test_identical_download_in_new_folder_is_kept(self, bot, tmp_path):
+        old, new = tmp_path / "old", tmp_path / "new"
+        old.mkdir()
+        new.mkdir()
+        (old / "TS_4500012345-10.xlsx").write_bytes(b"PK")
+        bot._settle_download(old / "TS_4500012345-10.xlsx", "4500012345", "10")
+
+        target = new / "TS_4500012345-10.xlsx"
+        target.write_bytes(b"PK")
+        assert bot._settle_download(target, "4500012345", "10") == target
+        assert target.exists()
+        assert bot.ledger.lookup(KEY).path == target
@@ -0,0 +1,62 @@
+"""
+Unit tests for the per-job DownloadManager.
+"""
+import json
+import pytest
+from unittest.mock import MagicMock
+
+from src.bots.common.downloads import DownloadManager
+
+
+def _perf_entry(method, **params):
+    return {"message": json.dumps({"message": {"method": method, "params": params}})}
+
+
+@pytest.fixture
+def driver():
+    driver = MagicMock()
+    driver.get_log.return_value = []
+    return driver
+
+
+class TestDownloadManager:
+
+    def test_job_uses_dedicated_directory(self, driver, tmp_path):
+        job = DownloadManager(driver, tmp_path).start()
+        assert job.directory.parent == tmp_path and job.directory.is_dir()
+        driver.execute_cdp_cmd.assert_called_with(
+            "Browser.setDownloadBehavior",
+            {"behavior": "allow", "downloadPath": str(job.directory), "eventsEnabled": True}
+        )
+
+    def test_completion_from_cdp_events(self, driver, tmp_path):
+        job = DownloadManager(driver, tmp_path).start()
+        (job.directory / "export.xlsx").write_bytes(b"data")
+        # File estraneo: con gli eventi conta solo il guid atteso
+        (job.directory / "other.xlsx").write_bytes(b"x")
+        driver.get_log.return_value = [
+            _perf_entry("Page.downloadWillBegin", guid="g1", suggestedFilename="export.xlsx"),
+            _perf_entry("Page.downloadProgress", guid="g1", state="completed"),
+        ]
+        assert job.wait(timeout=2) == job.directory / "export.xlsx"
+
+        target = job.move_to(job.directory / "export.xlsx", tmp_path / "out" / "TS_1.xlsx")
+        assert target.read_bytes() == b"data"
+        assert not job.directory.exists()
+
+    def test_filesystem_fallback_waits_for_partial_file(self, driver, tmp_path):
+        driver.get_log.side_effect = Exception("performance log non abilitato")
+        job = DownloadManager(driver, tmp_path).start()
+        (job.directory / "export.xlsx.crdownload").write_bytes(b"")
+        assert job.wait(timeout=0.5) is None
+
+        (job.directory / "export.xlsx.crdownload").rename(job.directory / "export.xlsx")
+        assert job.wait(timeout=2) == job.directory / "export.xlsx"
+
+    def test_canceled_download(self, driver, tmp_path):
+        job = DownloadManager(driver, tmp_path).start()
+        driver.get_log.return_value = [
+            _perf_entry("Browser.downloadWillBegin", guid="g1", suggestedFilename="a.xlsx"),
+            _perf_entry("Browser.downloadProgress", guid="g1", state="canceled"),
+        ]
+        assert job.wait(timeout=2) is None
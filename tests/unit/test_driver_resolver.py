@@ -0,0 +1,45 @@
+"""
+Unit tests for the offline chromedriver resolver.
+"""
+import pytest
+from unittest.mock import patch
+
+from src.bots.base import driver_resolver
+
+
+@pytest.fixture
+def config_dir(tmp_path):
+    with patch('src.core.config_manager.CONFIG_DIR', tmp_path):
+        yield tmp_path
+
+
+@pytest.fixture
+def driver_file(tmp_path):
+    path = tmp_path / "chromedriver.exe"
+    path.write_bytes(b"")
+    return str(path)
+
+
+class TestDriverResolver:
+
+    def test_same_major_reuses_cache_without_network(self, config_dir, driver_file):
+        driver_resolver.save_cache(driver_file, "131.0.6778.86")
+        with patch.object(driver_resolver, 'get_local_chrome_version', return_value="131.0.6778.108"), \
+             patch.object(driver_resolver, '_install') as mock_install:
+            assert driver_resolver.resolve_chromedriver(lambda m: None) == driver_file
+        mock_install.assert_not_called()
+
+    def test_major_change_downloads_and_updates_cache(self, config_dir, driver_file):
+        driver_resolver.save_cache(driver_file, "131.0.6778.86")
+        with patch.object(driver_resolver, 'get_local_chrome_version', return_value="132.0.6834.83"), \
+             patch.object(driver_resolver, '_install', return_value=driver_file) as mock_install:
+            driver_resolver.resolve_chromedriver(lambda m: None)
+        mock_install.assert_called_once()
+        assert driver_resolver.load_cache()["browser_major"] == "132"
+
+    def test_missing_driver_or_cache_triggers_install(self, config_dir, driver_file):
+        driver_resolver.save_cache(str(config_dir / "gone.exe"), "131.0.1.1")
+        with patch.object(driver_resolver, 'get_local_chrome_version', return_value=None), \
+             patch.object(driver_resolver, '_install', return_value=driver_file) as mock_install:
+            assert driver_resolver.resolve_chromedriver(lambda m: None) == driver_file
+        mock_install.assert_called_once()
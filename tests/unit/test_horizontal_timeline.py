@@ -0,0 +1,59 @@
+import pytest
+from src.gui.widgets import LogWidget, HorizontalTimelineWidget, MissionReportCard
+
+# The 'qapp' fixture is automatically provided by pytest-qt and ensures a
+# QApplication instance exists before any tests that use GUI components are run.
+
+def test_horizontal_timeline_functionality(qapp):
+    """
+    Tests the basic functionality of the LogWidget and its HorizontalTimelineWidget.
+    """
+    widget = LogWidget()
+
+    # Verify that the LogWidget correctly contains a HorizontalTimelineWidget
+    assert isinstance(widget.timeline, HorizontalTimelineWidget), \
+        "LogWidget should be using HorizontalTimelineWidget"
+
+    # Add a series of logs to the widget
+    logs_to_add = [
+        "🚀 Avvio sistema",
+        "🔐 Login in corso...",
+        "✅ Accesso effettuato",
+        "📥 Download dati",
+        "❌ Errore critico [IMG:/tmp/screenshot.png]"
+    ]
+
+    for log_message in logs_to_add:
+        widget.append(log_message)
+
+    # I messaggi sono accodati e applicati in blocco al flush successivo
+    assert len(widget.timeline._entries) == 0
+    widget.timeline._flush()
+
+    item_count = len(widget.timeline._entries)
+    assert item_count == len(logs_to_add), \
+        f"Expected {len(logs_to_add)} items in timeline, but found {item_count}"
+
+    last = widget.timeline._entries[-1]
+    assert last.category == "error"
+    assert [a[3] for a in last.actions] == ["/tmp/screenshot.png"]
+
+
+def test_timeline_is_bounded_and_groups(qapp):
+    """Il buffer resta limitato e i log consecutivi di download vengono raggruppati."""
+    timeline = HorizontalTimelineWidget()
+
+    for i in range(timeline.MAX_ENTRIES + 50):
+        timeline.add_log(f"Avvio passo {i}")
+    timeline._flush()
+    assert len(timeline._entries) == timeline.MAX_ENTRIES
+
+    timeline.clear()
+    for i in range(3):
+        timeline.add_log(f"Scaricato file {i}")
+    timeline.add_widget(MissionReportCard("0m 5s", True))
+
+    entries = list(timeline._entries)
+    assert len(entries) == 2
+    assert entries[0].count == 3
+    assert entries[1].widget is not None
@@ -0,0 +1,119 @@
+"""
+Unit tests for the Scarico TS HTTP export fast path, against a local
+stand-in of the portal's export endpoint.
+"""
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import MagicMock
+from urllib.parse import parse_qs, urlsplit
+
+import pytest
+
+from src.bots.scarico_ts.http_export import ExportTemplate, HttpExporter, capture_template
+
+SESSION_COOKIE = "JSESSIONID=abc123"
+
+
+class _PortalHandler(BaseHTTPRequestHandler):
+    """Export Excel autenticato: file .xlsx con il cookie giusto, pagina di login altrimenti."""
+
+    def do_GET(self):
+        params = {k: v[0] for k, v in parse_qs(urlsplit(self.path).query).items()}
+        if SESSION_COOKIE not in self.headers.get("Cookie", ""):
+            body = b"<html><body>Login</body></html>"
+            self.send_response(200)
+            self.send_header("Content-Type", "text/html")
+        else:
+            body = b"PK\x03\x04" + f"{params.get('NumeroOda')}-{params.get('PosizioneOda')}".encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/vnd.ms-excel")
+            self.send_header("Content-Disposition", "attachment; filename=export.xlsx")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture(scope="module")
+def portal():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _PortalHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+
+def _template(portal):
+    return ExportTemplate.from_request(
+        f"{portal}/export?NumeroOda=4500012345&PosizioneOda=10&page=1",
+        "GET", {"User-Agent": "Chrome"}, None,
+        {"numero_oda": "4500012345", "posizione_oda": "10"},
+    )
+
+
+class TestExportTemplate:
+
+    def test_render_replaces_captured_values(self, portal):
+        url, body = _template(portal).render({"numero_oda": "777", "posizione_oda": "2"})
+        assert parse_qs(urlsplit(url).query) == {"NumeroOda": ["777"], "PosizioneOda": ["2"], "page": ["1"]}
+        assert body is None
+
+    def test_json_filter_and_ambiguous_values(self):
+        body = "filter=" + json.dumps([{"property": "NumeroOda", "value": "123"},
+                                       {"property": "PosizioneOda", "value": "1"}]) + "&page=1"
+        template = ExportTemplate.from_request("https://portal/export", "post", {}, body,
+                                               {"numero_oda": "123", "posizione_oda": "1"})
+        # "1" compare anche in page=1: la posizione non è sostituibile
+        assert template.fields == {"numero_oda"}
+        assert template.supports({"numero_oda": "9", "posizione_oda": ""})
+        assert not template.supports({"numero_oda": "9", "posizione_oda": "3"})
+        _, rendered = template.render({"numero_oda": "999"})
+        assert "999" in parse_qs(rendered)["filter"][0] and parse_qs(rendered)["page"] == ["1"]
+
+    def test_not_replayable_without_oda_parameter(self):
+        assert ExportTemplate.from_request("https://portal/export?id=5", "GET", {}, None,
+                                           {"numero_oda": "123"}) is None
+
+    def test_capture_from_network_events(self, portal):
+        job = MagicMock(url=f"{portal}/export?NumeroOda=1&PosizioneOda=2")
+        events = [{"method": "Network.requestWillBeSent",
+                   "params": {"requestId": "r1", "request": {"url": job.url, "method": "GET", "headers": {}}}}]
+        template = capture_template(MagicMock(), job, events, {"numero_oda": "1", "posizione_oda": "2"})
+        assert template is not None and template.fields == {"numero_oda", "posizione_oda"}
+
+        job.url = "blob:https://portal/1234"
+        assert capture_template(MagicMock(), job, events, {"numero_oda": "1"}) is None
+
+
+class TestHttpExporter:
+
+    def test_concurrent_export_with_browser_cookies(self, portal, tmp_path):
+        cookies = [{"name": "JSESSIONID", "value": "abc123", "domain": "127.0.0.1", "path": "/"}]
+        exporter = HttpExporter(_template(portal), cookies, workers=3)
+        jobs = [(i, {"numero_oda": f"45{i}", "posizione_oda": str(i)}, tmp_path / f"TS_{i}.xlsx")
+                for i in range(1, 6)]
+        try:
+            results = exporter.export_all(jobs)
+        finally:
+            exporter.close()
+        assert all(results[i] == tmp_path / f"TS_{i}.xlsx" for i in range(1, 6))
+        assert (tmp_path / "TS_3.xlsx").read_bytes() == b"PK\x03\x04453-3"
+
+    def test_expired_session_stops_export(self, portal, tmp_path):
+        exporter = HttpExporter(_template(portal), [], workers=1)
+        resolved = []
+        jobs = [(i, {"numero_oda": str(i)}, lambda i=i: resolved.append(i) or tmp_path / f"TS_{i}.xlsx")
+                for i in range(3)]
+        try:
+            results = exporter.export_all(jobs)
+        finally:
+            exporter.close()
+        assert exporter.expired.is_set()
+        assert list(results.values()) == [None, None, None]
+        # Destinazione mai risolta: i file esistenti non vengono toccati
+        assert resolved == []
+        assert not list(tmp_path.iterdir())
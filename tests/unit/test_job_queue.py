@@ -0,0 +1,131 @@
+"""
+Unit tests for the persistent bot job queue.
+"""
+import pytest
+
+from src.core.constants import BotStatus
+from src.core.job_queue import (
+    JobQueue, JobRunner, JOB_COMPLETED, JOB_FAILED, JOB_INTERRUPTED, JOB_RUNNING, TASK_DONE, TASK_REJECTED
+)
+
+
+class FakeBot:
+    """
+    Bot finto: fallisce le righe indicate (non ritentabili quelle senza OdA),
+    si interrompe con un'eccezione su `crash_on`, registra le righe ricevute.
+    """
+
+    def __init__(self, rows, failing, calls, crash_on=None):
+        self.rows = rows
+        self.failing = failing
+        self.crash_on = crash_on
+        self.row_results = []
+        self.row_callback = None
+        calls.append([r["numero_oda"] for r in rows])
+
+    def set_log_callback(self, callback):
+        pass
+
+    def set_row_callback(self, callback):
+        self.row_callback = callback
+
+    def request_stop(self):
+        pass
+
+    def execute(self, data):
+        for i, row in enumerate(data["rows"], 1):
+            if row["numero_oda"] == self.crash_on:
+                raise RuntimeError("chiusura improvvisa")
+            ok = row["numero_oda"] not in self.failing
+            result = {"index": i, "ok": ok, "message": "" if ok else "errore",
+                      "output": f"TS_{row['numero_oda']}.xlsx" if ok else None,
+                      "retry": bool(row["numero_oda"])}
+            self.row_results.append(result)
+            self.row_callback(result)
+        return all(r["ok"] for r in self.row_results)
+
+
+@pytest.fixture
+def queue(tmp_path):
+    return JobQueue(tmp_path / "jobs.db")
+
+
+ROWS = [{"numero_oda": str(n)} for n in range(1, 5)]
+
+
+class TestJobQueue:
+
+    def test_resumable_job_matches_rows_and_params(self, queue):
+        job_id = queue.create_job("scarico_ts", ROWS, {"data_da": "01.01.2025"}, {"download_path": "x"})
+        assert queue.find_resumable("scarico_ts", ROWS, {"data_da": "01.01.2025"}) == job_id
+        assert queue.find_resumable("scarico_ts", ROWS, {"data_da": "02.01.2025"}) is None
+        job = queue.get_job(job_id)
+        assert (job.total, job.done, job.bot_kwargs) == (4, 0, {"download_path": "x"})
+
+        # Ripresa con la cartella di destinazione cambiata nel frattempo
+        queue.set_bot_kwargs(job_id, {"download_path": "y"})
+        assert queue.get_job(job_id).bot_kwargs == {"download_path": "y"}
+
+        queue.set_status(job_id, JOB_COMPLETED)
+        assert queue.find_resumable("scarico_ts", ROWS, {"data_da": "01.01.2025"}) is None
+
+    def test_running_jobs_are_interrupted_after_restart(self, queue, tmp_path):
+        job_id = queue.create_job("scarico_ts", ROWS, {})
+        queue.set_status(job_id, JOB_RUNNING)
+        assert JobQueue(tmp_path / "jobs.db").get_job(job_id).status == JOB_INTERRUPTED
+
+
+class TestJobRunner:
+
+    def _runner(self, queue, job_id, failing, calls, crash_on=None):
+        runner = JobRunner(queue, job_id, lambda rows: FakeBot(rows, failing, calls, crash_on))
+        runner.BACKOFF_BASE_SECONDS = 0
+        return runner
+
+    def test_retries_only_failed_rows_then_fails(self, queue):
+        calls = []
+        job_id = queue.create_job("scarico_ts", ROWS, {})
+        runner = self._runner(queue, job_id, {"3"}, calls)
+
+        assert runner.execute() is False
+        assert runner.status == BotStatus.ERROR
+        assert calls == [["1", "2", "3", "4"], ["3"], ["3"]]
+        job = queue.get_job(job_id)
+        assert (job.status, job.done, job.failed, job.attempts) == (JOB_FAILED, 3, 1, 3)
+        tasks = {t["idx"]: t for t in queue.tasks(job_id)}
+        assert tasks[1]["status"] == TASK_DONE and tasks[1]["output_path"] == "TS_1.xlsx"
+        assert tasks[3]["attempts"] == 3 and tasks[3]["message"] == "errore"
+
+    def test_resume_skips_completed_rows(self, queue):
+        job_id = queue.create_job("scarico_ts", ROWS, {})
+        self._runner(queue, job_id, {"2", "4"}, []).execute()
+        queue.set_status(job_id, JOB_INTERRUPTED)
+
+        calls = []
+        assert self._runner(queue, job_id, set(), calls).execute() is True
+        assert calls == [["2", "4"]]
+        assert queue.get_job(job_id).status == JOB_COMPLETED
+
+    def test_rows_are_checkpointed_before_a_crash(self, queue):
+        job_id = queue.create_job("scarico_ts", ROWS, {})
+        runner = self._runner(queue, job_id, set(), [], crash_on="3")
+        runner.MAX_ATTEMPTS = 1
+        assert runner.execute() is False
+
+        statuses = {t["idx"]: t["status"] for t in queue.tasks(job_id)}
+        assert statuses == {1: TASK_DONE, 2: TASK_DONE, 3: "pending", 4: "pending"}
+        assert queue.pending_tasks(job_id) == [(3, ROWS[2]), (4, ROWS[3])]
+
+    def test_permanent_failures_are_not_retried(self, queue):
+        rows = ROWS[:2] + [{"numero_oda": ""}]
+        calls = []
+        job_id = queue.create_job("scarico_ts", rows, {})
+        assert self._runner(queue, job_id, {""}, calls).execute() is False
+        assert calls == [["1", "2", ""]]
+        assert queue.tasks(job_id)[2]["status"] == TASK_REJECTED
+        assert queue.get_job(job_id).failed == 1
+
+    def test_backoff_is_exponential_and_capped(self, queue):
+        runner = JobRunner(queue, 1, lambda rows: None)
+        assert [runner.backoff(a) for a in (2, 3, 4)] == [10, 20, 40]
+        assert runner.backoff(20) == runner.BACKOFF_MAX_SECONDS
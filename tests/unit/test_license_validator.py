@@ -0,0 +1,57 @@
+import unittest
+import sys
+import os
+import tempfile
+from unittest.mock import patch
+
+# Fix import path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
+
+from src.core import license_validator
+
+
+class TestHardwareIdCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        cache_path = os.path.join(self.tmp.name, "hwid.cache")
+        for p in (
+            patch.object(license_validator, '_get_hw_cache_path', return_value=cache_path),
+            patch.object(license_validator, '_hw_id', None),
+            patch.object(license_validator, '_cheap_fingerprint', return_value="machine-a|1234"),
+        ):
+            p.start()
+            self.addCleanup(p.stop)
+
+    def _forget_process_memo(self):
+        license_validator._hw_id = None
+
+    @patch.object(license_validator, '_probe_hardware_id', return_value="SERIAL-XYZ")
+    def test_probe_runs_once_across_processes(self, mock_probe):
+        self.assertEqual(license_validator.get_hardware_id(), "SERIAL-XYZ")
+        self.assertEqual(license_validator.get_hardware_id(), "SERIAL-XYZ")
+        self._forget_process_memo()  # nuovo avvio: resta la cache su disco
+        self.assertEqual(license_validator.get_hardware_id(), "SERIAL-XYZ")
+        mock_probe.assert_called_once()
+
+        with open(license_validator._get_hw_cache_path()) as f:
+            self.assertNotIn("SERIAL-XYZ", f.read())
+
+    @patch.object(license_validator, '_probe_hardware_id', side_effect=["SERIAL-A", "SERIAL-B"])
+    def test_fingerprint_change_reprobes(self, mock_probe):
+        self.assertEqual(license_validator.get_hardware_id(), "SERIAL-A")
+        self._forget_process_memo()
+        with patch.object(license_validator, '_cheap_fingerprint', return_value="machine-b|5678"):
+            self.assertEqual(license_validator.get_hardware_id(), "SERIAL-B")
+        self.assertEqual(mock_probe.call_count, 2)
+
+    @patch.object(license_validator, '_probe_hardware_id', return_value="ERROR_GETTING_ID")
+    def test_probe_error_is_not_cached(self, mock_probe):
+        license_validator.get_hardware_id()
+        license_validator.get_hardware_id()
+        self.assertEqual(mock_probe.call_count, 2)
+        self.assertFalse(os.path.exists(license_validator._get_hw_cache_path()))
+
+
+if __name__ == '__main__':
+    unittest.main()
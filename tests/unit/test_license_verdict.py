@@ -0,0 +1,84 @@
+import unittest
+import sys
+import os
+import tempfile
+from datetime import datetime, timedelta, timezone
+from unittest.mock import patch
+
+# Fix import path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
+
+from src.core import license_verdict
+from src.core.license_validator import LicenseStatus
+
+
+class TestLicenseVerdict(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.paths = {
+            "dir": self.tmp.name,
+            "config": os.path.join(self.tmp.name, "config.dat"),
+            "manifest": os.path.join(self.tmp.name, "manifest.json"),
+        }
+        with open(self.paths["config"], "wb") as f:
+            f.write(b"licenza-cifrata")
+
+        patchers = [
+            patch('src.core.license_validator._get_license_paths', return_value=self.paths),
+            patch('src.core.license_validator.get_license_info',
+                  return_value={"Cliente": "ACME", "Scadenza Licenza": "31/12/2099"}),
+        ]
+        for p in patchers:
+            p.start()
+            self.addCleanup(p.stop)
+        self.addCleanup(self.tmp.cleanup)
+
+    def test_valid_verdict_is_reused(self):
+        license_verdict.save_verdict(LicenseStatus.VALID, "Licenza valida per: ACME")
+        self.assertEqual(license_verdict.load_cached_verdict(),
+                         (LicenseStatus.VALID, "Licenza valida per: ACME"))
+
+    def test_changed_license_file_invalidates(self):
+        license_verdict.save_verdict(LicenseStatus.VALID, "ok")
+        with open(self.paths["config"], "wb") as f:
+            f.write(b"altra-licenza")
+        self.assertIsNone(license_verdict.load_cached_verdict())
+
+    def test_tampered_token_is_rejected(self):
+        license_verdict.save_verdict(LicenseStatus.VALID, "ok")
+        path = license_verdict._get_verdict_path()
+        with open(path, "rb") as f:
+            token = bytearray(f.read())
+        token[20] = ord('A') if token[20] != ord('A') else ord('B')
+        with open(path, "wb") as f:
+            f.write(bytes(token))
+        self.assertIsNone(license_verdict.load_cached_verdict())
+
+    def test_age_and_clock_rollback(self):
+        license_verdict.save_verdict(LicenseStatus.VALID, "ok")
+        now = datetime.now(timezone.utc)
+        self.assertIsNotNone(license_verdict.load_cached_verdict(now + timedelta(days=2)))
+        self.assertIsNone(license_verdict.load_cached_verdict(now + timedelta(days=4)))
+        self.assertIsNone(license_verdict.load_cached_verdict(now - timedelta(hours=1)))
+
+    def test_expired_license_is_not_reused(self):
+        with patch('src.core.license_validator.get_license_info',
+                   return_value={"Scadenza Licenza": "01/01/2020"}):
+            license_verdict.save_verdict(LicenseStatus.VALID, "ok")
+        self.assertIsNone(license_verdict.load_cached_verdict())
+
+    @patch('src.core.license_updater.run_update')
+    @patch('src.core.license_validator.get_detailed_license_status',
+           return_value=(LicenseStatus.INVALID, "Hardware ID non valido"))
+    def test_revalidate_invalid_clears_verdict(self, mock_status, mock_update):
+        license_verdict.save_verdict(LicenseStatus.VALID, "ok")
+        status, _ = license_verdict.revalidate()
+
+        self.assertEqual(status, LicenseStatus.INVALID)
+        mock_update.assert_called_once()
+        self.assertEqual(mock_status.call_count, 2)
+        self.assertIsNone(license_verdict.load_cached_verdict())
+
+
+if __name__ == '__main__':
+    unittest.main()
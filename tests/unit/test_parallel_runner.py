@@ -0,0 +1,105 @@
+"""
+Unit tests for ParallelRunner (sharded execution across browsers).
+"""
+import threading
+import pytest
+from unittest.mock import patch
+
+from src.bots.base.parallel_runner import ParallelRunner
+from src.core.constants import BotStatus
+
+
+class FakeBot:
+    """Bot fittizio: registra gli esiti per riga come BaseBot._record_row."""
+    lock = threading.Lock()
+    instances = []
+    failing = set()      # numeri OdA che falliscono una volta
+    login_fails = set()  # username con login fallito
+
+    worker_id = None
+    browser_download_dir = None
+    row_callback = None
+
+    @staticmethod
+    def get_name():
+        return "Fake"
+
+    def __init__(self, username, password, headless=False, **kwargs):
+        self.username = username
+        self.headless = headless
+        self.row_results = []
+        with FakeBot.lock:
+            FakeBot.instances.append(self)
+
+    def set_log_callback(self, callback):
+        self.log = callback
+
+    def set_input_callback(self, callback):
+        pass
+
+    def set_row_callback(self, callback):
+        self.row_callback = callback
+
+    def request_stop(self):
+        pass
+
+    def execute(self, data):
+        self.row_results = []
+        if self.username in FakeBot.login_fails:
+            return False
+        for i, row in enumerate(data["rows"], 1):
+            with FakeBot.lock:
+                ok = row["numero_oda"] not in FakeBot.failing
+                FakeBot.failing.discard(row["numero_oda"])
+            result = {"index": i, "ok": ok, "message": "" if ok else "errore"}
+            self.row_results.append(result)
+            self.row_callback(result)
+        return all(r["ok"] for r in self.row_results)
+
+
+@pytest.fixture
+def runner_factory(tmp_path):
+    FakeBot.instances, FakeBot.failing, FakeBot.login_fails = [], set(), set()
+    with patch('src.core.config_manager.CONFIG_DIR', tmp_path), \
+         patch.object(ParallelRunner, 'STAGGER_SECONDS', 0), \
+         patch.object(ParallelRunner, 'RETRY_BACKOFF_SECONDS', 0):
+        yield lambda accounts, workers: ParallelRunner(FakeBot, accounts, workers, timeout=30)
+
+
+def _rows(n):
+    return [{"numero_oda": str(i)} for i in range(n)]
+
+
+class TestParallelRunner:
+
+    def test_rows_are_sharded_across_isolated_workers(self, runner_factory):
+        runner = runner_factory([("a", "p"), ("b", "p"), ("c", "p")], workers=3)
+        assert runner.execute({"rows": _rows(7), "fornitore": "F"}) is True
+
+        assert len(FakeBot.instances) == 3
+        assert sorted(b.username for b in FakeBot.instances) == ["a", "b", "c"]
+        assert all(b.headless for b in FakeBot.instances)
+        assert len({b.browser_download_dir for b in FakeBot.instances}) == 3
+        assert [r["index"] for r in runner.row_results] == list(range(1, 8))
+        assert runner.status == BotStatus.COMPLETED
+
+    def test_failed_rows_are_retried_with_less_concurrency(self, runner_factory):
+        FakeBot.failing = {"0", "1", "2"}
+        runner = runner_factory([(u, "p") for u in "abcd"], workers=4)
+        assert runner.execute({"rows": _rows(8)}) is True
+        # Giro 1: 4 browser; giro 2 (3/8 righe fallite): concorrenza dimezzata
+        assert len(FakeBot.instances) == 4 + 2
+
+    def test_concurrency_capped_at_one_browser_per_account(self, runner_factory):
+        # Stesso account su due browser: il secondo login chiuderebbe la prima sessione
+        runner = runner_factory([("a", "p"), ("b", "p")], workers=4)
+        assert runner.workers == 2
+        assert runner.execute({"rows": _rows(6)}) is True
+        assert sorted(b.username for b in FakeBot.instances) == ["a", "b"]
+
+    def test_login_failure_reported_per_row(self, runner_factory):
+        FakeBot.login_fails = {"a"}
+        runner = runner_factory([("a", "p")], workers=2)
+        assert runner.execute({"rows": _rows(2)}) is False
+        assert all(not r["ok"] for r in runner.row_results)
+        assert runner.status == BotStatus.ERROR
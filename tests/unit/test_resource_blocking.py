@@ -0,0 +1,49 @@
+"""
+Unit tests for the browser resource blocking profiles.
+"""
+from unittest.mock import MagicMock
+
+from src.bots.common import resource_blocking
+from src.bots.common.resource_blocking import blocked_patterns, blocks_images
+
+
+class TestBlockedPatterns:
+
+    def test_profiles_grow_from_minimal_to_aggressive(self):
+        minimal = blocked_patterns("minimo")
+        standard = blocked_patterns("standard")
+        aggressive = blocked_patterns("aggressivo")
+        assert blocked_patterns("disattivato") == []
+        assert set(minimal) < set(standard) < set(aggressive)
+        assert "*.woff*" in aggressive and "*.woff*" not in standard
+        assert blocks_images("standard") and not blocks_images("minimo")
+        # Il default non cambia il rendering del portale
+        assert not blocks_images(resource_blocking.DEFAULT_PROFILE)
+
+    def test_patterns_hitting_portal_urls_are_dropped(self):
+        extra = ["*.js", "*isab*", "*export*", "*Export*", "*.xls*", "*cdn.example.com*", "*.css*", "*.gif*"]
+        patterns = blocked_patterns("minimo", extra=extra,
+                                    allow=["https://cdn.example.com/ext/ext-all.js"])
+        assert patterns == blocked_patterns("minimo") + ["*.gif*"]
+        # Tutti i profili lasciano passare gli URL protetti
+        for url in resource_blocking.PROTECTED_URLS:
+            assert not any(resource_blocking.pattern_matches(p, url) for p in blocked_patterns("aggressivo"))
+
+    def test_pattern_matches_like_cdp(self):
+        assert resource_blocking.pattern_matches("*.png*", "https://x.it/ext/images/tool.png?v=1")
+        assert not resource_blocking.pattern_matches("*.png", "https://x.it/a.png?v=1")
+        assert not resource_blocking.pattern_matches("*[a]?*", "https://x.it/a")
+
+    def test_unknown_profile_falls_back_to_default(self, monkeypatch):
+        monkeypatch.setattr(resource_blocking.config_manager, "get_config_value",
+                            lambda key, default=None: "inesistente")
+        assert resource_blocking.profile_from_config() == resource_blocking.DEFAULT_PROFILE
+
+
+def test_apply_sends_cdp_commands():
+    driver = MagicMock()
+    assert resource_blocking.apply(driver, ["*.png*"]) is True
+    driver.execute_cdp_cmd.assert_called_with("Network.setBlockedURLs", {"urls": ["*.png*"]})
+
+    driver.execute_cdp_cmd.side_effect = RuntimeError("unknown command")
+    assert resource_blocking.apply(driver, ["*.png*"]) is False
@@ -0,0 +1,137 @@
+import unittest
+import shutil
+import tempfile
+import sys
+import os
+from pathlib import Path
+
+# Fix import path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
+
+import src.core.scarico_ore_cache as scarico_ore_cache
+from src.core.scarico_ore_cache import ScaricoOreCache, DictColumn
+
+ROWS = [
+    ("2024-03-05", "ROSSI", "", "4001", "", "07:00", "12:30", "5.5", "Verifica valvola", "SI", "C1", '{"pers1": {"bg": "#FFFF00"}}'),
+    ("2024-03-06 00:00:00", "BIANCHI", "VERDI", "", "2", "08:00", "10:00", "2", "Taratura àèì", "NO", "0", ""),
+    ("2024-03-07", "ROSSI", None, "4002", "", "13:00", "17:00", "4,25", "Pulizia", "SI", "C2", '{"pers1": {"bg": "#FFFF00"}}'),
+]
+
+
+class TestScaricoOreCache(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = Path(tempfile.mkdtemp())
+        self.original_cache_dir = scarico_ore_cache.CACHE_DIR
+        scarico_ore_cache.CACHE_DIR = self.test_dir
+
+    def tearDown(self):
+        scarico_ore_cache.CACHE_DIR = self.original_cache_dir
+        shutil.rmtree(self.test_dir, ignore_errors=True)
+
+    def test_build_formats_rows(self):
+        cache = ScaricoOreCache.build(ROWS, "3-3")
+        self.assertEqual(len(cache), 3)
+        self.assertEqual(cache.columns[0][0], "05/03/2024")
+        self.assertEqual(cache.columns[0][1], "06/03/2024")
+        self.assertEqual(cache.columns[2][2], "")
+        self.assertEqual(cache.columns[8][1], "Taratura àèì")
+        self.assertIn("verifica valvola", cache.search[0])
+        self.assertEqual(cache.totals.tolist(), [5.5, 2.0, 4.25])
+
+    def test_styles_are_deduplicated(self):
+        cache = ScaricoOreCache.build(ROWS, "3-3")
+        self.assertEqual(cache.style_ids[0], cache.style_ids[2])
+        self.assertEqual(cache.style_ids[1], 0)
+        self.assertEqual(cache.styles[cache.style_ids[0]]["pers1"]["bg"], "#FFFF00")
+
+    def test_save_and_load_roundtrip(self):
+        cache = ScaricoOreCache.build(ROWS, "3-3")
+        cache.save()
+
+        loaded = ScaricoOreCache.load_for_version("3-3")
+        self.assertIsNotNone(loaded)
+        for col in range(len(cache.columns)):
+            self.assertEqual(loaded.columns[col].to_list(), cache.columns[col].to_list())
+        self.assertEqual(loaded.search.to_list(), cache.search.to_list())
+        self.assertEqual(loaded.totals.tolist(), cache.totals.tolist())
+        self.assertEqual(loaded.style_ids.tolist(), cache.style_ids.tolist())
+        self.assertEqual(loaded.styles, cache.styles)
+
+    def test_other_version_is_not_loaded(self):
+        ScaricoOreCache.build(ROWS, "3-3").save()
+        self.assertIsNone(ScaricoOreCache.load_for_version("2-4"))
+
+    def test_remove_stale_keeps_current_version(self):
+        ScaricoOreCache.build(ROWS, "3-3").save()
+        ScaricoOreCache.build(ROWS[:2], "2-4").save()
+        ScaricoOreCache.remove_stale("2-4")
+        self.assertFalse(ScaricoOreCache.path_for("3-3").exists())
+        self.assertTrue(ScaricoOreCache.path_for("2-4").exists())
+
+    def test_sort_permutation_uses_typed_keys(self):
+        rows = [
+            ("2024-02-10", "B", "", "", "", "10:00", "", "10", "", "", "", ""),
+            ("2023-12-31", "a", "", "", "", "9:30", "", "2,5", "", "", "", ""),
+            ("", "C", "", "", "", "", "", "", "", "", "", ""),
+            ("2024-01-05", "a", "", "", "", "07:15", "", "100", "", "", "", ""),
+        ]
+        cache = ScaricoOreCache.build(rows, "4-4")
+        self.assertEqual(cache.sort_permutation(0).tolist(), [1, 3, 0, 2])  # date, vuote in fondo
+        self.assertEqual(cache.sort_permutation(5).tolist(), [3, 1, 0, 2])  # orari
+        self.assertEqual(cache.sort_permutation(7).tolist(), [1, 0, 3, 2])  # numeri, non stringhe
+        self.assertEqual(cache.sort_permutation(7, descending=True).tolist(), [3, 0, 1, 2])  # vuote sempre in fondo
+        self.assertEqual(cache.sort_permutation(0, descending=True).tolist(), [0, 3, 1, 2])
+        self.assertEqual(cache.sort_permutation(1).tolist(), [1, 3, 0, 2])  # testo case-insensitive, stabile
+
+    def test_apply_delta_matches_full_build(self):
+        with_ids = [row + (row_id,) for row, row_id in zip(ROWS, (3, 2, 1))]  # ORDER BY id DESC
+        cache = ScaricoOreCache.build(with_ids, "3-3")
+        added = [
+            ("2024-03-08", "NERI", "", "4003", "", "07:00", "09:00", "2", "Valvola nuova", "NO", "C3", '{"pers1": {"fg": "#FF0000"}}', 4),
+            ("2024-03-09", "ROSSI", "", "4001", "", "09:00", "10:00", "1", "Verifica", "SI", "C1", '{"pers1": {"bg": "#FFFF00"}}', 5),
+        ]
+        updated = cache.apply_delta([2], added, "4-5")
+
+        expected = ScaricoOreCache.build([added[1], added[0], with_ids[0], with_ids[2]], "4-5")
+        self.assertEqual(updated.ids.tolist(), [5, 4, 3, 1])
+        for col in range(len(expected.columns)):
+            self.assertEqual(updated.columns[col].to_list(), expected.columns[col].to_list())
+            self.assertEqual(updated.columns[col].distinct(), expected.columns[col].distinct())
+        self.assertEqual(updated.search.to_list(), expected.search.to_list())
+        self.assertEqual(updated.totals.tolist(), expected.totals.tolist())
+        self.assertEqual(
+            [updated.styles[i] for i in updated.style_ids],
+            [expected.styles[i] for i in expected.style_ids],
+        )
+        for name in ("codes", "starts", "rows"):
+            self.assertEqual(getattr(updated.trigrams, name).tolist(), getattr(expected.trigrams, name).tolist())
+
+        updated.save()
+        self.assertEqual(ScaricoOreCache.load_for_version("4-5").ids.tolist(), [5, 4, 3, 1])
+
+    def test_empty_cache_roundtrip(self):
+        ScaricoOreCache.build([], "0-0").save()
+        loaded = ScaricoOreCache.load_for_version("0-0")
+        self.assertEqual(len(loaded), 0)
+
+
+class TestDictColumn(unittest.TestCase):
+    def setUp(self):
+        self.column = DictColumn.from_strings(["ROSSI", "Bianchi", "ROSSI", "", "rossi"])
+
+    def test_roundtrip_values(self):
+        self.assertEqual(self.column.to_list(), ["ROSSI", "Bianchi", "ROSSI", "", "rossi"])
+        self.assertEqual(self.column[1], "Bianchi")
+
+    def test_distinct_and_counts(self):
+        counts = dict(zip(self.column.distinct(), self.column.counts().tolist()))
+        self.assertEqual(counts, {"": 1, "Bianchi": 1, "ROSSI": 2, "rossi": 1})
+
+    def test_rows_matching_is_case_insensitive_and_sorted(self):
+        self.assertEqual(self.column.rows_matching({"rossi"}).tolist(), [0, 2, 4])
+        self.assertEqual(self.column.rows_matching({"bianchi", ""}).tolist(), [1, 3])
+        self.assertEqual(self.column.rows_matching({"verdi"}).tolist(), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
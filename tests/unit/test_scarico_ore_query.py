@@ -0,0 +1,145 @@
+import unittest
+import shutil
+import sqlite3
+import tempfile
+import sys
+import os
+from pathlib import Path
+
+# Fix import path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
+
+from src.core.contabilita_manager import ContabilitaManager
+from src.core.scarico_ore_query import ScaricoOreQuery
+
+ROWS = [
+    ("2024-03-05", "ROSSI", "", "4001", "", "07:00", "12:30", "5.5", "Verifica valvola", "SI", "C1", ""),
+    ("2024-03-06 00:00:00", "bianchi", "VERDI", "", "2", "08:00", "10:00", "2", "Taratura", "NO", "0", ""),
+    ("2023-12-31", "ROSSI", None, "4002", "", "9:30", "17:00", "4,25", "Pulizia valvola", "SI", "C2", ""),
+    ("", "Neri", "", "", "", "", "", "", "Senza data", "NO", "", ""),
+]
+
+
+class TestScaricoOreQuery(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = Path(tempfile.mkdtemp())
+        self.original_db_path = ContabilitaManager.DB_PATH
+        ContabilitaManager.DB_PATH = self.test_dir / "contabilita.db"
+
+        cols = ContabilitaManager.SCARICO_ORE_COLS
+        conn = sqlite3.connect(ContabilitaManager.DB_PATH)
+        conn.execute("PRAGMA journal_mode=WAL")  # come db_manager: le connessioni read-only non possono cambiarlo
+        conn.execute(f"CREATE TABLE scarico_ore (id INTEGER PRIMARY KEY AUTOINCREMENT, {', '.join(c + ' TEXT' for c in cols)})")
+        conn.executemany(f"INSERT INTO scarico_ore ({', '.join(cols)}) VALUES ({', '.join('?' * len(cols))})", ROWS)
+        conn.commit()
+        conn.close()
+
+    def tearDown(self):
+        ContabilitaManager.DB_PATH = self.original_db_path
+        shutil.rmtree(self.test_dir, ignore_errors=True)
+
+    def test_default_order_is_id_desc(self):
+        ids, totals = ScaricoOreQuery().visible_rows()
+        self.assertEqual(ids.tolist(), [4, 3, 2, 1])
+        self.assertEqual(totals.tolist(), [0.0, 4.25, 2.0, 5.5])
+        self.assertEqual(ScaricoOreQuery.count(), 4)
+
+    def test_search_terms_are_anded_on_displayed_values(self):
+        ids, _ = ScaricoOreQuery(["valvola", "rossi"]).visible_rows()
+        self.assertEqual(ids.tolist(), [3, 1])
+        ids, _ = ScaricoOreQuery(["06/03/2024"]).visible_rows()  # data come visualizzata
+        self.assertEqual(ids.tolist(), [2])
+
+    def test_column_filters_use_lowercase_display_values(self):
+        ids, _ = ScaricoOreQuery(col_filters={1: {"rossi"}, 9: {"si"}}).visible_rows()
+        self.assertEqual(ids.tolist(), [3, 1])
+        ids, _ = ScaricoOreQuery(col_filters={0: {"31/12/2023", ""}}).visible_rows()
+        self.assertEqual(ids.tolist(), [4, 3])
+
+    def test_search_and_filters_fold_non_ascii_like_python(self):
+        cols = ContabilitaManager.SCARICO_ORE_COLS
+        row = ("2024-03-07", "ROSSI", "", "", "", "", "", "1", "VERIFICA ATTIVITÀ", "SI", "", "")
+        conn = sqlite3.connect(ContabilitaManager.DB_PATH)
+        conn.execute(f"INSERT INTO scarico_ore ({', '.join(cols)}) VALUES ({', '.join('?' * len(cols))})", row)
+        conn.commit()
+        conn.close()
+
+        ids, _ = ScaricoOreQuery(["attività"]).visible_rows()
+        self.assertEqual(ids.tolist(), [5])
+        ids, _ = ScaricoOreQuery(col_filters={8: {"verifica attività"}}).visible_rows()
+        self.assertEqual(ids.tolist(), [5])
+
+    def test_typed_sort_keeps_empty_values_last(self):
+        ids, _ = ScaricoOreQuery(sort_column=0).visible_rows()
+        self.assertEqual(ids.tolist(), [3, 1, 2, 4])
+        ids, _ = ScaricoOreQuery(sort_column=5).visible_rows()
+        self.assertEqual(ids.tolist(), [1, 2, 3, 4])  # 9:30 dopo 08:00, non prima
+        ids, _ = ScaricoOreQuery(sort_column=7, descending=True).visible_rows()
+        self.assertEqual(ids.tolist(), [1, 3, 2, 4])
+        ids, _ = ScaricoOreQuery(sort_column=0, descending=True).visible_rows()
+        self.assertEqual(ids.tolist(), [2, 1, 3, 4])
+
+    def test_sql_sort_matches_in_memory_cache(self):
+        from src.core.scarico_ore_cache import N_COLUMNS, ScaricoOreCache
+
+        cols = ContabilitaManager.SCARICO_ORE_COLS
+        extra = [
+            ("24/12/2024", "àrea", " ", "", "", "n/d", "7:5", "1.234,5", "Àrea", "si", "", ""),
+            ("2024-03-05", "Area", "", "", "", " 08:00", "", " ", "area", "", "", ""),
+            (None, "", "x", "", "", "25:00", "12:30:00", "abc", "", "SI", "", ""),
+        ]
+        conn = sqlite3.connect(ContabilitaManager.DB_PATH)
+        conn.executemany(f"INSERT INTO scarico_ore ({', '.join(cols)}) VALUES ({', '.join('?' * len(cols))})", extra)
+        conn.commit()
+        rows = conn.execute(f"SELECT {', '.join(cols)}, id FROM scarico_ore ORDER BY id DESC").fetchall()
+        conn.close()
+
+        cache = ScaricoOreCache.build(rows, "test")
+        for col in range(N_COLUMNS):
+            for descending in (False, True):
+                ids, totals = ScaricoOreQuery(sort_column=col, descending=descending).visible_rows()
+                perm = cache.sort_permutation(col, descending)
+                self.assertEqual(ids.tolist(), cache.ids[perm].tolist(), (col, descending))
+                self.assertEqual(totals.tolist(), cache.totals[perm].tolist())
+
+    def test_filter_popup_search_ignores_counts(self):
+        from PyQt6.QtWidgets import QApplication
+        from src.gui.scarico_ore_components import ListFilterPopupWidget
+
+        app = QApplication.instance() or QApplication([])
+        popup = ListFilterPopupWidget(["ROSSI", "Via 3"], counts={"ROSSI": 3, "Via 3": 1})
+        popup.select_none()
+        popup.search_edit.setText("3")
+        self.assertEqual([popup.list_view.isRowHidden(i) for i in range(2)], [True, False])
+
+        popup.select_all()
+        self.assertEqual(popup.get_selected_values(), ["Via 3"])
+
+    def test_fetch_rows_and_value_counts(self):
+        rows = ScaricoOreQuery.fetch_rows([2, 3])
+        self.assertEqual(sorted(rows), [2, 3])
+        self.assertEqual(rows[2][1], "bianchi")
+        self.assertEqual(ScaricoOreQuery.value_counts(1), {"ROSSI": 2, "bianchi": 1, "Neri": 1})
+        self.assertEqual(ScaricoOreQuery.value_counts(0)["06/03/2024"], 1)
+
+    def test_sql_model_keeps_only_latest_query_result(self):
+        from PyQt6.QtWidgets import QApplication
+        from src.gui.scarico_ore_components import ScaricoOreSqlModel
+
+        app = QApplication.instance() or QApplication([])
+        model = ScaricoOreSqlModel()
+        updates, counts = [], []
+        model.rows_updated.connect(lambda: updates.append(model.rowCount()))
+
+        # Filtro superato da uno più recente prima che il primo risultato arrivi
+        model.set_filter("valvola", {})
+        model.set_filter("taratura", {})
+        model.request_value_counts(1, counts.append)
+        while model._workers:
+            app.processEvents()
+        self.assertEqual(updates, [1])
+        self.assertEqual(counts, [{"ROSSI": 2, "bianchi": 1, "Neri": 1}])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,74 @@
+import unittest
+import sys
+import os
+
+# Fix import path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
+
+import numpy as np
+
+from src.utils.search_index import RowSearchIndex, TrigramIndex
+
+
+class TestRowSearchIndex(unittest.TestCase):
+    def setUp(self):
+        self.index = RowSearchIndex([
+            ("01/02/2024", "Sostituzione Valvola", "5400/123"),
+            ("03/02/2024", "Pompa centrifuga", "5400/456"),
+            ("05/03/2024", "Valvola di sicurezza", ""),
+        ])
+
+    def test_empty_text_matches_all(self):
+        self.assertEqual(self.index.match("   ").tolist(), [True, True, True])
+
+    def test_terms_are_and_across_columns(self):
+        self.assertEqual(self.index.match("valvola 123").tolist(), [True, False, False])
+
+    def test_case_insensitive(self):
+        self.assertEqual(self.index.match("POMPA").tolist(), [False, True, False])
+
+    def test_refinement_matches_full_scan(self):
+        # Digitazione progressiva: il raffinamento deve dare lo stesso esito di un indice nuovo
+        for text in ("v", "va", "valvola", "valvola s", "valvola si"):
+            expected = RowSearchIndex([
+                ("01/02/2024", "Sostituzione Valvola", "5400/123"),
+                ("03/02/2024", "Pompa centrifuga", "5400/456"),
+                ("05/03/2024", "Valvola di sicurezza", ""),
+            ]).match(text).tolist()
+            self.assertEqual(self.index.match(text).tolist(), expected)
+
+    def test_new_query_after_refinement(self):
+        self.index.match("valvola")
+        self.assertEqual(self.index.match("pompa").tolist(), [False, True, False])
+
+
+class TestTrigramIndex(unittest.TestCase):
+    ROWS = ["verifica valvola 4001", "pompa centrifuga", "valvola di sicurezza àèì", "", "va"]
+
+    def setUp(self):
+        encoded = [r.encode("utf-8") for r in self.ROWS]
+        offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        np.cumsum([len(e) for e in encoded], out=offsets[1:])
+        blob = np.frombuffer(b"".join(encoded), dtype=np.uint8)
+        self.index = TrigramIndex.build(offsets, blob)
+
+    def test_candidates_are_superset_of_matches(self):
+        for term in ("valvola", "pompa", "sicurezza", "àèì", "4001", "ola"):
+            expected = [i for i, r in enumerate(self.ROWS) if term in r]
+            candidates = self.index.candidates(term).tolist()
+            self.assertTrue(set(expected) <= set(candidates), term)
+
+    def test_exact_candidates(self):
+        self.assertEqual(self.index.candidates("valvola").tolist(), [0, 2])
+        self.assertEqual(self.index.candidates("xyz").tolist(), [])
+
+    def test_short_term_not_indexed(self):
+        self.assertIsNone(self.index.candidates("va"))
+
+    def test_trigrams_do_not_cross_rows(self):
+        # "4001" + "pompa" adiacenti nel blob: "1po" non deve esistere
+        self.assertEqual(self.index.candidates("1po").tolist(), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
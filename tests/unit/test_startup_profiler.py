@@ -0,0 +1,68 @@
+import unittest
+import sys
+import os
+import tempfile
+
+# Fix import path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
+
+from src.utils import startup_profiler
+from src.utils.startup_profiler import StartupProfiler
+
+
+class TestStartupProfiler(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        pkg = os.path.join(self.tmp.name, "bolt_profiled_pkg")
+        os.mkdir(pkg)
+        with open(os.path.join(pkg, "__init__.py"), "w") as f:
+            f.write("from . import child\n")
+        with open(os.path.join(pkg, "child.py"), "w") as f:
+            f.write("import time\ntime.sleep(0.02)\nVALUE = 42\n")
+        sys.path.insert(0, self.tmp.name)
+
+    def tearDown(self):
+        sys.path.remove(self.tmp.name)
+        for name in ("bolt_profiled_pkg", "bolt_profiled_pkg.child"):
+            sys.modules.pop(name, None)
+        self.tmp.cleanup()
+
+    def test_import_times_are_nested(self):
+        profiler = StartupProfiler()
+        profiler.install()
+        try:
+            import bolt_profiled_pkg
+        finally:
+            profiler.uninstall()
+
+        own, inclusive = profiler.imports["bolt_profiled_pkg"]
+        child_own, child_inclusive = profiler.imports["bolt_profiled_pkg.child"]
+        self.assertGreaterEqual(child_inclusive, 0.02)
+        self.assertGreaterEqual(inclusive, child_inclusive)
+        self.assertLess(own, 0.02)
+
+        # Dopo l'import il modulo vede il loader reale
+        self.assertEqual(bolt_profiled_pkg.child.VALUE, 42)
+        self.assertEqual(type(bolt_profiled_pkg.__loader__).__name__, "SourceFileLoader")
+        self.assertNotIn(profiler._finder, sys.meta_path)
+
+    def test_phases_and_report(self):
+        profiler = StartupProfiler()
+        with profiler.phase("MainWindow()"):
+            with profiler.phase("init DashboardPanel"):
+                pass
+        self.assertEqual([(name, depth) for name, _, depth in profiler.phases],
+                         [("MainWindow()", 0), ("init DashboardPanel", 1)])
+        report = profiler.report(target=60.0)
+        self.assertIn("    init DashboardPanel", report)
+        self.assertTrue(report.endswith("-> OK"))
+
+    def test_module_phase_is_noop_when_inactive(self):
+        self.assertFalse(startup_profiler.is_active())
+        with startup_profiler.phase("nulla"):
+            pass
+        self.assertIsNone(startup_profiler.stop())
+
+
+if __name__ == '__main__':
+    unittest.main()
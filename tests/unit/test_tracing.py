@@ -0,0 +1,91 @@
+"""
+Unit tests for step-level run tracing.
+"""
+import json
+
+import pytest
+
+from src.bots.common import tracing
+from src.bots.common.tracing import Tracer, traced
+from src.core.stats_manager import StatsManager
+
+
+class TestTracer:
+
+    def test_nested_spans_and_outcome(self):
+        tracer = Tracer("Scarico TS")
+        with tracer.span("run"):
+            with tracer.span("download", oda=4500012345) as span:
+                span.fail("file non trovato")
+            with pytest.raises(ValueError):
+                with tracer.span("ricerca"):
+                    raise ValueError("x")
+
+        events = {e["name"]: e for e in tracer.events}
+        assert events["run"]["args"] == {"outcome": "ok", "depth": 0}
+        assert events["download"]["args"] == {"oda": "4500012345", "outcome": "file non trovato", "depth": 1}
+        assert events["ricerca"]["args"]["outcome"] == "errore: ValueError"
+        assert events["run"]["dur"] >= events["download"]["dur"]
+
+    def test_summary_percentiles(self):
+        tracer = Tracer("run")
+        tracer.events = [{"name": "download", "dur": ms * 1000, "args": {"outcome": "ok"}}
+                         for ms in range(100, 2100, 100)]
+        tracer.events[0]["args"]["outcome"] = "fallito"
+        s = tracer.summary()["download"]
+        assert (s["count"], s["p50"], s["p95"], s["max"], s["errors"]) == (20, 1.0, 1.9, 2.0, 1)
+        assert "download" in tracer.summary_table()
+
+    def test_write_chrome_trace(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(tracing, "MAX_TRACE_FILES", 2)
+        paths = []
+        for i in range(3):
+            tracer = Tracer("Scarico TS")
+            tracer.wall_started += i
+            with tracer.span("login"):
+                pass
+            paths.append(tracer.write(tmp_path))
+
+        assert Tracer("vuoto").write(tmp_path) is None
+        assert len(list(tmp_path.glob("*.json"))) == 2
+        data = json.loads(paths[-1].read_text(encoding="utf-8"))
+        assert data["traceEvents"][0]["ph"] == "X"
+        assert data["otherData"]["summary"]["login"]["count"] == 1
+
+
+class TestModuleSpans:
+
+    def test_span_without_tracer_is_noop(self):
+        assert tracing.current_tracer() is None
+        with tracing.span("login") as span:
+            span.fail()
+
+    def test_traced_records_in_active_tracer(self):
+        @traced("filtri")
+        def setup(ok):
+            return ok
+
+        with tracing.recording("run") as tracer:
+            assert setup(True) is True
+            assert setup(False) is False
+        assert tracing.current_tracer() is None
+        assert [e["args"]["outcome"] for e in tracer.events] == ["ok", "fallito"]
+
+
+def test_step_durations_in_stats_manager(tmp_path, monkeypatch):
+    manager = StatsManager()
+    monkeypatch.setattr(manager, "stats", {})
+    monkeypatch.setattr(manager, "stats_file", tmp_path / "statistics.json")
+    monkeypatch.setattr(manager, "steps", {})
+    monkeypatch.setattr(manager, "steps_file", tmp_path / "step_durations.json")
+
+    step = {"count": 2, "total": 3.0, "p50": 1.0, "p95": 2.0, "max": 2.0, "errors": 1}
+    manager.record_step_durations("scarico_ts", {"download": step})
+    manager.record_step_durations("scarico_ts", {"download": dict(step, max=2.5, p50=1.2)})
+
+    download = manager.get_step_stats("scarico_ts")["download"]
+    assert (download["count"], download["total"], download["max"], download["errors"]) == (4, 6.0, 2.5, 2)
+    assert download["last_p50"] == 1.2
+    assert json.loads((tmp_path / "step_durations.json").read_text())["scarico_ts"]["download"]["count"] == 4
+    # Nessuna voce runs/errors fittizia nelle statistiche dei bot
+    assert manager.get_all_stats() == {}
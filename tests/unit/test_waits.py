@@ -0,0 +1,51 @@
+"""
+Unit tests for the ExtJS-aware waits and the wait/act report.
+"""
+import pytest
+from unittest.mock import MagicMock
+
+from selenium.common.exceptions import WebDriverException
+
+from src.bots.common import waits
+
+
+class TestWaits:
+
+    def test_wait_idle_returns_as_soon_as_portal_is_idle(self):
+        driver = MagicMock()
+        driver.execute_script.side_effect = [False, False, True]
+        with waits.recording() as stats:
+            assert waits.wait_idle(driver, timeout=2, label="overlay") is True
+        assert driver.execute_script.call_count == 3
+        count, seconds = stats.waits["overlay"]
+        assert count == 1 and seconds < 1
+
+    def test_wait_idle_timeout_and_driver_errors(self):
+        driver = MagicMock()
+        driver.execute_script.side_effect = WebDriverException("gone")
+        assert waits.wait_idle(driver, timeout=0.2) is False
+
+    def test_wait_optional_returns_none_on_timeout(self):
+        driver = MagicMock()
+        assert waits.wait_optional(driver, lambda d: False, timeout=0.1) is None
+        assert waits.wait_optional(driver, lambda d: "ok", timeout=0.1) == "ok"
+
+    def test_recording_is_scoped(self):
+        assert waits.current_stats() is None
+        with waits.recording() as stats:
+            waits.pause(0.01, label="animazione")
+            assert waits.current_stats() is stats
+        assert waits.current_stats() is None
+        # Fuori da una run le attese non vengono registrate
+        waits.pause(0.01)
+        assert list(stats.waits) == ["animazione"]
+
+    def test_report(self):
+        stats = waits.WaitStats()
+        stats.add("overlay", 0.4)
+        stats.add("overlay", 0.2)
+        stats.add("attesa elemento", 0.1)
+        report = stats.report()
+        assert report.startswith("⏱️ Tempo run")
+        assert "overlay (x2)" in report.splitlines()[1]
+        assert stats.waiting == pytest.approx(0.7)